@@ -0,0 +1,309 @@
+"""
+小説カタログのスナップショットを管理するモジュール
+- 小説一覧をメモリマップ可能なバイナリファイルとして保存
+- 起動時はファイルをマップするだけで一覧を表示でき、各行は参照時にデコードされる
+- データベースの変更カウンタでスナップショットの鮮度を判定
+
+ファイル形式（リトルエンディアン）:
+    ヘッダ: マジック, 形式バージョン, カタログバージョン, 行数, ソートキー数,
+            オフセット配列位置, 行データ位置, ソート順配列位置
+    オフセット配列: 行データ内の各行の開始位置（行数+1個のuint64）
+    行データ: 各行をJSON配列としてUTF-8で連結したもの
+    ソート順配列: ソートキーごとの昇順の行ID（行数個のuint32）
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from config import DATABASE_DIR
+from app.utils.logger_manager import get_logger
+
+# ロガーの設定
+logger = get_logger('CatalogSnapshot')
+
+# スナップショットファイルのパス
+SNAPSHOT_PATH = os.path.join(DATABASE_DIR, 'catalog_snapshot.bin')
+
+# ファイル形式
+SNAPSHOT_MAGIC = b'NVCS'
+SNAPSHOT_FORMAT_VERSION = 1
+HEADER_FORMAT = '<4sIqIIQQQ'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# ソートキーとタプル内のインデックス（スナップショットに保存する順序）
+SORT_KEYS = (
+    ('updated_at', 3),
+    ('n_code', 0),
+    ('title', 1),
+    ('total_ep', 5),
+)
+SORT_KEY_INDEXES = dict(SORT_KEYS)
+
+# カタログの変更カウンタ（novels_descsの変更時にトリガーで加算する）
+CHANGE_COUNTER_STATEMENTS = (
+    "CREATE TABLE IF NOT EXISTS catalog_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO catalog_meta (key, value) VALUES ('version', 0)",
+    """CREATE TRIGGER IF NOT EXISTS catalog_version_insert AFTER INSERT ON novels_descs
+       BEGIN UPDATE catalog_meta SET value = value + 1 WHERE key = 'version'; END""",
+    """CREATE TRIGGER IF NOT EXISTS catalog_version_update AFTER UPDATE ON novels_descs
+       BEGIN UPDATE catalog_meta SET value = value + 1 WHERE key = 'version'; END""",
+    """CREATE TRIGGER IF NOT EXISTS catalog_version_delete AFTER DELETE ON novels_descs
+       BEGIN UPDATE catalog_meta SET value = value + 1 WHERE key = 'version'; END""",
+)
+
+
+def make_sort_key(sort_key):
+    """
+    小説一覧のソートに使用するキー関数を作成
+
+    Args:
+        sort_key (str): ソートキー（updated_at / n_code / title / total_ep）
+
+    Returns:
+        function: 小説データを受け取りソート用の値を返す関数
+    """
+    key_index = SORT_KEY_INDEXES.get(sort_key, 3)  # デフォルトは更新日時
+
+    def key(novel):
+        value = novel[key_index] if key_index < len(novel) else None
+
+        # 数値型の場合は数値に変換してソート（未設定は0として扱う）
+        if sort_key == "total_ep":
+            try:
+                return int(value) if value else 0
+            except (ValueError, TypeError):
+                return 0
+
+        # 文字列の場合
+        if value is None:
+            return "" if sort_key == "n_code" or sort_key == "title" else "0000-00-00"
+
+        return value
+
+    return key
+
+
+def ensure_change_counter(db):
+    """
+    カタログの変更カウンタ（テーブルとトリガー）を作成
+
+    Args:
+        db: execute_queryを持つデータベースハンドラ（DatabaseHandler / DatabaseManager）
+    """
+    for statement in CHANGE_COUNTER_STATEMENTS:
+        db.execute_query(statement)
+
+
+def get_catalog_version(db):
+    """
+    カタログの変更カウンタを取得
+    PRAGMA data_versionは接続ごとの値で再起動をまたいで比較できないため、トリガーで管理するカウンタを使用する
+
+    Args:
+        db: execute_queryを持つデータベースハンドラ（DatabaseHandler / DatabaseManager）
+
+    Returns:
+        int: カタログバージョン
+    """
+    row = db.execute_query(
+        "SELECT value FROM catalog_meta WHERE key = 'version'",
+        fetch=True, fetch_all=False, commit=False
+    )
+    return row[0] if row else 0
+
+
+def _to_little_endian(values):
+    """配列をリトルエンディアンのバイト列に変換"""
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode, data):
+    """リトルエンディアンのバイト列から配列を作成"""
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def write_snapshot(novels, catalog_version, path=SNAPSHOT_PATH):
+    """
+    小説一覧のスナップショットを書き出す（一時ファイルに書いてから置き換える）
+
+    Args:
+        novels (list): 小説情報のリスト
+        catalog_version (int): 読み込み時点のカタログバージョン
+        path (str): 出力先パス
+
+    Returns:
+        bool: 書き出しに成功した場合True
+    """
+    try:
+        offsets = array('Q', [0])
+        chunks = []
+        position = 0
+        for novel in novels:
+            data = json.dumps(list(novel), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            chunks.append(data)
+            position += len(data)
+            offsets.append(position)
+
+        sort_orders = []
+        for sort_key, _ in SORT_KEYS:
+            key = make_sort_key(sort_key)
+            sort_orders.append(array('I', sorted(range(len(novels)), key=lambda i: key(novels[i]))))
+
+        offsets_pos = HEADER_SIZE
+        blob_pos = offsets_pos + offsets.itemsize * len(offsets)
+        sorts_pos = blob_pos + position
+
+        header = struct.pack(HEADER_FORMAT, SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, catalog_version,
+                             len(novels), len(SORT_KEYS), offsets_pos, blob_pos, sorts_pos)
+
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(header)
+            f.write(_to_little_endian(offsets))
+            f.writelines(chunks)
+            for order in sort_orders:
+                f.write(_to_little_endian(order))
+        os.replace(temp_path, path)
+
+        logger.info(f"カタログスナップショットを保存しました: {len(novels)}件 (version {catalog_version})")
+        return True
+
+    except (OSError, TypeError, ValueError) as e:
+        # マップ中のファイルを置き換えられない環境などでは次回の起動時に再作成する
+        logger.warning(f"カタログスナップショットの保存に失敗しました: {e}")
+        return False
+
+
+class CatalogSnapshot(Sequence):
+    """
+    メモリマップしたスナップショットを小説情報のシーケンスとして扱うクラス
+    各行は初回アクセス時にデコードしてキャッシュします
+    """
+
+    def __init__(self, mapped, catalog_version, row_count, offsets, blob_pos, sort_orders):
+        self._mapped = mapped
+        self.catalog_version = catalog_version
+        self._row_count = row_count
+        self._offsets = offsets
+        self._blob_pos = blob_pos
+        self._sort_orders = sort_orders
+        self._rows = [None] * row_count
+
+    @classmethod
+    def load(cls, path=SNAPSHOT_PATH):
+        """
+        スナップショットファイルを読み込む
+
+        Args:
+            path (str): スナップショットファイルのパス
+
+        Returns:
+            CatalogSnapshot: 読み込んだスナップショット（存在しない・壊れている場合はNone）
+        """
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+            if len(mapped) < HEADER_SIZE:
+                raise ValueError("ヘッダが不完全です")
+
+            (magic, format_version, catalog_version, row_count, sort_count,
+             offsets_pos, blob_pos, sorts_pos) = struct.unpack_from(HEADER_FORMAT, mapped, 0)
+
+            if magic != SNAPSHOT_MAGIC or format_version != SNAPSHOT_FORMAT_VERSION:
+                raise ValueError("形式が一致しません")
+            if sort_count != len(SORT_KEYS) or sorts_pos + 4 * row_count * sort_count != len(mapped):
+                raise ValueError("ファイルサイズが一致しません")
+
+            offsets = _from_little_endian('Q', mapped[offsets_pos:offsets_pos + 8 * (row_count + 1)])
+            if blob_pos + offsets[-1] != sorts_pos:
+                raise ValueError("行データの長さが一致しません")
+
+            sort_orders = {}
+            for i, (sort_key, _) in enumerate(SORT_KEYS):
+                start = sorts_pos + 4 * row_count * i
+                sort_orders[sort_key] = _from_little_endian('I', mapped[start:start + 4 * row_count])
+
+            return cls(mapped, catalog_version, row_count, offsets, blob_pos, sort_orders)
+
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"カタログスナップショットを読み込めませんでした: {e}")
+            return None
+
+    def __len__(self):
+        return self._row_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._row_count))]
+
+        if index < 0:
+            index += self._row_count
+        if not 0 <= index < self._row_count:
+            raise IndexError("snapshot index out of range")
+
+        row = self._rows[index]
+        if row is None:
+            start = self._blob_pos + self._offsets[index]
+            end = self._blob_pos + self._offsets[index + 1]
+            row = tuple(json.loads(self._mapped[start:end].decode('utf-8')))
+            self._rows[index] = row
+        return row
+
+    def close(self):
+        """
+        ファイルのマップを閉じる（同じパスにスナップショットを書き込む前に呼び出す）
+        マップ中のファイルはWindowsでは置き換えられないため、未デコードの行を先にデコードして
+        このインスタンスを参照し続けている一覧がそのまま使えるようにします
+        """
+        if self._mapped is None:
+            return
+        for index in range(self._row_count):
+            self[index]
+        self._mapped.close()
+        self._mapped = None
+
+    def get_sorted_row_ids(self, sort_key, descending=False):
+        """
+        保存済みのソート順を取得
+
+        Args:
+            sort_key (str): ソートキー
+            descending (bool): 降順かどうか
+
+        Returns:
+            list: 行IDのリスト（保存されていないソートキーの場合はNone）
+        """
+        order = self._sort_orders.get(sort_key)
+        if order is None:
+            return None
+        return order[::-1].tolist() if descending else order.tolist()
+
+
+class RowView(Sequence):
+    """小説リストを行IDの順序で参照するビュー（参照した行だけがデコードされる）"""
+
+    def __init__(self, rows, row_ids):
+        self._rows = rows
+        self._row_ids = row_ids
+
+    def __len__(self):
+        return len(self._row_ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._rows[row_id] for row_id in self._row_ids[index]]
+        return self._rows[self._row_ids[index]]
@@ -1,20 +1,14 @@
-import concurrent
 import configparser
 import datetime
 import gzip
 import sqlite3
 
-import yaml
-from bs4 import BeautifulSoup
-from selenium import webdriver
-import requests
 import os
-from selenium.webdriver.chrome.service import Service
 from concurrent.futures import ThreadPoolExecutor
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
 import random
 
+# yaml・bs4・selenium・requestsは読み込みに時間がかかるため、使用する関数内でインポートする
+
 from config import DOWNLOAD_DIR, YML_DIR, DATABASE_PATH
 from app.database.db_handler import DatabaseHandler
 from app.utils.logger_manager import get_logger
@@ -22,8 +16,17 @@ from app.utils.logger_manager import get_logger
 # ロガー設定
 logger = get_logger('Checker')
 
-# データベースハンドラの取得
-db = DatabaseHandler()
+
+
+class _LazyDatabaseHandler:
+    """初回アクセス時にDatabaseHandlerを生成するプロキシ（インポート時にワーカースレッドを起動しない）"""
+
+    def __getattr__(self, name):
+        return getattr(DatabaseHandler(), name)
+
+
+# データベースハンドラの取得（初回使用時に生成）
+db = _LazyDatabaseHandler()
 
 USER_AGENTS = [
     'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3',
@@ -123,61 +126,20 @@ def existence_check(ncode):
     2: 通常
     4: 作者退会&&作者によって削除
 
+    APIで判定し、判定できない場合だけ小説のページを確認します。
+    複数の小説はNovelClassifier.classifyでまとめて判定してください。
+
     Args:
         ncode (str): 小説コード
 
     Returns:
         int: レーティング
     """
-    rating = 0
-    n_url = f"https://ncode.syosetu.com/{ncode}"
-    n18_url = f"https://novel18.syosetu.com/{ncode}"
-    now_url = ""
-    logger.info(f"Checking {ncode}...({n_url} or {n18_url})")
-
-    options = Options()
-    options.add_argument('--headless')
-    options.add_argument('--disable-gpu')
-    options.add_argument(f'user-agent={random.choice(USER_AGENTS)}')
-
-    driver = webdriver.Chrome(options=options)
-    driver.get(n18_url)
-    now_url = driver.current_url
-
-    # 年齢認証ページにリダイレクトされたかチェック
-    if "ageauth" in now_url:
-        try:
-            enter_link = driver.find_element(By.LINK_TEXT, "Enter")
-            enter_link.click()
-            now_url = driver.current_url
-            logger.info(f"Redirected to: {now_url}")
-        except:
-            logger.error("Enter link not found")
-            driver.quit()
-            return rating
-
-    try:
-        span_attention = driver.find_element(By.CSS_SELECTOR, 'span.attention')
-        if span_attention.text == "エラーが発生しました。":
-            rating = 4
-    except:
-        pass
-
-    try:
-        h1 = driver.find_element(By.CSS_SELECTOR, 'h1')
-        if h1.text == "エラー":
-            rating = 0
-    except:
-        pass
-
-    if rating == 0:
-        if now_url == n_url:
-            rating = 2
-        elif now_url == n18_url:
-            rating = 1
+    from app.core.novel_classifier import NovelClassifier, RATING_DELETED
 
-    logger.info(f"{ncode}'s rating: {rating}, url: {now_url}")
-    driver.quit()
+    logger.info(f"Checking {ncode}...")
+    rating = NovelClassifier().classify([ncode], fields='n').get(ncode, (RATING_DELETED, None))[0]
+    logger.info(f"{ncode}'s rating: {rating}")
     return rating
 
 
@@ -205,7 +167,14 @@ def update_check(ncode, rating):
         logger.error(f"Error: {ncode}'s rating is {rating}")
         return
 
-    response = requests.get(n_api_url)
+    import requests
+    from app.core.concurrency_controller import outcome_from_status
+    from app.core.fetch_governor import get_fetch_governor
+
+    response = get_fetch_governor().call(
+        None, n_api_url, requests.get, n_api_url,
+        outcome=lambda r: outcome_from_status(r.status_code)
+    )
     if response.status_code == 200:
         file_path = os.path.join(DOWNLOAD_DIR, f"{ncode}.gz")
         with open(file_path, 'wb') as file:
@@ -232,26 +201,62 @@ def Thawing_gz():
             logger.info(f"Decompressed and saved: {yml_path}")
 
 
-def db_update():
-    """データベースの小説情報を更新する"""
+def db_update(full=False):
+    """
+    データベースの小説情報を更新する
+    前回の同期以降に更新された小説だけをAPIでまとめて取得して反映します。
+    同期の基準がない場合（初回）は全小説を確認し、APIの取得に失敗した場合は
+    更新間隔の予測から次の更新が予想される小説（と無作為に選んだ一部の小説）だけを確認します
+
+    Args:
+        full (bool): Trueの場合は前回の同期・予測にかかわらず全小説を確認
+    """
+    import time
+    from app.core.metadata_sync import MetadataSync
+    from app.core.update_cadence import RefreshPlanner, SKIP_RATINGS
+
     logger.info("データベース更新開始")
+    started = int(time.time())
 
     # データベースから小説のncodeとratingを取得
     n_codes_ratings = db.execute_query(
         "SELECT n_code, rating FROM novels_descs",
         fetch=True
-    )
+    ) or []
+
+    planner = RefreshPlanner()
+    metadata_sync = MetadataSync()
+    if not full:
+        applied = metadata_sync.sync(n_codes_ratings, apply_novel_metadata)
+        if applied is not None:
+            # 問い合わせた小説はすべて確認済みとして記録
+            planner.record_polls(n_code for n_code, rating in n_codes_ratings if rating not in SKIP_RATINGS)
+            planner.record_updates(applied)
+            logger.info("Updated database successfully")
+            return
+        if metadata_sync.high_water_mark() is None:
+            # 初回は全小説を確認して同期の基準を作る
+            full = True
+        else:
+            n_codes_ratings, _ = planner.plan(n_codes_ratings)
 
     # ThreadPoolExecutorを使用してマルチスレッドで処理
-    with ThreadPoolExecutor(max_workers=10) as executor:
+    # （スレッド数は設定の上限、実際の同時実行数はFetchGovernorが調整）
+    from app.core.fetch_governor import get_fetch_governor
+    with ThreadPoolExecutor(max_workers=get_fetch_governor().max_concurrency()) as executor:
         executor.map(process_n_code_rating, n_codes_ratings)
 
     # gzファイルを解凍
     Thawing_gz()
     logger.info("Thawing gz files...")
 
-    # YAMLファイルからデータを更新
-    yml_parse_time(n_codes_ratings)
+    # YAMLファイルからデータを更新し、確認した日時と更新日時の履歴を記録
+    parsed = yml_parse_time(n_codes_ratings)
+    planner.record_polls(n_code for n_code, _ in parsed)
+    planner.record_updates(parsed)
+    if full:
+        # 全小説を確認した時点を次回の同期の基準にする
+        metadata_sync.set_high_water_mark(started)
     logger.info("Updated database successfully")
 
 def yml_parse_time(n_codes_ratings):
@@ -261,12 +266,18 @@ def yml_parse_time(n_codes_ratings):
 
     Args:
         n_codes_ratings (list): 小説コードとレーティングのリスト
+
+    Returns:
+        list: 読み込めた小説の [(n_code, 更新日時)]（更新日時がない場合はNone）
     """
+    import yaml
+
     logger.info("YAMLデータ解析開始")
 
+    parsed = []
     if not n_codes_ratings:
         logger.warning("No data in n_codes_ratings.")
-        return
+        return parsed
 
     for n_code, _ in n_codes_ratings:
         logger.info(f"Updating {n_code}...")
@@ -298,75 +309,98 @@ def yml_parse_time(n_codes_ratings):
             logger.error(f"Error parsing YAML file {yml_path}: {exc}")
             continue
 
-        # データの取得
-        general_all_no = data.get('general_all_no')
-        story = data.get('story', '')
-        title = data.get('title', '')
-        updated_at = data.get('updated_at', None)
-        writer = data.get('writer', '')
-
         # allcountが0の場合スキップ
         if data.get('allcount', 1) == 0:
             logger.info(f"Skipping {n_code} as allcount is 0")
+            parsed.append((n_code, None))
             continue
 
-        if general_all_no is None:
-            logger.warning(f"Skipping {n_code}: Missing 'general_all_no'")
-            continue
+        if apply_novel_metadata(n_code, data):
+            parsed.append((n_code, _format_update_time(data.get('updated_at'))))
 
-        # 日時型の場合は文字列に変換
-        if isinstance(updated_at, datetime.datetime):
-            updated_at = updated_at.strftime('%Y-%m-%d %H:%M:%S')
+    return parsed
 
-        try:
-            # 現在のエピソード数を取得
-            current_data = db.execute_query(
-                "SELECT total_ep FROM novels_descs WHERE n_code = ?",
-                (n_code,),
-                fetch=True,
-                fetch_all=False
-            )
-
-            current_total_ep = 0
-            if current_data and current_data[0] is not None:
-                current_total_ep = current_data[0]
-
-            # 現在時刻を取得（実際の更新があった場合に使用）
-            current_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-            # 話数に更新があるかどうかを確認
-            has_new_episodes = int(general_all_no) > current_total_ep
-
-            # 更新するフィールドを準備
-            update_fields = {
-                'general_all_no': int(general_all_no),
-                'Synopsis': story,
-                'title': title,
-                'last_update_date': updated_at,  # YMLからの更新日時はlast_update_dateに保存
-                'author': writer
-            }
-
-            # 話数の更新があった場合のみupdate_atを更新
-            if has_new_episodes:
-                update_fields['updated_at'] = current_time
-                logger.info(f"New episodes detected for {n_code}: {current_total_ep} -> {general_all_no}")
-
-                # episodes テーブルの新しいエピソードのupdate_timeを設定するためのクエリを準備
-                # この更新はエピソード取得時に適用される（catch_up_episodeなどで）
-
-            # 動的にSQLクエリを構築
-            field_names = ', '.join([f"{field} = ?" for field in update_fields.keys()])
-            values = list(update_fields.values())
-            values.append(n_code)  # WHERE句用
-
-            # データベースを更新
-            db.execute_query(
-                f"UPDATE novels_descs SET {field_names} WHERE n_code = ?",
-                tuple(values)
-            )
-            logger.info(f"Successfully updated {n_code}")
-        except Exception as e:
-            logger.error(f"Database update failed for {n_code}: {e}")
+
+def _format_update_time(value):
+    """日時型の更新日時を文字列に変換（文字列・Noneはそのまま）"""
+    if isinstance(value, datetime.datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+
+def apply_novel_metadata(n_code, data):
+    """
+    小説APIの小説情報をデータベースに反映
+    更新日時はlast_update_dateに保存し、話数の更新があった場合のみupdated_atを更新
+
+    Args:
+        n_code (str): 小説コード
+        data (dict): 小説APIの項目（general_all_no, story, title, updated_at, writer）
+
+    Returns:
+        bool: 反映できる小説情報だった場合True
+    """
+    # データの取得
+    general_all_no = data.get('general_all_no')
+    story = data.get('story', '')
+    title = data.get('title', '')
+    updated_at = _format_update_time(data.get('updated_at', None))
+    writer = data.get('writer', '')
+
+    if general_all_no is None:
+        logger.warning(f"Skipping {n_code}: Missing 'general_all_no'")
+        return False
+
+    try:
+        # 現在のエピソード数を取得
+        current_data = db.execute_query(
+            "SELECT total_ep FROM novels_descs WHERE n_code = ?",
+            (n_code,),
+            fetch=True,
+            fetch_all=False
+        )
+
+        current_total_ep = 0
+        if current_data and current_data[0] is not None:
+            current_total_ep = current_data[0]
+
+        # 現在時刻を取得（実際の更新があった場合に使用）
+        current_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+        # 話数に更新があるかどうかを確認
+        has_new_episodes = int(general_all_no) > current_total_ep
+
+        # 更新するフィールドを準備
+        update_fields = {
+            'general_all_no': int(general_all_no),
+            'Synopsis': story,
+            'title': title,
+            'last_update_date': updated_at,  # APIからの更新日時はlast_update_dateに保存
+            'author': writer
+        }
+
+        # 話数の更新があった場合のみupdate_atを更新
+        if has_new_episodes:
+            update_fields['updated_at'] = current_time
+            logger.info(f"New episodes detected for {n_code}: {current_total_ep} -> {general_all_no}")
+
+            # episodes テーブルの新しいエピソードのupdate_timeを設定するためのクエリを準備
+            # この更新はエピソード取得時に適用される（catch_up_episodeなどで）
+
+        # 動的にSQLクエリを構築
+        field_names = ', '.join([f"{field} = ?" for field in update_fields.keys()])
+        values = list(update_fields.values())
+        values.append(n_code)  # WHERE句用
+
+        # データベースを更新
+        db.execute_query(
+            f"UPDATE novels_descs SET {field_names} WHERE n_code = ?",
+            tuple(values)
+        )
+        logger.info(f"Successfully updated {n_code}")
+    except Exception as e:
+        logger.error(f"Database update failed for {n_code}: {e}")
+    return True
 
 
 def ncode_title(n_code):
@@ -409,9 +443,49 @@ def shinchaku_checker():
 
     logger.info(f"Shinchaku: {shinchaku_novel_no}件{shinchaku_ep}話")
     return shinchaku_ep, shinchaku_novel, shinchaku_novel_no
+def _episode_outcome(result):
+    """catch_up_episodeの結果から取得の結果を判定（取得の統計と同時実行数の調整に使用）"""
+    from app.core.concurrency_controller import (
+        OUTCOME_FAILURE, OUTCOME_OK, OUTCOME_THROTTLED, THROTTLE_STATUS_CODES,
+    )
+
+    episode, _ = result
+    if episode and episode.startswith("Failed to retrieve"):
+        if any(f"Status code: {status}" in episode for status in THROTTLE_STATUS_CODES):
+            return OUTCOME_THROTTLED
+        return OUTCOME_FAILURE
+    if not episode or episode.startswith("No content found"):
+        return OUTCOME_FAILURE
+    return OUTCOME_OK
+
+
 def catch_up_episode(n_code, episode_no, rating):
     """
     指定されたエピソードを取得
+    取得はプロセス全体のFetchGovernorを経由し、ホストごとの取得数・同時実行数の制限を受けます。
+    同じエピソードの取得が実行中の場合は、その結果を共有します。
+
+    Args:
+        n_code (str): 小説コード
+        episode_no (int): エピソード番号
+        rating (int): レーティング
+
+    Returns:
+        tuple: (エピソード本文, エピソードタイトル)
+    """
+    from app.core.fetch_governor import get_fetch_governor
+
+    host = "novel18.syosetu.com" if rating == 1 or rating is None else "ncode.syosetu.com"
+    return get_fetch_governor().call(
+        ("episode", n_code, str(episode_no)), host,
+        _catch_up_episode, n_code, episode_no, rating,
+        outcome=_episode_outcome
+    )
+
+
+def _catch_up_episode(n_code, episode_no, rating):
+    """
+    指定されたエピソードを取得（FetchGovernorを経由しない）
 
     Args:
         n_code (str): 小説コード
@@ -421,6 +495,12 @@ def catch_up_episode(n_code, episode_no, rating):
     Returns:
         tuple: (エピソード本文, エピソードタイトル)
     """
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.chrome.options import Options
+    from bs4 import BeautifulSoup
+    import requests
+
     # データベースから小説の総エピソード数を取得
     novel = db.get_novel_by_ncode(n_code)
     general_all_no = novel[6] if novel and len(novel) > 6 and novel[6] is not None else None
@@ -502,6 +582,12 @@ def single_episode(n_code, rating):
     Returns:
         tuple: (エピソード本文, エピソードタイトル)
     """
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.chrome.options import Options
+    from bs4 import BeautifulSoup
+    import requests
+
     title = ""
     episode = ""
     EP_url = f"https://ncode.syosetu.com/{n_code}/"
@@ -585,14 +671,17 @@ def del_yml():
             logger.info(f"Deleted {filename}")
 
 
-def check_and_update_missing_general_all_no(max_workers=10):
+def check_and_update_missing_general_all_no(max_workers=None):
     """
-    general_all_noが取得できなかった小説の存在確認と話数の取得を並列処理で行います。
+    general_all_noが取得できなかった小説の存在確認と話数の取得を行います。
+    APIでまとめて取得し、APIに見つからない小説だけを目次ページ・二分探索で並列に調べます。
 
     Args:
-        max_workers (int): 同時に実行するスレッドの最大数
+        max_workers (int, optional): 同時に実行するスレッドの最大数（省略時は設定の同時実行数の上限）
     """
-    logger.info("general_all_noが不明な小説の並列確認を開始します")
+    from app.core.episode_count import EpisodeCountResolver
+
+    logger.info("general_all_noが不明な小説の確認を開始します")
 
     # データベース接続
     conn = sqlite3.connect(DATABASE_PATH)
@@ -614,48 +703,14 @@ def check_and_update_missing_general_all_no(max_workers=10):
             logger.info("処理対象の小説がありません")
             return
 
-        # 進捗表示用のカウンタと更新情報を保持するリスト
-        progress_count = 0
-        results = []
-
-        # 結果を保存するための関数
-        def process_novel_existence(novel_data):
-            nonlocal progress_count
-            n_code, current_rating = novel_data
-
-            try:
-                logger.info(f"小説 {n_code} の存在確認を行います")
-
-                # 小説の存在確認を行い、情報を取得
-                rating, exists, max_episode = check_novel_existence(n_code, current_rating)
-
-                # 処理カウンタを増加
-                progress_count += 1
-                logger.info(f"進捗: {progress_count}/{total_novels} - 小説 {n_code} の確認完了")
-
-                # 結果を返す
-                return n_code, rating, exists, max_episode
-            except Exception as e:
-                logger.error(f"小説 {n_code} の存在確認中にエラー: {e}")
-                progress_count += 1
-                return n_code, 5, False, 0  # エラー時はrating=5（存在しない）と仮定
-
-        # ThreadPoolExecutorを使用して並列処理
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 各小説の処理を実行し、結果を集める
-            future_to_novel = {executor.submit(process_novel_existence, novel): novel for novel in novels}
-
-            for future in concurrent.futures.as_completed(future_to_novel):
-                novel = future_to_novel[future]
-                try:
-                    result = future.result()
-                    if result:
-                        results.append(result)
-                except Exception as e:
-                    logger.error(f"小説 {novel[0]} の処理中に例外が発生: {e}")
+        # API → 目次ページ → 二分探索の順に話数を求める
+        resolver = EpisodeCountResolver(max_workers=max_workers)
+        results = resolver.resolve_many(novels)
 
         # 結果を一括でデータベースに更新（排他制御のため単一接続で実行）
-        for n_code, rating, exists, max_episode in results:
+        for n_code, _ in novels:
+            # 確認中にエラーになった小説はrating=5（存在しない）と仮定
+            rating, exists, max_episode = results.get(n_code, (5, False, 0))
             if exists:
                 cursor.execute("""
                     UPDATE novels_descs 
@@ -673,7 +728,7 @@ def check_and_update_missing_general_all_no(max_workers=10):
 
         # コミット
         conn.commit()
-        logger.info("general_all_noの並列更新が完了しました")
+        logger.info("general_all_noの更新が完了しました")
 
     except Exception as e:
         logger.error(f"general_all_no更新処理中にエラーが発生しました: {e}")
@@ -685,6 +740,7 @@ def check_and_update_missing_general_all_no(max_workers=10):
 def check_novel_existence(n_code, current_rating):
     """
     小説の存在確認と話数取得を行う関数
+    API → 目次ページ → エピソードページの二分探索の順に、通常のHTTPで調べます
 
     Args:
         n_code (str): 小説コード
@@ -693,179 +749,44 @@ def check_novel_existence(n_code, current_rating):
     Returns:
         tuple: (rating, exists, max_episode) - レーティング, 存在するか, 最大話数
     """
-    # 小説の存在確認
-    exists = False
-    max_episode = 0
-    rating = current_rating
-
-    # 一般小説URLと18禁小説URLの両方をチェック
-    normal_url = f"https://ncode.syosetu.com/{n_code}/"
-    r18_url = f"https://novel18.syosetu.com/{n_code}/"
-
-    # Chromeオプション設定
-    options = Options()
-    options.add_argument('--headless')
-    options.add_argument('--disable-gpu')
-    options.add_argument(f'user-agent={random.choice(USER_AGENTS)}')
-
-    driver = webdriver.Chrome(options=options)
+    from app.core.episode_count import EpisodeCountResolver
 
     try:
-        # まず通常URLをチェック
-        driver.get(normal_url)
-
-        # エラーページかどうか確認（p-novelcom-header__pagetitleで判定）
-        try:
-            page_title = driver.find_element(By.CLASS_NAME, "p-novelcom-header__pagetitle")
-            normal_exists = page_title.text != "エラー"
-        except:
-            # 要素が見つからない場合はタイトル要素が存在するかどうかでチェック
-            normal_exists = len(driver.find_elements(By.CLASS_NAME, "novel_title")) > 0
-
-        # 18禁URLをチェック
-        if not normal_exists:
-            driver.get(r18_url)
-
-            # 年齢認証ページが表示された場合
-            if "ageauth" in driver.current_url:
-                try:
-                    enter_link = driver.find_element(By.LINK_TEXT, "Enter")
-                    enter_link.click()
-                except:
-                    logger.error(f"小説 {n_code}: 年齢認証ページのEnterリンクが見つかりません")
-
-            # エラーページかどうか確認（p-novelcom-header__pagetitleで判定）
-            try:
-                page_title = driver.find_element(By.CLASS_NAME, "p-novelcom-header__pagetitle")
-                r18_exists = page_title.text != "エラー"
-            except:
-                # 要素が見つからない場合はタイトル要素が存在するかどうかでチェック
-                r18_exists = len(driver.find_elements(By.CLASS_NAME, "novel_title")) > 0
-
-            exists = r18_exists
-
-            # 18禁小説の場合はratingを1に設定
-            if r18_exists:
-                rating = 1
-        else:
-            # 通常小説の場合
-            exists = True
-            rating = 2
-
-        # 小説が存在する場合は話数を取得
-        if exists:
-            # 話数を調査（エラーが出るまでアクセス）
-            episode = 1
-            while True:
-                try:
-                    if rating == 1:
-                        episode_url = f"{r18_url}{episode}/"
-                    else:
-                        episode_url = f"{normal_url}{episode}/"
-
-                    driver.get(episode_url)
-
-                    # エラーページかどうか確認（p-novelcom-header__pagetitleで判定）
-                    try:
-                        page_title = driver.find_element(By.CLASS_NAME, "p-novelcom-header__pagetitle")
-                        if page_title.text == "エラー":
-                            # エラーが出たら一つ前が最大話数
-                            max_episode = episode - 1
-                            break
-                    except:
-                        # 要素が見つからない場合は、本文要素が存在するかで判断
-                        if len(driver.find_elements(By.CLASS_NAME, "novel_view")) == 0:
-                            # 本文要素がない場合はエラーページと判断
-                            max_episode = episode - 1
-                            break
-
-                    # 次の話数へ
-                    episode += 1
-
-                    # 念のため最大5000話までとする
-                    if episode > 5000:
-                        max_episode = 5000
-                        logger.warning(f"小説 {n_code} は話数が5000を超えているため、調査を打ち切ります")
-                        break
-
-                except Exception as e:
-                    logger.error(f"小説 {n_code} の話数調査中にエラー: {e}")
-                    max_episode = episode - 1
-                    break
-
+        return EpisodeCountResolver().resolve(n_code, current_rating)
     except Exception as e:
         logger.error(f"小説 {n_code} の存在確認中にエラー: {e}")
-        # エラーの場合も、できるだけページタイトルを確認
-        try:
-            page_title = driver.find_element(By.CLASS_NAME, "p-novelcom-header__pagetitle")
-            if page_title.text == "エラー":
-                rating = 5
-                exists = False
-        except:
-            # この時点でエラーが出ている場合は、サイトにアクセスできなかった可能性が高い
-            # この場合は現在のレーティングを維持（変更しない）
-            exists = False
+        return current_rating, False, 0
 
-    finally:
-        # ドライバーを閉じる
-        driver.quit()
-
-    return rating, exists, max_episode
-
-def batch_check_novel_existence(n_codes, max_workers=10):
+def batch_check_novel_existence(n_codes, max_workers=None):
     """
-    複数の小説の存在確認を並列処理で行う
+    複数の小説の存在確認を行う（APIでまとめて確認し、見つからない小説だけを並列処理で調べる）
 
     Args:
         n_codes (list): 小説コードのリスト
-        max_workers (int): 同時に実行するスレッドの最大数
+        max_workers (int, optional): 同時に実行するスレッドの最大数（省略時は設定の同時実行数の上限）
 
     Returns:
         dict: {n_code: (rating, exists, max_episode)} 形式の辞書
     """
-    logger.info(f"{len(n_codes)}件の小説の存在確認を並列処理で開始します")
-    results = {}
+    from app.core.episode_count import EpisodeCountResolver
 
-    # 進捗表示用のカウンタ
-    processed = 0
+    logger.info(f"{len(n_codes)}件の小説の存在確認を開始します")
     total = len(n_codes)
 
-    def check_single_novel(n_code):
-        nonlocal processed
-        try:
-            # 現在のレーティングを取得
-            current_rating = db.execute_read_query(
-                "SELECT rating FROM novels_descs WHERE n_code = ?",
-                (n_code,),
-                fetch_all=False
-            )
-            current_rating = current_rating[0] if current_rating else 0
-
-            # 存在確認を実行
-            result = check_novel_existence(n_code, current_rating)
-
-            # 進捗カウンタを更新
-            processed += 1
-            logger.info(f"進捗: {processed}/{total} - 小説 {n_code} の確認完了")
-
-            return n_code, result
-        except Exception as e:
-            logger.error(f"小説 {n_code} の処理中にエラー: {e}")
-            processed += 1
-            return n_code, (5, False, 0)  # エラー時はrating=5（存在しない）と仮定
-
-    # ThreadPoolExecutorを使用して並列処理
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # 各小説の処理を実行
-        future_to_ncode = {executor.submit(check_single_novel, n_code): n_code for n_code in n_codes}
-
-        for future in concurrent.futures.as_completed(future_to_ncode):
-            n_code = future_to_ncode[future]
-            try:
-                n_code, result = future.result()
-                results[n_code] = result
-            except Exception as e:
-                logger.error(f"小説 {n_code} の結果取得中にエラー: {e}")
+    # 現在のレーティングを取得
+    novels = []
+    for n_code in n_codes:
+        current_rating = db.execute_read_query(
+            "SELECT rating FROM novels_descs WHERE n_code = ?",
+            (n_code,),
+            fetch_all=False
+        )
+        novels.append((n_code, current_rating[0] if current_rating else 0))
+
+    results = EpisodeCountResolver(max_workers=max_workers).resolve_many(novels)
+    for n_code in n_codes:
+        if n_code not in results:
+            results[n_code] = (5, False, 0)  # エラー時はrating=5（存在しない）と仮定
 
     logger.info(f"全{total}件の小説の存在確認が完了しました")
-    return results
\ No newline at end of file
+    return results
@@ -0,0 +1,178 @@
+"""
+取得の同時実行数を自動で調整するモジュール（AIMD）
+- 一定数の取得ごとに結果を集計し、問題がなければ同時実行数を1ずつ増やす
+- 429/503やタイムアウトがあれば半分に、応答時間の90パーセンタイルが目標を超えれば少し減らす
+- 同時実行数は設定の下限・上限の範囲に収める
+
+判断の結果はFetchGovernorの統計に記録されます
+"""
+import collections
+import threading
+import time
+from app.utils.logger_manager import get_logger
+
+# ロガーの設定
+logger = get_logger('ConcurrencyController')
+
+# 取得の結果
+OUTCOME_OK = 'ok'
+OUTCOME_FAILURE = 'failure'
+OUTCOME_THROTTLED = 'throttled'
+OUTCOME_TIMEOUT = 'timeout'
+OUTCOME_ERROR = 'error'
+
+# 混雑を表すHTTPステータスコード
+THROTTLE_STATUS_CODES = (429, 503)
+
+# 判断に使う取得数
+DECISION_WINDOW = 20
+
+# 減らすときの倍率（混雑・タイムアウト時と、応答が遅い時）
+THROTTLE_DECREASE = 0.5
+LATENCY_DECREASE = 0.8
+
+# 判断に使う応答時間のパーセンタイル
+LATENCY_PERCENTILE = 0.9
+
+# 保持する判断の履歴の数
+DECISION_HISTORY = 50
+
+
+def outcome_from_status(status):
+    """
+    HTTPステータスコードから取得の結果を判定
+
+    Args:
+        status (int): HTTPステータスコード（取得できなかった場合は0）
+
+    Returns:
+        str: 取得の結果
+    """
+    if status in THROTTLE_STATUS_CODES:
+        return OUTCOME_THROTTLED
+    if status == 0:
+        return OUTCOME_ERROR
+    # 404は存在しないページの確認に使うため正常とみなす
+    return OUTCOME_OK if status in (200, 404) else OUTCOME_FAILURE
+
+
+def outcome_from_exception(error):
+    """
+    例外から取得の結果を判定
+
+    Args:
+        error (Exception): 取得中に発生した例外
+
+    Returns:
+        str: 取得の結果
+    """
+    if isinstance(error, TimeoutError) or 'Timeout' in type(error).__name__:
+        return OUTCOME_TIMEOUT
+    return OUTCOME_ERROR
+
+
+def percentile(values, q):
+    """
+    パーセンタイルを計算（最近傍法）
+
+    Args:
+        values (list): 値のリスト
+        q (float): 0から1の割合
+
+    Returns:
+        float: パーセンタイル（値がない場合は0）
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class AdaptiveConcurrency:
+    """
+    応答時間と混雑の応答から同時実行数を調整するクラス
+    """
+
+    def __init__(self, initial=2, minimum=1, maximum=8, latency_target=3.0, window=DECISION_WINDOW, name=''):
+        """
+        Args:
+            initial (int): 同時実行数の初期値
+            minimum (int): 同時実行数の下限
+            maximum (int): 同時実行数の上限
+            latency_target (float): 応答時間の90パーセンタイルの目標（秒）
+            window (int): 判断に使う取得数
+            name (str): ログに表示する名前（ホスト名など）
+        """
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(self.maximum, max(self.minimum, initial))
+        self.latency_target = latency_target
+        self.window = max(1, window)
+        self.name = name
+        self.in_flight = 0
+        self.decisions = collections.deque(maxlen=DECISION_HISTORY)
+        self._latencies = []
+        self._outcomes = collections.Counter()
+        self._saturated = False
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """同時実行数に空きができるまで待機して枠を確保"""
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+            if self.in_flight >= self.limit:
+                self._saturated = True
+
+    def release(self, latency, outcome):
+        """
+        枠を返却し、取得の結果を記録
+
+        Args:
+            latency (float): 応答時間（秒）
+            outcome (str): 取得の結果
+        """
+        with self._condition:
+            self.in_flight -= 1
+            self._latencies.append(latency)
+            self._outcomes[outcome] += 1
+            if len(self._latencies) >= self.window:
+                self._decide()
+            self._condition.notify_all()
+
+    def _decide(self):
+        """集計した結果から同時実行数を決める（ロックを取得した状態で呼び出す）"""
+        congested = self._outcomes[OUTCOME_THROTTLED] + self._outcomes[OUTCOME_TIMEOUT]
+        p90 = percentile(self._latencies, LATENCY_PERCENTILE)
+        previous = self.limit
+
+        if congested:
+            self.limit = max(self.minimum, int(self.limit * THROTTLE_DECREASE))
+            reason = f'混雑・タイムアウト {congested}件'
+        elif p90 > self.latency_target:
+            self.limit = max(self.minimum, int(self.limit * LATENCY_DECREASE))
+            reason = f'応答時間 p90={p90:.2f}秒'
+        elif self._saturated:
+            # 上限まで使い切っていた場合だけ増やす
+            self.limit = min(self.maximum, self.limit + 1)
+            reason = '正常'
+        else:
+            reason = '変更なし（同時実行数に余裕あり）'
+
+        decision = {
+            'time': time.time(),
+            'previous': previous,
+            'limit': self.limit,
+            'reason': reason,
+            'p90': p90,
+            'samples': len(self._latencies),
+        }
+        self.decisions.append(decision)
+        if self.limit != previous:
+            logger.info(f"{self.name}: 同時実行数を {previous} -> {self.limit} に変更しました（{reason}）")
+
+        self._latencies = []
+        self._outcomes.clear()
+        self._saturated = self.in_flight >= self.limit
+        return decision
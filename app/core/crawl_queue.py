@@ -0,0 +1,548 @@
+"""
+エピソード取得のジョブをSQLiteに保存する永続キュー
+- 1エピソード（小説コード・エピソード番号）につき1行のジョブ
+- 状態は pending（未処理）・in_flight（取得中）・done（完了）・failed（失敗）で、試行回数と最後のエラーを記録
+- ワーカーは期限付きでジョブを借り（リース）、期限が切れたジョブは他のワーカーが取り直せる
+- アプリを終了しても未処理のジョブは残り、次回の起動時に続きから再開する
+- 一時停止の状態もデータベースに保存する
+- ジョブは優先順位（priority、小さいほど先）の順に借りる。優先順位はUpdateSchedulerが付け直す
+
+使用例:
+    python -m app.core.crawl_queue --status       # キューの状態を表示
+"""
+import argparse
+import datetime
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.utils.logger_manager import get_logger
+from config import DATABASE_PATH
+
+# ロガーの設定
+logger = get_logger('CrawlQueue')
+
+# ジョブの状態
+STATE_PENDING = 'pending'
+STATE_IN_FLIGHT = 'in_flight'
+STATE_DONE = 'done'
+STATE_FAILED = 'failed'
+JOB_STATES = (STATE_PENDING, STATE_IN_FLIGHT, STATE_DONE, STATE_FAILED)
+
+# リースの期限（秒）。取得中のまま期限が切れたジョブは再び借りられる
+DEFAULT_LEASE_SECONDS = 300
+
+# 1ジョブの最大試行回数（超えると failed）
+DEFAULT_MAX_ATTEMPTS = 3
+
+# 完了したジョブの保存期間（日）。これより古い完了ジョブは clear_done で削除
+DONE_RETENTION_DAYS = 7
+
+# 実行中に優先順位を付け直す間隔（秒）。読書の状況や追加されたジョブを取得順に反映する
+RESCHEDULE_INTERVAL = 60
+
+# データベースに保存する日時の形式
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+CRAWL_QUEUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawl_jobs (
+    ncode TEXT NOT NULL,
+    episode_no INTEGER NOT NULL,
+    rating INTEGER,
+    source TEXT,
+    state TEXT NOT NULL DEFAULT 'pending',
+    priority INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    lease_owner TEXT,
+    lease_expires REAL,
+    enqueued_at TEXT,
+    updated_at TEXT,
+    PRIMARY KEY (ncode, episode_no)
+);
+CREATE INDEX IF NOT EXISTS idx_crawl_jobs_state ON crawl_jobs (state, lease_expires);
+CREATE TABLE IF NOT EXISTS crawl_queue_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _now():
+    """現在時刻の文字列"""
+    return datetime.datetime.now().strftime(TIME_FORMAT)
+
+
+class CrawlQueue:
+    """
+    エピソード取得ジョブの永続キュー
+    メソッドごとに短い接続を開くため、どのスレッドからも呼び出せます
+    """
+
+    def __init__(self, db_path=None, max_attempts=DEFAULT_MAX_ATTEMPTS, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """
+        Args:
+            db_path (str, optional): データベースファイルのパス。Noneの場合はconfigからパスを使用
+            max_attempts (int): 1ジョブの最大試行回数
+            lease_seconds (float): リースの期限（秒）
+        """
+        self.db_path = db_path if db_path is not None else DATABASE_PATH
+        self.max_attempts = max(1, max_attempts)
+        self.lease_seconds = lease_seconds
+        self._schema_ready = False
+
+    def _connect(self):
+        """接続を開く（初回はテーブルを作成）"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        if not self._schema_ready:
+            conn.executescript(CRAWL_QUEUE_SCHEMA)
+            # priority列がない古いテーブルには列を追加
+            columns = [column[1] for column in conn.execute('PRAGMA table_info(crawl_jobs)')]
+            if 'priority' not in columns:
+                conn.execute('ALTER TABLE crawl_jobs ADD COLUMN priority INTEGER')
+            self._schema_ready = True
+        return conn
+
+    def _write(self, func):
+        """書き込みトランザクションで func(conn) を実行"""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            result = func(conn)
+            conn.execute('COMMIT')
+            return result
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    # --- 追加・リース・完了 ---
+
+    def enqueue(self, tasks, source=None):
+        """
+        ジョブを追加（未処理・取得中のジョブはそのまま、完了・失敗したジョブは未処理に戻す）
+
+        Args:
+            tasks (iterable): [(ncode, episode_no, rating)]
+            source (str, optional): ジョブを追加した処理の名前（表示用）
+
+        Returns:
+            int: 追加または未処理に戻したジョブの数
+        """
+        now = _now()
+        rows = [(ncode, int(episode_no), rating, source, now, now) for ncode, episode_no, rating in tasks]
+        if not rows:
+            return 0
+
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany('''
+                INSERT INTO crawl_jobs (ncode, episode_no, rating, source, state, attempts, enqueued_at, updated_at)
+                VALUES (?, ?, ?, ?, 'pending', 0, ?, ?)
+                ON CONFLICT (ncode, episode_no) DO UPDATE SET
+                    rating = excluded.rating, source = excluded.source, state = 'pending', attempts = 0,
+                    last_error = NULL, lease_owner = NULL, lease_expires = NULL,
+                    enqueued_at = excluded.enqueued_at, updated_at = excluded.updated_at
+                WHERE crawl_jobs.state IN ('done', 'failed')
+            ''', rows)
+            return conn.total_changes - before
+
+        added = self._write(insert)
+        logger.info(f"{added}件のジョブを追加しました（要求: {len(rows)}件, 追加元: {source}）")
+        return added
+
+    def lease(self, owner, limit):
+        """
+        未処理のジョブ（または期限切れのリース）を優先順位の順に借りる
+        優先順位が付いていないジョブ（付け直す前に追加されたもの）は最後に回す
+
+        Args:
+            owner (str): 借り手の識別子
+            limit (int): 借りる最大数
+
+        Returns:
+            list: [(ncode, episode_no, rating, attempts)]（attemptsは今回を含む試行回数）
+        """
+        now = time.time()
+
+        def take(conn):
+            jobs = conn.execute('''
+                SELECT ncode, episode_no, rating, attempts FROM crawl_jobs
+                WHERE state = 'pending' OR (state = 'in_flight' AND lease_expires < ?)
+                ORDER BY priority IS NULL, priority, enqueued_at, ncode, episode_no
+                LIMIT ?
+            ''', (now, limit)).fetchall()
+            conn.executemany('''
+                UPDATE crawl_jobs
+                SET state = 'in_flight', attempts = attempts + 1, lease_owner = ?, lease_expires = ?, updated_at = ?
+                WHERE ncode = ? AND episode_no = ?
+            ''', [(owner, now + self.lease_seconds, _now(), ncode, episode_no) for ncode, episode_no, _, _ in jobs])
+            return [(ncode, episode_no, rating, attempts + 1) for ncode, episode_no, rating, attempts in jobs]
+
+        return self._write(take)
+
+    def complete(self, ncode, episode_no, owner=None):
+        """
+        ジョブを完了にする
+
+        Args:
+            ncode (str): 小説コード
+            episode_no (int): エピソード番号
+            owner (str, optional): 借り手の識別子（指定した場合はリースが自分のものの場合だけ更新）
+        """
+        self._finish(ncode, episode_no, owner, STATE_DONE, None)
+
+    def fail(self, ncode, episode_no, error, attempts, owner=None):
+        """
+        ジョブの失敗を記録（最大試行回数に達していなければ未処理に戻す）
+
+        Args:
+            ncode (str): 小説コード
+            episode_no (int): エピソード番号
+            error (str): エラーの内容
+            attempts (int): これまでの試行回数
+            owner (str, optional): 借り手の識別子
+
+        Returns:
+            str: 新しい状態
+        """
+        state = STATE_FAILED if attempts >= self.max_attempts else STATE_PENDING
+        self._finish(ncode, episode_no, owner, state, str(error)[:500])
+        return state
+
+    def _finish(self, ncode, episode_no, owner, state, error):
+        """ジョブの状態を更新してリースを解放"""
+        def update(conn):
+            conn.execute('''
+                UPDATE crawl_jobs
+                SET state = ?, last_error = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ?
+                WHERE ncode = ? AND episode_no = ? AND state = 'in_flight' AND (? IS NULL OR lease_owner = ?)
+            ''', (state, error, _now(), ncode, int(episode_no), owner, owner))
+        self._write(update)
+
+    def pending_jobs(self):
+        """
+        未処理のジョブの一覧（優先順位の付け直しに使用）
+
+        Returns:
+            list: [(ncode, episode_no)]
+        """
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT ncode, episode_no FROM crawl_jobs WHERE state = 'pending'").fetchall()
+        finally:
+            conn.close()
+
+    def set_priorities(self, ordered_jobs):
+        """
+        未処理のジョブに優先順位を付ける（リストの順に0から）
+
+        Args:
+            ordered_jobs (list): 取得する順に並べた [(ncode, episode_no)]
+        """
+        rows = [(rank, ncode, int(episode_no)) for rank, (ncode, episode_no) in enumerate(ordered_jobs)]
+        self._write(lambda conn: conn.executemany(
+            "UPDATE crawl_jobs SET priority = ? WHERE ncode = ? AND episode_no = ? AND state = 'pending'", rows))
+
+    def recover(self):
+        """
+        以前のプロセスで取得中のまま残ったジョブを未処理に戻す（起動時に呼び出す）
+        中断はジョブの失敗ではないため、中断された試行は試行回数に数えません
+        このプロセスのワーカーが実行中の場合や、このプロセスのワーカーが借りているジョブは戻しません
+        （戻すと実行中のワーカーの完了が記録されず、同じジョブを再び取得してしまうため）
+
+        Returns:
+            int: 未処理に戻したジョブの数
+        """
+        if _run_lock.locked():
+            logger.debug("キューのワーカーが実行中のため、中断されたジョブの復旧を省略します")
+            return 0
+
+        def reset(conn):
+            return conn.execute('''
+                UPDATE crawl_jobs
+                SET state = 'pending', attempts = MAX(attempts - 1, 0), lease_owner = NULL, lease_expires = NULL,
+                    updated_at = ?
+                WHERE state = 'in_flight' AND (lease_owner IS NULL OR lease_owner NOT LIKE ?)
+            ''', (_now(), f'{os.getpid()}-%')).rowcount
+
+        recovered = self._write(reset)
+        if recovered:
+            logger.info(f"中断された {recovered}件のジョブを未処理に戻しました")
+        return recovered
+
+    # --- 一時停止 ---
+
+    def _set_meta(self, key, value):
+        """キューの設定値を保存"""
+        self._write(lambda conn: conn.execute(
+            'INSERT OR REPLACE INTO crawl_queue_meta (key, value) VALUES (?, ?)', (key, value)))
+
+    def pause(self):
+        """キューを一時停止（実行中のワーカーは借りているジョブを終えてから停止）"""
+        self._set_meta('paused', '1')
+        logger.info("キューを一時停止しました")
+
+    def resume(self):
+        """キューの一時停止を解除"""
+        self._set_meta('paused', '0')
+        logger.info("キューの一時停止を解除しました")
+
+    def is_paused(self):
+        """
+        キューが一時停止中かどうか
+
+        Returns:
+            bool: 一時停止中の場合True
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT value FROM crawl_queue_meta WHERE key = 'paused'").fetchone()
+            return row is not None and row[0] == '1'
+        finally:
+            conn.close()
+
+    # --- 確認・整理 ---
+
+    def stats(self):
+        """
+        キューの状態を集計
+
+        Returns:
+            dict: {'pending', 'in_flight', 'done', 'failed': ジョブ数, 'novels': 未完了のジョブがある小説数,
+                   'paused': 一時停止中かどうか}
+        """
+        conn = self._connect()
+        try:
+            stats = dict.fromkeys(JOB_STATES, 0)
+            stats.update(conn.execute('SELECT state, COUNT(*) FROM crawl_jobs GROUP BY state').fetchall())
+            stats['novels'] = conn.execute(
+                "SELECT COUNT(DISTINCT ncode) FROM crawl_jobs WHERE state IN ('pending', 'in_flight')"
+            ).fetchone()[0]
+            row = conn.execute("SELECT value FROM crawl_queue_meta WHERE key = 'paused'").fetchone()
+            stats['paused'] = row is not None and row[0] == '1'
+            return stats
+        finally:
+            conn.close()
+
+    def failed_jobs(self, limit=20):
+        """
+        失敗したジョブの一覧
+
+        Args:
+            limit (int): 最大件数
+
+        Returns:
+            list: [(ncode, episode_no, attempts, last_error, updated_at)]
+        """
+        conn = self._connect()
+        try:
+            return conn.execute('''
+                SELECT ncode, episode_no, attempts, last_error, updated_at FROM crawl_jobs
+                WHERE state = 'failed' ORDER BY updated_at DESC LIMIT ?
+            ''', (limit,)).fetchall()
+        finally:
+            conn.close()
+
+    def retry_failed(self):
+        """
+        失敗したジョブを未処理に戻す
+
+        Returns:
+            int: 戻したジョブの数
+        """
+        return self._write(lambda conn: conn.execute('''
+            UPDATE crawl_jobs SET state = 'pending', attempts = 0, updated_at = ? WHERE state = 'failed'
+        ''', (_now(),)).rowcount)
+
+    def clear_done(self, days=DONE_RETENTION_DAYS):
+        """
+        古い完了ジョブを削除
+
+        Args:
+            days (int): 保存期間（日）。0の場合はすべての完了ジョブを削除
+
+        Returns:
+            int: 削除したジョブの数
+        """
+        threshold = (datetime.datetime.now() - datetime.timedelta(days=days)).strftime(TIME_FORMAT)
+        return self._write(lambda conn: conn.execute(
+            "DELETE FROM crawl_jobs WHERE state = 'done' AND updated_at <= ?", (threshold,)).rowcount)
+
+    def describe(self):
+        """
+        キューの状態を表示用の文字列にする
+
+        Returns:
+            str: 状態の説明
+        """
+        stats = self.stats()
+        status = '一時停止中' if stats['paused'] else '実行可能'
+        return (f"キュー: {status} / 未処理 {stats['pending']}件（{stats['novels']}作品）, "
+                f"取得中 {stats['in_flight']}件, 完了 {stats['done']}件, 失敗 {stats['failed']}件")
+
+
+# 同じプロセスで同時に実行するワーカーは1つだけ
+_run_lock = threading.Lock()
+
+
+class CrawlRunner:
+    """
+    永続キューのジョブを借りて並列に取得し、データベースに保存するワーカー
+    """
+
+    def __init__(self, db_manager, crawl_queue=None, novel_manager=None, max_workers=None, fetch_episode=None,
+                 scheduler=None):
+        """
+        Args:
+            db_manager: データベースマネージャのインスタンス（DatabaseManager / DatabaseHandler）
+            crawl_queue (CrawlQueue, optional): キュー。Noneの場合は設定のデータベースのキュー
+            novel_manager (optional): 小説マネージャ（保存後にキャッシュを消去）
+            max_workers (int, optional): 取得を行うスレッド数。Noneの場合は設定の同時実行数の上限
+            fetch_episode (callable, optional): (ncode, episode_no, rating) -> (本文, タイトル)。
+                Noneの場合はcatch_up_episodeを使用
+            scheduler (UpdateScheduler, optional): 取得順を決めるスケジューラ。
+                指定した場合は開始時と実行中に一定間隔で優先順位を付け直す
+        """
+        from app.core.fetch_governor import get_fetch_governor
+
+        self.db_manager = db_manager
+        self.queue = crawl_queue or CrawlQueue()
+        self.novel_manager = novel_manager
+        self.max_workers = max(1, max_workers or get_fetch_governor().max_concurrency())
+        self._fetch_episode = fetch_episode
+        self.scheduler = scheduler
+        self.owner = f'{os.getpid()}-{id(self)}'
+
+    def _fetch(self, job):
+        """ジョブを1件取得（ワーカースレッドで実行）"""
+        if self._fetch_episode is None:
+            from app.core.checker import catch_up_episode
+            self._fetch_episode = catch_up_episode
+
+        ncode, episode_no, rating, _ = job
+        try:
+            body, title = self._fetch_episode(ncode, episode_no, rating)
+        except Exception as e:
+            return job, None, None, str(e)
+        if not body or not title or body.startswith(('Failed to retrieve', 'No content found')):
+            return job, None, None, body or '本文を取得できませんでした'
+        return job, body, title, None
+
+    def _reschedule(self):
+        """優先順位を付け直す（失敗しても取得は続ける）"""
+        if self.scheduler is None:
+            return
+        try:
+            self.scheduler.reschedule(self.queue)
+        except Exception as e:
+            logger.error(f"優先順位の付け直し中にエラー: {e}")
+
+    def _finalize(self, touched, update_time):
+        """エピソードを保存した小説の総エピソード数・更新時刻・キャッシュを更新"""
+        for ncode in touched:
+            try:
+                self.db_manager.update_total_episodes(ncode)
+                self.db_manager.execute_query(
+                    "UPDATE novels_descs SET updated_at = ? WHERE n_code = ?", (update_time, ncode))
+                if self.novel_manager is not None:
+                    self.novel_manager.clear_cache(ncode)
+            except Exception as e:
+                logger.error(f"小説 {ncode} の更新情報の反映中にエラー: {e}")
+
+    def run(self, progress_queue=None):
+        """
+        キューが空になるか一時停止されるまでジョブを処理
+
+        Args:
+            progress_queue (optional): 進捗状況を通知するキュー
+
+        Returns:
+            dict: {'done': 完了数, 'failed': 失敗数, 'retried': 再試行に回した数, 'paused': 一時停止で終了したか}。
+                他のワーカーが実行中の場合はNone
+        """
+        if not _run_lock.acquire(blocking=False):
+            logger.info("キューのワーカーは既に実行中です（追加したジョブはそのワーカーが処理します）")
+            return None
+
+        summary = {'done': 0, 'failed': 0, 'retried': 0, 'paused': False}
+        touched = set()
+        update_time = _now()
+        try:
+            stats = self.queue.stats()
+            total = stats[STATE_PENDING] + stats[STATE_IN_FLIGHT]
+            processed = 0
+            self._reschedule()
+            rescheduled_at = time.monotonic()
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                while True:
+                    if self.queue.is_paused():
+                        summary['paused'] = True
+                        logger.info("キューが一時停止されたため、処理を中断します")
+                        break
+                    if time.monotonic() - rescheduled_at >= RESCHEDULE_INTERVAL:
+                        self._reschedule()
+                        rescheduled_at = time.monotonic()
+                    jobs = self.queue.lease(self.owner, self.max_workers)
+                    if not jobs:
+                        break
+                    # 処理中に追加されたジョブも全体数に含める
+                    total = max(total, processed + len(jobs))
+
+                    for job, body, title, error in executor.map(self._fetch, jobs):
+                        ncode, episode_no, _, attempts = job
+                        if error is None:
+                            try:
+                                self.db_manager.insert_episode(ncode, episode_no, body, title, update_time)
+                            except Exception as e:
+                                error = f"保存エラー: {e}"
+                        if error is None:
+                            self.queue.complete(ncode, episode_no, self.owner)
+                            touched.add(ncode)
+                            summary['done'] += 1
+                        elif self.queue.fail(ncode, episode_no, error, attempts, self.owner) == STATE_FAILED:
+                            logger.warning(f"エピソード {ncode}-{episode_no} の取得に失敗しました: {error}")
+                            summary['failed'] += 1
+                        else:
+                            summary['retried'] += 1
+                        processed += 1
+
+                        if progress_queue:
+                            progress_queue.put({
+                                'percent': int(processed * 100 / total) if total else 100,
+                                'message': f"キューを処理中... エピソード {ncode}-{episode_no} ({processed}/{total})",
+                                'completed': processed,
+                                'total': total
+                            })
+        finally:
+            self._finalize(touched, update_time)
+            _run_lock.release()
+
+        logger.info(f"キューの処理を終了しました: 完了 {summary['done']}件, 失敗 {summary['failed']}件, "
+                    f"再試行待ち {summary['retried']}件{'（一時停止）' if summary['paused'] else ''}")
+        return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='エピソード取得キューの状態を確認・操作します')
+    parser.add_argument('--db', default=None, help='データベースファイルのパス（省略時は設定のパス）')
+    parser.add_argument('--status', action='store_true', help='キューの状態を表示')
+    parser.add_argument('--pause', action='store_true', help='キューを一時停止')
+    parser.add_argument('--resume', action='store_true', help='キューの一時停止を解除')
+    parser.add_argument('--retry', action='store_true', help='失敗したジョブを未処理に戻す')
+    parser.add_argument('--clear', action='store_true', help='完了したジョブを削除')
+    args = parser.parse_args()
+
+    crawl_queue = CrawlQueue(args.db)
+    if args.pause:
+        crawl_queue.pause()
+    if args.resume:
+        crawl_queue.resume()
+    if args.retry:
+        print(f"未処理に戻したジョブ: {crawl_queue.retry_failed()}件")
+    if args.clear:
+        print(f"削除した完了ジョブ: {crawl_queue.clear_done(0)}件")
+    print(crawl_queue.describe())
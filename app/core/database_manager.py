@@ -49,6 +49,14 @@ class DatabaseManager:
         """
         return self.db_handler.get_all_novels()
 
+    def get_novel_list_rows(self):
+        """
+        一覧表示に必要な列のみの小説情報を取得
+        Returns:
+            list: 小説情報のリスト（あらすじを含まない）
+        """
+        return self.db_handler.get_novel_list_rows()
+
     def get_novel_by_ncode(self, ncode):
         """
         指定されたncodeの小説情報を取得
@@ -127,24 +135,70 @@ class DatabaseManager:
         if update_time is None:
             update_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-        # 既存のエピソードをチェック
-        check_query = 'SELECT rowid FROM episodes WHERE ncode = ? AND episode_no = ?'
-        existing = self.execute_read_query(check_query, (ncode, episode_no), fetch_all=False)
-
-        if existing:
-            # 既存のエピソードを更新
-            update_query = '''
-            UPDATE episodes SET body = ?, e_title = ?, update_time = ?
-            WHERE ncode = ? AND episode_no = ?
-            '''
-            self.execute_query(update_query, (body, title, update_time, ncode, episode_no))
-        else:
-            # 新規エピソードを挿入
-            insert_query = '''
-            INSERT INTO episodes (ncode, episode_no, body, e_title, update_time)
-            VALUES (?, ?, ?, ?, ?)
-            '''
-            self.execute_query(insert_query, (ncode, episode_no, body, title, update_time))
+        # 本文の内容ハッシュの計算と変更の判定はDatabaseHandlerで行う
+        self.db_handler.insert_episode(ncode, episode_no, body, title, update_time)
+
+    def get_episode_headers(self, ncode):
+        """
+        エピソードの番号・タイトル・更新時刻を取得（本文は読み込まない）
+        Args:
+            ncode (str): 小説コード
+        Returns:
+            list: [(episode_no, e_title, update_time)]
+        """
+        return self.db_handler.get_episode_headers(ncode)
+
+    def touch_episodes(self, ncode, episode_nos, update_time):
+        """
+        エピソードの更新時刻だけを更新
+        Args:
+            ncode (str): 小説コード
+            episode_nos (list): エピソード番号のリスト
+            update_time (str): 更新時刻
+        """
+        self.db_handler.touch_episodes(ncode, episode_nos, update_time)
+
+    def get_episode_hashes(self, ncode):
+        """
+        エピソードの番号・タイトル・内容ハッシュを取得（本文は読み込まない）
+        Args:
+            ncode (str): 小説コード
+        Returns:
+            list: [(episode_no, e_title, content_hash)]（content_hash列がない場合はNone）
+        """
+        return self.db_handler.get_episode_hashes(ncode)
+
+    def get_episode_bodies(self, ncode, episode_nos):
+        """
+        指定されたエピソードの本文を取得
+        Args:
+            ncode (str): 小説コード
+            episode_nos (list): エピソード番号のリスト
+        Returns:
+            dict: {episode_no: body}
+        """
+        return self.db_handler.get_episode_bodies(ncode, episode_nos)
+
+    def fill_episode_hashes(self, ncode, hashes):
+        """
+        content_hashが未計算のエピソードに計算済みのハッシュを保存
+        Args:
+            ncode (str): 小説コード
+            hashes (dict): {episode_no: content_hash}
+        """
+        self.db_handler.fill_episode_hashes(ncode, hashes)
+
+    def swap_episodes(self, ncode, episodes, update_time=None):
+        """
+        取得し直したエピソードを比較して置き換え
+        Args:
+            ncode (str): 小説コード
+            episodes (list): [(episode_no, body, title, expected_hash, exists)]（DatabaseHandler.swap_episodesを参照）
+            update_time (str, optional): 更新時刻
+        Returns:
+            dict: {'changed': 置き換えた数, 'added': 追加した数, 'conflicts': 競合して見送った数}
+        """
+        return self.db_handler.swap_episodes(ncode, episodes, update_time)
 
     def execute_query(self, query, params=None, fetch=False, fetch_all=True, commit=True):
         """
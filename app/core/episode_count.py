@@ -0,0 +1,224 @@
+"""
+小説の話数（general_all_no）を少ないリクエストで求めるモジュール
+次の順に試し、先に求まった方法の結果を使います
+1. なろう小説API（一般・R18）の general_all_no を複数の小説まとめて取得
+2. 目次ページの最終ページから最後のエピソード番号を取得
+3. エピソードページの有無を指数探索と二分探索で調べる（通常のHTTPでO(log n)回）
+
+いずれの方法もブラウザ（Selenium）は使いません
+"""
+from concurrent.futures import ThreadPoolExecutor
+from app.core.fetch_governor import get_fetch_governor
+from app.core.novel_classifier import (
+    NovelClassifier, novel_url, RATING_GENERAL, RATING_MISSING, RATING_R18,
+)
+from app.core.rate_limiter import RateLimiter
+from app.core.toc_sync import parse_toc_page
+from app.utils.logger_manager import get_logger
+
+# ロガーの設定
+logger = get_logger('EpisodeCount')
+
+# エピソードページの本文の要素（これがあればエピソードが存在する）
+EPISODE_BODY_MARKER = b'p-novel__body'
+
+# 探索する話数の上限
+PROBE_LIMIT = 20000
+
+
+class EpisodeCountResolver:
+    """
+    小説の存在・レーティング・話数を求めるクラス
+    """
+
+    def __init__(self, requests_per_second=2.0, max_workers=None, http_get=None):
+        """
+        Args:
+            requests_per_second (float): 全スレッド合計での1秒あたりの最大リクエスト数
+            max_workers (int, optional): API以外の方法で求めるときのスレッド数。
+                Noneの場合は設定の同時実行数の上限
+            http_get (callable, optional): (url, params, cookies) -> (ステータスコード, 内容)。
+                Noneの場合はrequestsで取得
+        """
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.max_workers = max(1, max_workers or get_fetch_governor().max_concurrency())
+        self.classifier = NovelClassifier(http_get=http_get, rate_limiter=self.rate_limiter)
+        self._get = self.classifier.get
+
+    # --- 1. API ---
+
+    def resolve_from_api(self, ncodes):
+        """
+        一般・R18のAPIで小説のレーティングと話数をまとめて求める
+
+        Args:
+            ncodes (list): 小説コードのリスト
+
+        Returns:
+            dict: {小説コード: (rating, 話数)}（APIに見つからない小説は含まない）
+        """
+        results = {}
+        for ncode, (rating, item) in self.classifier.classify(ncodes, verify=False).items():
+            if item is None:
+                continue
+            # 短編（noveltype=2）は1話
+            count = 1 if item.get('noveltype') == 2 else item.get('general_all_no')
+            if count:
+                results[ncode] = (rating, int(count))
+        return results
+
+    # --- 2. 目次ページ ---
+
+    def resolve_from_toc(self, ncode, rating):
+        """
+        目次ページの最終ページから話数を求める（2リクエスト以内）
+
+        Args:
+            ncode (str): 小説コード
+            rating (int): レーティング
+
+        Returns:
+            int: 話数（目次ページがない・読み取れない場合はNone）
+        """
+        url, cookies = novel_url(ncode, rating)
+        status, content = self._get(url, cookies=cookies)
+        if status != 200:
+            return None
+        try:
+            entries, last_page = parse_toc_page(content)
+            if last_page > 1:
+                status, content = self._get(url, {'p': last_page}, cookies)
+                if status != 200:
+                    return None
+                entries, _ = parse_toc_page(content)
+        except Exception as e:
+            logger.warning(f"小説 {ncode} の目次を読み取れませんでした: {e}")
+            return None
+        numbers = [int(entry['episode_no']) for entry in entries]
+        return max(numbers) if numbers else None
+
+    # --- 3. 探索 ---
+
+    def episode_exists(self, ncode, rating, episode_no):
+        """
+        エピソードページが存在するかどうか
+
+        Args:
+            ncode (str): 小説コード
+            rating (int): レーティング
+            episode_no (int): エピソード番号
+
+        Returns:
+            bool: 存在する場合True
+        """
+        url, cookies = novel_url(ncode, rating)
+        status, content = self._get(f'{url}{episode_no}/', cookies=cookies)
+        return status == 200 and EPISODE_BODY_MARKER in content
+
+    def probe_episode_count(self, ncode, rating, limit=PROBE_LIMIT):
+        """
+        指数探索で存在しない話数の上限を見つけ、二分探索で最後の話数を求める
+
+        Args:
+            ncode (str): 小説コード
+            rating (int): レーティング
+            limit (int): 探索する話数の上限
+
+        Returns:
+            int: 話数（エピソードが見つからない場合は0）
+        """
+        if not self.episode_exists(ncode, rating, 1):
+            # 短編は小説のページに本文がある
+            url, cookies = novel_url(ncode, rating)
+            status, content = self._get(url, cookies=cookies)
+            return 1 if status == 200 and EPISODE_BODY_MARKER in content else 0
+
+        # 存在する話数 low と存在しない話数 high を求める
+        low, high = 1, 2
+        while high <= limit and self.episode_exists(ncode, rating, high):
+            low, high = high, high * 2
+        if high > limit:
+            if self.episode_exists(ncode, rating, limit):
+                logger.warning(f"小説 {ncode} は話数が{limit}を超えているため、調査を打ち切ります")
+                return limit
+            high = limit
+
+        # low は存在し、high は存在しない
+        while high - low > 1:
+            middle = (low + high) // 2
+            if self.episode_exists(ncode, rating, middle):
+                low = middle
+            else:
+                high = middle
+        return low
+
+    # --- まとめて実行 ---
+
+    def resolve_without_api(self, ncode, current_rating):
+        """
+        APIに見つからなかった小説を目次ページ・探索で調べる
+
+        Args:
+            ncode (str): 小説コード
+            current_rating (int): 現在のレーティング
+
+        Returns:
+            tuple: (rating, exists, max_episode)
+        """
+        # 現在のレーティングのサイトから先に調べる
+        ratings = (RATING_R18, RATING_GENERAL) if current_rating == RATING_R18 else (RATING_GENERAL, RATING_R18)
+        for rating in ratings:
+            count = self.resolve_from_toc(ncode, rating)
+            if count:
+                logger.info(f"小説 {ncode} の話数を目次ページから取得しました: {count}話")
+                return rating, True, count
+        for rating in ratings:
+            count = self.probe_episode_count(ncode, rating)
+            if count:
+                logger.info(f"小説 {ncode} の話数を探索で取得しました: {count}話")
+                return rating, True, count
+        return RATING_MISSING, False, 0
+
+    def resolve_many(self, novels):
+        """
+        複数の小説のレーティングと話数を求める
+
+        Args:
+            novels (list): [(n_code, 現在のrating)]
+
+        Returns:
+            dict: {n_code: (rating, exists, max_episode)}
+        """
+        ncodes = [n_code for n_code, _ in novels]
+        results = {
+            n_code: (rating, True, count)
+            for n_code, (rating, count) in self.resolve_from_api(ncodes).items()
+        }
+        logger.info(f"{len(ncodes)}件中 {len(results)}件の話数をAPIから取得しました")
+
+        remaining = [(n_code, rating) for n_code, rating in novels if n_code not in results]
+        if remaining:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {
+                    n_code: executor.submit(self.resolve_without_api, n_code, rating)
+                    for n_code, rating in remaining
+                }
+                for n_code, future in futures.items():
+                    try:
+                        results[n_code] = future.result()
+                    except Exception as e:
+                        logger.error(f"小説 {n_code} の話数の取得中にエラー: {e}")
+        return results
+
+    def resolve(self, ncode, current_rating):
+        """
+        1件の小説のレーティングと話数を求める
+
+        Args:
+            ncode (str): 小説コード
+            current_rating (int): 現在のレーティング
+
+        Returns:
+            tuple: (rating, exists, max_episode)
+        """
+        return self.resolve_many([(ncode, current_rating)]).get(ncode, (current_rating, False, 0))
@@ -0,0 +1,183 @@
+"""
+小説のエピソードを既存のデータを消さずに取得し直すモジュール
+- 取得前に既存エピソードの内容ハッシュを読み取り（本文は読み込まない）
+- 取得は取得間隔を制限したワーカースレッドで並列に行い、結果はメモリ上のバッチにためる
+- 内容ハッシュかタイトルが変わったエピソードだけを、バッチごとに一つのトランザクションで差し替える
+
+取得中も既存のエピソードはそのまま読めるため、途中で失敗しても元のデータは失われません
+"""
+import queue
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.core.rate_limiter import RateLimiter
+from app.database import episode_hash
+from app.utils.logger_manager import get_logger
+
+# ロガーの設定
+logger = get_logger('EpisodeRefetcher')
+
+
+class EpisodeRefetcher:
+    """
+    エピソードを並列に取得し直し、変わったものだけを差し替えるクラス
+    """
+
+    def __init__(self, db_manager, max_workers=4, requests_per_second=2.0, batch_size=20,
+                 max_retries=2, retry_delay=3, fetch_episode=None):
+        """
+        Args:
+            db_manager: データベースマネージャのインスタンス（DatabaseManager / DatabaseHandler）
+            max_workers (int): 取得を行うスレッド数
+            requests_per_second (float): 全スレッド合計での1秒あたりの最大取得数
+            batch_size (int): 1回のトランザクションで差し替える最大件数
+            max_retries (int): エピソード取得の最大試行回数
+            retry_delay (float): 再試行の待機時間の基準（秒）。試行ごとに倍になる
+            fetch_episode (callable, optional): (ncode, episode_no, rating) -> (本文, タイトル)。
+                Noneの場合はcatch_up_episodeを使用
+        """
+        self.db_manager = db_manager
+        self.max_workers = max(1, max_workers)
+        self.batch_size = max(1, batch_size)
+        self.max_retries = max(1, max_retries)
+        self.retry_delay = retry_delay
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self._fetch_episode = fetch_episode
+
+    def _snapshot(self, ncode):
+        """
+        既存エピソードのタイトルと内容ハッシュを取得
+
+        Args:
+            ncode (str): 小説コード
+
+        Returns:
+            dict: {episode_no: (e_title, 読み取り時のcontent_hash, 比較に使うハッシュ)}
+        """
+        rows = self.db_manager.get_episode_hashes(ncode)
+        if rows is None:
+            # content_hash列がない場合は本文から計算する
+            return {
+                str(episode[0]): (episode[1], None, episode_hash.body_hash(episode[2]))
+                for episode in self.db_manager.get_episodes_by_ncode(ncode)
+            }
+        snapshot = {str(episode_no): (title, stored, stored) for episode_no, title, stored in rows}
+
+        # ハッシュが未計算のエピソードは本文を読み込んで計算し、差し替え時の比較に使えるように保存する
+        missing = [episode_no for episode_no, (_, stored, _) in snapshot.items() if stored is None]
+        if missing:
+            bodies = self.db_manager.get_episode_bodies(ncode, missing)
+            computed = {}
+            for episode_no in missing:
+                content_hash = episode_hash.body_hash(bodies.get(episode_no))
+                if content_hash is not None:
+                    computed[episode_no] = content_hash
+                snapshot[episode_no] = (snapshot[episode_no][0], content_hash, content_hash)
+            self.db_manager.fill_episode_hashes(ncode, computed)
+        return snapshot
+
+    def _fetch(self, ncode, episode_no, rating):
+        """
+        エピソードを取得間隔の制限と指数バックオフ付きで取得（ワーカースレッドで実行）
+
+        Args:
+            ncode (str): 小説コード
+            episode_no (str): エピソード番号
+            rating (int): 小説のレーティング
+
+        Returns:
+            tuple: (episode_no, 本文, タイトル)。取得できなかった場合は本文・タイトルがNone
+        """
+        if self._fetch_episode is None:
+            from app.core.checker import catch_up_episode
+            self._fetch_episode = catch_up_episode
+
+        for attempt in range(self.max_retries):
+            self.rate_limiter.wait()
+            try:
+                body, title = self._fetch_episode(ncode, episode_no, rating)
+                if body and title:
+                    return episode_no, body, title
+                logger.warning(f"エピソード {ncode}-{episode_no} の取得に失敗しました (試行 {attempt + 1}/{self.max_retries})")
+            except Exception as e:
+                logger.error(f"エピソード {ncode}-{episode_no} の取得中にエラー: {e} (試行 {attempt + 1}/{self.max_retries})")
+            if attempt + 1 < self.max_retries:
+                # 指数バックオフ（同時に再試行が集中しないように揺らぎを加える）
+                time.sleep(self.retry_delay * (2 ** attempt) * random.uniform(0.5, 1.5))
+        return episode_no, None, None
+
+    def refetch(self, ncode, episode_nos, rating, update_time=None, progress_callback=None, touch_unchanged=False):
+        """
+        エピソードを取得し直し、変わったものだけを差し替える
+
+        Args:
+            ncode (str): 小説コード
+            episode_nos (iterable): 取得するエピソード番号
+            rating (int): 小説のレーティング
+            update_time (str, optional): 差し替えたエピソードに設定する更新時刻
+            progress_callback (callable, optional): (取得済みの数, 全体の数, 集計) を受け取る関数
+            touch_unchanged (bool): 内容が変わらなかったエピソードの更新時刻をupdate_timeにするかどうか
+                （目次の改稿日時と比較する場合に、確認済みであることを記録する）
+
+        Returns:
+            dict: {'fetched': 取得した数, 'changed': 内容が変わって差し替えた数, 'added': 新たに追加した数,
+                   'unchanged': 変わっていなかった数, 'failed': 取得できなかった数, 'conflicts': 競合して見送った数}
+        """
+        episode_nos = [str(episode_no) for episode_no in episode_nos]
+        snapshot = self._snapshot(ncode)
+        stats = {'fetched': 0, 'changed': 0, 'added': 0, 'unchanged': 0, 'failed': 0, 'conflicts': 0}
+        total = len(episode_nos)
+        if total == 0:
+            return stats
+
+        results = queue.Queue()
+        batch = []
+        unchanged_episodes = []
+
+        def flush():
+            swapped = self.db_manager.swap_episodes(ncode, batch, update_time)
+            for key, value in swapped.items():
+                stats[key] += value
+            batch.clear()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for episode_no in episode_nos:
+                executor.submit(self._fetch, ncode, episode_no, rating).add_done_callback(results.put)
+
+            for completed in range(1, total + 1):
+                future = results.get()
+                try:
+                    episode_no, body, title = future.result()
+                except Exception as e:
+                    logger.error(f"小説 {ncode} のエピソード取得中に例外が発生: {e}")
+                    body = None
+
+                if body is None:
+                    stats['failed'] += 1
+                else:
+                    stats['fetched'] += 1
+                    previous = snapshot.get(episode_no)
+                    if previous is None:
+                        batch.append((episode_no, body, title, None, False))
+                    elif previous[2] == episode_hash.body_hash(body) and previous[0] == title:
+                        # 内容が変わっていなければ書き込まない
+                        stats['unchanged'] += 1
+                        unchanged_episodes.append(episode_no)
+                    else:
+                        batch.append((episode_no, body, title, previous[1], True))
+
+                    if len(batch) >= self.batch_size:
+                        flush()
+
+                if progress_callback:
+                    progress_callback(completed, total, stats)
+
+        if batch:
+            flush()
+        if touch_unchanged and update_time and unchanged_episodes:
+            self.db_manager.touch_episodes(ncode, unchanged_episodes, update_time)
+
+        logger.info(
+            f"小説 {ncode} の再取得: 取得 {stats['fetched']}話, 変更 {stats['changed']}話, 追加 {stats['added']}話, "
+            f"変更なし {stats['unchanged']}話, 失敗 {stats['failed']}話, 競合 {stats['conflicts']}話")
+        return stats
@@ -0,0 +1,246 @@
+"""
+プロセス全体の取得を管理するモジュール
+- ホストごとのトークンバケットで、どの処理から取得しても合計の取得数を制限する
+- ホストごとの同時実行数を、応答時間と混雑の応答（429/503・タイムアウト）から自動で調整する（AIMD）
+- 同じキー（小説コードとエピソード番号など）の取得が実行中なら、後から来た呼び出しはその結果を共有する
+- 取得数・待機時間・失敗数・同時実行数の判断などの統計をホストごとにここで集計する
+
+エピソードの取得（catch_up_episode）は必ずここを経由します
+"""
+import threading
+import time
+from urllib.parse import urlsplit
+from app.core.concurrency_controller import (
+    AdaptiveConcurrency, outcome_from_exception, OUTCOME_FAILURE, OUTCOME_OK, OUTCOME_THROTTLED, OUTCOME_TIMEOUT,
+)
+from app.core.rate_limiter import TokenBucket
+from app.utils.logger_manager import get_logger
+
+# ロガーの設定
+logger = get_logger('FetchGovernor')
+
+# ホストごとの1秒あたりの取得数と連続して取得できる数
+HOST_LIMITS = {
+    'ncode.syosetu.com': (2.0, 4),
+    'novel18.syosetu.com': (1.0, 2),
+    'api.syosetu.com': (1.0, 2),
+}
+
+# HOST_LIMITSにないホストの制限
+DEFAULT_HOST_LIMIT = (1.0, 2)
+
+# 統計の項目
+METRIC_KEYS = ('requests', 'coalesced', 'failures', 'errors', 'throttled', 'timeouts',
+               'wait_seconds', 'fetch_seconds')
+
+
+class _InFlight:
+    """
+    実行中の取得（同じキーの呼び出しが結果を待つ）
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def host_of(url):
+    """
+    URLのホスト名を取得
+
+    Args:
+        url (str): URLまたはホスト名
+
+    Returns:
+        str: ホスト名
+    """
+    return urlsplit(url).hostname or url
+
+
+class FetchGovernor:
+    """
+    ホストごとの取得数・同時実行数の制限と、同じ取得の重複の排除を行うクラス
+    """
+
+    def __init__(self, host_limits=None, default_limit=DEFAULT_HOST_LIMIT, crawl_settings=None):
+        """
+        Args:
+            host_limits (dict, optional): {ホスト名: (1秒あたりの取得数, 連続して取得できる数)}
+            default_limit (tuple): 指定のないホストの制限
+            crawl_settings (dict, optional): 同時実行数の設定（SettingsManager.load_crawl_settingsの形式）。
+                Noneの場合は設定ファイルから読み込む
+        """
+        if crawl_settings is None:
+            from app.core.settings_manager import SettingsManager
+            from config import SETTINGS_FILE
+            crawl_settings = SettingsManager(SETTINGS_FILE).load_crawl_settings()
+        self.crawl_settings = crawl_settings
+        self.host_limits = dict(HOST_LIMITS if host_limits is None else host_limits)
+        self.default_limit = default_limit
+        self._buckets = {}
+        self._controllers = {}
+        self._in_flight = {}
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host):
+        """ホストのトークンバケット（初回に作成）"""
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                rate, capacity = self.host_limits.get(host, self.default_limit)
+                bucket = self._buckets[host] = TokenBucket(rate, capacity)
+            return bucket
+
+    def _controller(self, host):
+        """ホストの同時実行数の制御（初回に作成）"""
+        with self._lock:
+            controller = self._controllers.get(host)
+            if controller is None:
+                controller = self._controllers[host] = AdaptiveConcurrency(
+                    initial=self.crawl_settings['initial_concurrency'],
+                    minimum=self.crawl_settings['min_concurrency'],
+                    maximum=self.crawl_settings['max_concurrency'],
+                    latency_target=self.crawl_settings['latency_target'],
+                    name=host,
+                )
+            return controller
+
+    def _record(self, host, **values):
+        """ホストの統計を加算"""
+        with self._lock:
+            metrics = self._metrics.setdefault(host, dict.fromkeys(METRIC_KEYS, 0))
+            for key, value in values.items():
+                metrics[key] += value
+
+    def max_concurrency(self):
+        """
+        同時実行数の上限（取得を行うスレッドプールの大きさに使用）
+        実際の同時実行数はホストごとに自動で調整されます
+
+        Returns:
+            int: 上限
+        """
+        return max(1, self.crawl_settings['max_concurrency'])
+
+    def call(self, key, url, func, *args, outcome=None):
+        """
+        取得を実行（同じキーの取得が実行中なら、その結果を待って共有する）
+
+        Args:
+            key (hashable): 取得を識別するキー（Noneの場合は共有しない）
+            url (str): 取得するURLまたはホスト名（制限するホストの判定に使用）
+            func (callable): 取得を行う関数
+            *args: 関数の引数
+            outcome (callable, optional): 結果を受け取り、取得の結果（OUTCOME_*）を返す関数。
+                Noneの場合は例外がなければ正常とみなす
+
+        Returns:
+            関数の戻り値（例外も呼び出し元すべてに伝える）
+        """
+        host = host_of(url)
+        leader = True
+        if key is None:
+            call = _InFlight()
+        else:
+            with self._lock:
+                call = self._in_flight.get(key)
+                leader = call is None
+                if leader:
+                    call = self._in_flight[key] = _InFlight()
+
+        if not leader:
+            self._record(host, coalesced=1)
+            call.done.wait()
+        else:
+            try:
+                self._fetch(host, call, func, args, outcome)
+            finally:
+                if key is not None:
+                    with self._lock:
+                        del self._in_flight[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def _fetch(self, host, call, func, args, outcome):
+        """同時実行数の枠とトークンを確保して取得し、結果を統計と同時実行数の制御に記録"""
+        controller = self._controller(host)
+        controller.acquire()
+        result = OUTCOME_OK
+        waited = 0.0
+        started = time.monotonic()
+        try:
+            waited = self._bucket(host).acquire()
+            started = time.monotonic()
+            try:
+                call.result = func(*args)
+                if outcome is not None:
+                    result = outcome(call.result)
+            except Exception as e:
+                call.error = e
+                result = outcome_from_exception(e)
+        finally:
+            elapsed = time.monotonic() - started
+            controller.release(elapsed, result)
+
+        self._record(host, requests=1, wait_seconds=waited, fetch_seconds=elapsed,
+                     errors=int(call.error is not None and result != OUTCOME_TIMEOUT),
+                     failures=int(result == OUTCOME_FAILURE),
+                     throttled=int(result == OUTCOME_THROTTLED),
+                     timeouts=int(result == OUTCOME_TIMEOUT))
+
+    def metrics(self):
+        """
+        統計を取得
+
+        Returns:
+            dict: {ホスト名: {'requests', 'coalesced', 'failures', 'errors', 'throttled', 'timeouts',
+                   'wait_seconds', 'fetch_seconds', 'concurrency', 'decisions'}}
+                concurrencyは現在の同時実行数、decisionsは同時実行数の判断の履歴
+        """
+        with self._lock:
+            metrics = {host: dict(values) for host, values in self._metrics.items()}
+            controllers = dict(self._controllers)
+        for host, controller in controllers.items():
+            values = metrics.setdefault(host, dict.fromkeys(METRIC_KEYS, 0))
+            values['concurrency'] = controller.limit
+            values['decisions'] = list(controller.decisions)
+        return metrics
+
+    def reset_metrics(self):
+        """統計を消去"""
+        with self._lock:
+            self._metrics.clear()
+
+    def log_metrics(self):
+        """統計をログに出力"""
+        for host, values in sorted(self.metrics().items()):
+            logger.info(
+                f"{host}: 取得 {values['requests']}件, 共有 {values['coalesced']}件, 失敗 {values['failures']}件, "
+                f"エラー {values['errors']}件, 混雑 {values['throttled']}件, タイムアウト {values['timeouts']}件, "
+                f"待機 {values['wait_seconds']:.1f}秒, 取得時間 {values['fetch_seconds']:.1f}秒, "
+                f"同時実行数 {values.get('concurrency', '-')}")
+
+
+# プロセス全体で共有するインスタンス
+_governor = None
+_governor_lock = threading.Lock()
+
+
+def get_fetch_governor():
+    """
+    プロセス全体で共有するFetchGovernorを取得
+
+    Returns:
+        FetchGovernor: インスタンス
+    """
+    global _governor
+    if _governor is None:
+        with _governor_lock:
+            if _governor is None:
+                _governor = FetchGovernor()
+    return _governor
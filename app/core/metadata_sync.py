@@ -0,0 +1,213 @@
+"""
+前回の同期以降に更新された小説だけの小説情報を取得するモジュール
+- 前回までに確認した最新の更新日時（novelupdated_at / general_lastup）を同期の基準としてsync_stateに保存する
+- なろう小説APIに、登録している小説コードと「基準以降に更新された」条件（lastupdate）をまとめて指定する
+- 返ってきた（実際に更新された）小説だけを小説情報の反映（apply_novel_metadata）に渡す
+- 取得に失敗したまとまりがあった場合は基準を進めない（次回に同じ範囲を取り直す）
+
+使用例:
+    python -m app.core.metadata_sync            # 前回の同期以降に更新された小説情報を反映
+"""
+import argparse
+import datetime
+import sqlite3
+import time
+from app.core.novel_classifier import NovelClassifier, NOVEL_API_URL, NOVEL18_API_URL, RATING_GENERAL, RATING_R18
+from app.utils.logger_manager import get_logger
+from config import DATABASE_PATH
+
+# ロガーの設定
+logger = get_logger('MetadataSync')
+
+# 同期の基準を保存するキー
+HIGH_WATER_MARK_KEY = 'novel_metadata_high_water_mark'
+
+# 基準より少し前から取り直す秒数（サーバーの反映の遅れに備える）
+OVERLAP_SECONDS = 3600
+
+# 取得する項目（ncode・タイトル・作者・話数・あらすじ・更新日時・最終更新日時・最終掲載日）
+SYNC_FIELDS = 'n-t-w-ga-s-ua-nu-gl'
+
+# APIの日時のタイムゾーン（日本時間）
+API_TIMEZONE = datetime.timezone(datetime.timedelta(hours=9))
+
+# APIの日時の形式
+API_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+SYNC_STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def api_timestamp(value):
+    """
+    APIの日時（日本時間）をUNIX時間に変換
+
+    Args:
+        value (str): 日時の文字列
+
+    Returns:
+        int: UNIX時間（変換できない場合はNone）
+    """
+    try:
+        moment = datetime.datetime.strptime(str(value), API_TIME_FORMAT)
+    except (TypeError, ValueError):
+        return None
+    return int(moment.replace(tzinfo=API_TIMEZONE).timestamp())
+
+
+def to_metadata(item):
+    """
+    APIの項目を小説情報の反映（apply_novel_metadata）の形式に変換
+
+    Args:
+        item (dict): APIの項目
+
+    Returns:
+        dict: {'general_all_no', 'story', 'title', 'updated_at', 'writer'}
+    """
+    return {
+        'general_all_no': item.get('general_all_no'),
+        'story': item.get('story', ''),
+        'title': item.get('title', ''),
+        'updated_at': item.get('updated_at') or item.get('novelupdated_at'),
+        'writer': item.get('writer', ''),
+    }
+
+
+class MetadataSync:
+    """
+    前回の同期以降に更新された小説の小説情報だけを取得するクラス
+    """
+
+    def __init__(self, db_path=None, classifier=None):
+        """
+        Args:
+            db_path (str, optional): データベースファイルのパス。Noneの場合はconfigからパスを使用
+            classifier (NovelClassifier, optional): APIの問い合わせに使うインスタンス
+        """
+        self.db_path = db_path if db_path is not None else DATABASE_PATH
+        self.classifier = classifier or NovelClassifier()
+        self._schema_ready = False
+
+    def _connect(self):
+        """接続を開く（初回はテーブルを作成）"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._schema_ready:
+            conn.executescript(SYNC_STATE_SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    def high_water_mark(self):
+        """
+        同期の基準（これより後に更新された小説を取得する）
+
+        Returns:
+            int: UNIX時間（一度も同期していない場合はNone）
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT value FROM sync_state WHERE key = ?', (HIGH_WATER_MARK_KEY,)).fetchone()
+        finally:
+            conn.close()
+        return int(row[0]) if row and row[0] else None
+
+    def set_high_water_mark(self, timestamp):
+        """
+        同期の基準を保存
+
+        Args:
+            timestamp (int): UNIX時間
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)',
+                             (HIGH_WATER_MARK_KEY, str(int(timestamp))))
+        finally:
+            conn.close()
+
+    def fetch_changed(self, n_codes_ratings, since, until):
+        """
+        期間内に更新された小説の項目を取得
+
+        Args:
+            n_codes_ratings (list): [(n_code, rating)]（削除済みの小説は問い合わせない）
+            since (int): 期間の始まり（UNIX時間）
+            until (int): 期間の終わり（UNIX時間）
+
+        Returns:
+            tuple: ({n_code: APIの項目}, 取得に失敗した小説コードのリスト)
+        """
+        filters = {'lastupdate': f'{int(since)}-{int(until)}'}
+        changed = {}
+        failed = []
+        for rating, api_url in ((RATING_GENERAL, NOVEL_API_URL), (RATING_R18, NOVEL18_API_URL)):
+            ncodes = [n_code for n_code, novel_rating in n_codes_ratings if novel_rating == rating]
+            if not ncodes:
+                continue
+            items, api_failed = self.classifier.query_api(ncodes, api_url, SYNC_FIELDS, filters)
+            failed.extend(api_failed)
+            for n_code in ncodes:
+                if n_code.lower() in items:
+                    changed[n_code] = items[n_code.lower()]
+        return changed, failed
+
+    def sync(self, n_codes_ratings, apply):
+        """
+        前回の同期以降に更新された小説の小説情報を反映
+
+        Args:
+            n_codes_ratings (list): [(n_code, rating)]
+            apply (callable): (n_code, 小説情報) -> bool。小説情報を反映する関数
+
+        Returns:
+            list: 反映した小説の [(n_code, 更新日時)]。同期の基準がないか、取得に失敗した場合はNone
+        """
+        high_water_mark = self.high_water_mark()
+        if high_water_mark is None:
+            logger.info("同期の基準がないため、前回以降の更新を取得できません")
+            return None
+
+        until = int(time.time())
+        changed, failed = self.fetch_changed(n_codes_ratings, high_water_mark - OVERLAP_SECONDS, until)
+        if failed:
+            logger.warning(f"{len(failed)}件の小説の更新を取得できませんでした（同期の基準は進めません）")
+            return None
+
+        applied = []
+        latest = high_water_mark
+        for n_code, item in changed.items():
+            metadata = to_metadata(item)
+            if apply(n_code, metadata):
+                applied.append((n_code, metadata['updated_at']))
+            for key in ('novelupdated_at', 'general_lastup'):
+                timestamp = api_timestamp(item.get(key))
+                if timestamp is not None:
+                    latest = max(latest, min(timestamp, until))
+
+        self.set_high_water_mark(latest)
+        logger.info(f"前回の同期以降に更新された {len(applied)}件の小説情報を反映しました")
+        return applied
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='前回の同期以降に更新された小説の小説情報を設定のデータベースに反映します')
+    parser.parse_args()
+
+    from app.core.checker import apply_novel_metadata
+
+    metadata_sync = MetadataSync()
+    conn = sqlite3.connect(metadata_sync.db_path)
+    try:
+        novels = conn.execute('SELECT n_code, rating FROM novels_descs').fetchall()
+    finally:
+        conn.close()
+    result = metadata_sync.sync(novels, apply_novel_metadata)
+    if result is None:
+        print("前回以降の更新を取得できませんでした（update --metadata --full で全小説を確認してください）")
+    else:
+        print(f"反映した小説: {len(result)}件")
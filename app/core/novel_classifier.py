@@ -0,0 +1,267 @@
+"""
+小説の存在とレーティングをまとめて判定するモジュール
+- なろう小説API（一般・R18）に複数の小説コードをまとめて問い合わせる（ブラウザは使わない）
+- 一般APIにある小説は通常（2）、R18APIにある小説は18禁（1）、どちらにもない小説は削除済み（0）
+- APIの取得に失敗して判定できなかった小説だけを、小説のページ（HTML）で確認する
+
+使用例:
+    python -m app.core.novel_classifier            # 全小説のレーティングを確認し直す
+"""
+import argparse
+import json
+import random
+import sqlite3
+from app.core.concurrency_controller import outcome_from_status
+from app.core.fetch_governor import get_fetch_governor
+from app.core.rate_limiter import RateLimiter
+from app.utils.logger_manager import get_logger
+from config import DATABASE_PATH
+
+# ロガーの設定
+logger = get_logger('NovelClassifier')
+
+# なろう小説API（一般・R18）
+NOVEL_API_URL = 'https://api.syosetu.com/novelapi/api/'
+NOVEL18_API_URL = 'https://api.syosetu.com/novel18api/api/'
+
+# APIの1リクエストで問い合わせる小説数
+API_BATCH_SIZE = 100
+
+# 小説のページ（一般・R18）
+NOVEL_URL = 'https://ncode.syosetu.com/{ncode}/'
+NOVEL18_URL = 'https://novel18.syosetu.com/{ncode}/'
+
+# 小説のページにだけある要素（エラーページ・年齢確認ページにはない）
+NOVEL_PAGE_MARKERS = (b'p-novel__title', b'novel_title')
+
+# 作者が退会している場合のエラーメッセージ
+AUTHOR_DELETED_MARKER = 'エラーが発生しました。'.encode('utf-8')
+
+# レーティング（novels_descs.rating）
+RATING_DELETED = 0
+RATING_R18 = 1
+RATING_GENERAL = 2
+RATING_AUTHOR_DELETED = 4
+RATING_MISSING = 5
+
+# 削除済みを表すレーティング（確認し直しても削除済みなら変更しない）
+DELETED_RATINGS = (RATING_DELETED, RATING_AUTHOR_DELETED, RATING_MISSING)
+
+
+def default_http_get(url, params=None, cookies=None):
+    """
+    URLを取得（通常のHTTP）
+
+    Args:
+        url (str): URL
+        params (dict, optional): クエリパラメータ
+        cookies (dict, optional): Cookie
+
+    Returns:
+        tuple: (ステータスコード, 内容のバイト列)
+    """
+    import requests
+    from app.core.checker import USER_AGENTS
+
+    response = requests.get(url, params=params, cookies=cookies, timeout=30,
+                            headers={'User-Agent': random.choice(USER_AGENTS)})
+    return response.status_code, response.content
+
+
+def novel_url(ncode, rating):
+    """
+    小説のページのURLと年齢確認のCookie
+
+    Args:
+        ncode (str): 小説コード
+        rating (int): レーティング
+
+    Returns:
+        tuple: (URL, Cookie)
+    """
+    if rating == RATING_R18:
+        return NOVEL18_URL.format(ncode=ncode), {'over18': 'yes'}
+    return NOVEL_URL.format(ncode=ncode), None
+
+
+class NovelClassifier:
+    """
+    APIで小説の存在とレーティングをまとめて判定するクラス
+    """
+
+    def __init__(self, requests_per_second=2.0, http_get=None, rate_limiter=None):
+        """
+        Args:
+            requests_per_second (float): 1秒あたりの最大リクエスト数
+            http_get (callable, optional): (url, params, cookies) -> (ステータスコード, 内容)。
+                Noneの場合はrequestsで取得
+            rate_limiter (RateLimiter, optional): 他の処理と共有する取得間隔の制限
+        """
+        self.rate_limiter = rate_limiter or RateLimiter(requests_per_second)
+        self._http_get = http_get or default_http_get
+
+    def get(self, url, params=None, cookies=None):
+        """
+        取得間隔を守ってURLを取得
+
+        Returns:
+            tuple: (ステータスコード, 内容)。失敗した場合はステータスコード0
+        """
+        self.rate_limiter.wait()
+        try:
+            return get_fetch_governor().call(
+                None, url, self._http_get, url, params, cookies,
+                outcome=lambda result: outcome_from_status(result[0])
+            )
+        except Exception as e:
+            logger.error(f"{url} の取得中にエラー: {e}")
+            return 0, b''
+
+    def query_api(self, ncodes, api_url, fields='n-ga-nt', filters=None):
+        """
+        APIに複数の小説をまとめて問い合わせる
+
+        Args:
+            ncodes (list): 小説コードのリスト
+            api_url (str): APIのURL（一般・R18）
+            fields (str): 取得する項目（ofパラメータ）。ncode（n）は必ず含める
+            filters (dict, optional): 追加の条件（lastupdateなど）。条件に合う小説だけが返る
+
+        Returns:
+            tuple: ({小文字の小説コード: APIの項目}, 取得に失敗した小説コードのリスト)
+        """
+        items = {}
+        failed = []
+        for start in range(0, len(ncodes), API_BATCH_SIZE):
+            batch = ncodes[start:start + API_BATCH_SIZE]
+            params = {'out': 'json', 'of': fields, 'lim': len(batch), 'ncode': '-'.join(batch)}
+            params.update(filters or {})
+            status, content = self.get(api_url, params)
+            if status != 200:
+                logger.warning(f"APIの取得に失敗しました: {api_url} (ステータスコード: {status})")
+                failed.extend(batch)
+                continue
+            try:
+                # 先頭の要素は件数（allcount）
+                for item in json.loads(content)[1:]:
+                    items[item['ncode'].lower()] = item
+            except (ValueError, TypeError, KeyError, AttributeError) as e:
+                logger.warning(f"APIの応答を読み取れませんでした: {e}")
+                failed.extend(batch)
+        return items, failed
+
+    def verify_page(self, ncode):
+        """
+        APIで判定できなかった小説を小説のページで確認
+
+        Args:
+            ncode (str): 小説コード
+
+        Returns:
+            int: レーティング（ページを取得できなかった場合はNone）
+        """
+        reachable = False
+        author_deleted = False
+        for rating in (RATING_GENERAL, RATING_R18):
+            url, cookies = novel_url(ncode, rating)
+            status, content = self.get(url, cookies=cookies)
+            if status == 0:
+                continue
+            reachable = True
+            if status == 200 and any(marker in content for marker in NOVEL_PAGE_MARKERS):
+                return rating
+            author_deleted = author_deleted or AUTHOR_DELETED_MARKER in content
+        if not reachable:
+            return None
+        return RATING_AUTHOR_DELETED if author_deleted else RATING_DELETED
+
+    def classify(self, ncodes, fields='n-ga-nt', verify=True):
+        """
+        小説の存在とレーティングをまとめて判定
+
+        Args:
+            ncodes (list): 小説コードのリスト
+            fields (str): APIから取得する項目
+            verify (bool): APIで判定できなかった小説を小説のページで確認するかどうか
+
+        Returns:
+            dict: {小説コード: (rating, APIの項目)}。APIの項目はAPIにない場合None、
+                判定できなかった小説は含まない
+        """
+        results = {}
+        general, general_failed = self.query_api(ncodes, NOVEL_API_URL, fields)
+        remaining = [ncode for ncode in ncodes if ncode.lower() not in general]
+        for ncode in ncodes:
+            if ncode.lower() in general:
+                results[ncode] = (RATING_GENERAL, general[ncode.lower()])
+
+        r18, r18_failed = self.query_api(remaining, NOVEL18_API_URL, fields) if remaining else ({}, [])
+        ambiguous = set(general_failed) | set(r18_failed)
+        for ncode in remaining:
+            if ncode.lower() in r18:
+                results[ncode] = (RATING_R18, r18[ncode.lower()])
+            elif ncode not in ambiguous:
+                # どちらのAPIにもない小説は削除済み
+                results[ncode] = (RATING_DELETED, None)
+
+        leftovers = [ncode for ncode in remaining if ncode not in results]
+        if leftovers:
+            logger.info(f"APIで判定できなかった {len(leftovers)}件の小説を確認します")
+            if verify:
+                for ncode in leftovers:
+                    rating = self.verify_page(ncode)
+                    if rating is not None:
+                        results[ncode] = (rating, None)
+        return results
+
+
+def revalidate_ratings(db_path=None, classifier=None):
+    """
+    全小説のレーティングをAPIで確認し直し、変わったものだけを更新
+
+    Args:
+        db_path (str, optional): データベースファイルのパス。Noneの場合はconfigからパスを使用
+        classifier (NovelClassifier, optional): 判定に使うインスタンス
+
+    Returns:
+        dict: {'checked': 確認した数, 'changed': レーティングを変更した数, 'unknown': 判定できなかった数}
+    """
+    classifier = classifier or NovelClassifier()
+    conn = sqlite3.connect(db_path or DATABASE_PATH, timeout=30)
+    try:
+        novels = conn.execute('SELECT n_code, rating FROM novels_descs').fetchall()
+        results = classifier.classify([n_code for n_code, _ in novels], fields='n')
+
+        updates = []
+        for n_code, current in novels:
+            if n_code not in results:
+                continue
+            rating = results[n_code][0]
+            if rating == RATING_DELETED and current in DELETED_RATINGS:
+                # 削除済みとして記録済みの小説はそのまま
+                continue
+            if rating != current:
+                updates.append((rating, n_code))
+                logger.info(f"小説 {n_code} のレーティングを変更します: {current} -> {rating}")
+
+        conn.execute('BEGIN IMMEDIATE')
+        conn.executemany('UPDATE novels_descs SET rating = ? WHERE n_code = ?', updates)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    stats = {'checked': len(novels), 'changed': len(updates), 'unknown': len(novels) - len(results)}
+    logger.info(f"{stats['checked']}件の小説のレーティングを確認しました"
+                f"（変更: {stats['changed']}件, 判定できなかったもの: {stats['unknown']}件）")
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='全小説の存在とレーティングをAPIで確認し直します')
+    parser.add_argument('--db', default=None, help='データベースファイルのパス（省略時は設定のパス）')
+    args = parser.parse_args()
+    result = revalidate_ratings(args.db)
+    print(f"確認: {result['checked']}件, 変更: {result['changed']}件, 判定できなかったもの: {result['unknown']}件")
@@ -2,6 +2,10 @@
 小説データを管理するモジュール
 """
 import threading
+from app.core.catalog_snapshot import (
+    CatalogSnapshot, RowView, ensure_change_counter, get_catalog_version, make_sort_key, write_snapshot
+)
+from app.core.search_index import NovelSearchIndex
 from app.utils.logger_manager import get_logger
 
 # ロガーの設定
@@ -25,7 +29,109 @@ class NovelManager:
         self.novels = []  # 全小説リスト
         self.last_read_novel = None
         self.last_read_episode = 0
+        self.search_index = NovelSearchIndex()  # 小説検索用インデックス
+        self.catalog_snapshot = None  # 起動時に読み込んだカタログスナップショット
     
+    def load_catalog(self):
+        """
+        起動時の小説一覧を読み込む
+        カタログスナップショットがあればそれをマップし、なければ一覧表示に必要な列のみを読み込みます
+
+        Returns:
+            bool: 読み込みに成功した場合True
+        """
+        snapshot = CatalogSnapshot.load()
+        if snapshot is None:
+            return self.load_novel_list()
+
+        with self.lock:
+            self.catalog_snapshot = snapshot
+            self.novels = snapshot
+        logger.info(f"カタログスナップショットから{len(snapshot)}件の小説一覧を読み込みました")
+        return True
+
+    def refresh_catalog(self):
+        """
+        カタログスナップショットの鮮度を確認し、必要な場合のみデータベースから再読み込みする
+        （起動後にバックグラウンドで呼び出す）
+
+        Returns:
+            bool: 処理に成功した場合True
+        """
+        try:
+            ensure_change_counter(self.db_manager)
+            catalog_version = get_catalog_version(self.db_manager)
+        except Exception as e:
+            logger.error(f"カタログバージョンの取得エラー: {e}")
+            return self.load_novels()
+
+        snapshot = self.catalog_snapshot
+        if snapshot is not None and snapshot.catalog_version == catalog_version:
+            logger.info(f"カタログスナップショットは最新です (version {catalog_version})")
+            self._load_last_read()
+            self.rebuild_search_index(background=True)
+            return True
+
+        # データベースが変更されている場合は全件を読み込み直してスナップショットを更新
+        if not self.load_novels():
+            return False
+        self._write_catalog_snapshot(self.get_all_novels(), catalog_version)
+        return True
+
+    def save_catalog_snapshot(self, catalog_version=None):
+        """
+        現在の小説リストをカタログスナップショットとして保存
+
+        Args:
+            catalog_version (int, optional): 小説リストを読み込む前に取得したカタログバージョン。
+                Noneの場合はここで取得する（読み込み後の変更を含んだバージョンになる場合があります）
+        """
+        try:
+            if catalog_version is None:
+                catalog_version = get_catalog_version(self.db_manager)
+            self._write_catalog_snapshot(self.get_all_novels(), catalog_version)
+        except Exception as e:
+            logger.error(f"カタログスナップショットの保存エラー: {e}")
+
+    def _write_catalog_snapshot(self, novels, catalog_version):
+        """
+        起動時に読み込んだスナップショットのマップを閉じてから、スナップショットを書き込む
+
+        Args:
+            novels (list): 小説リスト
+            catalog_version (int): カタログバージョン
+        """
+        with self.lock:
+            snapshot = self.catalog_snapshot
+            self.catalog_snapshot = None
+        if snapshot is not None:
+            snapshot.close()
+        write_snapshot(novels, catalog_version)
+
+    def _load_last_read(self):
+        """最後に読んだ小説の情報を読み込む"""
+        last_read_info = self.db_manager.get_last_read_novel()
+        if last_read_info:
+            last_read_ncode, self.last_read_episode = last_read_info
+            self.last_read_novel = self.get_novel(last_read_ncode)
+
+    def load_novel_list(self):
+        """
+        一覧表示に必要な列のみを読み込む（起動時に一覧を素早く表示するため）
+        あらすじを含む完全なデータと検索インデックスは後からload_novelsで読み込みます
+
+        Returns:
+            bool: 読み込みに成功した場合True
+        """
+        with self.lock:
+            try:
+                self.novels = self.db_manager.get_novel_list_rows()
+                logger.info(f"{len(self.novels)}件の小説一覧を読み込みました")
+                return True
+            except Exception as e:
+                logger.error(f"小説一覧の読み込みエラー: {e}")
+                return False
+
     def load_novels(self):
         """小説データを読み込む"""
         with self.lock:
@@ -44,11 +150,13 @@ class NovelManager:
                         if novel[0] == last_read_ncode:
                             self.last_read_novel = novel
                             break
-                
-                return True
             except Exception as e:
                 logger.error(f"小説データの読み込みエラー: {e}")
                 return False
+
+        # 検索インデックスはロックの外で構築する（構築中も一覧の取得をブロックしない）
+        self.rebuild_search_index(background=True)
+        return True
     
     def get_all_novels(self):
         """
@@ -59,6 +167,40 @@ class NovelManager:
         """
         with self.lock:
             return self.novels
+
+    def get_sorted_row_ids(self, sort_key, descending=False):
+        """
+        指定したソート順の行IDを取得（スナップショットに保存済みの順序があれば再ソートしない）
+
+        Args:
+            sort_key (str): ソートキー（updated_at / n_code / title / total_ep）
+            descending (bool): 降順かどうか
+
+        Returns:
+            list: get_all_novelsのリストに対する行IDのリスト
+        """
+        novels = self.get_all_novels()
+        if novels is self.catalog_snapshot:
+            row_ids = novels.get_sorted_row_ids(sort_key, descending)
+            if row_ids is not None:
+                return row_ids
+
+        key = make_sort_key(sort_key)
+        return sorted(range(len(novels)), key=lambda i: key(novels[i]), reverse=descending)
+
+    def get_sorted_novels(self, sort_key, descending=False):
+        """
+        指定したソート順の小説リストを取得（参照した行だけがデコードされるビュー）
+
+        Args:
+            sort_key (str): ソートキー
+            descending (bool): 降順かどうか
+
+        Returns:
+            RowView: ソート済みの小説リスト
+        """
+        novels = self.get_all_novels()
+        return RowView(novels, self.get_sorted_row_ids(sort_key, descending))
     
     def get_novel(self, ncode):
         """
@@ -163,6 +305,14 @@ class NovelManager:
         """
         小説データを再読み込み
         """
+        # 読み込み中の変更を取りこぼさないよう、カタログバージョンは読み込む前に取得する
+        try:
+            ensure_change_counter(self.db_manager)
+            catalog_version = get_catalog_version(self.db_manager)
+        except Exception as e:
+            logger.error(f"カタログバージョンの取得エラー: {e}")
+            catalog_version = None
+
         with self.lock:
             # キャッシュをクリア
             self.clear_cache()
@@ -170,3 +320,41 @@ class NovelManager:
             # 小説リストを更新
             self.novels = self.db_manager.get_all_novels()
             logger.info(f"{len(self.novels)}件の小説データを再読み込みしました")
+
+        self.rebuild_search_index(background=True)
+        if catalog_version is not None:
+            self.save_catalog_snapshot(catalog_version)
+
+    def rebuild_search_index(self, background=False):
+        """
+        現在の小説リストから検索インデックスを再構築
+
+        Args:
+            background (bool): 転置インデックスをバックグラウンドで構築するかどうか
+        """
+        try:
+            self.search_index.build(self.get_all_novels(), background=background)
+        except Exception as e:
+            logger.error(f"検索インデックスの構築エラー: {e}")
+
+    def search_novels(self, query, cancel_event=None):
+        """
+        小説を検索
+
+        Args:
+            query (str): 検索語（n_code・タイトル・作者名・あらすじの部分一致）
+            cancel_event (threading.Event, optional): セットされたら検索を中断する
+
+        Returns:
+            list: 一致した小説情報のリスト（中断された場合はNone）
+        """
+        novels = self.get_all_novels()
+        if self.search_index.source is not novels:
+            # 検索インデックスの構築前（起動直後など）は小説リストを直接走査する
+            text = self.search_index.normalize(query.strip() if query else "")
+            return [novel for novel in novels if text in self.search_index.make_document(novel)]
+
+        row_ids = self.search_index.search(query, cancel_event)
+        if row_ids is None:
+            return None
+        return self.search_index.get_rows(row_ids)
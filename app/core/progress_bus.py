@@ -0,0 +1,308 @@
+"""
+更新処理の進捗をUIへ伝えるイベントバス
+- タスクごとに進捗を集約（最新の進捗率・メッセージを優先）
+- UIへの反映はフレームレート単位に間引く
+- 実際の完了速度からスループットと残り時間を算出
+"""
+import threading
+import time
+from app.utils.logger_manager import get_logger
+
+# ロガーの設定
+logger = get_logger('ProgressBus')
+
+# UIへの反映間隔（ミリ秒、約30fps）
+FRAME_INTERVAL_MS = 33
+
+# 既定のタスク名
+DEFAULT_TASK = 'default'
+
+# スループットの指数移動平均の係数
+RATE_SMOOTHING = 0.3
+
+# スループットを計算する最小の時間間隔（秒）
+MIN_RATE_INTERVAL = 0.5
+
+
+class _RateTracker:
+    """完了数の推移からスループットと残り時間を推定するクラス"""
+
+    def __init__(self):
+        self.counted = False  # 完了数による計測を行っているかどうか
+        self.total = None
+        self.last_completed = None
+        self.last_time = None
+        self.rate = None
+
+    def update(self, completed, total, now):
+        """
+        完了数を記録
+
+        Args:
+            completed (float): 完了数
+            total (float): 総数
+            now (float): 現在時刻（time.monotonic）
+
+        Returns:
+            tuple: (スループット[件/秒], 残り時間[秒])（算出できない場合はNone）
+        """
+        # 総数が変わった・完了数が戻った場合は計測をやり直す
+        if total != self.total or self.last_completed is None or completed < self.last_completed:
+            self.total = total
+            self.last_completed = completed
+            self.last_time = now
+            self.rate = None
+            return None, None
+
+        elapsed = now - self.last_time
+        if elapsed >= MIN_RATE_INTERVAL:
+            instant_rate = (completed - self.last_completed) / elapsed
+            if self.rate is None:
+                self.rate = instant_rate
+            else:
+                self.rate = RATE_SMOOTHING * instant_rate + (1 - RATE_SMOOTHING) * self.rate
+            self.last_completed = completed
+            self.last_time = now
+
+        if not self.rate or self.rate <= 0 or total is None:
+            return self.rate, None
+
+        return self.rate, max(0.0, (total - completed) / self.rate)
+
+
+class ProgressBus:
+    """
+    進捗イベントを集約するバス
+    queue.Queueと同じputで進捗を受け取り、UIスレッドは変化したタスクの最新状態だけを受け取ります
+
+    進捗データ（辞書）のキー:
+        show (bool): 進捗表示の表示/非表示
+        percent (int): 進捗率
+        message (str): 進捗メッセージ
+        completed (int): 完了数（スループットの算出に使用）
+        total (int): 総数
+        task (str): タスク名（省略時は既定のタスク）
+    UIに渡される状態には rate（件/秒）と eta（残り秒数）が追加されます
+    """
+
+    def __init__(self):
+        """初期化"""
+        self.lock = threading.Lock()
+        self.pending = {}  # {task: 前回の取得以降に変化したキーと値}
+        self.order = []  # 変化したタスクの順序（最後が最新）
+        self.trackers = {}  # {task: _RateTracker}
+        self.received = 0  # 受け取ったイベント数
+        self.delivered = 0  # UIに渡した状態の数
+
+        self._poll_after_id = None
+
+    def put(self, progress_data, block=True, timeout=None):
+        """
+        進捗イベントを送信（queue.Queue.put互換）
+
+        Args:
+            progress_data (dict or str): 進捗データ（文字列の場合はメッセージとして扱う）
+            block: 互換性のための引数（未使用）
+            timeout: 互換性のための引数（未使用）
+        """
+        if isinstance(progress_data, dict):
+            update = dict(progress_data)
+        else:
+            update = {'show': True, 'message': str(progress_data)}
+
+        task = update.pop('task', DEFAULT_TASK)
+        now = time.monotonic()
+
+        with self.lock:
+            self.received += 1
+
+            # スループットと残り時間を算出（完了数を送らないタスクは進捗率から推定する）
+            tracker = self.trackers.get(task)
+            if tracker is None:
+                tracker = self.trackers[task] = _RateTracker()
+
+            completed = None
+            if 'completed' in update:
+                tracker.counted = True
+                completed, total = update['completed'], update.get('total')
+            elif 'percent' in update and not tracker.counted:
+                completed, total = update['percent'], 100
+
+            if completed is not None:
+                rate, eta = tracker.update(completed, total, now)
+                update['rate'] = rate
+                update['eta'] = eta
+
+            if update.get('show') is False:
+                # 表示終了時は計測をリセット
+                self.trackers.pop(task, None)
+
+            state = self.pending.get(task)
+            if state is None:
+                self.pending[task] = update
+            else:
+                state.update(update)
+                self.order.remove(task)
+            self.order.append(task)
+
+    def put_nowait(self, progress_data):
+        """進捗イベントを送信（queue.Queue.put_nowait互換）"""
+        self.put(progress_data)
+
+    def empty(self):
+        """
+        未取得の進捗があるかどうか
+
+        Returns:
+            bool: 未取得の進捗がない場合True
+        """
+        with self.lock:
+            return not self.pending
+
+    def drain(self):
+        """
+        前回の取得以降に変化したタスクの状態を取得
+
+        Returns:
+            list: [(task, state)] のリスト（古い順）
+        """
+        with self.lock:
+            if not self.pending:
+                return []
+            changes = [(task, self.pending[task]) for task in self.order]
+            self.pending = {}
+            self.order = []
+            self.delivered += len(changes)
+        return changes
+
+    def scoped(self, start_percent, end_percent, task=None):
+        """
+        進捗率を指定範囲に変換して送信する送信口を作成
+
+        Args:
+            start_percent (float): 開始進捗率（全体に対する割合）
+            end_percent (float): 終了進捗率（全体に対する割合）
+            task (str, optional): 送信先のタスク名
+
+        Returns:
+            ScopedProgress: put可能な送信口
+        """
+        return ScopedProgress(self, start_percent, end_percent, task)
+
+    def start_polling(self, widget, on_update, interval_ms=FRAME_INTERVAL_MS):
+        """
+        フレームレート間隔で進捗をUIに反映するループを開始（既に開始済みなら何もしない）
+
+        Args:
+            widget: afterを持つTkinterウィジェット
+            on_update: 状態を受け取るコールバック on_update(task, state)
+            interval_ms (int): 反映間隔（ミリ秒）
+        """
+        if self._poll_after_id is not None:
+            return
+
+        def poll():
+            self._poll_after_id = None
+            try:
+                if not widget.winfo_exists():
+                    return
+            except Exception:
+                return
+
+            for task, state in self.drain():
+                try:
+                    on_update(task, state)
+                except Exception as e:
+                    logger.error(f"進捗の反映中にエラーが発生しました: {e}")
+
+            self._poll_after_id = widget.after(interval_ms, poll)
+
+        self._poll_after_id = widget.after(interval_ms, poll)
+
+    def stop_polling(self, widget):
+        """
+        進捗の反映ループを停止
+
+        Args:
+            widget: start_pollingに渡したウィジェット
+        """
+        if self._poll_after_id is not None:
+            try:
+                widget.after_cancel(self._poll_after_id)
+            except Exception:
+                pass
+            self._poll_after_id = None
+
+
+class ScopedProgress:
+    """進捗率を全体の一部の範囲に変換して親のバスに送信する送信口"""
+
+    def __init__(self, bus, start_percent, end_percent, task=None):
+        """
+        初期化
+
+        Args:
+            bus: 送信先（ProgressBusまたはput可能なオブジェクト）
+            start_percent (float): 開始進捗率
+            end_percent (float): 終了進捗率
+            task (str, optional): 送信先のタスク名
+        """
+        self.bus = bus
+        self.start_percent = start_percent
+        self.end_percent = end_percent
+        self.task = task
+
+    def put(self, progress_data, block=True, timeout=None):
+        """
+        進捗イベントを送信（queue.Queue.put互換）
+
+        Args:
+            progress_data (dict or str): 進捗データ
+        """
+        if isinstance(progress_data, dict):
+            progress_data = dict(progress_data)
+            if 'percent' in progress_data:
+                original_percent = progress_data['percent']
+                progress_data['percent'] = int(
+                    self.start_percent + (original_percent / 100) * (self.end_percent - self.start_percent)
+                )
+            if self.task is not None:
+                progress_data.setdefault('task', self.task)
+        elif self.task is not None:
+            progress_data = {'show': True, 'message': str(progress_data), 'task': self.task}
+
+        self.bus.put(progress_data)
+
+    def put_nowait(self, progress_data):
+        """進捗イベントを送信（queue.Queue.put_nowait互換）"""
+        self.put(progress_data)
+
+
+def format_rate_eta(state):
+    """
+    状態のスループットと残り時間を表示用文字列に変換
+
+    Args:
+        state (dict): 進捗状態
+
+    Returns:
+        str: 表示用文字列（算出できていない場合は空文字）
+    """
+    parts = []
+
+    eta = state.get('eta')
+    if eta is not None:
+        minutes, seconds = divmod(int(eta), 60)
+        if minutes >= 60:
+            hours, minutes = divmod(minutes, 60)
+            parts.append(f"残り約{hours}時間{minutes}分")
+        elif minutes > 0:
+            parts.append(f"残り約{minutes}分{seconds}秒")
+        else:
+            parts.append(f"残り約{seconds}秒")
+
+    rate = state.get('rate')
+    if rate and state.get('total') is not None and 'completed' in state:
+        parts.append(f"{rate:.1f}件/秒")
+
+    return " / ".join(parts)
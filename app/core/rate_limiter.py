@@ -0,0 +1,84 @@
+"""
+スレッド間で共有する取得間隔の制限（一定間隔・トークンバケット）を提供するモジュール
+"""
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    スレッド間で共有する取得間隔の制限
+    各スレッドは自分の取得枠の時刻まで待ってから取得します
+    """
+
+    def __init__(self, requests_per_second):
+        """
+        Args:
+            requests_per_second (float): 1秒あたりの最大取得数（0以下の場合は制限なし）
+        """
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self, stop_event=None):
+        """
+        次の取得枠まで待機
+
+        Args:
+            stop_event (threading.Event, optional): 中断用のイベント（セットされると待機を打ち切る）
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            if stop_event is not None:
+                stop_event.wait(delay)
+            else:
+                time.sleep(delay)
+
+
+class TokenBucket:
+    """
+    スレッド間で共有するトークンバケット
+    平均の取得数を制限しつつ、容量までの連続した取得（バースト）を許可します
+    """
+
+    def __init__(self, rate, capacity=1):
+        """
+        Args:
+            rate (float): 1秒あたりに補充するトークン数（0以下の場合は制限なし）
+            capacity (int): バケットの容量（連続して取得できる最大数）
+        """
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, stop_event=None):
+        """
+        トークンを1つ取得（足りない場合は補充されるまで待機）
+
+        Args:
+            stop_event (threading.Event, optional): 中断用のイベント（セットされると待機を打ち切る）
+
+        Returns:
+            float: 待機した秒数
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # 先にトークンを予約し、不足分が補充される時刻まで待つ（待機の順番を守る）
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if delay > 0:
+            if stop_event is not None:
+                stop_event.wait(delay)
+            else:
+                time.sleep(delay)
+        return delay
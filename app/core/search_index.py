@@ -0,0 +1,338 @@
+"""
+小説検索用のインメモリn-gramインデックスを提供するモジュール
+- 小説一覧から一度だけ構築するtrigram転置インデックス
+- 入力中検索のデバウンスと古い検索の取り消し
+- 検索結果は行ID（小説リストのインデックス）で返す
+"""
+import threading
+import time
+from array import array
+from collections import defaultdict
+from app.utils.logger_manager import get_logger
+
+# ロガーの設定
+logger = get_logger('SearchIndex')
+
+# 検索対象フィールドのインデックス（n_code, title, author, Synopsis）
+SEARCH_FIELD_INDEXES = (0, 1, 2, 7)
+
+# フィールド区切り文字（検索語には含まれないため、フィールドを跨いだ一致を防ぐ）
+FIELD_SEPARATOR = '\n'
+
+# キャンセル確認の間隔（走査する行数）
+CANCEL_CHECK_INTERVAL = 2048
+
+# インデックス構築中に他スレッドへ処理を譲る間隔（行数）
+BUILD_YIELD_INTERVAL = 500
+
+
+class NovelSearchIndex:
+    """
+    小説のn_code・タイトル・作者名・あらすじを対象としたn-gram転置インデックス
+    部分一致検索の結果は従来の小文字化した部分文字列検索と同じになります
+    """
+
+    def __init__(self, ngram=3):
+        """
+        初期化
+
+        Args:
+            ngram (int): インデックスに使用するn-gramの長さ
+        """
+        self.ngram = ngram
+        self.lock = threading.RLock()
+        self.source = []  # インデックスの構築元となった小説リスト
+        self.documents = []  # 行IDごとの正規化済み検索テキスト
+        self.postings = {}  # {gram: array('I') 行IDの昇順リスト}
+        self.ready = False  # 転置インデックスの構築が完了したかどうか
+
+        # 入力中検索用の直前の検索結果
+        self._last_query = None
+        self._last_result = None
+
+    @staticmethod
+    def normalize(text):
+        """
+        検索用にテキストを正規化
+
+        Args:
+            text: 正規化する値
+
+        Returns:
+            str: 小文字化したテキスト
+        """
+        if not text:
+            return ""
+        return str(text).lower()
+
+    def make_document(self, novel):
+        """
+        小説データから検索テキストを作成
+
+        Args:
+            novel (tuple): 小説データ
+
+        Returns:
+            str: 検索対象フィールドを連結した正規化済みテキスト
+        """
+        return FIELD_SEPARATOR.join(
+            self.normalize(novel[i]) for i in SEARCH_FIELD_INDEXES if i < len(novel) and novel[i]
+        )
+
+    def build(self, novels, background=False):
+        """
+        小説リストからインデックスを構築（小説データの読み込み・再読み込み時に呼び出す）
+        検索テキストは同期的に用意するため、転置インデックスの構築中も走査検索で応答できます
+
+        Args:
+            novels (list): 小説情報のリスト
+            background (bool): 転置インデックスをバックグラウンドスレッドで構築するかどうか
+        """
+        documents = [self.make_document(novel) for novel in novels]
+        with self.lock:
+            self.source = novels
+            self.documents = documents
+            self.postings = {}
+            self.ready = False
+            self._last_query = None
+            self._last_result = None
+
+        if background:
+            thread = threading.Thread(target=self._build_postings, args=(documents,))
+            thread.daemon = True
+            thread.start()
+        else:
+            self._build_postings(documents)
+
+    def _build_postings(self, documents):
+        """
+        検索テキストからn-gramの転置インデックスを構築
+
+        Args:
+            documents (list): 行IDごとの正規化済み検索テキスト
+        """
+        start_time = time.perf_counter()
+        n = self.ngram
+
+        lists = defaultdict(list)
+        for row_id, text in enumerate(documents):
+            for gram in {text[i:i + n] for i in range(len(text) - n + 1)}:
+                lists[gram].append(row_id)
+            if row_id % BUILD_YIELD_INTERVAL == 0:
+                # UIスレッドが応答できるようにGILを手放す
+                time.sleep(0)
+
+        # 行IDリストはメモリ効率のため配列に変換して保持
+        postings = {gram: array('I', row_ids) for gram, row_ids in lists.items()}
+        del lists
+
+        with self.lock:
+            # 構築中に別の構築が始まっていた場合は破棄
+            if self.documents is not documents:
+                return
+            self.postings = postings
+            self.ready = True
+
+        elapsed = (time.perf_counter() - start_time) * 1000
+        logger.info(f"検索インデックスを構築しました: {len(documents)}件, {len(postings)}gram ({elapsed:.0f}ms)")
+
+    def search(self, query, cancel_event=None):
+        """
+        検索語を含む小説の行IDを取得
+
+        Args:
+            query (str): 検索語
+            cancel_event (threading.Event, optional): セットされたら検索を中断する
+
+        Returns:
+            list: 一致した行IDの昇順リスト（中断された場合はNone）
+        """
+        text = self.normalize(query.strip() if query else "")
+
+        with self.lock:
+            documents = self.documents
+            postings = self.postings if self.ready else None
+            last_query, last_result = self._last_query, self._last_result
+
+        if not text:
+            return list(range(len(documents)))
+
+        # 直前の検索語を含む検索語なら、直前の結果だけを絞り込めばよい
+        if last_query and last_result is not None and last_query in text:
+            candidates = last_result
+        elif postings is not None and len(text) >= self.ngram:
+            candidates = self._candidates_from_postings(text, postings)
+        else:
+            candidates = range(len(documents))
+
+        result = []
+        for count, row_id in enumerate(candidates):
+            if cancel_event is not None and count % CANCEL_CHECK_INTERVAL == 0 and cancel_event.is_set():
+                return None
+            if text in documents[row_id]:
+                result.append(row_id)
+
+        with self.lock:
+            if self.documents is documents:
+                self._last_query = text
+                self._last_result = result
+
+        return result
+
+    def _candidates_from_postings(self, text, postings):
+        """
+        検索語のn-gramのポスティングから候補行IDを取得
+
+        Args:
+            text (str): 正規化済みの検索語
+            postings (dict): 転置インデックス
+
+        Returns:
+            iterable: 候補行IDの昇順リスト
+        """
+        n = self.ngram
+        lists = []
+        for gram in {text[i:i + n] for i in range(len(text) - n + 1)}:
+            posting = postings.get(gram)
+            if posting is None:
+                # 含まれないgramがあれば一致する小説は存在しない
+                return []
+            lists.append(posting)
+
+        lists.sort(key=len)
+        candidates = lists[0]
+
+        # 2番目に短いポスティングとの積集合で候補をさらに絞り込む
+        if len(lists) > 1 and len(candidates) > 64:
+            second = set(lists[1])
+            candidates = [row_id for row_id in candidates if row_id in second]
+
+        return candidates
+
+    def get_rows(self, row_ids):
+        """
+        行IDから小説データを取得
+
+        Args:
+            row_ids (list): 行IDのリスト
+
+        Returns:
+            list: 小説データのリスト
+        """
+        with self.lock:
+            source = self.source
+        return [source[row_id] for row_id in row_ids if row_id < len(source)]
+
+
+class SearchDebouncer:
+    """
+    入力中の検索をデバウンスし、古い検索結果を破棄するヘルパークラス
+    Tkinterウィジェットのafterでスケジュールし、検索自体はバックグラウンドスレッドで実行します
+    """
+
+    def __init__(self, widget, search_func, on_result, delay_ms=250):
+        """
+        初期化
+
+        Args:
+            widget: after/after_cancelを持つTkinterウィジェット
+            search_func: 検索関数 search_func(query, cancel_event) -> 結果（中断時はNone）
+            on_result: 結果を受け取るコールバック on_result(query, result)（メインスレッドで呼ばれる）
+            delay_ms (int): 最後の入力から検索開始までの待機時間（ミリ秒）
+        """
+        self.widget = widget
+        self.search_func = search_func
+        self.on_result = on_result
+        self.delay_ms = delay_ms
+
+        self._after_id = None
+        self._generation = 0
+        self._cancel_event = None
+
+    def submit(self, query, immediate=False):
+        """
+        検索を予約（既に予約・実行中の検索は取り消す）
+
+        Args:
+            query (str): 検索語
+            immediate (bool): 待機せずに検索を開始するかどうか
+        """
+        self.cancel()
+        delay = 0 if immediate else self.delay_ms
+        self._after_id = self.widget.after(delay, self._start, query)
+
+    def cancel(self):
+        """予約中・実行中の検索を取り消す"""
+        if self._after_id is not None:
+            try:
+                self.widget.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+            self._cancel_event = None
+
+        # 実行中の検索結果が届いても破棄されるように世代を進める
+        self._generation += 1
+
+    def _start(self, query):
+        """検索スレッドを開始（メインスレッドで呼ばれる）"""
+        self._after_id = None
+        generation = self._generation
+        cancel_event = threading.Event()
+        self._cancel_event = cancel_event
+
+        thread = threading.Thread(target=self._run, args=(query, generation, cancel_event))
+        thread.daemon = True
+        thread.start()
+
+    def _run(self, query, generation, cancel_event):
+        """検索を実行（バックグラウンドスレッド用）"""
+        try:
+            start_time = time.perf_counter()
+            result = self.search_func(query, cancel_event)
+            elapsed = (time.perf_counter() - start_time) * 1000
+        except Exception as e:
+            logger.error(f"検索中にエラーが発生しました: {e}")
+            return
+
+        if result is None or cancel_event.is_set():
+            logger.debug(f"検索が取り消されました: {query}")
+            return
+
+        logger.debug(f"検索 '{query}' が完了しました ({elapsed:.1f}ms)")
+        try:
+            self.widget.after(0, self._deliver, query, generation, result)
+        except Exception:
+            # ウィジェットが破棄済みの場合は結果を破棄
+            pass
+
+    def _deliver(self, query, generation, result):
+        """最新の検索結果のみをコールバックに渡す（メインスレッドで呼ばれる）"""
+        if generation != self._generation:
+            return
+        self._cancel_event = None
+        self.on_result(query, result)
+
+
+# 簡易ベンチマーク
+if __name__ == "__main__":
+    import random
+
+    random.seed(0)
+    chars = "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわをん勇者魔王転生異世界"
+    novels = [
+        (f"n{i:04d}ab", ''.join(random.choices(chars, k=20)), ''.join(random.choices(chars, k=6)),
+         None, 2, 10, 10, ''.join(random.choices(chars, k=300)))
+        for i in range(50000)
+    ]
+
+    index = NovelSearchIndex()
+    index.build(novels)
+
+    for query in ["勇者", "魔王転生", "異世界の", "n1234"]:
+        start = time.perf_counter()
+        hits = index.search(query)
+        print(f"{query}: {len(hits)}件 {(time.perf_counter() - start) * 1000:.2f}ms")
@@ -26,6 +26,14 @@ class SettingsManager:
         self.default_fontsize = 14
         self.default_backgroundcolor = "#FFFFFF"
 
+        # 取得の同時実行数のデフォルト設定（[Crawl]セクション）
+        self.default_crawl_settings = {
+            'initial_concurrency': 2,
+            'min_concurrency': 1,
+            'max_concurrency': 8,
+            'latency_target': 3.0,
+        }
+
     def load_settings(self):
         """
         設定ファイルを読み込む
@@ -134,4 +142,32 @@ class SettingsManager:
 
         except Exception as e:
             logger.error(f"設定の保存に失敗しました: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    def load_crawl_settings(self):
+        """
+        取得の同時実行数の設定を読み込む（[Crawl]セクション、ない項目はデフォルト値）
+
+        Returns:
+            dict: {'initial_concurrency', 'min_concurrency', 'max_concurrency', 'latency_target'}
+        """
+        settings = dict(self.default_crawl_settings)
+        config = configparser.ConfigParser()
+        if os.path.exists(self.config_file):
+            try:
+                with open(self.config_file, 'r', encoding='utf-8') as f:
+                    config.read_file(f)
+            except (UnicodeDecodeError, configparser.Error) as e:
+                logger.warning(f"取得の設定を読み込めませんでした: {e}")
+                return settings
+
+        if config.has_section('Crawl'):
+            for key, default in self.default_crawl_settings.items():
+                try:
+                    if isinstance(default, float):
+                        settings[key] = config.getfloat('Crawl', key, fallback=default)
+                    else:
+                        settings[key] = config.getint('Crawl', key, fallback=default)
+                except ValueError:
+                    logger.warning(f"取得の設定 {key} が不正なため、デフォルト値 {default} を使用します")
+        return settings
@@ -0,0 +1,170 @@
+"""
+アプリケーションの段階的起動を管理するモジュール
+- 一覧表示までに必要な処理（クリティカルパス）と後回しにできる処理を分離
+- 後回しの処理はバックグラウンドで順に実行し、終了時には中断可能
+- 各段階の所要時間を計測してレポートを出力
+"""
+import threading
+import time
+from contextlib import contextmanager
+from app.utils.logger_manager import get_logger
+
+# ロガーの設定
+logger = get_logger('Startup')
+
+
+class StartupProfiler:
+    """起動処理の段階ごとの所要時間を記録するクラス"""
+
+    def __init__(self, origin=None):
+        """
+        初期化
+
+        Args:
+            origin (float, optional): 計測の基準時刻（time.perf_counter）。省略時は現在時刻
+        """
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.lock = threading.Lock()
+        self.records = []  # [(段階名, 開始時刻, 所要時間, 種別, 状態)]
+
+    def record(self, name, start, end, kind="critical", status="ok"):
+        """
+        計測結果を記録
+
+        Args:
+            name (str): 段階名
+            start (float): 開始時刻（time.perf_counter）
+            end (float): 終了時刻（time.perf_counter）
+            kind (str): 種別（critical / deferred / mark）
+            status (str): 状態（ok / error / cancelled）
+        """
+        with self.lock:
+            self.records.append((name, start - self.origin, end - start, kind, status))
+
+    @contextmanager
+    def stage(self, name, kind="critical"):
+        """
+        with文で段階の所要時間を計測
+
+        Args:
+            name (str): 段階名
+            kind (str): 種別
+        """
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            self.record(name, start, time.perf_counter(), kind, status)
+
+    def mark(self, name):
+        """
+        起動からの経過時刻を記録（初回描画など）
+
+        Args:
+            name (str): 記録名
+        """
+        now = time.perf_counter()
+        self.record(name, now, now, "mark")
+
+    def report(self):
+        """
+        計測結果のレポートを作成
+
+        Returns:
+            str: 段階ごとの開始時刻と所要時間の一覧
+        """
+        with self.lock:
+            records = sorted(self.records, key=lambda r: r[1])
+
+        lines = ["起動プロファイル（起動からの経過時間）:",
+                 f"{'開始(ms)':>10} {'所要(ms)':>10}  {'種別':<9} {'状態':<9} 段階"]
+        for name, offset, duration, kind, status in records:
+            duration_text = "-" if kind == "mark" else f"{duration * 1000:.1f}"
+            lines.append(f"{offset * 1000:>10.1f} {duration_text:>10}  {kind:<9} {status:<9} {name}")
+        return "\n".join(lines)
+
+
+class StagedStartup:
+    """クリティカルパスと後回しの段階を分けて起動処理を実行するクラス"""
+
+    def __init__(self, profiler=None):
+        """
+        初期化
+
+        Args:
+            profiler (StartupProfiler, optional): 計測に使用するプロファイラ
+        """
+        self.profiler = profiler or StartupProfiler()
+        self.cancel_event = threading.Event()
+        self.deferred_stages = []  # [(段階名, 関数)]
+        self.thread = None
+        self.finished = threading.Event()
+
+    def run_critical(self, name, func, *args):
+        """
+        クリティカルパスの段階を実行（例外は呼び出し元に送出）
+
+        Args:
+            name (str): 段階名
+            func: 実行する関数
+            *args: 関数の引数
+
+        Returns:
+            関数の戻り値
+        """
+        with self.profiler.stage(name, "critical"):
+            return func(*args)
+
+    def add_deferred(self, name, func, *args):
+        """
+        後回しにする段階を登録（登録順に実行される）
+
+        Args:
+            name (str): 段階名
+            func: 実行する関数
+            *args: 関数の引数
+        """
+        self.deferred_stages.append((name, func, args))
+
+    def start_deferred(self, on_finished=None):
+        """
+        後回しの段階をバックグラウンドスレッドで順に実行
+
+        Args:
+            on_finished: 全段階の終了（中断を含む）時に呼ばれるコールバック
+        """
+        def run():
+            for name, func, args in self.deferred_stages:
+                if self.cancel_event.is_set():
+                    now = time.perf_counter()
+                    self.profiler.record(name, now, now, "deferred", "cancelled")
+                    continue
+
+                logger.info(f"起動処理: {name} を開始します")
+                try:
+                    with self.profiler.stage(name, "deferred"):
+                        func(*args)
+                except Exception as e:
+                    # 後回しの段階の失敗はアプリケーションの起動を妨げない
+                    logger.error(f"起動処理 {name} でエラーが発生しました: {e}")
+
+            self.finished.set()
+            if on_finished:
+                try:
+                    on_finished()
+                except Exception as e:
+                    logger.error(f"起動処理の完了通知でエラーが発生しました: {e}")
+
+        self.thread = threading.Thread(target=run, name="DeferredStartup")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def cancel(self):
+        """未実行の後回しの段階を中断"""
+        if not self.finished.is_set():
+            logger.info("残りの起動処理を中断します")
+        self.cancel_event.set()
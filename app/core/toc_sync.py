@@ -0,0 +1,244 @@
+"""
+小説の目次ページから新着・改稿エピソードを検出するモジュール
+- 本文ではなく目次ページ（100話ごとに1ページ）だけを取得する
+- 各エピソードのタイトルと掲載日時・改稿日時を読み取り、保存済みのe_title/update_timeと比較
+- 結果（新着・改稿エピソードの番号）はエピソードの取得処理（EpisodeRefetcher）にそのまま渡せる
+
+保存済みのupdate_timeはエピソードを取得した日時のため、改稿日時がそれより後のものを改稿とみなします
+"""
+import datetime
+import random
+import re
+from app.core.concurrency_controller import outcome_from_status
+from app.core.fetch_governor import get_fetch_governor
+from app.core.rate_limiter import RateLimiter
+from app.utils.logger_manager import get_logger
+
+# ロガーの設定
+logger = get_logger('TocSync')
+
+# 目次ページのURL（ページ番号は1から）
+TOC_URL = 'https://ncode.syosetu.com/{ncode}/?p={page}'
+TOC18_URL = 'https://novel18.syosetu.com/{ncode}/?p={page}'
+
+# 目次ページの日時の形式（例: 2024/01/02 03:04）
+TOC_DATETIME_PATTERN = re.compile(r'(\d{4})/(\d{1,2})/(\d{1,2})\s+(\d{1,2}):(\d{2})')
+
+# エピソードへのリンクからエピソード番号を取り出す
+EPISODE_HREF_PATTERN = re.compile(r'/(\d+)/?$')
+
+# ページ送りのリンクからページ番号を取り出す
+PAGE_HREF_PATTERN = re.compile(r'[?&]p=(\d+)')
+
+# データベースに保存している日時の形式
+STORED_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def parse_toc_datetime(text):
+    """
+    目次ページの日時を datetime に変換
+
+    Args:
+        text (str): 日時を含む文字列
+
+    Returns:
+        datetime.datetime: 日時（見つからない場合はNone）
+    """
+    match = TOC_DATETIME_PATTERN.search(text or '')
+    if not match:
+        return None
+    return datetime.datetime(*(int(value) for value in match.groups()))
+
+
+def parse_stored_datetime(text):
+    """
+    保存済みのupdate_timeを datetime に変換
+
+    Args:
+        text (str): update_time
+
+    Returns:
+        datetime.datetime: 日時（未設定・形式が異なる場合はNone）
+    """
+    try:
+        return datetime.datetime.strptime(text, STORED_DATETIME_FORMAT)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_toc_page(html):
+    """
+    目次ページからエピソードの一覧と最終ページの番号を読み取る
+
+    Args:
+        html (str | bytes): 目次ページのHTML
+
+    Returns:
+        tuple: ([{'episode_no', 'title', 'published_at', 'revised_at'}], 最終ページの番号)
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    entries = []
+
+    # 現行のレイアウト（p-eplist）と旧レイアウト（novel_sublist2）の両方に対応
+    rows = soup.select('div.p-eplist__sublist') or soup.select('dl.novel_sublist2')
+    for row in rows:
+        link = row.select_one('a.p-eplist__subtitle') or row.select_one('dd.subtitle a')
+        if link is None:
+            continue
+        match = EPISODE_HREF_PATTERN.search(link.get('href', ''))
+        if not match:
+            continue
+
+        update = row.select_one('.p-eplist__update') or row.select_one('dt.long_update')
+        revised_at = None
+        if update is not None:
+            revised = update.find(attrs={'title': re.compile('改稿')})
+            if revised is not None:
+                revised_at = parse_toc_datetime(revised.get('title'))
+
+        entries.append({
+            'episode_no': match.group(1),
+            'title': link.get_text(strip=True),
+            'published_at': parse_toc_datetime(update.get_text(' ', strip=True)) if update is not None else None,
+            'revised_at': revised_at,
+        })
+
+    last_page = 1
+    for pager in soup.select('a.c-pager__item--last, a.novelview_pager-last'):
+        match = PAGE_HREF_PATTERN.search(pager.get('href', ''))
+        if match:
+            last_page = max(last_page, int(match.group(1)))
+    return entries, last_page
+
+
+def fetch_toc_page(ncode, rating, page):
+    """
+    目次ページを取得して読み取る（年齢制限のある小説は年齢確認のCookieを付けて取得）
+
+    Args:
+        ncode (str): 小説コード
+        rating (int): レーティング（1の場合は年齢制限あり）
+        page (int): ページ番号
+
+    Returns:
+        tuple: parse_toc_pageの結果（取得できなかった場合はNone）
+    """
+    import requests
+    from app.core.checker import USER_AGENTS
+
+    url = (TOC18_URL if rating == 1 else TOC_URL).format(ncode=ncode, page=page)
+    headers = {'User-Agent': random.choice(USER_AGENTS)}
+    cookies = {'over18': 'yes'} if rating == 1 else None
+    response = get_fetch_governor().call(
+        None, url, lambda: requests.get(url, headers=headers, cookies=cookies, timeout=30),
+        outcome=lambda r: outcome_from_status(r.status_code)
+    )
+    if response.status_code != 200:
+        logger.error(f"目次ページの取得に失敗しました: {url} (ステータスコード: {response.status_code})")
+        return None
+    return parse_toc_page(response.content)
+
+
+def diff_toc(entries, stored):
+    """
+    目次のエピソードと保存済みのエピソードを比較
+
+    Args:
+        entries (list): parse_toc_pageで読み取ったエピソード
+        stored (dict): {episode_no: (e_title, update_time)}
+
+    Returns:
+        tuple: (新着エピソードの番号のリスト, 改稿されたエピソードの番号のリスト)
+    """
+    new_episodes = []
+    revised_episodes = []
+    for entry in entries:
+        episode_no = entry['episode_no']
+        if episode_no not in stored:
+            new_episodes.append(episode_no)
+            continue
+
+        stored_title, stored_time = stored[episode_no]
+        if (stored_title or '').strip() != entry['title']:
+            revised_episodes.append(episode_no)
+            continue
+
+        # 取得した日時より後に改稿（または掲載）されていれば取得し直す
+        fetched_at = parse_stored_datetime(stored_time)
+        changed_at = entry['revised_at'] or entry['published_at']
+        if fetched_at is not None and changed_at is not None and changed_at > fetched_at:
+            revised_episodes.append(episode_no)
+    return new_episodes, revised_episodes
+
+
+class TocSync:
+    """
+    目次ページを使って新着・改稿エピソードを検出するクラス
+    """
+
+    def __init__(self, db_manager, requests_per_second=1.0, fetch_page=None):
+        """
+        Args:
+            db_manager: データベースマネージャのインスタンス（DatabaseManager / DatabaseHandler）
+            requests_per_second (float): 1秒あたりの最大取得数
+            fetch_page (callable, optional): (ncode, rating, page) -> parse_toc_pageの結果。
+                Noneの場合はfetch_toc_pageを使用
+        """
+        self.db_manager = db_manager
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self._fetch_page = fetch_page or fetch_toc_page
+
+    def fetch_toc(self, ncode, rating):
+        """
+        目次の全ページを取得
+
+        Args:
+            ncode (str): 小説コード
+            rating (int): レーティング
+
+        Returns:
+            tuple: (エピソードのリスト, 取得したページ数)（1ページ目を取得できなかった場合はNone）
+        """
+        self.rate_limiter.wait()
+        first = self._fetch_page(ncode, rating, 1)
+        if first is None:
+            return None
+        entries, last_page = first
+        entries = list(entries)
+        for page in range(2, last_page + 1):
+            self.rate_limiter.wait()
+            result = self._fetch_page(ncode, rating, page)
+            if result is None:
+                logger.warning(f"小説 {ncode} の目次 {page}ページ目を取得できなかったため、以降のページを省略します")
+                return entries, page - 1
+            entries.extend(result[0])
+        return entries, last_page
+
+    def sync(self, ncode, rating):
+        """
+        目次と保存済みのエピソードを比較して新着・改稿エピソードを検出
+
+        Args:
+            ncode (str): 小説コード
+            rating (int): レーティング
+
+        Returns:
+            dict: {'new': 新着エピソードの番号, 'revised': 改稿されたエピソードの番号,
+                   'entries': 目次のエピソード数, 'pages': 取得したページ数}（目次を取得できなかった場合はNone）
+        """
+        toc = self.fetch_toc(ncode, rating)
+        if toc is None:
+            logger.error(f"小説 {ncode} の目次を取得できませんでした")
+            return None
+        entries, pages = toc
+
+        stored = {
+            str(episode_no): (title, update_time)
+            for episode_no, title, update_time in self.db_manager.get_episode_headers(ncode)
+        }
+        new_episodes, revised_episodes = diff_toc(entries, stored)
+        logger.info(f"小説 {ncode} の目次を確認しました（{pages}ページ, {len(entries)}話）: "
+                    f"新着 {len(new_episodes)}話, 改稿 {len(revised_episodes)}話")
+        return {'new': new_episodes, 'revised': revised_episodes, 'entries': len(entries), 'pages': pages}
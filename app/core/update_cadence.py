@@ -0,0 +1,270 @@
+"""
+小説の更新間隔から次の更新を予測し、小説情報の確認（API）を必要な小説だけに絞るモジュール
+- 小説情報の更新日時（last_update_date）の履歴と、エピソードの更新時刻（episodes.update_time）を更新の記録とする
+- 全小説の更新の間隔をSQLのウィンドウ関数（LAG）でまとめて計算し、小説ごとの中央値を更新間隔とする
+- 最後の更新から更新間隔が経った小説（次の更新が予想される小説）だけを確認する
+- 長く更新されていない小説ほど確認の間隔を延ばす（最長でもMAX_POLL_DAYSごとに確認する）
+- 予測を外した小説を見つけるため、確認しない小説からも一部を無作為に選んで確認する
+
+使用例:
+    python -m app.core.update_cadence            # 今回確認する小説の数を表示
+"""
+import argparse
+import datetime
+import random
+import sqlite3
+from app.utils.logger_manager import get_logger
+from config import DATABASE_PATH
+
+# ロガーの設定
+logger = get_logger('UpdateCadence')
+
+# 更新の記録が少ない小説の更新間隔（日）
+DEFAULT_INTERVAL_DAYS = 7.0
+
+# 更新間隔の計算に必要な間隔の数
+MIN_GAPS = 2
+
+# 確認の間隔の下限・上限（日）。上限を超えて確認しない小説はない
+MIN_POLL_DAYS = 0.5
+MAX_POLL_DAYS = 30.0
+
+# 予想の更新日を過ぎた小説の確認の間隔（最後の更新からの日数に対する割合）
+DORMANCY_FACTOR = 0.1
+
+# 確認しない小説から無作為に確認する割合
+EXPLORATION_RATE = 0.02
+
+# 確認しない小説（削除済み）のレーティング
+SKIP_RATINGS = (0, 4, 5)
+
+# データベースに保存する日時の形式
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+UPDATE_CADENCE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS novel_update_history (
+    ncode TEXT NOT NULL,
+    last_update_date TEXT NOT NULL,
+    PRIMARY KEY (ncode, last_update_date)
+);
+CREATE TABLE IF NOT EXISTS novel_poll_state (
+    ncode TEXT PRIMARY KEY,
+    last_polled_at TEXT
+);
+"""
+
+# 小説ごとの更新日（1日1件）と前回の更新からの間隔（日）
+UPDATE_GAPS_QUERY = """
+WITH events AS (
+    SELECT ncode, julianday(date(t)) AS day
+    FROM (
+        SELECT ncode, last_update_date AS t FROM novel_update_history
+        UNION ALL SELECT n_code, last_update_date FROM novels_descs
+        UNION ALL SELECT ncode, update_time FROM episodes
+    )
+    WHERE julianday(t) IS NOT NULL
+    GROUP BY ncode, day
+)
+SELECT ncode, day, day - LAG(day) OVER (PARTITION BY ncode ORDER BY day) AS gap
+FROM events
+"""
+
+
+def _julian(moment):
+    """
+    日時をユリウス日（SQLiteのjulianday）に変換
+
+    データベースの日時と同じく、タイムゾーンのない日時をそのまま換算する（UTCへの変換はしない）
+    """
+    if moment.tzinfo is not None:
+        moment = moment.replace(tzinfo=None)
+    return (moment - datetime.datetime(1970, 1, 1)).total_seconds() / 86400.0 + 2440587.5
+
+
+def median(values):
+    """
+    中央値を計算
+
+    Args:
+        values (list): 値のリスト
+
+    Returns:
+        float: 中央値（値がない場合はNone）
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2.0
+
+
+def next_poll_day(last_update_day, interval, last_polled_day):
+    """
+    次に確認する日を計算
+
+    Args:
+        last_update_day (float): 最後の更新日（ユリウス日、更新の記録がない場合はNone）
+        interval (float): 更新間隔（日）
+        last_polled_day (float): 最後に確認した日（ユリウス日、確認したことがない場合はNone）
+
+    Returns:
+        float: 次に確認する日（ユリウス日、すぐに確認する場合はNone）
+    """
+    if last_polled_day is None or last_update_day is None:
+        return None
+    expected = last_update_day + interval
+    # 予想の更新日を過ぎても更新がない小説は、最後の更新から時間が経つほど確認の間隔を延ばす
+    age = max(0.0, last_polled_day - last_update_day)
+    backoff = min(MAX_POLL_DAYS, max(MIN_POLL_DAYS, DORMANCY_FACTOR * age))
+    return min(max(expected, last_polled_day + backoff), last_polled_day + MAX_POLL_DAYS)
+
+
+class RefreshPlanner:
+    """
+    更新間隔の予測から、小説情報を確認する小説を選ぶクラス
+    """
+
+    def __init__(self, db_path=None, exploration_rate=EXPLORATION_RATE, rng=None):
+        """
+        Args:
+            db_path (str, optional): データベースファイルのパス。Noneの場合はconfigからパスを使用
+            exploration_rate (float): 確認しない小説から無作為に確認する割合
+            rng (random.Random, optional): 無作為の選択に使う乱数
+        """
+        self.db_path = db_path if db_path is not None else DATABASE_PATH
+        self.exploration_rate = exploration_rate
+        self.rng = rng or random.Random()
+        self._schema_ready = False
+
+    def _connect(self):
+        """接続を開く（初回はテーブルを作成）"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._schema_ready:
+            conn.executescript(UPDATE_CADENCE_SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    def cadences(self):
+        """
+        全小説の更新間隔をまとめて計算
+
+        Returns:
+            dict: {ncode: (最後の更新日（ユリウス日）, 更新間隔（日）)}
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(UPDATE_GAPS_QUERY).fetchall()
+        finally:
+            conn.close()
+
+        last_days = {}
+        gaps = {}
+        for ncode, day, gap in rows:
+            last_days[ncode] = max(day, last_days.get(ncode, day))
+            if gap is not None:
+                gaps.setdefault(ncode, []).append(gap)
+
+        cadences = {}
+        for ncode, last_day in last_days.items():
+            novel_gaps = gaps.get(ncode, [])
+            interval = median(novel_gaps) if len(novel_gaps) >= MIN_GAPS else DEFAULT_INTERVAL_DAYS
+            cadences[ncode] = (last_day, interval)
+        return cadences
+
+    def _last_polls(self):
+        """小説ごとの最後に確認した日（ユリウス日）"""
+        conn = self._connect()
+        try:
+            return dict(conn.execute(
+                'SELECT ncode, julianday(last_polled_at) FROM novel_poll_state WHERE last_polled_at IS NOT NULL'))
+        finally:
+            conn.close()
+
+    def plan(self, n_codes_ratings, now=None):
+        """
+        今回確認する小説を選ぶ
+
+        Args:
+            n_codes_ratings (list): [(n_code, rating)]
+            now (datetime, optional): 基準の日時（省略時は現在）
+
+        Returns:
+            tuple: (確認する [(n_code, rating)], {'total', 'due', 'explore', 'skipped'})
+        """
+        today = _julian(now or datetime.datetime.now())
+        cadences = self.cadences()
+        last_polls = self._last_polls()
+
+        due = []
+        waiting = []
+        for n_code, rating in n_codes_ratings:
+            if rating in SKIP_RATINGS:
+                continue
+            last_update_day, interval = cadences.get(n_code, (None, DEFAULT_INTERVAL_DAYS))
+            poll_day = next_poll_day(last_update_day, interval, last_polls.get(n_code))
+            if poll_day is None or poll_day <= today:
+                due.append((n_code, rating))
+            else:
+                waiting.append((n_code, rating))
+
+        explore_count = min(len(waiting), int(round(len(waiting) * self.exploration_rate)))
+        if waiting and self.exploration_rate > 0:
+            explore_count = max(1, explore_count)
+        explore = self.rng.sample(waiting, explore_count)
+
+        stats = {'total': len(n_codes_ratings), 'due': len(due), 'explore': len(explore),
+                 'skipped': len(n_codes_ratings) - len(due) - len(explore)}
+        logger.info(f"小説情報を確認する小説: {len(due) + len(explore)}/{stats['total']}件"
+                    f"（更新予測 {stats['due']}件, 無作為 {stats['explore']}件）")
+        return due + explore, stats
+
+    def record_polls(self, ncodes, now=None):
+        """
+        小説情報を確認した日時を記録
+
+        Args:
+            ncodes (iterable): 確認した小説コード
+            now (datetime, optional): 確認した日時
+        """
+        polled_at = (now or datetime.datetime.now()).strftime(TIME_FORMAT)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany('INSERT OR REPLACE INTO novel_poll_state (ncode, last_polled_at) VALUES (?, ?)',
+                                 [(ncode, polled_at) for ncode in ncodes])
+        finally:
+            conn.close()
+
+    def record_updates(self, updates):
+        """
+        小説情報の更新日時を履歴に記録（同じ日時は1件）
+
+        Args:
+            updates (iterable): [(ncode, last_update_date)]
+        """
+        rows = [(ncode, str(updated)) for ncode, updated in updates if updated]
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    'INSERT OR IGNORE INTO novel_update_history (ncode, last_update_date) VALUES (?, ?)', rows)
+        finally:
+            conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='更新間隔の予測から、今回小説情報を確認する小説の数を表示します')
+    parser.add_argument('--db', default=None, help='データベースファイルのパス（省略時は設定のパス）')
+    args = parser.parse_args()
+
+    planner = RefreshPlanner(args.db)
+    conn = sqlite3.connect(planner.db_path)
+    try:
+        novels = conn.execute('SELECT n_code, rating FROM novels_descs').fetchall()
+    finally:
+        conn.close()
+    _, result = planner.plan(novels)
+    print(f"全 {result['total']}件 / 更新予測 {result['due']}件, 無作為 {result['explore']}件, "
+          f"確認しない {result['skipped']}件")
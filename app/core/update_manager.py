@@ -5,6 +5,11 @@ import datetime
 import threading
 from app.utils.logger_manager import get_logger
 from app.core.checker import catch_up_episode
+from app.core.crawl_queue import CrawlQueue, CrawlRunner
+from app.core.episode_refetcher import EpisodeRefetcher
+from app.core.fetch_governor import get_fetch_governor
+from app.core.toc_sync import TocSync
+from app.core.update_scheduler import UpdateScheduler
 
 # ロガーの設定
 logger = get_logger('UpdateManager')
@@ -25,6 +30,12 @@ class UpdateManager:
         self.novel_manager = novel_manager
         self.lock = threading.RLock()
 
+        # エピソード取得の永続キュー
+        self.crawl_queue = CrawlQueue()
+
+        # 読書の状況から取得順を決めるスケジューラ
+        self.scheduler = UpdateScheduler()
+
         # 更新情報のキャッシュ
         self.shinchaku_ep = 0
         self.shinchaku_novels = []
@@ -138,7 +149,9 @@ class UpdateManager:
                 if progress_queue:
                     progress_queue.put({
                         'percent': progress_percent,
-                        'message': f"エピソード {ep_no}/{total_ep} を取得中... ({progress_percent}%)"
+                        'message': f"エピソード {ep_no}/{total_ep} を取得中... ({progress_percent}%)",
+                        'completed': i,
+                        'total': missing_episode_count
                     })
 
                 # エピソードを取得
@@ -183,6 +196,8 @@ class UpdateManager:
     def update_novels(self, novels, progress_queue=None, on_complete=None):
         """
         複数の小説を更新
+        不足しているエピソードを永続キューに追加してから取得するため、
+        途中でアプリを終了しても次回の起動時に続きから再開されます
 
         Args:
             novels: 小説データのリスト [(n_code, title, current_ep, total_ep, rating), ...]
@@ -191,11 +206,7 @@ class UpdateManager:
         """
         try:
             total = len(novels)
-
-            # デバッグ情報: 受け取った小説リストの構造を出力
             logger.debug(f"update_novels called with {total} novels")
-            for i, novel in enumerate(novels):
-                logger.debug(f"Novel {i + 1}: Type={type(novel)}, Length={len(novel)}, Content={novel}")
 
             if total == 0:
                 if progress_queue:
@@ -216,142 +227,38 @@ class UpdateManager:
                     'message': f"合計 {total} 件の小説を更新します。"
                 })
 
-            # 全体の進捗計算用
-            # 全体の進捗計算
-            logger.debug("進捗計算のためのエピソード情報")
-            total_episodes_to_update = 0
-            for i, novel in enumerate(novels):
-                logger.debug(f"Novel {i + 1} for progress calc: {novel}")
+            # 不足しているエピソードをジョブにする
+            tasks = []
+            for novel_data in novels:
                 try:
-                    current_ep_raw = novel[2]
-                    total_ep_raw = novel[3]
-                    logger.debug(
-                        f"Raw values: current_ep={current_ep_raw}, total_ep={total_ep_raw}, types: {type(current_ep_raw)}, {type(total_ep_raw)}")
-
-                    current_ep = int(current_ep_raw) if current_ep_raw is not None else 0
-                    total_ep = int(total_ep_raw) if total_ep_raw is not None else 0
-
-                    logger.debug(f"Converted values: current_ep={current_ep}, total_ep={total_ep}")
-
-                    if total_ep > current_ep:
-                        episodes_delta = total_ep - current_ep
-                        total_episodes_to_update += episodes_delta
-                        logger.debug(f"Adding {episodes_delta} episodes to update count")
-                except (IndexError, ValueError, TypeError) as e:
-                    logger.error(f"Error calculating progress for novel {i + 1}: {e}")
-                    logger.error(f"Novel data: {novel}")
-                    continue
-
-            logger.debug(f"Total episodes to update: {total_episodes_to_update}")
-            updated_episodes = 0
-
-            # 現在の日時を取得（エピソード更新時に使用）
-            current_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-            for i, novel_data in enumerate(novels):
-                logger.debug(f"Processing novel {i + 1}/{total}: {novel_data}")
-
-                try:
-                    # インデックスエラーを避けるための処理
                     if len(novel_data) < 5:
                         logger.error(f"Novel data has insufficient elements: {novel_data}")
                         continue
+                    n_code, _, current_ep_raw, total_ep_raw, rating = novel_data[:5]
+                    current_ep = int(current_ep_raw) if current_ep_raw is not None else 0
+                    total_ep = int(total_ep_raw) if total_ep_raw is not None else 0
+                except (ValueError, TypeError) as e:
+                    logger.error(f"Error converting episode numbers: {e}")
+                    logger.error(f"Novel data: {novel_data}")
+                    continue
+                tasks.extend((n_code, ep_no, rating) for ep_no in range(current_ep + 1, total_ep + 1))
 
-                    n_code = novel_data[0]
-                    title = novel_data[1]
-                    current_ep_raw = novel_data[2]
-                    total_ep_raw = novel_data[3]
-                    rating = novel_data[4]
-
-                    logger.debug(f"Extracted values: n_code={n_code}, title={title}, "
-                                 f"current_ep_raw={current_ep_raw}, total_ep_raw={total_ep_raw}, "
-                                 f"rating={rating}")
-
-                    try:
-                        current_ep = int(current_ep_raw) if current_ep_raw is not None else 0
-                        total_ep = int(total_ep_raw) if total_ep_raw is not None else 0
-                        logger.debug(f"Converted episode numbers: current_ep={current_ep}, total_ep={total_ep}")
-                    except (ValueError, TypeError) as e:
-                        logger.error(f"Error converting episode numbers: {e}")
-                        logger.error(f"Raw values: current_ep={current_ep_raw}, total_ep={total_ep_raw}")
-                        continue
+            logger.debug(f"Total episodes to update: {len(tasks)}")
+            self.crawl_queue.enqueue(tasks, 'update')
 
-                    novel_progress = (i / total) * 100
-
-                    if progress_queue:
-                        progress_queue.put({
-                            'percent': int(novel_progress),
-                            'message': f"[{i + 1}/{total}] {title}(ID:{n_code}) の更新を開始します..."
-                        })
-
-                    # 不足しているエピソードを取得
-                    episode_count = total_ep - current_ep
-                    logger.debug(f"Episodes to fetch: {episode_count}")
-
-                    # 更新があるかどうかのフラグ
-                    has_update = False
-
-                    for j, ep_no in enumerate(range(current_ep + 1, total_ep + 1)):
-                        # 個別の小説の進捗と全体の進捗を計算
-                        episode_progress = j / episode_count if episode_count > 0 else 1
-                        overall_progress = novel_progress + (episode_progress * (100 / total))
-
-                        if progress_queue:
-                            progress_queue.put({
-                                'percent': int(overall_progress),
-                                'message': f"[{i + 1}/{total}] {title} - エピソード {ep_no}/{total_ep} を取得中..."
-                            })
-
-                        # エピソードを取得
-                        logger.debug(f"Fetching episode {ep_no} for novel {n_code}")
-                        episode_content, episode_title = catch_up_episode(n_code, ep_no, rating)
-
-                        # データベースに保存
-                        if episode_content and episode_title:
-                            # タイムスタンプ付きでエピソードを保存
-                            logger.debug(f"Saving episode {ep_no} with title: {episode_title}")
-                            self.db_manager.insert_episode(n_code, ep_no, episode_content, episode_title, current_time)
-                            has_update = True
-                        else:
-                            logger.warning(f"Failed to get content for episode {ep_no}")
-
-                        updated_episodes += 1
-
-                    # 更新があった場合、小説テーブルのupdate_atを更新
-                    if has_update:
-                        logger.debug(f"Updating timestamp for novel {n_code}")
-                        self.db_manager.execute_query(
-                            "UPDATE novels_descs SET updated_at = ? WHERE n_code = ?",
-                            (current_time, n_code)
-                        )
-
-                    # 総エピソード数を更新
-                    self.db_manager.update_total_episodes(n_code)
-
-                    # 小説キャッシュをクリア
-                    self.novel_manager.clear_cache(n_code)
-
-                    if progress_queue:
-                        progress_queue.put({
-                            'percent': int(novel_progress + (100 / total)),
-                            'message': f"[{i + 1}/{total}] {title} - 更新完了"
-                        })
-
-                    logger.info(f"小説 {n_code} ({title}) の更新が完了しました")
-
-                except Exception as e:
-                    logger.error(
-                        f"小説 {novel_data[0] if len(novel_data) > 0 else 'unknown'} の更新中にエラーが発生しました: {e}")
-                    logger.error(f"Novel data: {novel_data}")
-                    if progress_queue:
-                        progress_queue.put({
-                            'message': f"[{i + 1}/{total}] 更新中にエラーが発生しました: {e}"
-                        })
+            # キューのジョブを処理（以前に中断したジョブも含む）
+            summary = self.run_crawl_queue(progress_queue)
 
             if progress_queue:
+                if summary is None:
+                    message = "更新をキューに追加しました（実行中の処理が取得します）。"
+                elif summary['paused']:
+                    message = f"キューが一時停止されました。{summary['done']}話を取得済みです。"
+                else:
+                    message = f"すべての更新処理が完了しました。（{summary['done']}話を取得、失敗 {summary['failed']}話）"
                 progress_queue.put({
                     'percent': 100,
-                    'message': "すべての更新処理が完了しました。"
+                    'message': message
                 })
 
         except Exception as e:
@@ -365,6 +272,9 @@ class UpdateManager:
                 })
 
         finally:
+            # 取得の統計を出力
+            get_fetch_governor().log_metrics()
+
             # 更新情報を再チェック
             self.check_shinchaku()
 
@@ -372,6 +282,65 @@ class UpdateManager:
             if on_complete:
                 on_complete()
 
+    def run_crawl_queue(self, progress_queue=None):
+        """
+        永続キューのジョブを、キューが空になるか一時停止されるまで処理
+
+        Args:
+            progress_queue: 進捗状況を通知するキュー
+
+        Returns:
+            dict: CrawlRunner.runの結果（他の処理がキューを実行中の場合はNone）
+        """
+        runner = CrawlRunner(self.db_manager, self.crawl_queue, self.novel_manager, scheduler=self.scheduler)
+        summary = runner.run(progress_queue)
+        if summary is None:
+            # 実行中のワーカーが追加したジョブを正しい順に取得するよう、ここで優先順位を付け直す
+            # 付け直しに失敗してもジョブは追加済みのため、エラーとして扱わない
+            try:
+                self.scheduler.reschedule(self.crawl_queue)
+            except Exception as e:
+                logger.error(f"優先順位の付け直し中にエラー: {e}")
+        return summary
+
+    def resume_crawl_queue(self, progress_queue=None, on_complete=None):
+        """
+        前回の実行で残ったジョブを再開（起動時に呼び出す）
+
+        Args:
+            progress_queue: 進捗状況を通知するキュー
+            on_complete: 完了時に呼び出すコールバック関数
+        """
+        try:
+            self.crawl_queue.recover()
+            stats = self.crawl_queue.stats()
+            if stats['paused'] or stats['pending'] == 0:
+                if stats['pending']:
+                    logger.info(f"キューは一時停止中です（未処理 {stats['pending']}件）")
+                return
+
+            logger.info(f"前回の続きから {stats['pending']}件のジョブを再開します")
+            if progress_queue:
+                progress_queue.put({
+                    'show': True,
+                    'percent': 0,
+                    'message': f"前回の続きから {stats['pending']}話の取得を再開します..."
+                })
+            summary = self.run_crawl_queue(progress_queue)
+            if progress_queue and summary is not None:
+                progress_queue.put({
+                    'percent': 100,
+                    'message': f"再開した取得が終了しました。（{summary['done']}話を取得、失敗 {summary['failed']}話）"
+                })
+            self.check_shinchaku()
+
+        except Exception as e:
+            logger.error(f"キューの再開中にエラー: {e}")
+
+        finally:
+            if on_complete:
+                on_complete()
+
     def update_all_novels(self, progress_queue=None, on_complete=None):
         """
         全ての更新可能な小説を更新
@@ -381,8 +350,8 @@ class UpdateManager:
             on_complete: 完了時に呼び出すコールバック関数
         """
         try:
-            # 更新が必要な小説を取得
-            needs_update = self.db_manager.get_novels_needing_update()
+            # 更新が必要な小説を取得（読んでいる小説・ピン留めした小説を先に）
+            needs_update = self.scheduler.order_novels(self.db_manager.get_novels_needing_update())
 
             if not needs_update:
                 if progress_queue:
@@ -474,7 +443,9 @@ class UpdateManager:
                 if progress_queue:
                     progress_queue.put({
                         'percent': progress_percent,
-                        'message': f"エピソード {i + 1}/{total_missing} (No.{ep_no}) を取得中... ({progress_percent}%)"
+                        'message': f"エピソード {i + 1}/{total_missing} (No.{ep_no}) を取得中... ({progress_percent}%)",
+                        'completed': i,
+                        'total': total_missing
                     })
 
                 # エピソードを取得
@@ -518,7 +489,7 @@ class UpdateManager:
 
     def refetch_all_episodes(self, ncode, progress_queue=None, on_complete=None):
         """
-        すべてのエピソードを再取得
+        すべてのエピソードを再取得（既存のエピソードは削除せず、内容が変わったものだけを差し替える）
 
         Args:
             ncode: 小説コード
@@ -563,32 +534,130 @@ class UpdateManager:
                     'message': f"小説 [{title}] の全エピソード再取得中..."
                 })
 
-            # 既存のエピソードを削除
-            self.db_manager.execute_query("DELETE FROM episodes WHERE ncode = ?", (ncode,))
+            # 既存のエピソードは残したまま並列に取得し直し、内容が変わったものだけを差し替える
+            def report_progress(completed, total, stats):
+                if progress_queue:
+                    progress_percent = int((completed / total) * 100)
+                    progress_queue.put({
+                        'percent': progress_percent,
+                        'message': f"エピソード {completed}/{total} を取得しました "
+                                   f"(変更 {stats['changed'] + stats['added']}話) ({progress_percent}%)",
+                        'completed': completed,
+                        'total': total
+                    })
+
+            current_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            refetcher = EpisodeRefetcher(self.db_manager)
+            stats = refetcher.refetch(ncode, range(1, general_all_no_int + 1), rating, current_time, report_progress)
+
+            # 総エピソード数を更新
+            self.db_manager.update_total_episodes(ncode)
+
+            # 小説キャッシュをクリア
+            self.novel_manager.clear_cache(ncode)
+
+            if progress_queue:
+                progress_queue.put({
+                    'percent': 100,
+                    'message': f"小説 [{title}] の全エピソード再取得が完了しました"
+                               f"（変更 {stats['changed']}話・追加 {stats['added']}話・変更なし {stats['unchanged']}話"
+                               f"・失敗 {stats['failed']}話）"
+                })
+
+            logger.info(f"小説 {ncode} の全エピソード再取得が完了しました")
 
+        except Exception as e:
+            logger.error(f"全エピソード再取得エラー: {e}")
             if progress_queue:
                 progress_queue.put({
                     'percent': 0,
-                    'message': f"既存のエピソードを削除しました。全{general_all_no_int}話を再取得します..."
+                    'message': f"エラー: {e}"
                 })
 
-            # すべてのエピソードを取得して保存
-            for i, ep_no in enumerate(range(1, general_all_no_int + 1)):
-                # 進捗率計算
-                progress_percent = int((i / general_all_no_int) * 100)
+        finally:
+            # 更新情報を再チェック
+            self.check_shinchaku()
 
+            # 完了コールバックの呼び出し
+            if on_complete:
+                on_complete()
+
+    def sync_revised_episodes(self, ncode, progress_queue=None, on_complete=None):
+        """
+        目次ページだけを取得して新着・改稿エピソードを検出し、それらのエピソードのみを取得し直す
+
+        Args:
+            ncode: 小説コード
+            progress_queue: 進捗状況を通知するキュー
+            on_complete: 完了時に呼び出すコールバック関数
+        """
+        try:
+            # この小説のデータを取得
+            novel = self.novel_manager.get_novel(ncode)
+            if not novel:
                 if progress_queue:
+                    progress_queue.put({
+                        'show': True,
+                        'percent': 0,
+                        'message': f"エラー: 小説 {ncode} が見つかりません"
+                    })
+                return
+
+            title = novel[1]
+            rating = novel[4] if len(novel) > 4 else None
+
+            if progress_queue:
+                progress_queue.put({
+                    'show': True,
+                    'percent': 0,
+                    'message': f"小説 [{title}] の目次を確認中..."
+                })
+
+            # 目次ページだけを取得して保存済みのエピソードと比較
+            toc = TocSync(self.db_manager).sync(ncode, rating)
+            if toc is None:
+                if progress_queue:
+                    progress_queue.put({
+                        'percent': 0,
+                        'message': f"エラー: 小説 [{title}] の目次を取得できませんでした"
+                    })
+                return
+
+            episode_list = toc['new'] + toc['revised']
+            if not episode_list:
+                if progress_queue:
+                    progress_queue.put({
+                        'percent': 100,
+                        'message': f"小説 [{title}] に新着・改稿エピソードはありません（目次 {toc['pages']}ページを確認）"
+                    })
+                return
+
+            if progress_queue:
+                progress_queue.put({
+                    'percent': 0,
+                    'message': f"新着 {len(toc['new'])}話・改稿 {len(toc['revised'])}話を取得します..."
+                })
+
+            def report_progress(completed, total, stats):
+                if progress_queue:
+                    progress_percent = int((completed / total) * 100)
                     progress_queue.put({
                         'percent': progress_percent,
-                        'message': f"エピソード {ep_no}/{general_all_no_int} を取得中... ({progress_percent}%)"
+                        'message': f"エピソード {completed}/{total} を取得しました ({progress_percent}%)",
+                        'completed': completed,
+                        'total': total
                     })
 
-                # エピソードを取得
-                episode_content, episode_title = catch_up_episode(ncode, ep_no, rating)
+            # 検出したエピソードだけを取得し、内容が変わったものを差し替える
+            current_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            stats = EpisodeRefetcher(self.db_manager).refetch(
+                ncode, episode_list, rating, current_time, report_progress, touch_unchanged=True)
 
-                # データベースに保存
-                if episode_content and episode_title:
-                    self.db_manager.insert_episode(ncode, ep_no, episode_content, episode_title)
+            if stats['changed'] or stats['added']:
+                self.db_manager.execute_query(
+                    "UPDATE novels_descs SET updated_at = ? WHERE n_code = ?",
+                    (current_time, ncode)
+                )
 
             # 総エピソード数を更新
             self.db_manager.update_total_episodes(ncode)
@@ -599,13 +668,13 @@ class UpdateManager:
             if progress_queue:
                 progress_queue.put({
                     'percent': 100,
-                    'message': f"小説 [{title}] の全エピソード再取得が完了しました"
+                    'message': f"小説 [{title}] の新着・改稿エピソードの取得が完了しました"
+                               f"（変更 {stats['changed']}話・追加 {stats['added']}話・変更なし {stats['unchanged']}話"
+                               f"・失敗 {stats['failed']}話）"
                 })
 
-            logger.info(f"小説 {ncode} の全エピソード再取得が完了しました")
-
         except Exception as e:
-            logger.error(f"全エピソード再取得エラー: {e}")
+            logger.error(f"新着・改稿エピソードの取得エラー: {e}")
             if progress_queue:
                 progress_queue.put({
                     'percent': 0,
@@ -681,7 +750,9 @@ class UpdateManager:
                 if progress_queue:
                     progress_queue.put({
                         'percent': progress_percent,
-                        'message': f"エピソード {i + 1}/{total_episodes} (No.{ep_no}) を取得中... ({progress_percent}%)"
+                        'message': f"エピソード {i + 1}/{total_episodes} (No.{ep_no}) を取得中... ({progress_percent}%)",
+                        'completed': i,
+                        'total': total_episodes
                     })
 
                 # エピソードを取得
@@ -0,0 +1,265 @@
+"""
+更新の取得順を決めるモジュール
+- 小説ごとに、最後に読んだ日時・読んだ位置と保存済みの話数の差・未取得の話数・ピン留めから優先度を計算する
+- ピン留めした小説と最近読んだ小説を先に、それ以外の小説を後に取得する
+- 同じ区分の中では小説を交互に並べる（各小説の最初の未取得エピソードを先に取得し、次に2話目、…）
+  そのため、放置している小説の大量の未取得エピソードが、読んでいる連載の新着を待たせることはない
+
+優先順位は永続キュー（CrawlQueue）の未処理のジョブに付け直します
+"""
+import datetime
+import math
+import sqlite3
+from app.utils.logger_manager import get_logger
+from config import DATABASE_PATH
+
+# ロガーの設定
+logger = get_logger('UpdateScheduler')
+
+# この日数以内に読んだ小説を「読んでいる小説」として先に取得する
+ACTIVE_READING_DAYS = 30
+
+# 最後に読んだ日時の重みが半分になる日数
+RECENCY_HALF_LIFE_DAYS = 7.0
+
+# 優先度の重み（読んだ日時・未取得の話数・ピン留め）
+RECENCY_WEIGHT = 10.0
+BACKLOG_WEIGHT = 1.0
+PIN_BONUS = 100.0
+
+# last_read_novel.date の形式
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+UPDATE_PINS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS update_pins (
+    ncode TEXT PRIMARY KEY,
+    pinned_at TEXT
+);
+"""
+
+
+def _episode_count(value):
+    """
+    話数・エピソード番号を整数に変換（total_epの既定値'undefined'など、数値でない値は0）
+
+    Args:
+        value: データベースの値
+
+    Returns:
+        int: 話数
+    """
+    try:
+        return int(value or 0)
+    except (ValueError, TypeError):
+        return 0
+
+
+def novel_priority(pinned, days_since_read, read_episode, stored_episodes, backlog):
+    """
+    小説の優先度を計算（大きいほど先に取得）
+
+    Args:
+        pinned (bool): ピン留めされているかどうか
+        days_since_read (float): 最後に読んでからの日数（読んだことがない場合はNone）
+        read_episode (int): 最後に読んだエピソード番号
+        stored_episodes (int): 保存済みの話数（novels_descs.total_ep）
+        backlog (int): 未取得の話数
+
+    Returns:
+        float: 優先度
+    """
+    score = PIN_BONUS if pinned else 0.0
+    if days_since_read is not None:
+        recency = 0.5 ** (max(0.0, days_since_read) / RECENCY_HALF_LIFE_DAYS)
+        # 保存済みの最新話まで読み進めているほど、新着を待っている
+        proximity = 1.0 / (1 + max(0, stored_episodes - read_episode))
+        score += RECENCY_WEIGHT * recency * (0.5 + 0.5 * proximity)
+    # 未取得の話数が多い小説（まとめて取り込む小説）は少し後に回す
+    return score - BACKLOG_WEIGHT * math.log1p(backlog)
+
+
+class UpdateScheduler:
+    """
+    読書の状況から更新の取得順を決めるクラス
+    """
+
+    def __init__(self, db_path=None):
+        """
+        Args:
+            db_path (str, optional): データベースファイルのパス。Noneの場合はconfigからパスを使用
+        """
+        self.db_path = db_path if db_path is not None else DATABASE_PATH
+        self._schema_ready = False
+
+    def _connect(self):
+        """接続を開く（初回はテーブルを作成）"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._schema_ready:
+            conn.executescript(UPDATE_PINS_SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    # --- ピン留め ---
+
+    def pin(self, ncode):
+        """
+        小説をピン留め（更新を優先して取得）
+
+        Args:
+            ncode (str): 小説コード
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('INSERT OR REPLACE INTO update_pins (ncode, pinned_at) VALUES (?, ?)',
+                             (ncode, datetime.datetime.now().strftime(TIME_FORMAT)))
+        finally:
+            conn.close()
+        logger.info(f"小説 {ncode} をピン留めしました")
+
+    def unpin(self, ncode):
+        """
+        小説のピン留めを解除
+
+        Args:
+            ncode (str): 小説コード
+
+        Returns:
+            bool: ピン留めされていた場合True
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                removed = conn.execute('DELETE FROM update_pins WHERE ncode = ?', (ncode,)).rowcount
+        finally:
+            conn.close()
+        if removed:
+            logger.info(f"小説 {ncode} のピン留めを解除しました")
+        return bool(removed)
+
+    def pinned(self):
+        """
+        ピン留めされている小説の一覧
+
+        Returns:
+            list: [(ncode, pinned_at)]
+        """
+        conn = self._connect()
+        try:
+            return conn.execute('SELECT ncode, pinned_at FROM update_pins ORDER BY pinned_at').fetchall()
+        finally:
+            conn.close()
+
+    # --- 優先度 ---
+
+    def _signals(self, conn):
+        """
+        小説ごとの読書の状況
+
+        Returns:
+            tuple: ({ncode: (最後に読んだ日時, 読んだエピソード番号)}, {ncode: 保存済みの話数}, ピン留めの集合)
+        """
+        # MAX()と一緒に選んだ列は、最大値の行の値になる（SQLiteの仕様）
+        last_read = {
+            ncode: (date, episode_no or 0)
+            for ncode, date, episode_no in conn.execute(
+                'SELECT ncode, MAX(date), episode_no FROM last_read_novel GROUP BY ncode')
+        }
+        stored = dict(conn.execute('SELECT n_code, COALESCE(total_ep, 0) FROM novels_descs'))
+        pins = {ncode for ncode, in conn.execute('SELECT ncode FROM update_pins')}
+        return last_read, stored, pins
+
+    def rank_novels(self, backlogs, now=None):
+        """
+        小説の取得順の区分と優先度を計算
+
+        Args:
+            backlogs (dict): {ncode: 未取得の話数}
+            now (datetime, optional): 基準の日時（省略時は現在）
+
+        Returns:
+            dict: {ncode: (区分, 優先度)}。区分は0（ピン留め・読んでいる小説）または1（それ以外）
+        """
+        now = now or datetime.datetime.now()
+        conn = self._connect()
+        try:
+            last_read, stored, pins = self._signals(conn)
+        finally:
+            conn.close()
+
+        ranks = {}
+        for ncode, backlog in backlogs.items():
+            days = None
+            read_episode = 0
+            if ncode in last_read:
+                date, read_episode = last_read[ncode]
+                try:
+                    days = (now - datetime.datetime.strptime(date, TIME_FORMAT)).total_seconds() / 86400
+                except (TypeError, ValueError):
+                    days = None
+            pinned = ncode in pins
+            active = pinned or (days is not None and days <= ACTIVE_READING_DAYS)
+            score = novel_priority(pinned, days, _episode_count(read_episode), _episode_count(stored.get(ncode)), backlog)
+            ranks[ncode] = (0 if active else 1, score)
+        return ranks
+
+    def order_jobs(self, jobs, now=None):
+        """
+        ジョブを取得する順に並べる
+
+        Args:
+            jobs (list): [(ncode, episode_no)]
+            now (datetime, optional): 基準の日時
+
+        Returns:
+            list: 並べ替えた [(ncode, episode_no)]
+        """
+        episodes = {}
+        for ncode, episode_no in jobs:
+            episodes.setdefault(ncode, []).append(int(episode_no))
+        ranks = self.rank_novels({ncode: len(eps) for ncode, eps in episodes.items()}, now)
+
+        keyed = []
+        for ncode, eps in episodes.items():
+            tier, score = ranks[ncode]
+            # 小説の中では話数の順、小説の間では何話目かで交互に並べる
+            for index, episode_no in enumerate(sorted(eps)):
+                keyed.append(((tier, index, -score, ncode), (ncode, episode_no)))
+        keyed.sort(key=lambda item: item[0])
+        return [job for _, job in keyed]
+
+    def order_novels(self, novels, now=None):
+        """
+        更新する小説を優先度の順に並べる
+
+        Args:
+            novels (list): [(n_code, title, current_ep, total_ep, rating), ...]
+            now (datetime, optional): 基準の日時
+
+        Returns:
+            list: 並べ替えた小説のリスト
+        """
+        backlogs = {}
+        for novel in novels:
+            try:
+                backlogs[novel[0]] = max(0, int(novel[3] or 0) - int(novel[2] or 0))
+            except (ValueError, TypeError, IndexError):
+                backlogs[novel[0]] = 0
+        ranks = self.rank_novels(backlogs, now)
+        return sorted(novels, key=lambda novel: (ranks[novel[0]][0], -ranks[novel[0]][1]))
+
+    def reschedule(self, crawl_queue):
+        """
+        キューの未処理のジョブに優先順位を付け直す
+
+        Args:
+            crawl_queue (CrawlQueue): キュー
+
+        Returns:
+            int: 優先順位を付けたジョブの数
+        """
+        ordered = self.order_jobs(crawl_queue.pending_jobs())
+        if ordered:
+            crawl_queue.set_priorities(ordered)
+            logger.debug(f"{len(ordered)}件のジョブの優先順位を付け直しました（先頭: {ordered[0][0]}-{ordered[0][1]}）")
+        return len(ordered)
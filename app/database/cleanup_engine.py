@@ -0,0 +1,216 @@
+"""
+エピソードテーブルのクリーンアップをSQLだけで行うモジュール
+- 重複エピソードはウィンドウ関数で順位付けし、一時テーブルに集めた行を一つのトランザクションで削除
+- 内容ハッシュ（content_hash列）が同じ重複は、本文を読まずにインデックスだけで削除
+- エピソードの品質（短すぎる・エラー内容・タイトルなし）はSQLの式で判定
+- 本文はPythonに読み込まず、判定結果（ncode・エピソード番号・rowid）だけを返す
+
+(ncode, episode_no) のインデックス（主キー）があれば、重複の検出は本文を読まずに行えます
+"""
+import sqlite3
+from app.database import episode_hash
+from app.utils.logger_manager import get_logger
+
+# ロガーの設定
+logger = get_logger('CleanupEngine')
+
+# これより短い本文は取得失敗とみなす（文字数）
+MIN_BODY_LENGTH = 50
+
+# 重複エピソードの順位付けでエラーとみなす本文中の文字列
+DUPLICATE_ERROR_MARKERS = ('エラー', 'Error')
+
+# 品質分析でエラー内容とみなす本文中の文字列
+QUALITY_ERROR_MARKERS = ('エラー', 'Error', '失敗')
+
+# 重複エピソードの順位を格納する一時テーブル
+RANKED_TABLE = 'cleanup_ranked_episodes'
+
+
+def error_condition_sql(markers, column='body'):
+    """
+    本文にいずれかの文字列を含むかを判定するSQLの式を作成（大文字・小文字を区別）
+
+    Args:
+        markers (tuple): 判定する文字列
+        column (str): 本文の列名
+
+    Returns:
+        str: SQLの式
+    """
+    return '(' + ' OR '.join(f"instr({column}, '{marker}') > 0" for marker in markers) + ')'
+
+
+def quality_issue_sql(body='body', title='e_title'):
+    """
+    エピソードの問題の種類を返すSQLの式を作成（問題がなければNULL）
+
+    Args:
+        body (str): 本文の列名
+        title (str): タイトルの列名
+
+    Returns:
+        str: SQLの式（empty_or_short / error_content / missing_title / NULL）
+    """
+    return f"""CASE
+        WHEN {body} IS NULL OR LENGTH({body}) < {MIN_BODY_LENGTH} THEN 'empty_or_short'
+        WHEN {error_condition_sql(QUALITY_ERROR_MARKERS, body)} THEN 'error_content'
+        WHEN {title} IS NULL OR TRIM({title}) = '' THEN 'missing_title'
+    END"""
+
+
+def _begin(conn):
+    """書き込みトランザクションを開始（既に開始済みならそのまま使う）"""
+    if not conn.in_transaction:
+        conn.execute('BEGIN IMMEDIATE')
+
+
+def remove_episode_duplicates(conn, ncode=None):
+    """
+    重複するエピソードを削除し、各エピソードごとに最良の1件を残す
+    内容ハッシュが同じものを先に削除し、残りはエラーを含まないもの、本文が長いもの、rowidが小さいものの順に順位付けする
+    削除は一つのトランザクションで行い、失敗した場合はロールバックして例外を送出します
+
+    Args:
+        conn (sqlite3.Connection): データベース接続
+        ncode (str, optional): 対象の小説コード。Noneの場合は全小説
+
+    Returns:
+        tuple: (削除したエピソードの数, 最良のエントリにもエラーがある [(ncode, episode_no, rowid)])
+    """
+    where = 'WHERE ncode = ?' if ncode else ''
+    hash_where = 'AND ncode = ?' if ncode else ''
+    params = (ncode,) if ncode else ()
+
+    use_hash = episode_hash.has_hash_column(conn)
+    cursor = conn.cursor()
+    try:
+        _begin(conn)
+        identical_count = 0
+        if use_hash:
+            # 内容ハッシュが同じ重複はインデックスだけで判定し、rowidが最小のものを残して削除
+            cursor.execute(f'''
+                DELETE FROM episodes WHERE rowid IN (
+                    SELECT rid FROM (
+                        SELECT rowid AS rid,
+                               ROW_NUMBER() OVER (PARTITION BY ncode, episode_no, content_hash ORDER BY rowid) AS rn
+                        FROM episodes
+                        WHERE content_hash IS NOT NULL {hash_where}
+                    )
+                    WHERE rn > 1
+                )
+            ''', params)
+            identical_count = cursor.rowcount
+
+        cursor.execute(f'DROP TABLE IF EXISTS temp.{RANKED_TABLE}')
+        # 重複のあるグループだけを順位付け（グループの検出は主キーのインデックスだけで済む）
+        cursor.execute(f'''
+            CREATE TEMP TABLE {RANKED_TABLE} AS
+            SELECT rid, ncode, episode_no, has_error,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY ncode, episode_no
+                       ORDER BY has_error, body_length DESC, rid
+                   ) AS rn
+            FROM (
+                SELECT e.rowid AS rid, e.ncode, e.episode_no,
+                       CASE WHEN {error_condition_sql(DUPLICATE_ERROR_MARKERS, 'e.body')} THEN 1 ELSE 0 END AS has_error,
+                       COALESCE(LENGTH(e.body), 0) AS body_length
+                FROM episodes e
+                JOIN (
+                    SELECT ncode, episode_no
+                    FROM episodes
+                    {where}
+                    GROUP BY ncode, episode_no
+                    HAVING COUNT(*) > 1
+                ) d ON d.ncode = e.ncode AND d.episode_no = e.episode_no
+            )
+        ''', params)
+
+        cursor.execute(f'DELETE FROM episodes WHERE rowid IN (SELECT rid FROM temp.{RANKED_TABLE} WHERE rn > 1)')
+        deleted_count = identical_count + cursor.rowcount
+
+        cursor.execute(f'''
+            SELECT ncode, episode_no, rid FROM temp.{RANKED_TABLE}
+            WHERE rn = 1 AND has_error = 1
+            ORDER BY ncode, CAST(episode_no AS INTEGER)
+        ''')
+        flagged = cursor.fetchall()
+
+        cursor.execute(f'DROP TABLE temp.{RANKED_TABLE}')
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+    for flagged_ncode, episode_no, _ in flagged:
+        logger.warning(f"エピソード {flagged_ncode}-{episode_no} の最良エントリにもエラーがあります（後で修復が必要）")
+    logger.info(f"重複エピソードを {deleted_count} 件削除しました")
+    return deleted_count, flagged
+
+
+def iter_quality_issues(conn, ncode=None):
+    """
+    問題のあるエピソードを小説コード・エピソード番号順に返す
+    判定はSQLで行い、本文は読み込みません
+
+    Args:
+        conn (sqlite3.Connection): データベース接続
+        ncode (str, optional): 対象の小説コード。Noneの場合は小説テーブルにある全小説
+
+    Yields:
+        tuple: (ncode, rating, episode_no, issue_type, rowid)
+    """
+    where = 'AND e.ncode = ?' if ncode else ''
+    params = (ncode,) if ncode else ()
+    cursor = conn.execute(f'''
+        SELECT ncode, rating, episode_no, issue, rid
+        FROM (
+            SELECT e.ncode, n.rating, e.episode_no, e.rowid AS rid,
+                   {quality_issue_sql('e.body', 'e.e_title')} AS issue
+            FROM episodes e
+            JOIN (SELECT n_code, MAX(rating) AS rating FROM novels_descs GROUP BY n_code) n
+              ON n.n_code = e.ncode
+            WHERE 1 = 1 {where}
+        )
+        WHERE issue IS NOT NULL
+        ORDER BY ncode, CAST(episode_no AS INTEGER), episode_no
+    ''', params)
+    yield from cursor
+
+
+def analyze_episode_quality(conn, ncode=None):
+    """
+    問題のあるエピソードを小説ごとにまとめる
+
+    Args:
+        conn (sqlite3.Connection): データベース接続
+        ncode (str, optional): 対象の小説コード。Noneの場合は全小説
+
+    Returns:
+        dict: {n_code: ([(episode_no, issue_type, rowid), ...], rating)}
+    """
+    problematic_episodes = {}
+    for n_code, rating, episode_no, issue, rowid in iter_quality_issues(conn, ncode):
+        if n_code not in problematic_episodes:
+            problematic_episodes[n_code] = ([], rating)
+        problematic_episodes[n_code][0].append((episode_no, issue, rowid))
+    return problematic_episodes
+
+
+def count_quality_issues(conn):
+    """
+    問題の種類ごとのエピソード数を集計
+
+    Args:
+        conn (sqlite3.Connection): データベース接続
+
+    Returns:
+        dict: {issue_type: 件数}
+    """
+    cursor = conn.execute(f'''
+        SELECT issue, COUNT(*)
+        FROM (SELECT {quality_issue_sql()} AS issue FROM episodes)
+        WHERE issue IS NOT NULL
+        GROUP BY issue
+    ''')
+    return dict(cursor.fetchall())
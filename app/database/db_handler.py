@@ -6,10 +6,49 @@ import queue
 import concurrent.futures
 from config import DATABASE_PATH
 from app.utils.logger_manager import get_logger
+from app.database import cleanup_engine, episode_hash
 
 # ロガーの設定
 logger = get_logger('DatabaseHandler')
 
+# エピソードの番号・タイトル・内容ハッシュを話数順に取得するクエリ
+EPISODE_HASHES_QUERY = '''
+SELECT episode_no, e_title, content_hash
+FROM episodes
+WHERE ncode = ?
+ORDER BY CAST(episode_no AS INTEGER)
+'''
+
+# 小説ごとのエピソードの構成（話数・最終更新時刻・各話の番号と内容ハッシュ）をまとめて取得
+# 内容ハッシュがない（列がない・未計算の）エピソードは更新時刻で代用する
+# group_concatの並び順は保証されないため、使う側で並べ替える
+EPISODE_FINGERPRINTS_QUERY = '''
+SELECT ncode, COUNT(*), MAX(update_time), group_concat(episode_no || ':' || COALESCE({version}, ''), ',')
+FROM episodes
+{where}
+GROUP BY ncode
+'''
+
+
+def episode_fingerprints_query(has_hash_column, by_ncode):
+    """
+    エピソードの構成を取得するクエリを作成
+
+    Args:
+        has_hash_column (bool): episodesテーブルにcontent_hash列があるかどうか
+        by_ncode (bool): 1つの小説だけを取得するかどうか
+
+    Returns:
+        str: クエリ
+    """
+    return EPISODE_FINGERPRINTS_QUERY.format(
+        version='content_hash, update_time' if has_hash_column else 'update_time',
+        where='WHERE ncode = ?' if by_ncode else '',
+    )
+
+# 本文をまとめて取得するときの1クエリあたりのエピソード数
+EPISODE_BODIES_CHUNK_SIZE = 500
+
 
 class DatabaseHandler:
     """
@@ -40,6 +79,7 @@ class DatabaseHandler:
         self._initialized = True
         self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=10)  # 並列クエリ実行用
         self._bulk_operation_queue = queue.Queue()  # 一括操作用キュー
+        self._episode_hash_ready = False  # episodesテーブルのcontent_hash列が使えるかどうか
 
         # 一括操作処理スレッドを開始
         self._bulk_processing_thread = threading.Thread(target=self._process_bulk_queue, daemon=True)
@@ -422,6 +462,20 @@ class DatabaseHandler:
         query = 'SELECT * FROM novels_descs'
         return self.execute_read_query(query)
 
+    def get_novel_list_rows(self):
+        """
+        一覧表示に必要な列のみの小説情報を取得（起動時の初回表示用）
+        列の順序はget_all_novelsと同じで、あらすじ（Synopsis）以降を含みません
+
+        Returns:
+            list: (n_code, title, author, updated_at, rating, total_ep, general_all_no) のリスト
+        """
+        query = """
+            SELECT n_code, title, author, updated_at, rating, total_ep, general_all_no
+            FROM novels_descs
+        """
+        return self.execute_read_query(query)
+
     def get_novel_by_ncode(self, ncode):
         """
         指定されたncodeの小説情報を取得
@@ -453,6 +507,86 @@ class DatabaseHandler:
         '''
         return self.execute_read_query(query, (ncode,))
 
+    def get_episode_headers(self, ncode):
+        """
+        指定されたncodeのエピソードの番号・タイトル・更新時刻を取得（本文は読み込まない）
+
+        Args:
+            ncode (str): 小説コード
+
+        Returns:
+            list: [(episode_no, e_title, update_time)]
+        """
+        query = '''
+        SELECT episode_no, e_title, update_time
+        FROM episodes
+        WHERE ncode = ?
+        ORDER BY CAST(episode_no AS INTEGER)
+        '''
+        return self.execute_read_query(query, (ncode,))
+
+    def touch_episodes(self, ncode, episode_nos, update_time):
+        """
+        エピソードの更新時刻だけを更新（取得し直して内容が変わらなかったエピソードの確認日時の記録に使う）
+
+        Args:
+            ncode (str): 小説コード
+            episode_nos (list): エピソード番号のリスト
+            update_time (str): 更新時刻
+        """
+        for chunk in self._chunks(list(episode_nos), EPISODE_BODIES_CHUNK_SIZE):
+            placeholders = ', '.join(['?'] * len(chunk))
+            self.execute_query(
+                f'UPDATE episodes SET update_time = ? WHERE ncode = ? AND episode_no IN ({placeholders})',
+                (update_time, ncode, *chunk)
+            )
+
+    def get_episode_hashes(self, ncode):
+        """
+        指定されたncodeのエピソードの番号・タイトル・内容ハッシュを取得（本文は読み込まない）
+
+        Args:
+            ncode (str): 小説コード
+
+        Returns:
+            list: [(episode_no, e_title, content_hash)]（content_hash列がない場合はNone）
+        """
+        if not self.episode_hash_enabled():
+            return None
+        return self.execute_read_query(EPISODE_HASHES_QUERY, (ncode,))
+
+    def get_episode_fingerprints(self, ncode=None):
+        """
+        小説ごとのエピソードの構成を1回のクエリでまとめて取得（本文は読み込まない）
+
+        Args:
+            ncode (str, optional): 小説コード。Noneの場合は全ての小説
+
+        Returns:
+            dict: {ncode: (エピソード数, 最終更新時刻, 'episode_no:内容ハッシュ'をカンマで連結した文字列)}
+        """
+        query = episode_fingerprints_query(self.episode_hash_enabled(), ncode is not None)
+        rows = self.execute_read_query(query, (ncode,) if ncode is not None else None)
+        return {row[0]: tuple(row[1:]) for row in rows}
+
+    def get_episode_bodies(self, ncode, episode_nos):
+        """
+        指定されたエピソードの本文を取得
+
+        Args:
+            ncode (str): 小説コード
+            episode_nos (list): エピソード番号のリスト
+
+        Returns:
+            dict: {episode_no: body}
+        """
+        bodies = {}
+        for chunk in self._chunks(list(episode_nos), EPISODE_BODIES_CHUNK_SIZE):
+            placeholders = ', '.join(['?'] * len(chunk))
+            query = f'SELECT episode_no, body FROM episodes WHERE ncode = ? AND episode_no IN ({placeholders})'
+            bodies.update(self.execute_read_query(query, (ncode, *chunk)))
+        return bodies
+
     def get_last_read_novel(self):
         """
         最後に読んだ小説の情報を取得
@@ -516,34 +650,159 @@ class DatabaseHandler:
                 for future in futures:
                     future.result()
 
-    def insert_episode(self, ncode, episode_no, body, title):
+    def episode_hash_enabled(self):
+        """
+        episodesテーブルのcontent_hash列が使えるかどうか（列がなければ作成する）
+
+        Returns:
+            bool: 使える場合True
+        """
+        if not self._episode_hash_ready:
+            conn = self.get_connection()
+            with self._connection_locks[threading.get_ident()]:
+                try:
+                    self._episode_hash_ready = episode_hash.ensure_hash_column(conn)
+                except sqlite3.Error as e:
+                    logger.error(f"content_hash列の作成エラー: {e}")
+        return self._episode_hash_ready
+
+    def insert_episode(self, ncode, episode_no, body, title, update_time=None):
         """
         エピソードをデータベースに挿入（重複チェック付き）
+        既存のエピソードは本文の内容ハッシュかタイトルが変わった場合のみ更新します
 
         Args:
             ncode (str): 小説コード
             episode_no (int): エピソード番号
             body (str): エピソード本文
             title (str): エピソードタイトル
+            update_time (str, optional): 更新時刻。Noneの場合は更新時刻を変更しない
         """
+        if not self.episode_hash_enabled():
+            self._insert_episode_without_hash(ncode, episode_no, body, title, update_time)
+            return
+
+        content_hash = episode_hash.body_hash(body)
+
         # 既存のエピソードをチェック
         check_query = 'SELECT rowid FROM episodes WHERE ncode = ? AND episode_no = ?'
         existing = self.execute_read_query(check_query, (ncode, episode_no), fetch_all=False)
 
         if existing:
-            # 既存のエピソードを更新
+            # 内容が変わった場合のみ既存のエピソードを更新
             update_query = '''
-            UPDATE episodes SET body = ?, e_title = ?
-            WHERE ncode = ? AND episode_no = ?
+            UPDATE episodes SET body = ?, e_title = ?, content_hash = ?, update_time = COALESCE(?, update_time)
+            WHERE ncode = ? AND episode_no = ? AND (content_hash IS NOT ? OR e_title IS NOT ?)
             '''
-            self.execute_query(update_query, (body, title, ncode, episode_no))
+            self.execute_query(update_query, (body, title, content_hash, update_time,
+                                              ncode, episode_no, content_hash, title))
         else:
             # 新規エピソードを挿入
-            insert_query = '''
-            INSERT INTO episodes (ncode, episode_no, body, e_title)
-            VALUES (?, ?, ?, ?)
-            '''
-            self.execute_query(insert_query, (ncode, episode_no, body, title))
+            self._insert_new_episode(ncode, episode_no, body, title, update_time, content_hash)
+
+    def fill_episode_hashes(self, ncode, hashes):
+        """
+        content_hashが未計算のエピソードに計算済みのハッシュを保存
+
+        Args:
+            ncode (str): 小説コード
+            hashes (dict): {episode_no: content_hash}
+        """
+        if not hashes or not self.episode_hash_enabled():
+            return
+        conn = self.get_connection()
+        with self._connection_locks[threading.get_ident()]:
+            try:
+                conn.executemany(
+                    'UPDATE episodes SET content_hash = ? WHERE ncode = ? AND episode_no = ? AND content_hash IS NULL',
+                    [(content_hash, ncode, episode_no) for episode_no, content_hash in hashes.items()]
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                conn.rollback()
+                logger.error(f"content_hashの保存エラー: {e}")
+                raise
+
+    def swap_episodes(self, ncode, episodes, update_time=None):
+        """
+        取得し直したエピソードを一つのトランザクションで差し替える（比較して置き換え）
+        既存のエピソードは読み取り時の内容ハッシュから変わっていない場合のみ置き換え、
+        その間に他の処理で書き換えられていたものは上書きしません
+
+        Args:
+            ncode (str): 小説コード
+            episodes (list): [(episode_no, body, title, expected_hash, exists)]
+                expected_hash: 読み取り時のcontent_hash（未計算の場合はNone）
+                exists: 読み取り時にエピソードが存在したかどうか
+            update_time (str, optional): 更新時刻。Noneの場合は更新時刻を変更しない
+
+        Returns:
+            dict: {'changed': 置き換えた数, 'added': 追加した数, 'conflicts': 他の処理と競合して見送った数}
+        """
+        result = {'changed': 0, 'added': 0, 'conflicts': 0}
+        if not episodes:
+            return result
+        if not self.episode_hash_enabled():
+            # content_hash列が使えない場合は比較せずに書き込む
+            for episode_no, body, title, _, exists in episodes:
+                self.insert_episode(ncode, episode_no, body, title, update_time)
+                result['changed' if exists else 'added'] += 1
+            return result
+
+        conn = self.get_connection()
+        with self._connection_locks[threading.get_ident()]:
+            cursor = conn.cursor()
+            try:
+                if not conn.in_transaction:
+                    cursor.execute('BEGIN IMMEDIATE')
+                for episode_no, body, title, expected_hash, exists in episodes:
+                    content_hash = episode_hash.body_hash(body)
+                    if exists:
+                        cursor.execute('''
+                        UPDATE episodes
+                        SET body = ?, e_title = ?, content_hash = ?, update_time = COALESCE(?, update_time)
+                        WHERE ncode = ? AND episode_no = ? AND content_hash IS ?
+                          AND (content_hash IS NOT ? OR e_title IS NOT ?)
+                        ''', (body, title, content_hash, update_time, ncode, episode_no, expected_hash,
+                              content_hash, title))
+                        result['changed' if cursor.rowcount else 'conflicts'] += 1
+                    else:
+                        cursor.execute('''
+                        INSERT INTO episodes (ncode, episode_no, body, e_title, content_hash, update_time)
+                        SELECT ?, ?, ?, ?, ?, COALESCE(?, 'undefined')
+                        WHERE NOT EXISTS (SELECT 1 FROM episodes WHERE ncode = ? AND episode_no = ?)
+                        ''', (ncode, episode_no, body, title, content_hash, update_time, ncode, episode_no))
+                        result['added' if cursor.rowcount else 'conflicts'] += 1
+                conn.commit()
+                return result
+
+            except sqlite3.Error as e:
+                conn.rollback()
+                logger.error(f"エピソード差し替えエラー: {e}")
+                raise
+
+    def _insert_episode_without_hash(self, ncode, episode_no, body, title, update_time):
+        """content_hash列を使えない場合のエピソードの挿入・更新"""
+        existing = self.execute_read_query('SELECT rowid FROM episodes WHERE ncode = ? AND episode_no = ?',
+                                           (ncode, episode_no), fetch_all=False)
+        if existing:
+            self.execute_query('''
+            UPDATE episodes SET body = ?, e_title = ?, update_time = COALESCE(?, update_time)
+            WHERE ncode = ? AND episode_no = ?
+            ''', (body, title, update_time, ncode, episode_no))
+        else:
+            self._insert_new_episode(ncode, episode_no, body, title, update_time)
+
+    def _insert_new_episode(self, ncode, episode_no, body, title, update_time, content_hash=None):
+        """新規エピソードを挿入（更新時刻・ハッシュが指定されていない列は既定値のまま）"""
+        values = {'ncode': ncode, 'episode_no': episode_no, 'body': body, 'e_title': title}
+        if update_time is not None:
+            values['update_time'] = update_time
+        if content_hash is not None:
+            values['content_hash'] = content_hash
+        placeholders = ', '.join(['?'] * len(values))
+        self.execute_query(f"INSERT INTO episodes ({', '.join(values)}) VALUES ({placeholders})",
+                           tuple(values.values()))
 
     def get_novels_needing_update(self):
         """
@@ -572,40 +831,22 @@ class DatabaseHandler:
 
     def remove_duplicate_episodes(self):
         """
-        重複するエピソードを削除し、各エピソードごとに最も長い本文を持つものだけを残す
-        （パフォーマンス最適化版）
+        重複するエピソードを削除し、各エピソードごとに最良のもの（エラーを含まず本文が最も長いもの）だけを残す
+        順位付けはウィンドウ関数で行い、一時テーブル経由で一つのトランザクションで削除します
+
+        Returns:
+            int: 削除したエピソードの数
         """
-        # トランザクションを開始
         conn = self.get_connection()
         thread_id = threading.get_ident()
 
         with self._connection_locks[thread_id]:
-            cursor = conn.cursor()
-
             try:
-                # 重複エピソードの識別と削除を一つのクエリで効率的に実行
-                cursor.execute('''
-                DELETE FROM episodes
-                WHERE rowid NOT IN (
-                    SELECT MIN(rowid)
-                    FROM (
-                        SELECT rowid,
-                               ncode,
-                               episode_no,
-                               LENGTH(body) as body_length
-                        FROM episodes
-                    ) AS e
-                    GROUP BY ncode, episode_no
-                    HAVING body_length = MAX(body_length)
-                )
-                ''')
-
-                # コミット
-                conn.commit()
-                logger.info(f"重複エピソードの削除が完了しました。削除数: {cursor.rowcount}")
+                deleted_count, _ = cleanup_engine.remove_episode_duplicates(conn)
+                logger.info(f"重複エピソードの削除が完了しました。削除数: {deleted_count}")
+                return deleted_count
 
             except sqlite3.Error as e:
-                conn.rollback()
                 logger.error(f"重複エピソード削除エラー: {e}")
                 raise
 
@@ -661,4 +902,148 @@ class DatabaseHandler:
     def _chunks(self, lst, n):
         """リストをn個ずつのチャンクに分割"""
         for i in range(0, len(lst), n):
-            yield lst[i:i + n]
\ No newline at end of file
+            yield lst[i:i + n]
+
+
+class ReadOnlyDatabase:
+    """
+    読み取り専用の軽量なデータベースアクセスクラス
+    エクスポートのワーカープロセスなど、DatabaseHandler（シングルトン・ワーカースレッド付き）を
+    使えない・使う必要のない場面で、プロセスごとに独立した接続を持つために使用します
+    """
+
+    def __init__(self, db_path=None):
+        """
+        初期化
+
+        Args:
+            db_path (str, optional): データベースファイルのパス（省略時は設定のパス）
+        """
+        self.db_path = db_path or DATABASE_PATH
+        self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        self.conn.execute('PRAGMA query_only=ON')
+        self.conn.execute('PRAGMA cache_size=-20000')
+        self.conn.text_factory = str
+        self._has_hash_column = None  # episodesテーブルにcontent_hash列があるかどうか（初回参照時に確認）
+
+    def execute_read_query(self, query, params=None, fetch=True, fetch_all=True):
+        """読み取りクエリの実行（DatabaseHandler.execute_read_queryと同じ形式）"""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(query, params or ())
+            if fetch:
+                return cursor.fetchall() if fetch_all else cursor.fetchone()
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            logger.error(f"読み取りクエリエラー: {e}, クエリ: {query}")
+            raise
+
+    def get_all_novels(self):
+        """全ての小説情報を取得"""
+        return self.execute_read_query('SELECT * FROM novels_descs')
+
+    def get_novel_by_ncode(self, ncode):
+        """指定されたncodeの小説情報を取得"""
+        return self.execute_read_query('SELECT * FROM novels_descs WHERE n_code = ?', (ncode,), fetch_all=False)
+
+    def get_episodes_by_ncode(self, ncode):
+        """指定されたncodeの全エピソードを取得"""
+        query = '''
+        SELECT episode_no, e_title, body
+        FROM episodes
+        WHERE ncode = ?
+        ORDER BY CAST(episode_no AS INTEGER)
+        '''
+        return self.execute_read_query(query, (ncode,))
+
+    def get_episode_hashes(self, ncode):
+        """指定されたncodeのエピソードの番号・タイトル・内容ハッシュを取得（DatabaseHandler.get_episode_hashesと同じ形式）"""
+        if self._has_hash_column is None:
+            self._has_hash_column = episode_hash.has_hash_column(self.conn)
+        if not self._has_hash_column:
+            return None
+        return self.execute_read_query(EPISODE_HASHES_QUERY, (ncode,))
+
+    def get_episode_fingerprints(self, ncode=None):
+        """小説ごとのエピソードの構成をまとめて取得（DatabaseHandler.get_episode_fingerprintsと同じ形式）"""
+        if self._has_hash_column is None:
+            self._has_hash_column = episode_hash.has_hash_column(self.conn)
+        query = episode_fingerprints_query(self._has_hash_column, ncode is not None)
+        rows = self.execute_read_query(query, (ncode,) if ncode is not None else None)
+        return {row[0]: tuple(row[1:]) for row in rows}
+
+    def get_episode_bodies(self, ncode, episode_nos):
+        """指定されたエピソードの本文を取得（DatabaseHandler.get_episode_bodiesと同じ形式）"""
+        episode_nos = list(episode_nos)
+        bodies = {}
+        for start in range(0, len(episode_nos), EPISODE_BODIES_CHUNK_SIZE):
+            chunk = episode_nos[start:start + EPISODE_BODIES_CHUNK_SIZE]
+            placeholders = ', '.join(['?'] * len(chunk))
+            query = f'SELECT episode_no, body FROM episodes WHERE ncode = ? AND episode_no IN ({placeholders})'
+            bodies.update(self.execute_read_query(query, (ncode, *chunk)))
+        return bodies
+
+    def iter_episodes_by_ncode(self, ncode, batch_size=100):
+        """
+        指定されたncodeのエピソードを話数順に少しずつ取得（全話をメモリに載せない）
+
+        Args:
+            ncode (str): 小説コード
+            batch_size (int): 一度に取得する件数
+
+        Yields:
+            tuple: (episode_no, e_title, body)
+        """
+        query = '''
+        SELECT episode_no, e_title, body
+        FROM episodes
+        WHERE ncode = ?
+        ORDER BY CAST(episode_no AS INTEGER)
+        '''
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(query, (ncode,))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+
+    def iter_episode_pages(self, ncode, page_size=200):
+        """
+        指定されたncodeのエピソードを話数順にキーセット方式で1ページずつ取得
+        前のページの最後の話数を起点に次のページを取得するため、OFFSETのように後半ほど遅くなることがなく、
+        ページの間は読み取りトランザクションを保持しません
+
+        Args:
+            ncode (str): 小説コード
+            page_size (int): 1ページの件数
+
+        Yields:
+            list: [(episode_no, e_title, body)] のページ
+        """
+        query = '''
+        SELECT episode_no, e_title, body, CAST(episode_no AS INTEGER) AS episode_key
+        FROM episodes
+        WHERE ncode = ? AND (CAST(episode_no AS INTEGER), episode_no) > (?, ?)
+        ORDER BY episode_key, episode_no
+        LIMIT ?
+        '''
+        last_key, last_no = -1, ''
+        while True:
+            rows = self.execute_read_query(query, (ncode, last_key, last_no, page_size))
+            if not rows:
+                break
+            last_key, last_no = rows[-1][3], rows[-1][0]
+            yield [row[:3] for row in rows]
+            if len(rows) < page_size:
+                break
+
+    def close(self):
+        """接続を閉じる"""
+        try:
+            self.conn.close()
+        except sqlite3.Error as e:
+            logger.error(f"読み取り専用DB接続を閉じる際にエラーが発生しました: {e}")
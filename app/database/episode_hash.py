@@ -0,0 +1,157 @@
+"""
+エピソード本文の内容ハッシュを管理するモジュール
+- 本文を正規化してBLAKE2でハッシュ化し、episodesテーブルのcontent_hash列に保存
+- 書き込み時に計算し、既存の行はバッチ処理（backfill_content_hashes）で埋める
+- (ncode, episode_no, content_hash) のインデックスにより、本文を読まずに同一内容の判定ができる
+
+使用例:
+    python -m app.database.episode_hash            # 未計算の行のハッシュを計算
+"""
+import argparse
+import hashlib
+import sqlite3
+import unicodedata
+from config import DATABASE_PATH
+from app.utils.logger_manager import get_logger
+
+# ロガーの設定
+logger = get_logger('EpisodeHash')
+
+# ハッシュを保存する列
+HASH_COLUMN = 'content_hash'
+
+# 同一内容の判定に使うインデックス
+HASH_INDEX = 'idx_episodes_content_hash'
+
+# ハッシュを更新せずに本文だけが書き換えられた場合にハッシュを未計算に戻すトリガー
+# （ハッシュに対応していない書き込みで古いハッシュが残らないようにする）
+HASH_RESET_TRIGGER = f"""
+CREATE TRIGGER IF NOT EXISTS episodes_content_hash_reset AFTER UPDATE OF body ON episodes
+WHEN NEW.body IS NOT OLD.body AND NEW.{HASH_COLUMN} IS OLD.{HASH_COLUMN}
+BEGIN UPDATE episodes SET {HASH_COLUMN} = NULL WHERE rowid = NEW.rowid; END
+"""
+
+# バッチ処理で1トランザクションあたりに処理するrowidの範囲
+BACKFILL_BATCH_SIZE = 2000
+
+# SQLから呼び出すときの関数名（backfill_content_hashesで登録）
+SQL_FUNCTION_NAME = 'episode_content_hash'
+
+
+def normalize_body(body):
+    """
+    ハッシュ計算用に本文を正規化（改行コードの統一・Unicode正規化・前後の空白の除去）
+
+    Args:
+        body (str): 本文
+
+    Returns:
+        str: 正規化した本文
+    """
+    text = body.replace('\r\n', '\n').replace('\r', '\n')
+    return unicodedata.normalize('NFC', text).strip()
+
+
+def body_hash(body):
+    """
+    本文の内容ハッシュを計算
+
+    Args:
+        body (str): 本文（Noneの場合はNone）
+
+    Returns:
+        str: 16進数のハッシュ文字列（本文がない場合はNone）
+    """
+    if body is None:
+        return None
+    return hashlib.blake2b(normalize_body(body).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def has_hash_column(conn):
+    """
+    episodesテーブルにcontent_hash列があるかどうか
+
+    Args:
+        conn (sqlite3.Connection): データベース接続
+
+    Returns:
+        bool: 列がある場合True
+    """
+    columns = conn.execute('PRAGMA table_info(episodes)').fetchall()
+    return any(column[1] == HASH_COLUMN for column in columns)
+
+
+def ensure_hash_column(conn):
+    """
+    episodesテーブルにcontent_hash列とインデックス・トリガーを作成（作成済みなら何もしない）
+
+    Args:
+        conn (sqlite3.Connection): データベース接続
+
+    Returns:
+        bool: 列が使える場合True（episodesテーブルがない場合はFalse）
+    """
+    columns = conn.execute('PRAGMA table_info(episodes)').fetchall()
+    if not columns:
+        return False
+    if not any(column[1] == HASH_COLUMN for column in columns):
+        conn.execute(f'ALTER TABLE episodes ADD COLUMN {HASH_COLUMN} TEXT')
+        logger.info("episodesテーブルにcontent_hash列を追加しました")
+    conn.execute(f'CREATE INDEX IF NOT EXISTS {HASH_INDEX} ON episodes (ncode, episode_no, {HASH_COLUMN})')
+    conn.execute(HASH_RESET_TRIGGER)
+    conn.commit()
+    return True
+
+
+def backfill_content_hashes(db_path=None, batch_size=BACKFILL_BATCH_SIZE):
+    """
+    content_hashが未計算の行のハッシュをrowidの範囲ごとの短いトランザクションで計算
+    中断しても計算済みの行は残るため、再実行すると続きから処理します
+
+    Args:
+        db_path (str, optional): データベースファイルのパス。Noneの場合はconfigからパスを使用
+        batch_size (int): 1トランザクションあたりに処理するrowidの範囲
+
+    Returns:
+        int: ハッシュを計算した行の数
+    """
+    conn = sqlite3.connect(db_path or DATABASE_PATH, timeout=30)
+    try:
+        if not ensure_hash_column(conn):
+            logger.warning("episodesテーブルがないため、ハッシュの計算を省略します")
+            return 0
+        conn.create_function(SQL_FUNCTION_NAME, 1, body_hash, deterministic=True)
+
+        low, high = conn.execute(
+            f'SELECT MIN(rowid), MAX(rowid) FROM episodes WHERE {HASH_COLUMN} IS NULL AND body IS NOT NULL'
+        ).fetchone()
+        if low is None:
+            logger.info("ハッシュが未計算のエピソードはありません")
+            return 0
+
+        updated = 0
+        for start in range(low, high + 1, batch_size):
+            conn.execute('BEGIN IMMEDIATE')
+            cursor = conn.execute(f'''
+                UPDATE episodes SET {HASH_COLUMN} = {SQL_FUNCTION_NAME}(body)
+                WHERE rowid >= ? AND rowid < ? AND {HASH_COLUMN} IS NULL AND body IS NOT NULL
+            ''', (start, start + batch_size))
+            conn.commit()
+            updated += cursor.rowcount
+        logger.info(f"{updated}件のエピソードのハッシュを計算しました")
+        return updated
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='エピソード本文の内容ハッシュを計算します')
+    parser.add_argument('--db', default=None, help='データベースファイルのパス（省略時は設定のパス）')
+    parser.add_argument('--batch-size', type=int, default=BACKFILL_BATCH_SIZE,
+                        help='1トランザクションあたりに処理するrowidの範囲')
+    args = parser.parse_args()
+    count = backfill_content_hashes(args.db, args.batch_size)
+    print(f"ハッシュを計算したエピソード: {count}件")
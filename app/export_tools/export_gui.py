@@ -9,7 +9,6 @@ import queue
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from pathlib import Path
-import time
 
 # ルートディレクトリをパスに追加
 current_dir = Path(__file__).parent
@@ -17,6 +16,8 @@ root_dir = current_dir.parent
 sys.path.insert(0, str(root_dir))
 
 from app.utils.exporters.html_exporter import HTMLExporter
+from app.utils.exporters.epub_exporter import EpubExporter
+from app.core.search_index import NovelSearchIndex, SearchDebouncer
 from app.utils.logger_manager import get_logger
 from app.database.db_handler import DatabaseHandler
 
@@ -160,6 +161,11 @@ class ExportApp(tk.Tk):
 
         # 小説リスト
         self.novels = []
+        self.visible_row_ids = []  # リストボックスの各行に対応するself.novelsの行ID
+
+        # 検索インデックスと入力中検索のデバウンス
+        self.search_index = NovelSearchIndex()
+        self.search_debouncer = SearchDebouncer(self, self.search_index.search, self.on_search_results)
 
         # UIの初期化
         self.init_ui()
@@ -218,6 +224,12 @@ class ExportApp(tk.Tk):
         )
         zip_check.pack(side="left", padx=5)
 
+        # 出力形式（EPUBは小説ごとに1ファイルを作成するため、ZIPオプションは使わない）
+        ttk.Label(options_frame, text="形式:").pack(side="left", padx=(15, 0))
+        self.format_var = tk.StringVar(value="html")
+        ttk.Radiobutton(options_frame, text="HTML", variable=self.format_var, value="html").pack(side="left", padx=5)
+        ttk.Radiobutton(options_frame, text="EPUB", variable=self.format_var, value="epub").pack(side="left", padx=5)
+
         # 小説選択フレーム
         novels_frame = ttk.LabelFrame(main_frame, text="小説選択", padding=10)
         novels_frame.pack(fill="both", expand=True, pady=10)
@@ -272,6 +284,7 @@ class ExportApp(tk.Tk):
         search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
         search_entry.pack(side="left", fill="x", expand=True, padx=5)
         search_entry.bind("<Return>", self.search_novels)
+        search_entry.bind("<KeyRelease>", self.on_search_key)
 
         search_button = ttk.Button(search_frame, text="検索", command=self.search_novels)
         search_button.pack(side="left")
@@ -335,16 +348,11 @@ class ExportApp(tk.Tk):
             # すべての小説を取得
             self.novels = self.db_handler.get_all_novels()
 
-            # リストボックスに表示
-            self.novels_listbox.delete(0, tk.END)
-
-            for novel in self.novels:
-                ncode = novel[0]
-                title = novel[1] if novel[1] else "無題の小説"
-                author = novel[2] if novel[2] else "著者不明"
-                episodes = novel[5] if len(novel) > 5 and novel[5] is not None else 0
+            # 検索インデックスを構築（転置インデックスはバックグラウンドで構築）
+            self.search_index.build(self.novels, background=True)
 
-                self.novels_listbox.insert(tk.END, f"{title} - {author} ({episodes}話)")
+            # リストボックスに表示
+            self.show_rows(range(len(self.novels)))
 
             # 情報ラベルを更新
             self.info_label.config(text=f"合計: {len(self.novels)}作品")
@@ -353,42 +361,59 @@ class ExportApp(tk.Tk):
             logger.error(f"小説データの読み込みエラー: {e}")
             messagebox.showerror("エラー", f"小説データの読み込みに失敗しました: {e}")
 
-    def search_novels(self, event=None):
-        """検索キーワードに一致する小説を表示"""
-        search_term = self.search_var.get().lower()
-
-        if not search_term:
-            # 検索条件なしならすべて表示
-            self.load_novels()
-            return
+    def show_rows(self, row_ids):
+        """
+        指定された行IDの小説をリストボックスに表示
 
-        # リストボックスをクリア
-        self.novels_listbox.delete(0, tk.END)
+        Args:
+            row_ids: self.novelsの行IDのリスト
+        """
+        self.visible_row_ids = list(row_ids)
 
-        # 検索条件に一致する小説を表示
-        matched_count = 0
-        for novel in self.novels:
-            ncode = novel[0]
+        items = []
+        for row_id in self.visible_row_ids:
+            novel = self.novels[row_id]
             title = novel[1] if novel[1] else "無題の小説"
             author = novel[2] if novel[2] else "著者不明"
             episodes = novel[5] if len(novel) > 5 and novel[5] is not None else 0
-            synopsis = novel[7] if len(novel) > 7 and novel[7] else ""
+            items.append(f"{title} - {author} ({episodes}話)")
 
-            # タイトル、作者、あらすじのいずれかに検索語が含まれるかチェック
-            if (search_term in title.lower() or
-                    search_term in author.lower() or
-                    search_term in synopsis.lower() or
-                    search_term in ncode.lower()):
-                self.novels_listbox.insert(tk.END, f"{title} - {author} ({episodes}話)")
-                matched_count += 1
+        self.novels_listbox.delete(0, tk.END)
+        if items:
+            self.novels_listbox.insert(tk.END, *items)
+
+    def search_novels(self, event=None):
+        """検索キーワードに一致する小説を表示"""
+        self.search_debouncer.submit(self.search_var.get(), immediate=True)
+
+    def on_search_key(self, event=None):
+        """検索欄の入力時の処理（入力が止まってから検索する）"""
+        if event is not None and event.keysym == "Return":
+            return
+        self.search_debouncer.submit(self.search_var.get())
+
+    def on_search_results(self, search_term, row_ids):
+        """
+        検索結果を表示（メインスレッドで呼ばれる）
+
+        Args:
+            search_term (str): 検索キーワード
+            row_ids (list): 一致した小説の行ID
+        """
+        self.show_rows(row_ids)
 
         # 情報ラベルを更新
-        self.info_label.config(text=f"検索結果: {matched_count}作品")
+        if search_term.strip():
+            self.info_label.config(text=f"検索結果: {len(row_ids)}作品")
+        else:
+            self.info_label.config(text=f"合計: {len(self.novels)}作品")
 
     def clear_search(self):
         """検索をクリア"""
+        self.search_debouncer.cancel()
         self.search_var.set("")
-        self.load_novels()
+        self.show_rows(range(len(self.novels)))
+        self.info_label.config(text=f"合計: {len(self.novels)}作品")
 
     def get_selected_novels(self):
         """選択された小説のリストを取得"""
@@ -402,11 +427,11 @@ class ExportApp(tk.Tk):
                 # 選択モードで何も選択されていない場合は空リストを返す
                 return []
 
-        # 選択された小説のみ返す
+        # 選択された小説のみ返す（リストボックスの位置を行IDに変換）
         selected_novels = []
         for i in selected_indices:
-            if i < len(self.novels):
-                selected_novels.append(self.novels[i])
+            if i < len(self.visible_row_ids):
+                selected_novels.append(self.novels[self.visible_row_ids[i]])
 
         return selected_novels
 
@@ -452,8 +477,9 @@ class ExportApp(tk.Tk):
                 messagebox.showerror("エラー", "エクスポートする小説が選択されていません")
                 return
 
-        # ZIPオプションの取得
+        # ZIPオプションと出力形式の取得
         create_zip = self.create_zip_var.get()
+        export_format = self.format_var.get()
 
         # プログレスダイアログを表示
         progress_dialog = ExportProgressDialog(self)
@@ -461,24 +487,29 @@ class ExportApp(tk.Tk):
         # エクスポート処理を別スレッドで実行
         export_thread = threading.Thread(
             target=self.run_export,
-            args=(export_path, selected_novels, create_zip, progress_dialog)
+            args=(export_path, selected_novels, create_zip, progress_dialog, export_format)
         )
         export_thread.daemon = True
         export_thread.start()
 
-    def run_export(self, export_path, novels, create_zip, progress_dialog):
+    def run_export(self, export_path, novels, create_zip, progress_dialog, export_format="html"):
         """
         エクスポート処理を実行（バックグラウンドスレッド）
 
         Args:
             export_path (str): エクスポート先パス
             novels (list): エクスポートする小説のリスト
-            create_zip (bool): ZIPファイルを作成するかどうか
+            create_zip (bool): ZIPファイルを作成するかどうか（EPUBでは無視）
             progress_dialog: 進捗ダイアログ
+            export_format (str): 出力形式（"html" または "epub"）
         """
         try:
-            # エクスポーターの初期化
-            exporter = HTMLExporter(export_path)
+            # エクスポーターの初期化（ZIPの場合はディレクトリを作成せずに直接書き出す）
+            if export_format == "epub":
+                exporter = EpubExporter(export_path)
+                create_zip = False
+            else:
+                exporter = HTMLExporter(export_path, prepare_assets=not create_zip)
 
             # 小説の総数
             total_novels = len(novels)
@@ -486,63 +517,57 @@ class ExportApp(tk.Tk):
             # 選択したモード
             all_novels = self.selection_mode.get() == "all"
 
-            # 全小説モードかどうかによって処理を分ける
-            if all_novels:
-                # すべての小説をエクスポート
-                progress_dialog.update_progress(0, "すべての小説をエクスポートしています...")
-                result = exporter.export_all_novels()
+            # 小説コードからタイトルを引けるようにする（進捗表示用）
+            titles = {novel[0]: novel[1] if novel[1] else "無題の小説" for novel in novels}
+
+            def on_progress(completed, total, ncode):
+                # ワーカープロセスの完了通知はこのスレッドで届くため、UIの更新はメインスレッドに任せる
+                progress = int((completed / total) * 90) if total else 90
+                message = f"小説をエクスポート中... ({completed}/{total})"
+                progress_dialog.after(
+                    0, progress_dialog.update_progress, progress, message, titles.get(ncode, ncode)
+                )
+
+            cancel_check = lambda: progress_dialog.cancelled
+
+            if create_zip:
+                # ZIPファイルへ直接書き出す
+                progress_dialog.after(0, progress_dialog.update_progress, 0, "ZIPファイルに書き出しています...")
+                ncodes = None if all_novels else [novel[0] for novel in novels]
+                zip_path = exporter.export_to_zip(ncodes=ncodes, progress_callback=on_progress, cancel_check=cancel_check)
 
                 if progress_dialog.cancelled:
                     progress_dialog.finished(False, "エクスポートがキャンセルされました")
                     return
 
-                if not result:
+                if not zip_path:
                     progress_dialog.finished(False, "エクスポートに失敗しました")
                     return
-            else:
-                # 選択された小説のみエクスポート
-                for i, novel in enumerate(novels):
-                    if progress_dialog.cancelled:
-                        progress_dialog.finished(False, "エクスポートがキャンセルされました")
-                        return
-
-                    ncode = novel[0]
-                    title = novel[1] if novel[1] else "無題の小説"
-
-                    # 進捗更新
-                    progress = int((i / total_novels) * 100)
-                    progress_dialog.update_progress(
-                        progress,
-                        f"小説をエクスポート中... ({i + 1}/{total_novels})",
-                        title
-                    )
-
-                    # 小説をエクスポート
-                    exporter.export_novel(ncode)
 
-                    # 少し待機（UI更新のため）
-                    time.sleep(0.1)
+                progress_dialog.finished(True, f"エクスポートが完了しました\nZIPファイル: {os.path.abspath(zip_path)}")
+                return
 
-            # ZIPファイルの作成
-            if create_zip and not progress_dialog.cancelled:
-                progress_dialog.update_progress(95, "ZIPファイルを作成しています...")
-                zip_path = exporter.export_as_zip()
+            # 全小説モードかどうかによって処理を分ける
+            if all_novels:
+                # すべての小説をエクスポート
+                progress_dialog.after(0, progress_dialog.update_progress, 0, "すべての小説をエクスポートしています...")
+                result = exporter.export_all_novels(on_progress, cancel_check)
+            else:
+                # 選択された小説のみエクスポート
+                progress_dialog.after(0, progress_dialog.update_progress, 0, f"小説をエクスポート中... (0/{total_novels})")
+                result = exporter.export_novels([novel[0] for novel in novels], on_progress, cancel_check)
 
-                if progress_dialog.cancelled:
-                    progress_dialog.finished(False, "エクスポートがキャンセルされました")
-                    return
+            if progress_dialog.cancelled:
+                progress_dialog.finished(False, "エクスポートがキャンセルされました")
+                return
 
-                # 成功メッセージ
-                if os.path.exists(zip_path):
-                    message = f"エクスポートが完了しました\nZIPファイル: {zip_path}"
-                else:
-                    message = f"エクスポートは完了しましたが、ZIPファイルの作成に失敗しました"
+            if not result:
+                progress_dialog.finished(False, "エクスポートに失敗しました")
+                return
 
-                progress_dialog.finished(True, message)
-            else:
-                # ZIP無しで完了
-                message = f"エクスポートが完了しました\nフォルダ: {export_path}"
-                progress_dialog.finished(True, message)
+            # ZIP無しで完了
+            message = f"エクスポートが完了しました\nフォルダ: {export_path}"
+            progress_dialog.finished(True, message)
 
         except Exception as e:
             logger.error(f"エクスポート処理中にエラーが発生しました: {e}")
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-小説データをHTML形式にエクスポートするメインスクリプト
+小説データをHTML形式・EPUB形式・テキスト形式にエクスポートするメインスクリプト
 """
 import os
 import sys
@@ -12,6 +12,8 @@ root_dir = current_dir.parent
 sys.path.insert(0, str(root_dir))
 
 from app.utils.exporters.html_exporter import HTMLExporter, run_export
+from app.utils.exporters.epub_exporter import EpubExporter, run_export as run_epub_export
+from app.utils.exporters.txt_exporter import TxtExporter, run_export as run_txt_export
 from app.utils.logger_manager import get_logger
 
 # ロガーの設定
@@ -23,19 +25,59 @@ def main():
     import argparse
 
     # コマンドライン引数の解析
-    parser = argparse.ArgumentParser(description='小説データをHTML形式にエクスポートするツール')
-    parser.add_argument('--dir', default='html_export', help='エクスポート先ディレクトリ')
-    parser.add_argument('--no-zip', action='store_true', help='ZIPファイルを作成しない')
+    parser = argparse.ArgumentParser(description='小説データをHTML形式・EPUB形式・テキスト形式にエクスポートするツール')
+    parser.add_argument('--format', choices=['html', 'epub', 'txt'], default='html', help='出力形式（epubは小説ごとに1ファイル）')
+    parser.add_argument('--dir', default=None, help='エクスポート先ディレクトリ（省略時は html_export / epub_export / txt_export）')
+    parser.add_argument('--no-zip', action='store_true', help='ZIPファイルを作成しない（HTMLのみ）')
     parser.add_argument('--ncode', help='特定の小説だけをエクスポート')
+    parser.add_argument('--workers', type=int, default=None, help='並列に処理するプロセス数（省略時はCPUコア数）')
+    parser.add_argument('--full', action='store_true', help='変更の有無にかかわらず全ページを書き出す')
+    parser.add_argument('--split', choices=['novel', 'episode'], default='novel',
+                        help='テキストのファイルの分け方（novel: 小説ごと、episode: エピソードごと）')
+    parser.add_argument('--encoding', default='utf-8', help='テキストの文字コード（utf-8、utf-8-sig、cp932など）')
+    parser.add_argument('--crlf', action='store_true', help='テキストの改行コードをCRLFにする')
 
     args = parser.parse_args()
+    if args.dir is None:
+        args.dir = f'{args.format}_export'
 
     # エクスポート処理を実行
     try:
-        if args.ncode:
+        if args.format == 'epub':
+            if args.ncode:
+                # 特定の小説のみエクスポート
+                exporter = EpubExporter(args.dir)
+                epub_path = exporter.export_novel(args.ncode)
+                exporter.close()
+                result = epub_path is not None
+
+                if result:
+                    print(f"小説 {args.ncode} のエクスポートが完了しました: {epub_path}")
+                else:
+                    print(f"小説 {args.ncode} のエクスポートに失敗しました。ログを確認してください。")
+            else:
+                # 全小説をエクスポート
+                result = run_epub_export(args.dir, args.workers)
+        elif args.format == 'txt':
+            newline = '\r\n' if args.crlf else '\n'
+            if args.ncode:
+                # 特定の小説のみエクスポート
+                exporter = TxtExporter(args.dir, split=args.split, encoding=args.encoding, newline=newline)
+                txt_path = exporter.export_novel(args.ncode)
+                exporter.close()
+                result = txt_path is not None
+
+                if result:
+                    print(f"小説 {args.ncode} のエクスポートが完了しました: {txt_path}")
+                else:
+                    print(f"小説 {args.ncode} のエクスポートに失敗しました。ログを確認してください。")
+            else:
+                # 全小説をエクスポート
+                result = run_txt_export(args.dir, args.workers, args.split, args.encoding, newline)
+        elif args.ncode:
             # 特定の小説のみエクスポート
             exporter = HTMLExporter(args.dir)
-            result = exporter.export_novel(args.ncode)
+            result = exporter.export_novel(args.ncode, force=args.full)
 
             if result:
                 logger.info(f"小説 {args.ncode} のエクスポートが完了しました")
@@ -49,7 +91,7 @@ def main():
                 print(f"ZIPファイルを作成しました: {zip_path}")
         else:
             # 全小説をエクスポート
-            result = run_export(args.dir, not args.no_zip)
+            result = run_export(args.dir, not args.no_zip, args.workers, args.full)
 
             if result:
                 print("エクスポートが正常に完了しました")
@@ -5,6 +5,12 @@
 - オンデマンドファイル操作
 - パフォーマンス最適化
 """
+import time
+
+# 起動プロファイル用にインポート開始時刻を記録
+_IMPORT_START = time.perf_counter()
+
+import argparse
 import tkinter as tk
 from tkinter import ttk, messagebox
 import threading
@@ -22,18 +28,32 @@ from app.core.novel_manager import NovelManager
 from app.core.database_manager import DatabaseManager
 from app.core.settings_manager import SettingsManager
 from app.core.update_manager import UpdateManager
+from app.core.progress_bus import ProgressBus, format_rate_eta
+from app.core.startup import StagedStartup, StartupProfiler
 
 from app.utils.logger_manager import get_logger
 
 # ロガーの設定
 logger = get_logger('AppMain')
 
+# インポート完了時刻
+_IMPORT_END = time.perf_counter()
+
 
 class NovelViewerApp:
     """メインアプリケーションクラス"""
 
-    def __init__(self):
-        """アプリケーションの初期化"""
+    def __init__(self, startup_profiler=None, show_startup_profile=False):
+        """
+        アプリケーションの初期化
+
+        Args:
+            startup_profiler (StartupProfiler, optional): 起動時間の計測に使用するプロファイラ
+            show_startup_profile (bool): 起動処理の完了時に起動プロファイルを出力するかどうか
+        """
+        self.startup = StagedStartup(startup_profiler)
+        self.show_startup_profile = show_startup_profile
+
         self.root = None
         self.main_frame = None
         self.side_panel = None
@@ -51,7 +71,8 @@ class NovelViewerApp:
 
         # 非同期処理用キュー
         self.task_queue = queue.Queue()
-        self.update_progress_queue = queue.Queue()
+        self.update_progress_queue = ProgressBus()
+        self.progress_state = {}  # 進捗表示に反映済みの状態
 
         # ビュー
         self.novel_list_view = None
@@ -160,11 +181,12 @@ class NovelViewerApp:
         # 初期ビューを表示
         self.show_loading_screen()
         self.setup_progress_panel()
+        self.startup.profiler.mark("メインウィンドウの生成")
         # 非同期データロードの開始
         self.start_background_tasks()
 
-        # 進捗状況の更新機能を開始
-        self.root.after(100, self.update_progress)
+        # 進捗状況の更新機能を開始（フレームレート間隔で集約済みの進捗を反映）
+        self.update_progress_queue.start_polling(self.root, self.update_progress)
 
     def create_side_panel_buttons(self):
         """サイドパネルのボタンを作成"""
@@ -233,68 +255,101 @@ class NovelViewerApp:
         db_thread.start()
 
     def initialize_database(self):
-        """データベースの初期化（バックグラウンドスレッドで実行）"""
+        """
+        データベースの初期化（バックグラウンドスレッドで実行）
+        一覧表示に必要な処理だけを先に行い、残りの処理は後回しの段階として実行する
+        """
         try:
-            # データベース接続
-            self.db_manager.connect()
-
-            # general_all_noが不明な小説の確認と更新
-            check_and_update_missing_general_all_no()
-
-            # 小説データの読み込み
-            self.novel_manager.load_novels()
-
-            # 新着情報のチェック
-            shinchaku_info = self.update_manager.check_shinchaku()
-            shinchaku_ep, shinchaku_novels, shinchaku_count = shinchaku_info
-
-            # UI更新はメインスレッドで実行
-            self.root.after(0, lambda: self.header_label.config(
-                text=f"新着情報\n新着{shinchaku_count}件,{shinchaku_ep}話"))
+            # クリティカルパス: データベース接続と一覧表示用データの読み込み
+            self.startup.run_critical("データベース接続", self.db_manager.connect)
+            self.startup.run_critical("小説一覧の読み込み", self.novel_manager.load_catalog)
 
             # 初期表示を設定
-            self.root.after(0, self.show_novel_list)
-
-            logger.info("データベース初期化が完了しました")
+            self.root.after(0, self.on_novel_list_ready)
 
         except Exception as e:
             logger.error(f"データベース初期化エラー: {e}")
             self.root.after(0,
                             lambda: messagebox.showerror("エラー", f"データベース初期化中にエラーが発生しました: {e}"))
-    def update_progress(self):
-        """進捗状況の表示を更新する"""
-        if not self.update_progress_queue.empty():
-            progress_data = self.update_progress_queue.get()
-
-            # データが辞書形式の場合、詳細な進捗情報として扱う
-            if isinstance(progress_data, dict):
-                # 進捗パネルの表示/非表示
-                if 'show' in progress_data:
-                    if progress_data['show']:
-                        self.progress_panel.pack(side="bottom", fill="x", padx=5, pady=10)
-                    else:
-                        self.progress_panel.pack_forget()
-
-                # 進捗率の更新
-                if 'percent' in progress_data:
-                    percent = progress_data['percent']
-                    self.progress_bar['value'] = percent
-                    self.progress_percent.config(text=f"{percent}%")
-
-                # メッセージの更新
-                if 'message' in progress_data:
-                    self.progress_message.config(text=progress_data['message'])
-            else:
-                # 文字列の場合は単純なメッセージとして表示
-                self.progress_message.config(text=progress_data)
+            return
+
+        # 後回しの段階（登録順に実行、終了時に中断可能）
+        self.startup.add_deferred("カタログの鮮度確認・検索インデックスの構築", self.novel_manager.refresh_catalog)
+        self.startup.add_deferred("新着情報の確認", self.refresh_shinchaku)
+        self.startup.add_deferred("小説情報の更新", self.update_novel_metadata)
+        self.startup.add_deferred("話数不明の小説の確認", check_and_update_missing_general_all_no)
+        self.startup.add_deferred("小説データの再読み込み", self.novel_manager.reload_novels)
+        self.startup.add_deferred("新着情報の再確認", self.refresh_shinchaku)
+        self.startup.add_deferred("取得キューの再開", lambda: self.root.after(0, self.resume_crawl_queue))
+        self.startup.start_deferred(self.on_startup_finished)
+
+    def on_novel_list_ready(self):
+        """クリティカルパス完了時の処理（メインスレッドで実行）"""
+        self.show_novel_list()
+        self.root.after_idle(lambda: self.startup.profiler.mark("小説一覧の初回描画"))
+        logger.info("小説一覧を表示しました")
+
+    def refresh_shinchaku(self):
+        """新着情報を確認してヘッダーに反映する"""
+        shinchaku_ep, shinchaku_novels, shinchaku_count = self.update_manager.check_shinchaku()
+
+        # UI更新はメインスレッドで実行
+        self.root.after(0, lambda: self.header_label.config(
+            text=f"新着情報\n新着{shinchaku_count}件,{shinchaku_ep}話"))
+
+    def update_novel_metadata(self, full=False):
+        """
+        小説APIから小説情報（総話数・あらすじなど）を更新する
+
+        Args:
+            full (bool): Trueの場合は前回の同期にかかわらず全小説を確認
+        """
+        del_yml()
+        dell_dl()
+        db_update(full)
+
+    def on_startup_finished(self):
+        """後回しの起動処理がすべて終了したときの処理"""
+        logger.info("データベース初期化が完了しました")
+        report = self.startup.profiler.report()
+        logger.debug(report)
+        if self.show_startup_profile:
+            print(report, flush=True)
+
+    def update_progress(self, task, progress_data):
+        """
+        進捗状況の表示を更新する（ProgressBusからフレームごとに呼ばれる）
+
+        Args:
+            task (str): タスク名
+            progress_data (dict): 前回の反映以降に変化した進捗状態
+        """
+        # 進捗パネルの表示/非表示
+        if 'show' in progress_data:
+            if progress_data['show']:
                 self.progress_panel.pack(side="bottom", fill="x", padx=5, pady=10)
+            else:
+                self.progress_panel.pack_forget()
+                self.progress_state = {}
 
-        # 更新中は定期的に再実行
-        if self.update_in_progress:
-            self.root.after(100, self.update_progress)
-        else:
-            # 3秒後にメッセージをクリア
-            self.root.after(3000, lambda: self.progress_panel.pack_forget())
+        self.progress_state.update(progress_data)
+
+        # 進捗率・スループット・残り時間の更新
+        if 'percent' in progress_data or 'eta' in progress_data:
+            percent = self.progress_state.get('percent', 0)
+            self.progress_bar['value'] = percent
+            rate_eta = format_rate_eta(self.progress_state)
+            self.progress_percent.config(text=f"{percent}%" + (f" ({rate_eta})" if rate_eta else ""))
+
+        # メッセージの更新
+        if 'message' in progress_data:
+            self.progress_message.config(text=progress_data['message'])
+
+    def hide_progress_panel(self):
+        """更新処理が実行中でなければ進捗パネルを非表示にする"""
+        if not self.update_in_progress:
+            self.progress_panel.pack_forget()
+            self.progress_state = {}
 
     # update_novels メソッドを更新
     def update_novels(self, novels=None):
@@ -309,7 +364,6 @@ class NovelViewerApp:
             'percent': 0,
             'message': "更新処理を開始しています..."
         })
-        self.root.after(100, self.update_progress)
 
         if novels:
             # 特定の小説を更新
@@ -392,6 +446,8 @@ class NovelViewerApp:
         """コマンドの処理"""
         if command.lower().startswith("update"):
             return self.handle_update_command(command)
+        elif command.lower().startswith("queue"):
+            return self.handle_queue_command(command)
         else:
             return "エラー: 不明なコマンドです。'help'コマンドでヘルプを表示します。"
 
@@ -408,9 +464,16 @@ class NovelViewerApp:
                 args=(self.update_progress_queue, self.on_update_complete)
             ).start()
             self.update_in_progress = True
-            self.root.after(100, self.update_progress)
             return "全ての更新可能な小説の取得を開始します..."
 
+        # 小説情報の更新コマンド（--fullで前回の同期にかかわらず全小説を確認）
+        elif "--metadata" in command:
+            full = "--full" in command
+            threading.Thread(target=self.update_novel_metadata, args=(full,), daemon=True).start()
+            if full:
+                return "全小説の小説情報の確認を開始します..."
+            return "前回の同期以降に更新された小説情報の取得を開始します..."
+
         # 個別更新コマンド
         elif "--single" in command:
             parts = command.split("--")
@@ -432,9 +495,17 @@ class NovelViewerApp:
                     args=(ncode, self.update_progress_queue, self.on_update_complete)
                 ).start()
                 self.update_in_progress = True
-                self.root.after(100, self.update_progress)
                 return f"小説コード {ncode} の全エピソードの再取得を開始します..."
 
+            # 目次から新着・改稿エピソードを検出して取得
+            elif "--revised" in command:
+                threading.Thread(
+                    target=self.update_manager.sync_revised_episodes,
+                    args=(ncode, self.update_progress_queue, self.on_update_complete)
+                ).start()
+                self.update_in_progress = True
+                return f"小説コード {ncode} の目次を確認し、新着・改稿エピソードの取得を開始します..."
+
             # 欠落エピソード取得
             elif "--get_lost" in command:
                 threading.Thread(
@@ -442,7 +513,6 @@ class NovelViewerApp:
                     args=(ncode, self.update_progress_queue, self.on_update_complete)
                 ).start()
                 self.update_in_progress = True
-                self.root.after(100, self.update_progress)
                 return f"小説コード {ncode} の欠落エピソードの取得を開始します..."
 
             # 通常の更新
@@ -457,17 +527,84 @@ class NovelViewerApp:
                     args=(novel, self.update_progress_queue, self.on_update_complete)
                 ).start()
                 self.update_in_progress = True
-                self.root.after(100, self.update_progress)
                 return f"小説 {novel[1]} の更新を開始します..."
 
         else:
             return "エラー: 無効なコマンド形式です。'help'コマンドでヘルプを表示します。"
 
 
+    def handle_queue_command(self, command):
+        """取得キューのコマンドの処理"""
+        crawl_queue = self.update_manager.crawl_queue
+
+        if "--pause" in command:
+            crawl_queue.pause()
+            return "キューを一時停止しました（取得中のエピソードが終わり次第停止します）。\n" + crawl_queue.describe()
+
+        elif "--resume" in command:
+            crawl_queue.resume()
+            if self.update_in_progress:
+                return "キューの一時停止を解除しました（実行中の更新処理の完了後に再開します）。"
+            self.resume_crawl_queue()
+            return "キューの処理を再開します...\n" + crawl_queue.describe()
+
+        elif "--retry" in command:
+            count = crawl_queue.retry_failed()
+            return f"失敗した {count}件のジョブを未処理に戻しました。"
+
+        elif "--clear" in command:
+            count = crawl_queue.clear_done(0)
+            return f"完了した {count}件のジョブを削除しました。"
+
+        elif "--pins" in command:
+            pins = self.update_manager.scheduler.pinned()
+            if not pins:
+                return "ピン留めされている小説はありません。"
+            return "\n".join(f"  {ncode} ({pinned_at})" for ncode, pinned_at in pins)
+
+        elif "--unpin" in command or "--pin" in command:
+            # フラグの後のncodeを取得
+            ncode = next((part for part in command.split()[1:] if not part.startswith("--")), None)
+            if not ncode:
+                return "エラー: 小説コード(ncode)が指定されていません。"
+            scheduler = self.update_manager.scheduler
+            if "--unpin" in command:
+                if not scheduler.unpin(ncode):
+                    return f"小説コード {ncode} はピン留めされていません。"
+                message = f"小説コード {ncode} のピン留めを解除しました。"
+            else:
+                scheduler.pin(ncode)
+                message = f"小説コード {ncode} をピン留めしました（更新を優先して取得します）。"
+            scheduler.reschedule(self.update_manager.crawl_queue)
+            return message
+
+        elif "--status" in command or command.strip().lower() == "queue":
+            lines = [crawl_queue.describe()]
+            for ncode, episode_no, attempts, last_error, updated_at in crawl_queue.failed_jobs():
+                lines.append(f"  失敗: {ncode}-{episode_no} (試行 {attempts}回, {updated_at}): {last_error}")
+            return "\n".join(lines)
+
+        else:
+            return "エラー: 無効なコマンド形式です。'help'コマンドでヘルプを表示します。"
+
+    def resume_crawl_queue(self):
+        """前回の実行で残った取得キューのジョブを再開する（更新処理が実行中なら何もしない）"""
+        if self.update_in_progress:
+            return
+        self.update_in_progress = True
+        threading.Thread(
+            target=self.update_manager.resume_crawl_queue,
+            args=(self.update_progress_queue, self.on_update_complete),
+            daemon=True
+        ).start()
+
     def on_update_complete(self):
         """更新完了時の処理"""
         self.update_in_progress = False
 
+        # 3秒後に進捗表示を閉じる
+        self.root.after(3000, self.hide_progress_panel)
+
         # 新着情報を再取得して表示を更新
         shinchaku_info = self.update_manager.check_shinchaku()
         shinchaku_ep, shinchaku_novels, shinchaku_count = shinchaku_info
@@ -506,6 +643,8 @@ class NovelViewerApp:
 
         # アプリケーション終了時の処理
         logger.info("アプリケーションの終了処理を開始します")
+        # 未実行の起動処理を中断
+        self.startup.cancel()
         # データベース接続を閉じてWALファイルをクリーンアップ
         self.db_manager.close()
         logger.info("アプリケーションを終了しました")
@@ -513,10 +652,17 @@ class NovelViewerApp:
 
 def main():
     """アプリケーションのエントリーポイント"""
-    del_yml()
-    dell_dl()
-    db_update()
-    app = NovelViewerApp()
+    parser = argparse.ArgumentParser(description='小説ビューア')
+    parser.add_argument('--startup-profile', action='store_true',
+                        help='起動処理の段階ごとの所要時間を出力する')
+    args, _ = parser.parse_known_args()
+
+    # 起動時間の計測（インポート開始を基準とする）
+    profiler = StartupProfiler(origin=_IMPORT_START)
+    profiler.record("モジュールのインポート", _IMPORT_START, _IMPORT_END)
+
+    # 小説情報の更新（API）は一覧表示の後にバックグラウンドで実行する
+    app = NovelViewerApp(startup_profiler=profiler, show_startup_profile=args.startup_profile)
     app.run()
 
 
@@ -1,7 +1,6 @@
 import sqlite3
-import time
-import random
-from app.core.checker import catch_up_episode
+from app.database import cleanup_engine
+from app.tools.data_cleanup.repair_queue import RepairQueue
 from app.utils.logger_manager import get_logger
 from config import DATABASE_PATH  # 正しいデータベースパスをインポート
 
@@ -23,8 +22,8 @@ class DuplicatesHandler:
 
         Args:
             db_path (str, optional): データベースファイルのパス。Noneの場合はconfigからパスを使用
-            max_retries (int): エピソード取得の最大再試行回数
-            retry_delay (int): 再試行間の待機時間（秒）
+            max_retries (int): エピソード取得の最大試行回数
+            retry_delay (int): 再試行の待機時間の基準（秒）。試行ごとに倍になる
         """
         self.db_path = db_path if db_path is not None else DATABASE_PATH
         self.max_retries = max_retries
@@ -96,52 +95,13 @@ class DuplicatesHandler:
             ncode (str, optional): 特定の小説コード。Noneの場合は全小説を分析
 
         Returns:
-            dict: 問題のあるエピソードのリスト {n_code: [(episode_no, issue_type), ...]}
+            dict: 問題のあるエピソードのリスト {n_code: ([(episode_no, issue_type, rowid), ...], rating)}
         """
         conn = None
         try:
-            # データベースに接続
+            # 判定はSQLで行い、本文は読み込まない
             conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            problematic_episodes = {}
-
-            # 分析対象のncodeリストを取得
-            if ncode:
-                cursor.execute("SELECT n_code, rating FROM novels_descs WHERE n_code = ?", (ncode,))
-                novels = cursor.fetchall()
-            else:
-                cursor.execute("SELECT n_code, rating FROM novels_descs")
-                novels = cursor.fetchall()
-
-            for n_code, rating in novels:
-                # この小説のエピソードを取得
-                cursor.execute("""
-                    SELECT episode_no, body, e_title, rowid,
-                    LENGTH(body) as body_length
-                    FROM episodes 
-                    WHERE ncode = ? 
-                    ORDER BY CAST(episode_no AS INTEGER)
-                """, (n_code,))
-
-                episodes = cursor.fetchall()
-                bad_episodes = []
-
-                for episode in episodes:
-                    episode_no, body, title, rowid, body_length = episode
-
-                    # 問題を検出
-                    if not body or body_length < 50:
-                        bad_episodes.append((episode_no, "empty_or_short", rowid))
-                    elif "エラー" in body or "Error" in body or "失敗" in body:
-                        bad_episodes.append((episode_no, "error_content", rowid))
-                    elif not title or title.strip() == "":
-                        bad_episodes.append((episode_no, "missing_title", rowid))
-
-                if bad_episodes:
-                    problematic_episodes[n_code] = (bad_episodes, rating)
-
-            return problematic_episodes
+            return cleanup_engine.analyze_episode_quality(conn, ncode)
 
         except sqlite3.Error as e:
             logger.error(f"エピソード品質分析中にエラーが発生しました: {e}")
@@ -161,68 +121,19 @@ class DuplicatesHandler:
         Returns:
             int: 修復したエピソードの数
         """
-        # 問題のあるエピソードを分析
-        problematic_dict = self.analyze_episode_quality(ncode)
-
-        if not problematic_dict:
-            logger.info("修復が必要なエピソードはありません")
-            return 0
-
-        repaired_count = 0
-
-        # データベースに接続
-        conn = None
+        # 分析（読み取り専用）・並列の再取得・まとめての反映は修復キューに任せる
+        # ネットワーク取得中は書き込みトランザクションを開かず、中断した場合は次回に続きから再開する
+        repair_queue = RepairQueue(
+            self.db_path,
+            max_retries=self.max_retries,
+            retry_delay=self.retry_delay,
+        )
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            for n_code, (bad_episodes, rating) in problematic_dict.items():
-                logger.info(f"小説 {n_code} の問題エピソード {len(bad_episodes)}件を修復します")
-
-                for episode_no, issue_type, rowid in bad_episodes:
-                    logger.info(f"エピソード {n_code}-{episode_no} ({issue_type}) を再取得します")
-
-                    # エピソードを再取得（リトライロジック付き）
-                    for attempt in range(self.max_retries):
-                        try:
-                            # エピソードを取得
-                            body, title = catch_up_episode(n_code, episode_no, rating)
-
-                            # 正常に取得できたかチェック
-                            if body and len(body) > 50 and title and "エラー" not in body and "Error" not in body:
-                                # データベースを更新
-                                cursor.execute("""
-                                    UPDATE episodes
-                                    SET body = ?, e_title = ?
-                                    WHERE rowid = ?
-                                """, (body, title, rowid))
-
-                                conn.commit()
-                                repaired_count += 1
-                                logger.info(f"エピソード {n_code}-{episode_no} を正常に修復しました")
-                                break
-                            else:
-                                logger.warning(
-                                    f"エピソード {n_code}-{episode_no} の取得結果が不十分です (試行 {attempt + 1}/{self.max_retries})")
-                                time.sleep(self.retry_delay)
-                        except Exception as e:
-                            logger.error(
-                                f"エピソード {n_code}-{episode_no} の再取得中にエラー: {e} (試行 {attempt + 1}/{self.max_retries})")
-                            time.sleep(self.retry_delay)
-
-            logger.info(f"合計 {repaired_count} 件のエピソードを修復しました")
-            return repaired_count
-
+            return repair_queue.run(ncode)
         except sqlite3.Error as e:
             logger.error(f"エピソード修復中にデータベースエラーが発生しました: {e}")
-            if conn:
-                conn.rollback()
             return 0
 
-        finally:
-            if conn:
-                conn.close()
-
     def remove_episode_duplicates(self):
         """
         重複するエピソードエントリを削除し、最良のものを残す
@@ -232,66 +143,13 @@ class DuplicatesHandler:
         """
         conn = None
         try:
-            # データベースに接続
+            # 順位付けと削除はSQLで行い、一つのトランザクションで削除する
             conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            # 重複エピソードの識別
-            cursor.execute("""
-                SELECT ncode, episode_no, COUNT(*) as count
-                FROM episodes
-                GROUP BY ncode, episode_no
-                HAVING count > 1
-            """)
-
-            duplicates = cursor.fetchall()
-
-            if not duplicates:
-                logger.info("重複するエピソードはありません")
-                return 0
-
-            deleted_count = 0
-
-            for ncode, episode_no, count in duplicates:
-                # 各重複エピソードセットを処理
-                cursor.execute("""
-                    SELECT rowid, body, e_title, LENGTH(body) as body_length,
-                    (CASE 
-                        WHEN body LIKE '%エラー%' OR body LIKE '%Error%' THEN 1 
-                        ELSE 0 
-                    END) as has_error
-                    FROM episodes 
-                    WHERE ncode = ? AND episode_no = ?
-                    ORDER BY has_error, body_length DESC
-                """, (ncode, episode_no))
-
-                entries = cursor.fetchall()
-
-                if len(entries) <= 1:
-                    continue
-
-                # 先頭の（最良の）エントリを除くすべてを削除
-                best_entry = entries[0]
-                rowids_to_delete = [entry[0] for entry in entries[1:]]
-
-                if rowids_to_delete:
-                    placeholders = ', '.join(['?'] * len(rowids_to_delete))
-                    cursor.execute(f"DELETE FROM episodes WHERE rowid IN ({placeholders})", rowids_to_delete)
-                    deleted_count += len(rowids_to_delete)
-
-                # 最良のエントリにもエラーがある場合は修復の候補としてマーク
-                if best_entry[4] == 1:  # has_error フラグがセットされている
-                    logger.warning(
-                        f"エピソード {ncode}-{episode_no} の最良エントリにもエラーがあります（後で修復が必要）")
-
-            conn.commit()
-            logger.info(f"合計 {deleted_count} 件の重複エピソードを削除しました")
+            deleted_count, _ = cleanup_engine.remove_episode_duplicates(conn)
             return deleted_count
 
         except sqlite3.Error as e:
             logger.error(f"エピソードの重複削除中にエラーが発生しました: {e}")
-            if conn:
-                conn.rollback()
             return 0
 
         finally:
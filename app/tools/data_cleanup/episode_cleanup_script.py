@@ -1,5 +1,6 @@
 import sqlite3
-from app.core.checker import catch_up_episode
+from app.database import cleanup_engine
+from app.tools.data_cleanup.repair_queue import RepairQueue
 
 # ロガーの設定
 from app.utils.logger_manager import get_logger
@@ -11,56 +12,44 @@ from config import DATABASE_PATH
 
 def analyze_episode_duplicates(ncode):
     """
-    指定された小説のエピソードの重複と品質を分析する
+    指定された小説のエピソードの重複と品質を分析する（本文は読み込まない）
 
     Args:
         ncode (str): 小説コード
 
     Returns:
-        dict: エピソード番号ごとの重複エピソード情報
+        dict: エピソード番号ごとの重複エピソード情報 {episode_no: [(rowid, e_title, body_length, has_error), ...]}
+              各リストは最良のエントリが先頭になるように並べる
     """
     conn = sqlite3.connect(DATABASE_PATH)
     cursor = conn.cursor()
 
     try:
-        # 指定された小説の同一エピソード番号を持つエピソードを取得
-        query = '''
-        SELECT episode_no, rowid, body, e_title, 
-               LENGTH(body) as body_length,
-               (CASE 
-                   WHEN body LIKE '%エラー%' OR body LIKE '%Error%' 
-                   THEN 1 
-                   ELSE 0 
+        # 同一エピソード番号を持つエピソードだけを、順位の高い順に取得
+        query = f'''
+        SELECT e.episode_no, e.rowid, e.e_title,
+               COALESCE(LENGTH(e.body), 0) as body_length,
+               (CASE
+                   WHEN {cleanup_engine.error_condition_sql(cleanup_engine.DUPLICATE_ERROR_MARKERS, 'e.body')}
+                   THEN 1
+                   ELSE 0
                END) as has_error
-        FROM episodes 
-        WHERE ncode = ? 
-        ORDER BY episode_no, has_error, body_length DESC
+        FROM episodes e
+        JOIN (
+            SELECT episode_no FROM episodes
+            WHERE ncode = ?
+            GROUP BY episode_no
+            HAVING COUNT(*) > 1
+        ) d ON d.episode_no = e.episode_no
+        WHERE e.ncode = ?
+        ORDER BY e.episode_no, has_error, body_length DESC, e.rowid
         '''
-        cursor.execute(query, (ncode,))
-        rows = cursor.fetchall()
+        cursor.execute(query, (ncode, ncode))
 
         # エピソード番号ごとの重複エントリを分類
         duplicates = {}
-        current_ep_no = None
-        current_ep_entries = []
-
-        for row in rows:
-            episode_no, rowid, body, title, body_length, has_error = row
-
-            if episode_no != current_ep_no:
-                # 前のエピソード番号のエントリを処理
-                if current_ep_entries:
-                    duplicates[current_ep_no] = current_ep_entries
-
-                # 新しいエピソード番号の処理を開始
-                current_ep_no = episode_no
-                current_ep_entries = [row]
-            else:
-                current_ep_entries.append(row)
-
-        # 最後のエピソード番号のエントリを追加
-        if current_ep_entries:
-            duplicates[current_ep_no] = current_ep_entries
+        for episode_no, rowid, title, body_length, has_error in cursor:
+            duplicates.setdefault(episode_no, []).append((rowid, title, body_length, has_error))
 
         return duplicates
 
@@ -71,6 +60,24 @@ def analyze_episode_duplicates(ncode):
     finally:
         conn.close()
 
+def _refetch_flagged_episodes(flagged, ratings, scope):
+    """
+    最良のエントリにもエラーがあるエピソードを修復キューで再取得して更新する
+    重複の削除をコミットした後に呼び、ネットワーク取得中はトランザクションを開かない
+
+    Args:
+        flagged (list): [(ncode, episode_no, rowid)]
+        ratings (dict): {ncode: rating}
+        scope (str): 修復キューの再開判定に使う値
+    """
+    if not flagged:
+        return
+    tasks = [
+        (ncode, episode_no, 'error_content', rowid, ratings.get(ncode))
+        for ncode, episode_no, rowid in flagged
+    ]
+    RepairQueue(DATABASE_PATH).repair(tasks, scope)
+
 def clean_duplicate_episodes(ncode, rating):
     """
     重複するエピソードをクリーンアップし、最適なエピソードを残す
@@ -80,55 +87,14 @@ def clean_duplicate_episodes(ncode, rating):
         rating (int): 小説のレーティング
     """
     conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
 
     try:
-        # 重複エピソードを分析
-        duplicates = analyze_episode_duplicates(ncode)
-        logger.info(f"小説 {ncode} の重複エピソードを分析しました")
-
-        # 各エピソード番号の重複エントリを処理
-        for episode_no, entries in duplicates.items():
-            if len(entries) > 1:
-                # エラーのない、最も長い本文を持つエピソードを選択
-                best_entry = max(
-                    [entry for entry in entries if 'エラー' not in entry[2] and 'Error' not in entry[2]], 
-                    key=lambda x: len(x[2]) if x[2] else 0
-                )
-
-                if best_entry is None:
-                    # すべてのエントリにエラーがある場合、最初のエントリを保持
-                    best_entry = entries[0]
-                    logger.warning(f"エピソード {ncode}-{episode_no} のすべてのエントリにエラーがあります")
-
-                # 最良のエントリ以外を削除
-                rowids_to_remove = [entry[1] for entry in entries if entry[1] != best_entry[1]]
-                
-                if rowids_to_remove:
-                    # 不要なエントリを削除
-                    remove_query = 'DELETE FROM episodes WHERE rowid IN ({})'.format(
-                        ','.join(map(str, rowids_to_remove))
-                    )
-                    cursor.execute(remove_query)
-                    logger.info(f"小説 {ncode} のエピソード {episode_no} から {len(rowids_to_remove)} 個のエントリを削除")
-
-                    # エラーのあるエントリを削除した後、再取得が必要な場合
-                    if 'エラー' in best_entry[2] or 'Error' in best_entry[2]:
-                        logger.info(f"エピソード {ncode}-{episode_no} を再取得します")
-                        new_body, new_title = catch_up_episode(ncode, episode_no, rating)
-                        
-                        if new_body and new_title:
-                            # 再取得したエピソードで更新
-                            update_query = '''
-                            UPDATE episodes 
-                            SET body = ?, e_title = ? 
-                            WHERE rowid = ?
-                            '''
-                            cursor.execute(update_query, (new_body, new_title, best_entry[1]))
-                            logger.info(f"エピソード {ncode}-{episode_no} を再取得して更新しました")
-
-        # 変更をコミット
-        conn.commit()
+        # エラーのない、最も長い本文を持つエピソードを残して削除（SQLで一括処理）
+        deleted_count, flagged = cleanup_engine.remove_episode_duplicates(conn, ncode)
+        logger.info(f"小説 {ncode} から {deleted_count} 個の重複エントリを削除")
+
+        # 最良のエントリにもエラーがある場合は再取得
+        _refetch_flagged_episodes(flagged, {ncode: rating}, f'duplicates:{ncode}')
         logger.info(f"小説 {ncode} のエピソードクリーンアップが完了しました")
 
     except sqlite3.Error as e:
@@ -145,18 +111,21 @@ def clean_duplicate_episodes(ncode, rating):
 def clean_all_novels_episodes():
     """
     すべての小説のエピソードをクリーンアップする
+    重複の削除は全小説をまとめて一つのトランザクションで行う
     """
     conn = sqlite3.connect(DATABASE_PATH)
     
     try:
         # すべての小説のncodeとratingを取得
         cursor = conn.cursor()
-        cursor.execute('SELECT DISTINCT n_code, rating FROM novels_descs')
-        novels = cursor.fetchall()
+        cursor.execute('SELECT n_code, MAX(rating) FROM novels_descs GROUP BY n_code')
+        ratings = dict(cursor.fetchall())
+
+        logger.info("全小説のエピソードクリーンアップを開始")
+        deleted_count, flagged = cleanup_engine.remove_episode_duplicates(conn)
+        logger.info(f"全小説から {deleted_count} 個の重複エントリを削除")
 
-        for ncode, rating in novels:
-            logger.info(f"小説 {ncode} のエピソードクリーンアップを開始")
-            clean_duplicate_episodes(ncode, rating)
+        _refetch_flagged_episodes(flagged, ratings, 'duplicates:*')
 
     except sqlite3.Error as e:
         logger.error(f"データベース処理中にエラーが発生しました: {e}")
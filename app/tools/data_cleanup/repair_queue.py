@@ -0,0 +1,369 @@
+"""
+問題のあるエピソードを並列に再取得して修復するモジュール
+修復は次の3段階に分け、ネットワーク取得中はデータベースのトランザクションを開きません
+- analyze: 読み取り専用の接続で、問題のあるエピソードの一覧（スナップショット）を作成
+- fetch: 取得間隔を制限したワーカースレッドで並列に再取得（失敗時は指数バックオフで再試行）
+- apply: 取得できた結果を一定件数ずつまとめ、短い書き込みトランザクションで反映
+
+修復タスクの一覧は開始時に一度だけ状態ファイルに保存し、完了したタスクは進捗ファイルに追記するため、
+中断した修復は次回の実行で続きから再開できます
+"""
+import json
+import os
+import queue
+import random
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.core.rate_limiter import RateLimiter
+from app.database import cleanup_engine, episode_hash
+from app.database.db_handler import ReadOnlyDatabase
+from app.utils.logger_manager import get_logger
+from config import DATABASE_PATH
+
+# ロガーの設定
+logger = get_logger('RepairQueue')
+
+# 状態ファイルの形式バージョン
+REPAIR_STATE_VERSION = 2
+
+# 状態ファイルの名前（データベースと同じディレクトリに作成）
+REPAIR_STATE_FILENAME = 'repair_state.json'
+
+# 進捗ファイル（状態ファイルのパスに付ける接尾辞）。完了したタスクを1行ずつ追記する
+REPAIR_PROGRESS_SUFFIX = '.progress'
+
+# 進捗ファイルの行の種類
+PROGRESS_DONE = 'done'
+PROGRESS_FAILED = 'failed'
+
+
+def task_key(ncode, episode_no):
+    """
+    修復タスクを識別するキーを作成
+
+    Args:
+        ncode (str): 小説コード
+        episode_no (str): エピソード番号
+
+    Returns:
+        str: キー
+    """
+    return f'{ncode}/{episode_no}'
+
+
+def is_valid_episode(body, title):
+    """
+    再取得したエピソードが正常かを判定
+
+    Args:
+        body (str): 本文
+        title (str): タイトル
+
+    Returns:
+        bool: 正常な場合はTrue
+    """
+    # 分析（cleanup_engineの'empty_or_short'）と同じ基準で判定する
+    if not body or len(body) < cleanup_engine.MIN_BODY_LENGTH or not title:
+        return False
+    return not any(marker in body for marker in cleanup_engine.DUPLICATE_ERROR_MARKERS)
+
+
+class RepairQueue:
+    """
+    問題のあるエピソードの修復キュー
+    """
+
+    def __init__(self, db_path=None, state_path=None, max_workers=4, requests_per_second=1.0,
+                 max_retries=3, retry_delay=5, batch_size=50, fetch_episode=None):
+        """
+        Args:
+            db_path (str, optional): データベースファイルのパス。Noneの場合はconfigからパスを使用
+            state_path (str, optional): 状態ファイルのパス。Noneの場合はデータベースと同じディレクトリ
+            max_workers (int): 再取得を行うスレッド数
+            requests_per_second (float): 全スレッド合計での1秒あたりの最大取得数
+            max_retries (int): エピソード取得の最大試行回数
+            retry_delay (float): 再試行の待機時間の基準（秒）。試行ごとに倍になる
+            batch_size (int): 1回の書き込みトランザクションで反映する件数
+            fetch_episode (callable, optional): (ncode, episode_no, rating) -> (本文, タイトル)。
+                Noneの場合はcatch_up_episodeを使用
+        """
+        self.db_path = db_path if db_path is not None else DATABASE_PATH
+        self.state_path = state_path or os.path.join(os.path.dirname(os.path.abspath(self.db_path)),
+                                                     REPAIR_STATE_FILENAME)
+        self.progress_path = self.state_path + REPAIR_PROGRESS_SUFFIX
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max(1, max_retries)
+        self.retry_delay = retry_delay
+        self.batch_size = max(1, batch_size)
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.stop_event = threading.Event()
+        self._fetch_episode = fetch_episode
+        self._state = None
+
+    # --- analyze ---
+
+    def analyze(self, ncode=None):
+        """
+        問題のあるエピソードの一覧を読み取り専用の接続で作成
+
+        Args:
+            ncode (str, optional): 対象の小説コード。Noneの場合は全小説
+
+        Returns:
+            list: 修復タスク [(ncode, episode_no, issue_type, rowid, rating)]
+        """
+        db = ReadOnlyDatabase(self.db_path)
+        try:
+            return [
+                (n_code, episode_no, issue, rowid, rating)
+                for n_code, rating, episode_no, issue, rowid in cleanup_engine.iter_quality_issues(db.conn, ncode)
+            ]
+        finally:
+            db.close()
+
+    # --- 状態ファイル ---
+
+    def load_state(self):
+        """
+        状態ファイルと進捗ファイルを読み込む
+
+        Returns:
+            dict or None: 状態（存在しない・読み込めない場合はNone）
+        """
+        if not os.path.exists(self.state_path):
+            return None
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"修復の状態ファイルを読み込めませんでした: {e}")
+            return None
+        if state.get('version') != REPAIR_STATE_VERSION or state.get('db_path') != os.path.abspath(self.db_path):
+            return None
+
+        state['done'] = []
+        state['failed'] = []
+        if os.path.exists(self.progress_path):
+            try:
+                with open(self.progress_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        # 書き込み途中で中断された最後の行は無視する
+                        if not line.endswith('\n'):
+                            break
+                        kind, _, key = line.rstrip('\n').partition('\t')
+                        state['done'].append(key)
+                        if kind == PROGRESS_FAILED:
+                            state['failed'].append(key)
+            except OSError as e:
+                logger.warning(f"修復の進捗ファイルを読み込めませんでした: {e}")
+        return state
+
+    def _save_state(self):
+        """
+        修復タスクの一覧を状態ファイルに書き込み、進捗ファイルを空にする（修復の開始時に一度だけ呼び出す）
+        """
+        snapshot = {key: value for key, value in self._state.items() if key not in ('done', 'failed')}
+        temp_path = self.state_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        open(self.progress_path, 'w', encoding='utf-8').close()
+        os.replace(temp_path, self.state_path)
+
+    def _append_progress(self, entries):
+        """
+        完了したタスクを進捗ファイルに追記
+
+        Args:
+            entries (list): [(種類, キー)]
+        """
+        with open(self.progress_path, 'a', encoding='utf-8') as f:
+            f.writelines(f'{kind}\t{key}\n' for kind, key in entries)
+
+    def clear_state(self):
+        """状態ファイルと進捗ファイルを削除"""
+        for path in (self.state_path, self.progress_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    # --- fetch ---
+
+    def _fetch(self, ncode, episode_no, rating):
+        """エピソードを1回取得"""
+        if self._fetch_episode is None:
+            from app.core.checker import catch_up_episode
+            self._fetch_episode = catch_up_episode
+        return self._fetch_episode(ncode, episode_no, rating)
+
+    def _fetch_with_retry(self, task):
+        """
+        エピソードを取得間隔の制限と指数バックオフ付きで再取得（ワーカースレッドで実行）
+
+        Args:
+            task (tuple): (ncode, episode_no, issue_type, rowid, rating)
+
+        Returns:
+            tuple: (task, 本文, タイトル)。取得できなかった場合は本文・タイトルがNone
+        """
+        ncode, episode_no, issue_type, rowid, rating = task
+        for attempt in range(self.max_retries):
+            if self.stop_event.is_set():
+                break
+            self.rate_limiter.wait(self.stop_event)
+            try:
+                body, title = self._fetch(ncode, episode_no, rating)
+                if is_valid_episode(body, title):
+                    return task, body, title
+                logger.warning(
+                    f"エピソード {ncode}-{episode_no} の取得結果が不十分です (試行 {attempt + 1}/{self.max_retries})")
+            except Exception as e:
+                logger.error(
+                    f"エピソード {ncode}-{episode_no} の再取得中にエラー: {e} (試行 {attempt + 1}/{self.max_retries})")
+
+            if attempt + 1 < self.max_retries:
+                # 指数バックオフ（同時に再試行が集中しないように揺らぎを加える）
+                delay = self.retry_delay * (2 ** attempt) * random.uniform(0.5, 1.5)
+                self.stop_event.wait(delay)
+        return task, None, None
+
+    # --- apply ---
+
+    def _apply_batch(self, conn, batch):
+        """
+        取得できたエピソードを一つの短いトランザクションで反映し、進捗ファイルに追記
+
+        Args:
+            conn (sqlite3.Connection): 書き込み用の接続
+            batch (list): [(task, 本文, タイトル)]
+
+        Returns:
+            int: 反映したエピソードの数（内容が変わらなかったものは含まない）
+        """
+        updates = [
+            (body, title, episode_hash.body_hash(body), task[3], task[0], task[1])
+            for task, body, title in batch if body is not None
+        ]
+        applied = 0
+        if updates:
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                # rowidが他の処理で変わっていた場合に備えてncodeとエピソード番号も確認
+                # 内容ハッシュとタイトルが変わらない場合は書き込まない
+                for body, title, content_hash, rowid, ncode, episode_no in updates:
+                    cursor = conn.execute('''
+                        UPDATE episodes
+                        SET body = ?, e_title = ?, content_hash = ?
+                        WHERE rowid = ? AND ncode = ? AND episode_no = ?
+                          AND (content_hash IS NOT ? OR e_title IS NOT ?)
+                    ''', (body, title, content_hash, rowid, ncode, episode_no, content_hash, title))
+                    applied += cursor.rowcount
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+
+        entries = []
+        for task, body, _ in batch:
+            key = task_key(task[0], task[1])
+            self._state['done'].append(key)
+            if body is None:
+                self._state['failed'].append(key)
+            entries.append((PROGRESS_DONE if body is not None else PROGRESS_FAILED, key))
+        self._append_progress(entries)
+        return applied
+
+    # --- 実行 ---
+
+    def repair(self, tasks, scope=None):
+        """
+        修復タスクを並列に再取得し、まとめて反映する
+
+        Args:
+            tasks (list): 修復タスク [(ncode, episode_no, issue_type, rowid, rating)]
+            scope (str, optional): 再開時に同じ修復かを判定するための値
+
+        Returns:
+            int: 修復したエピソードの数
+        """
+        if self._state is None or self._state.get('scope') != scope:
+            self._state = {
+                'version': REPAIR_STATE_VERSION,
+                'db_path': os.path.abspath(self.db_path),
+                'scope': scope,
+                'tasks': [list(task) for task in tasks],
+                'done': [],
+                'failed': [],
+            }
+            self._save_state()
+
+        done = set(self._state['done'])
+        pending = [tuple(task) for task in tasks if task_key(task[0], task[1]) not in done]
+        if not pending:
+            logger.info("修復が必要なエピソードはありません")
+            self.clear_state()
+            return 0
+
+        logger.info(f"{len(pending)}件のエピソードを {self.max_workers} スレッドで再取得します")
+        self.stop_event.clear()
+        results = queue.Queue()
+        repaired_count = 0
+
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            episode_hash.ensure_hash_column(conn)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [executor.submit(self._fetch_with_retry, task) for task in pending]
+                for future in futures:
+                    future.add_done_callback(results.put)
+
+                batch = []
+                for _ in range(len(futures)):
+                    future = results.get()
+                    if future.cancelled():
+                        continue
+                    task, body, title = future.result()
+                    if self.stop_event.is_set() and body is None:
+                        # 中断で取得しなかったタスクは次回に持ち越す
+                        continue
+                    batch.append((task, body, title))
+                    if len(batch) >= self.batch_size:
+                        repaired_count += self._apply_batch(conn, batch)
+                        batch = []
+                if batch:
+                    repaired_count += self._apply_batch(conn, batch)
+        finally:
+            conn.close()
+
+        if self.stop_event.is_set():
+            logger.info(f"修復を中断しました（{repaired_count}件を反映済み、続きは次回に再開）")
+        else:
+            failed = len(self._state['failed'])
+            logger.info(f"合計 {repaired_count} 件のエピソードを修復しました（取得できなかったもの: {failed}件）")
+            self.clear_state()
+        return repaired_count
+
+    def run(self, ncode=None, resume=True):
+        """
+        分析・再取得・反映をまとめて実行（中断した修復があれば続きから再開）
+
+        Args:
+            ncode (str, optional): 対象の小説コード。Noneの場合は全小説
+            resume (bool): 中断した修復を再開するかどうか
+
+        Returns:
+            int: 修復したエピソードの数
+        """
+        scope = ncode or '*'
+        state = self.load_state() if resume else None
+        if state is not None and state.get('scope') == scope:
+            logger.info(f"中断した修復を再開します（完了済み: {len(state['done'])}/{len(state['tasks'])}件）")
+            self._state = state
+            tasks = state['tasks']
+        else:
+            self._state = None
+            tasks = self.analyze(ncode)
+        return self.repair(tasks, scope)
+
+    def stop(self):
+        """修復を中断（取得中のエピソードが終わり次第停止し、未処理のものは次回に持ち越す）"""
+        self.stop_event.set()
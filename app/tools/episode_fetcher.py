@@ -2,6 +2,7 @@ import datetime
 import threading
 import queue
 from concurrent.futures import ThreadPoolExecutor
+from app.core.fetch_governor import get_fetch_governor
 from app.database.db_handler import DatabaseHandler
 from app.utils.logger_manager import get_logger
 
@@ -14,12 +15,13 @@ class EpisodeFetcher:
     マルチスレッドでエピソードを取得・保存するクラス
     """
 
-    def __init__(self, max_workers=10):
+    def __init__(self, max_workers=None):
         """
         Args:
-            max_workers (int): 同時に実行するスレッドの最大数
+            max_workers (int, optional): 同時に実行するスレッドの最大数。
+                Noneの場合は設定の同時実行数の上限（実際の同時実行数はFetchGovernorが調整）
         """
-        self.max_workers = max_workers
+        self.max_workers = max_workers or get_fetch_governor().max_concurrency()
         self.db = DatabaseHandler()
         self.fetch_queue = queue.Queue()  # 取得待ちのエピソード情報を格納
         self.result_queue = queue.Queue()  # 取得結果を格納
@@ -247,9 +247,22 @@ class CommandPrompt:
         
         ■ 小説更新コマンド
         update --all                  すべての新着小説を更新
+        update --metadata             前回の同期以降に更新された小説の小説情報を取得
+        update --metadata --full      全小説の小説情報を確認
         update --single --n [ncode]   指定されたncodeの小説を更新
         update --single --re_all --n [ncode]   指定されたncodeの小説の全エピソードを再取得
         update --single --get_lost --n [ncode] 指定されたncodeの小説の欠落エピソードを取得
+        update --single --revised --n [ncode]  指定されたncodeの小説の目次を確認し、新着・改稿エピソードを取得
+
+        ■ 取得キューコマンド
+        queue --status            キューの状態と失敗したジョブを表示
+        queue --pause             キューを一時停止
+        queue --resume            キューの一時停止を解除して処理を再開
+        queue --retry             失敗したジョブを未処理に戻す
+        queue --clear             完了したジョブを削除
+        queue --pin [ncode]       小説をピン留めし、更新を優先して取得
+        queue --unpin [ncode]     小説のピン留めを解除
+        queue --pins              ピン留めされている小説を表示
 
         ■ システムコマンド
         help                      このヘルプを表示
@@ -5,7 +5,6 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext
 import threading
 import time
-from bs4 import BeautifulSoup
 from app.utils.logger_manager import get_logger
 
 # ロガーの設定
@@ -251,7 +250,8 @@ class EpisodeListView(ttk.Frame):
             scrolled_text.config(state=tk.NORMAL)
             scrolled_text.delete(1.0, tk.END)
 
-            # HTMLコンテンツを解析
+            # HTMLコンテンツを解析（bs4は起動時間短縮のため初回表示時に読み込む）
+            from bs4 import BeautifulSoup
             soup = BeautifulSoup(episode_body, "html.parser")
 
             # 空の段落を削除
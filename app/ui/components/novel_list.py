@@ -5,6 +5,8 @@ import threading
 import tkinter as tk
 from tkinter import ttk
 import time
+from app.core.catalog_snapshot import make_sort_key
+from app.core.search_index import SearchDebouncer
 from app.utils.logger_manager import get_logger
 
 # ロガーの設定
@@ -49,6 +51,9 @@ class NovelListView(ttk.Frame):
         self.search_entry = None
         self.sort_combobox = None  # 追加：ソートプルダウン
 
+        # 入力中検索のデバウンス（古い検索は取り消される）
+        self.search_debouncer = SearchDebouncer(self, self.collect_novels, self.on_search_results)
+
         # UIの初期化
         self.init_ui()
 
@@ -63,6 +68,7 @@ class NovelListView(ttk.Frame):
         self.search_entry = ttk.Entry(search_frame)
         self.search_entry.pack(side="left", fill="x", expand=True, padx=5)
         self.search_entry.bind("<Return>", self.search_novels)
+        self.search_entry.bind("<KeyRelease>", self.on_search_key)
 
         search_button = ttk.Button(search_frame, text="検索", command=self.search_novels)
         search_button.pack(side="left", padx=5)
@@ -197,27 +203,53 @@ class NovelListView(ttk.Frame):
     def load_novels(self):
         """小説データの読み込み（バックグラウンドスレッド用）"""
         try:
-            # 小説データを取得
-            self.novels = self.novel_manager.get_all_novels()
-
-            # 検索フィルタが有効ならフィルタリング
-            if self.search_text:
-                self.novels = [n for n in self.novels if self.filter_novel(n, self.search_text)]
-
-            # 選択されたソート条件に従ってソート
-            self.sort_novels_data()
-
-            # 総ページ数を計算
-            self.total_pages = (len(self.novels) + self.items_per_page - 1) // self.items_per_page
+            novels = self.collect_novels(self.search_text)
 
             # UIの更新はメインスレッドで行う
-            self.after(0, lambda: self.load_page(0))
+            self.after(0, lambda: self.set_novels(novels))
 
         except Exception as e:
             logger.error(f"小説データの読み込みエラー: {e}")
             # エラー表示
             self.after(0, lambda: self.show_error(f"小説データの読み込みに失敗しました: {e}"))
 
+    def collect_novels(self, search_text, cancel_event=None):
+        """
+        検索条件とソート条件に従って表示する小説リストを作成
+
+        Args:
+            search_text (str): 検索テキスト
+            cancel_event (threading.Event, optional): セットされたら処理を中断する
+
+        Returns:
+            list: 表示する小説リスト（中断された場合はNone）
+        """
+        if not search_text:
+            # 小説マネージャのソート順を使用（スナップショットの保存済みの順序があれば再ソートしない）
+            return self.novel_manager.get_sorted_novels(self.sort_key, self.sort_order)
+
+        # 検索インデックスで絞り込み（新しいリストが返される）
+        novels = self.novel_manager.search_novels(search_text, cancel_event)
+        if novels is None:
+            return None
+
+        # 選択されたソート条件に従ってソート
+        self.sort_novels_data(novels)
+        return novels
+
+    def set_novels(self, novels):
+        """
+        表示する小説リストを設定して先頭ページを表示
+
+        Args:
+            novels (list): 表示する小説リスト
+        """
+        self.novels = novels
+
+        # 総ページ数を計算
+        self.total_pages = (len(self.novels) + self.items_per_page - 1) // self.items_per_page
+        self.load_page(0)
+
     def sort_novels(self, event=None):
         """ソート変更時の処理"""
         # 現在選択されているソートオプションを取得
@@ -239,40 +271,16 @@ class NovelListView(ttk.Frame):
         # データを再読み込み
         self.show_novels()
 
-    def sort_novels_data(self):
-        """選択されたソート条件に従って小説リストをソート"""
-        try:
-            # ソートキーに基づいて、インデックスを決定
-            if self.sort_key == "updated_at":
-                key_index = 3  # updated_at のインデックス
-            elif self.sort_key == "n_code":
-                key_index = 0  # n_code のインデックス
-            elif self.sort_key == "title":
-                key_index = 1  # title のインデックス
-            elif self.sort_key == "total_ep":
-                key_index = 5  # total_ep のインデックス（もしくは使用しているものに合わせる）
-            else:
-                key_index = 3  # デフォルトは更新日時
-
-            # ソート実行
-            def sort_key(novel):
-                value = novel[key_index] if key_index < len(novel) else None
-
-                # 数値型の場合は数値に変換してソート
-                if self.sort_key == "total_ep" and value is not None:
-                    try:
-                        return int(value) if value else 0
-                    except (ValueError, TypeError):
-                        return 0
-
-                # 文字列の場合
-                if value is None:
-                    return "" if self.sort_key == "n_code" or self.sort_key == "title" else "0000-00-00"
-
-                return value
+    def sort_novels_data(self, novels):
+        """
+        選択されたソート条件に従って小説リストをソート
 
+        Args:
+            novels (list): ソートする小説リスト（その場でソートされる）
+        """
+        try:
             # ソート実行（昇順・降順に合わせる）
-            self.novels.sort(key=sort_key, reverse=self.sort_order)
+            novels.sort(key=make_sort_key(self.sort_key), reverse=self.sort_order)
 
         except Exception as e:
             logger.error(f"小説のソート中にエラーが発生しました: {e}")
@@ -348,39 +356,37 @@ class NovelListView(ttk.Frame):
     def search_novels(self, event=None):
         """小説の検索"""
         self.search_text = self.search_entry.get().strip().lower()
-        self.show_novels()
+        self.search_debouncer.submit(self.search_text, immediate=True)
 
-    def clear_search(self):
-        """検索をクリア"""
-        self.search_entry.delete(0, tk.END)
-        self.search_text = ""
-        self.show_novels()
+    def on_search_key(self, event=None):
+        """検索欄の入力時の処理（入力が止まってから検索する）"""
+        if event is not None and event.keysym == "Return":
+            return
 
-    def filter_novel(self, novel, search_text):
+        search_text = self.search_entry.get().strip().lower()
+        if search_text == self.search_text:
+            return
+
+        self.search_text = search_text
+        self.search_debouncer.submit(search_text)
+
+    def on_search_results(self, search_text, novels):
         """
-        検索テキストに基づいて小説をフィルタリング
+        検索結果を受け取ったときの処理（メインスレッドで呼ばれる）
 
         Args:
-            novel: 小説データ
-            search_text: 検索テキスト
-
-        Returns:
-            bool: 検索条件に一致するかどうか
+            search_text (str): 検索テキスト
+            novels (list): 検索・ソート済みの小説リスト
         """
-        if not search_text:
-            return True
-
-        # 小説コード、タイトル、作者名、あらすじを検索
-        n_code = novel[0].lower() if novel[0] else ""
-        title = novel[1].lower() if novel[1] else ""
-        author = novel[2].lower() if novel[2] else ""
-        synopsis = novel[7].lower() if len(novel) > 7 and novel[7] else ""
-
-        # いずれかのフィールドに検索テキストが含まれるかチェック
-        return (search_text in n_code or
-                search_text in title or
-                search_text in author or
-                search_text in synopsis)
+        self.scroll_canvas.yview_moveto(0)
+        self.set_novels(novels)
+
+    def clear_search(self):
+        """検索をクリア"""
+        self.search_debouncer.cancel()
+        self.search_entry.delete(0, tk.END)
+        self.search_text = ""
+        self.show_novels()
 
     def show_error(self, message):
         """エラーメッセージを表示"""
@@ -5,12 +5,12 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import threading
 import time
-import queue
 import os
 import json
 from datetime import datetime
 
 from app.core.checker import catch_up_episode
+from app.core.progress_bus import ProgressBus, ScopedProgress, format_rate_eta
 from app.utils.logger_manager import get_logger
 
 # ロガーの設定
@@ -65,7 +65,8 @@ class UpdatePanel(ttk.Frame):
         self.is_first_run = self.check_first_run()
 
         # 進捗状況管理
-        self.progress_queue = queue.Queue()
+        self.progress_queue = ProgressBus()
+        self.progress_state = {}  # 進捗表示に反映済みの状態
         self.update_in_progress = False
 
         # UIコンポーネント
@@ -263,74 +264,55 @@ class UpdatePanel(ttk.Frame):
         except Exception as e:
             logger.error(f"設定ファイル保存エラー: {e}")
 
-    """
-    UpdatePanelクラスのcheck_progress_queueメソッドの修正パッチ
-    """
-
-    # check_progress_queueメソッドを修正
-    def check_progress_queue(self):
-        """進捗キューの確認とUI更新"""
-        try:
-            # キューからメッセージを取得（非ブロッキング）
-            while not self.progress_queue.empty():
-                progress_data = self.progress_queue.get_nowait()
+    def apply_progress(self, task, progress_data):
+        """
+        集約済みの進捗をUIに反映（ProgressBusからフレームごとに呼ばれる）
 
-                # ウィジェットが存在するか確認
-                if not hasattr(self, 'progress_bar') or not self.progress_bar.winfo_exists():
-                    logger.debug("プログレスバーが存在しないため、進捗更新をスキップします")
-                    continue
+        Args:
+            task (str): タスク名
+            progress_data (dict): 前回の反映以降に変化した進捗状態
+        """
+        # ウィジェットが存在するか確認
+        if not hasattr(self, 'progress_bar') or not self.progress_bar.winfo_exists():
+            logger.debug("プログレスバーが存在しないため、進捗更新をスキップします")
+            return
 
-                # 進捗データの形式をチェック
-                if isinstance(progress_data, dict):
-                    # 進捗率の更新
-                    if 'percent' in progress_data:
-                        try:
-                            self.progress_bar['value'] = progress_data['percent']
-                        except Exception as e:
-                            logger.error(f"プログレスバーの更新中にエラーが発生しました: {e}")
-
-                    # メッセージの更新
-                    if 'message' in progress_data and hasattr(self,
-                                                              'progress_label') and self.progress_label.winfo_exists():
-                        try:
-                            self.progress_label.config(text=progress_data['message'])
-                        except Exception as e:
-                            logger.error(f"プログレスラベルの更新中にエラーが発生しました: {e}")
-
-                    # 進捗表示の表示/非表示
-                    if 'show' in progress_data and hasattr(self,
-                                                           'progress_frame') and self.progress_frame.winfo_exists():
-                        try:
-                            if progress_data['show']:
-                                # progress_frameが表示されていないことを確認してから表示
-                                if not self.progress_frame.winfo_ismapped():
-                                    if len(self.scrollable_frame.winfo_children()) > 0:
-                                        self.progress_frame.pack(fill="x", pady=5, padx=10,
-                                                                 after=self.scrollable_frame.winfo_children()[0])
-                                    else:
-                                        self.progress_frame.pack(fill="x", pady=5, padx=10)
-                            else:
-                                self.progress_frame.pack_forget()
-                        except Exception as e:
-                            logger.error(f"進捗フレームの表示/非表示中にエラーが発生しました: {e}")
+        if progress_data.get('show') is False:
+            self.progress_state = {}
+        self.progress_state.update(progress_data)
+
+        # 進捗率の更新
+        if 'percent' in progress_data:
+            try:
+                self.progress_bar['value'] = progress_data['percent']
+            except Exception as e:
+                logger.error(f"プログレスバーの更新中にエラーが発生しました: {e}")
+
+        # メッセージ・残り時間の更新
+        if ('message' in progress_data or 'eta' in progress_data) and hasattr(self, 'progress_label') \
+                and self.progress_label.winfo_exists():
+            try:
+                message = self.progress_state.get('message', "")
+                rate_eta = format_rate_eta(self.progress_state)
+                self.progress_label.config(text=f"{message}\n{rate_eta}" if rate_eta else message)
+            except Exception as e:
+                logger.error(f"プログレスラベルの更新中にエラーが発生しました: {e}")
+
+        # 進捗表示の表示/非表示
+        if 'show' in progress_data and hasattr(self, 'progress_frame') and self.progress_frame.winfo_exists():
+            try:
+                if progress_data['show']:
+                    # progress_frameが表示されていないことを確認してから表示
+                    if not self.progress_frame.winfo_ismapped():
+                        if len(self.scrollable_frame.winfo_children()) > 0:
+                            self.progress_frame.pack(fill="x", pady=5, padx=10,
+                                                     after=self.scrollable_frame.winfo_children()[0])
+                        else:
+                            self.progress_frame.pack(fill="x", pady=5, padx=10)
                 else:
-                    # 文字列の場合はメッセージとして表示
-                    if hasattr(self, 'progress_label') and self.progress_label.winfo_exists():
-                        try:
-                            self.progress_label.config(text=str(progress_data))
-                        except Exception as e:
-                            logger.error(f"プログレスラベルの更新中にエラーが発生しました: {e}")
-
-                self.progress_queue.task_done()
-
-        except queue.Empty:
-            pass
-        except Exception as e:
-            logger.error(f"進捗キュー処理中に予期しないエラーが発生しました: {e}")
-
-        # 定期的にキューをチェック（100ミリ秒ごと）
-        if self.winfo_exists():  # ウィジェットが存在する場合のみスケジュール
-            self.after(100, self.check_progress_queue)
+                    self.progress_frame.pack_forget()
+            except Exception as e:
+                logger.error(f"進捗フレームの表示/非表示中にエラーが発生しました: {e}")
 
     # init_uiメソッドの修正（プログレスフレームの初期化部分）
 
@@ -430,6 +412,32 @@ class UpdatePanel(ttk.Frame):
         )
         check_missing_all_button.pack(side="left", padx=5)
 
+        # 取得キューの状態と操作
+        queue_frame = tk.Frame(self.scrollable_frame, bg="#F0F0F0")
+        queue_frame.pack(fill="x", pady=(0, 5), padx=10)
+
+        self.queue_status_label = tk.Label(
+            queue_frame,
+            text="",
+            bg="#F0F0F0",
+            anchor="w"
+        )
+        self.queue_status_label.pack(side="left", padx=5)
+
+        ttk.Button(
+            queue_frame,
+            text="キューを再開",
+            command=self.resume_crawl_queue
+        ).pack(side="right", padx=5)
+
+        ttk.Button(
+            queue_frame,
+            text="キューを一時停止",
+            command=self.pause_crawl_queue
+        ).pack(side="right", padx=5)
+
+        self.refresh_queue_status()
+
         # 全選択フレーム
         select_all_frame = tk.Frame(self.scrollable_frame, bg="#F0F0F0")
         select_all_frame.pack(fill="x", pady=5, padx=10)
@@ -527,8 +535,8 @@ class UpdatePanel(ttk.Frame):
         self.next_button.config(state=tk.NORMAL if current_page < total_pages - 1 else tk.DISABLED)
 
     def start_progress_update_timer(self):
-        """進捗更新タイマーを開始"""
-        self.check_progress_queue()
+        """進捗更新タイマーを開始（既に開始済みなら何もしない）"""
+        self.progress_queue.start_polling(self, self.apply_progress)
 
     def check_updates(self):
         """
@@ -1309,10 +1317,10 @@ class UpdatePanel(ttk.Frame):
                 logger.info("通常更新が完了しました。欠落エピソードの更新を開始します。")
                 self._update_missing_episodes(novels_with_missing, progress_queue, on_complete)
 
-            # 新着更新の進捗計算用のカスタムキューを作成
+            # 新着更新の進捗を全体の20%～60%に変換する送信口を作成
             normal_progress_queue = None
             if progress_queue:
-                normal_progress_queue = self._create_progress_wrapper(progress_queue, 20, 60)
+                normal_progress_queue = ScopedProgress(progress_queue, 20, 60)
 
             # 更新処理を実行（コールバックを変更して欠落更新に繋げる）
             self.update_novels(needs_update, normal_progress_queue, on_normal_update_complete)
@@ -1448,52 +1456,6 @@ class UpdatePanel(ttk.Frame):
             if on_complete:
                 on_complete()
 
-    def _create_progress_wrapper(self, original_queue, start_percent, end_percent):
-        """
-        進捗表示を指定した範囲に調整するためのラッパーキューを作成
-
-        Args:
-            original_queue: 元の進捗表示キュー
-            start_percent: 開始進捗率（全体に対する割合）
-            end_percent: 終了進捗率（全体に対する割合）
-
-        Returns:
-            Queue: ラッパーキュー
-        """
-        wrapper_queue = queue.Queue()
-
-        def process_queue():
-            while True:
-                try:
-                    # タイムアウト付きでキューからデータを取得
-                    progress_data = wrapper_queue.get(timeout=0.1)
-
-                    # 進捗率を調整
-                    if isinstance(progress_data, dict) and 'percent' in progress_data:
-                        original_percent = progress_data['percent']
-                        # 進捗率を指定範囲に変換
-                        adjusted_percent = start_percent + (original_percent / 100) * (end_percent - start_percent)
-                        progress_data['percent'] = int(adjusted_percent)
-
-                    # 元のキューに送信
-                    original_queue.put(progress_data)
-
-                    wrapper_queue.task_done()
-
-                except queue.Empty:
-                    # キューが空の場合は一定時間待機
-                    time.sleep(0.1)
-                    continue
-                except Exception as e:
-                    logger.error(f"進捗ラッパーエラー: {e}")
-                    continue
-
-        # キュー処理スレッドを開始
-        thread = threading.Thread(target=process_queue, daemon=True)
-        thread.start()
-
-        return wrapper_queue
-
     def check_missing_episodes(self, ncode):
         """
         欠落エピソードを確認
@@ -2123,6 +2085,41 @@ class UpdatePanel(ttk.Frame):
     # 2. 一括欠落確認＆更新機能の実装
 
     # 2. 一括欠落確認＆更新機能の実装
+    def refresh_queue_status(self):
+        """取得キューの状態の表示を更新"""
+        try:
+            self.queue_status_label.config(text=self.update_manager.crawl_queue.describe())
+        except Exception as e:
+            logger.error(f"キューの状態の取得中にエラー: {e}")
+
+    def pause_crawl_queue(self):
+        """取得キューを一時停止（取得中のエピソードが終わり次第停止）"""
+        self.update_manager.crawl_queue.pause()
+        self.refresh_queue_status()
+
+    def resume_crawl_queue(self):
+        """取得キューの一時停止を解除し、残っているジョブの取得を開始"""
+        self.update_manager.crawl_queue.resume()
+        self.refresh_queue_status()
+        if self.update_in_progress:
+            return
+
+        self.update_in_progress = True
+        self.start_progress_update_timer()
+
+        def on_complete():
+            self.update_in_progress = False
+            self.after(0, self.refresh_queue_status)
+            if self.on_complete_callback:
+                self.after(0, self.on_complete_callback)
+
+        thread = threading.Thread(
+            target=self.update_manager.resume_crawl_queue,
+            args=(self.progress_queue, on_complete)
+        )
+        thread.daemon = True
+        thread.start()
+
     def check_and_update_all_missing(self):
         """すべての小説の欠落エピソードを確認して更新する"""
         if self.update_in_progress:
@@ -2150,7 +2147,7 @@ class UpdatePanel(ttk.Frame):
         })
 
         # 進捗表示を確実に表示（タイマーを開始）
-        self.check_progress_queue()
+        self.start_progress_update_timer()
 
         # バックグラウンドで処理
         logger.info("一括欠落確認＆更新スレッドを開始します")
@@ -2227,144 +2224,35 @@ class UpdatePanel(ttk.Frame):
             })
 
             # 自動的に更新処理を続行する（確認ダイアログなしでシンプルに）
+            # 欠落エピソードは永続キューに追加し、中断しても次回の起動時に続きから再開できるようにする
             logger.info("欠落エピソードの更新を開始します")
-
-            # 処理カウンタ
-            processed_novels = 0
-            processed_episodes = 0
-
-            # 現在の日時（更新時のタイムスタンプ用）
-            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-            for ncode, title, rating, missing_episodes in novels_with_missing:
-                # 小説ごとの進捗メッセージ
-                novel_progress = 50 + (processed_novels / total_missing_novels) * 50
-                self.progress_queue.put({
-                    'percent': int(novel_progress),
-                    'message': f"[{processed_novels + 1}/{total_missing_novels}] {title} - {len(missing_episodes)}話の欠落エピソードを更新中..."
-                })
-
-                # 各欠落エピソードを処理
-                for i, ep_no in enumerate(missing_episodes):
-                    episode_progress = i / len(missing_episodes)
-                    overall_progress = 50 + ((processed_novels + episode_progress) / total_missing_novels) * 50
-
-                    self.progress_queue.put({
-                        'percent': int(overall_progress),
-                        'message': f"[{processed_novels + 1}/{total_missing_novels}] {title} - エピソード {ep_no} を取得中... ({i + 1}/{len(missing_episodes)})"
-                    })
-
-                    # エピソードを取得
-                    try:
-                        from app.core.checker import catch_up_episode
-                        episode_content, episode_title = catch_up_episode(ncode, ep_no, rating)
-
-                        # データベースに保存
-                        if episode_content and episode_title:
-                            self.db_manager.insert_episode(ncode, ep_no, episode_content, episode_title, current_time)
-                            processed_episodes += 1
-                            logger.info(f"エピソード {ncode}-{ep_no} を取得して保存しました")
-                        else:
-                            logger.warning(f"エピソード {ncode}-{ep_no} の取得に失敗しました")
-                    except Exception as e:
-                        logger.error(f"エピソード {ncode}-{ep_no} の処理中にエラー: {e}")
-                        continue
-
-                # 総エピソード数を更新
-                self.db_manager.update_total_episodes(ncode)
-
-                # 小説テーブルのupdate_atを更新
-                self.db_manager.execute_query(
-                    "UPDATE novels_descs SET updated_at = ? WHERE n_code = ?",
-                    (current_time, ncode)
-                )
-
-                # 小説キャッシュをクリア
-                # 修正後
-                try:
-                    # update_managerを通じてnovel_managerにアクセス
-                    self.update_manager.novel_manager.clear_cache(ncode)
-                except AttributeError:
-                    logger.warning(f"novel_managerにアクセスできませんでした：ncode={ncode}")
-                except Exception as e:
-                    logger.error(f"キャッシュクリア中にエラー: {e}")
-
-                # 処理済みカウンタを増加
-                processed_novels += 1
-
-            # 完了メッセージ
-            self.progress_queue.put({
-                'percent': 100,
-                'message': f"欠落エピソードの更新が完了しました。{processed_novels}冊の小説から{processed_episodes}話を更新しました。"
-            })
-
-            # 更新情報を再チェック
-            self.check_shinchaku()
-
-            # UIを更新（メインスレッドで）
-            self.after(0, self.update_ui)
-
-            # 欠落エピソードを順番に更新
-            processed_novels = 0
-            processed_episodes = 0
-
-            # 現在の日時（更新時のタイムスタンプ用）
-            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-            for ncode, title, rating, missing_episodes in novels_with_missing:
-                # 小説ごとの進捗メッセージ
-                novel_progress = 50 + (processed_novels / total_missing_novels) * 50
-                self.progress_queue.put({
-                    'percent': int(novel_progress),
-                    'message': f"[{processed_novels + 1}/{total_missing_novels}] {title} - {len(missing_episodes)}話の欠落エピソードを更新中..."
-                })
-
-                # 各欠落エピソードを処理
-                for i, ep_no in enumerate(missing_episodes):
-                    episode_progress = i / len(missing_episodes)
-                    overall_progress = 50 + ((processed_novels + episode_progress) / total_missing_novels) * 50
-
-                    self.progress_queue.put({
-                        'percent': int(overall_progress),
-                        'message': f"[{processed_novels + 1}/{total_missing_novels}] {title} - エピソード {ep_no} を取得中... ({i + 1}/{len(missing_episodes)})"
-                    })
-
-                    # エピソードを取得
-                    episode_content, episode_title = catch_up_episode(ncode, ep_no, rating)
-
-                    # データベースに保存
-                    if episode_content and episode_title:
-                        self.db_manager.insert_episode(ncode, ep_no, episode_content, episode_title, current_time)
-                        processed_episodes += 1
-                    else:
-                        logger.warning(f"エピソード {ncode}-{ep_no} の取得に失敗しました")
-
-                # 総エピソード数を更新
-                self.db_manager.update_total_episodes(ncode)
-
-                # 小説テーブルのupdate_atを更新
-                self.db_manager.execute_query(
-                    "UPDATE novels_descs SET updated_at = ? WHERE n_code = ?",
-                    (current_time, ncode)
-                )
-
-                # 小説キャッシュをクリア
-                self.novel_manager.clear_cache(ncode)
-
-                # 処理済みカウンタを増加
-                processed_novels += 1
+            self.update_manager.crawl_queue.enqueue(
+                [(ncode, ep_no, rating)
+                 for ncode, _, rating, missing_episodes in novels_with_missing
+                 for ep_no in missing_episodes],
+                'missing'
+            )
+            summary = self.update_manager.run_crawl_queue(self.progress_queue)
 
             # 完了メッセージ
+            if summary is None:
+                message = "欠落エピソードをキューに追加しました（実行中の処理が取得します）。"
+            elif summary['paused']:
+                message = f"キューが一時停止されました。{summary['done']}話を取得済みです。"
+            else:
+                message = (f"欠落エピソードの更新が完了しました。{total_missing_novels}冊の小説から"
+                           f"{summary['done']}話を更新しました。")
             self.progress_queue.put({
                 'percent': 100,
-                'message': f"欠落エピソードの更新が完了しました。{processed_novels}冊の小説から{processed_episodes}話を更新しました。"
+                'message': message
             })
 
             # 更新情報を再チェック
-            self.check_shinchaku()
+            self.update_manager.check_shinchaku()
 
             # UIを更新（メインスレッドで）
             self.after(0, self.update_ui)
+            self.after(0, self.refresh_queue_status)
 
             # 3秒後に進捗表示を非表示
             self.after(3000, lambda: self.progress_queue.put({'show': False}))
@@ -0,0 +1,144 @@
+"""
+HTMLエクスポートの小説カタログと検索インデックスを作成するモジュール
+- 小説一覧を一定件数ごとのJSON（カタログページ）に分割し、インデックスページには先頭ページだけを埋め込む
+- タイトルと作者名のn-gram（1文字・2文字）から転置インデックスを作成し、n-gramのハッシュでシャードに分割
+- ブラウザ側（script.js）は検索語のn-gramを含むシャードとカタログページだけを必要になった時点で読み込む
+
+n-gramの正規化（NFKC・小文字化）とシャードの振り分け（FNV-1a）はscript.jsと同じ方法で行う必要があります
+"""
+import json
+import unicodedata
+
+# カタログを書き出すディレクトリ（エクスポート先からの相対パス）
+CATALOG_DIR = 'catalog'
+
+# カタログの目次（ページ・シャードの一覧）
+CATALOG_META_PATH = f'{CATALOG_DIR}/meta.json'
+
+# カタログの形式バージョン（script.jsと合わせる）
+CATALOG_FORMAT_VERSION = 1
+
+# カタログ1ページあたりの小説数（インデックスページには先頭ページを埋め込む）
+CATALOG_PAGE_SIZE = 200
+
+# 検索インデックス1シャードあたりの小説数の目安とシャード数の上限
+NOVELS_PER_SEARCH_SHARD = 1000
+MAX_SEARCH_SHARDS = 64
+
+# FNV-1a（32ビット）の定数
+FNV_OFFSET_BASIS = 2166136261
+FNV_PRIME = 16777619
+
+
+def normalize_text(text):
+    """
+    検索用にテキストを正規化（全角・半角の統一と小文字化）
+
+    Args:
+        text (str): テキスト
+
+    Returns:
+        str: 正規化したテキスト
+    """
+    return unicodedata.normalize('NFKC', text or '').lower()
+
+
+def text_ngrams(text):
+    """
+    テキストから検索用のn-gram（1文字と2文字）を取り出す（空白を含むものは除く）
+
+    Args:
+        text (str): 正規化済みのテキスト
+
+    Returns:
+        set: n-gramの集合
+    """
+    grams = set()
+    previous = None
+    for char in text:
+        if char.isspace():
+            previous = None
+            continue
+        grams.add(char)
+        if previous is not None:
+            grams.add(previous + char)
+        previous = char
+    return grams
+
+
+def ngram_shard(gram, shard_count):
+    """
+    n-gramを格納するシャードの番号を計算（コードポイント単位のFNV-1a）
+
+    Args:
+        gram (str): n-gram
+        shard_count (int): シャード数
+
+    Returns:
+        int: シャード番号
+    """
+    h = FNV_OFFSET_BASIS
+    for char in gram:
+        h = ((h ^ ord(char)) * FNV_PRIME) & 0xFFFFFFFF
+    return h % shard_count
+
+
+def _dumps(data):
+    """JSONを空白なしで文字列化"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def build_catalog(cards, exported_at):
+    """
+    カタログページ・検索インデックスのシャード・目次を作成
+
+    Args:
+        cards (list): 小説カードの値（辞書）のリスト。キーは ncode, title, author, updated_at, episodes, synopsis
+        exported_at (str): エクスポート日時
+
+    Returns:
+        list: [(エクスポート先からの相対パス, JSON文字列)] のリスト（目次は最後）
+    """
+    files = []
+
+    # カタログページ（小説の番号はカタログ内の並び順）
+    page_paths = []
+    for start in range(0, len(cards), CATALOG_PAGE_SIZE):
+        path = f'{CATALOG_DIR}/page-{len(page_paths):04d}.json'
+        files.append((path, _dumps([
+            [card['ncode'], card['title'], card['author'], card['updated_at'], card['episodes'], card['synopsis']]
+            for card in cards[start:start + CATALOG_PAGE_SIZE]
+        ])))
+        page_paths.append(path)
+
+    # 転置インデックス {n-gram: [小説の番号]}（番号は昇順）
+    postings = {}
+    for novel_id, card in enumerate(cards):
+        grams = text_ngrams(normalize_text(card['title'])) | text_ngrams(normalize_text(card['author']))
+        for gram in grams:
+            postings.setdefault(gram, []).append(novel_id)
+
+    # n-gramのハッシュでシャードに分割し、番号は差分で格納する
+    shard_count = max(1, min(MAX_SEARCH_SHARDS, -(-len(cards) // NOVELS_PER_SEARCH_SHARD)))
+    shards = [{} for _ in range(shard_count)]
+    for gram, novel_ids in postings.items():
+        deltas = [novel_ids[0]]
+        deltas.extend(novel_ids[i] - novel_ids[i - 1] for i in range(1, len(novel_ids)))
+        shards[ngram_shard(gram, shard_count)][gram] = deltas
+
+    shard_paths = []
+    for i, shard in enumerate(shards):
+        path = f'{CATALOG_DIR}/search-{i:02d}.json'
+        files.append((path, _dumps(shard)))
+        shard_paths.append(path)
+
+    # 目次
+    files.append((CATALOG_META_PATH, _dumps({
+        'version': CATALOG_FORMAT_VERSION,
+        'exported_at': exported_at,
+        'total': len(cards),
+        'page_size': CATALOG_PAGE_SIZE,
+        'pages': page_paths,
+        'search_shards': shard_paths,
+    })))
+    return files
@@ -0,0 +1,409 @@
+"""
+小説データをEPUB形式でエクスポートするモジュール
+- 小説ごとに1つのEPUBファイルを作成（電子書籍リーダー向け）
+- エピソードはデータベースから少しずつ読み込み、XHTMLの章としてEPUBのZIPコンテナへ直接書き込む
+- 目次（nav.xhtml / toc.ncx）はエピソードタイトルから作成
+- 複数の小説は複数プロセスで並列に処理
+"""
+import datetime
+import sys
+from html import escape
+from pathlib import Path
+
+# ルートディレクトリをパスに追加（単体実行用）
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+from app.database.db_handler import ReadOnlyDatabase
+from app.utils.exporters.export_pool import run_novel_tasks
+from app.utils.exporters.export_sink import ZipSink
+from app.utils.exporters.html_templates import PageTemplate, episode_paragraphs
+from app.utils.logger_manager import get_logger
+from config import DATABASE_PATH
+
+# ロガーの設定
+logger = get_logger('EpubExporter')
+
+# データベースから一度に読み込むエピソード数
+EPISODE_BATCH_SIZE = 50
+
+# ワーカープロセス内の状態（_init_epub_workerで設定）
+_worker_exporter = None
+_worker_cancel_event = None
+
+CONTAINER_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+"""
+
+STYLE_CSS = """body { margin: 0 1em; line-height: 1.8; }
+h1 { font-size: 1.4em; margin: 2em 0 1em; }
+h2 { font-size: 1.2em; margin: 1.5em 0 1em; }
+p { margin: 0 0 1em; text-indent: 0; }
+.author { margin-bottom: 2em; }
+.synopsis { font-size: 0.9em; }
+"""
+
+XHTML_PAGE_TEMPLATE = PageTemplate("""<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" xml:lang="ja" lang="ja">
+<head>
+<meta charset="UTF-8"/>
+<title>{title}</title>
+<link rel="stylesheet" type="text/css" href="{css_path}"/>
+</head>
+<body>
+{content}
+</body>
+</html>
+""")
+
+NAV_TEMPLATE = PageTemplate("""<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" xml:lang="ja" lang="ja">
+<head>
+<meta charset="UTF-8"/>
+<title>目次</title>
+</head>
+<body>
+<nav epub:type="toc" id="toc">
+<h1>目次</h1>
+<ol>
+{items}
+</ol>
+</nav>
+</body>
+</html>
+""")
+
+NCX_TEMPLATE = PageTemplate("""<?xml version="1.0" encoding="UTF-8"?>
+<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1" xml:lang="ja">
+<head>
+<meta name="dtb:uid" content="{identifier}"/>
+<meta name="dtb:depth" content="1"/>
+<meta name="dtb:totalPageCount" content="0"/>
+<meta name="dtb:maxPageNumber" content="0"/>
+</head>
+<docTitle><text>{title}</text></docTitle>
+<navMap>
+{nav_points}
+</navMap>
+</ncx>
+""")
+
+OPF_TEMPLATE = PageTemplate("""<?xml version="1.0" encoding="UTF-8"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="book-id" xml:lang="ja">
+<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+<dc:identifier id="book-id">{identifier}</dc:identifier>
+<dc:title>{title}</dc:title>
+<dc:creator>{author}</dc:creator>
+<dc:language>ja</dc:language>
+<dc:description>{synopsis}</dc:description>
+<meta property="dcterms:modified">{modified}</meta>
+</metadata>
+<manifest>
+<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>
+<item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>
+<item id="style" href="style.css" media-type="text/css"/>
+<item id="title-page" href="title.xhtml" media-type="application/xhtml+xml"/>
+{items}
+</manifest>
+<spine toc="ncx">
+<itemref idref="title-page"/>
+{itemrefs}
+</spine>
+</package>
+""")
+
+
+def render_paragraphs(episode_body):
+    """
+    エピソード本文をXHTMLの段落に整形（段落内の改行は<br/>にする）
+
+    Args:
+        episode_body (str): 本文（HTMLを含む場合がある）
+
+    Returns:
+        str: 段落ごとに<p>で囲んだ本文
+    """
+    if not episode_body:
+        return "<p>本文がありません</p>"
+    return '\n'.join(
+        '<p>' + escape(paragraph).replace('\n', '<br/>') + '</p>'
+        for paragraph in episode_paragraphs(episode_body)
+    )
+
+
+class EpubExporter:
+    """
+    小説データをEPUB形式でエクスポートするクラス
+    エクスポート先ディレクトリに小説ごとの「{ncode}.epub」を作成します
+    """
+
+    def __init__(self, export_dir='epub_export', db_path=None):
+        """
+        初期化
+
+        Args:
+            export_dir (str): エクスポート先ディレクトリ
+            db_path (str, optional): データベースファイルのパス（省略時は設定のパス）
+        """
+        self.export_dir = export_dir
+        self.base_dir = Path(export_dir)
+        self.db_path = db_path or DATABASE_PATH
+        self._db = None
+
+    @property
+    def db(self):
+        """読み取り専用のデータベース接続（初回アクセス時に接続）"""
+        if self._db is None:
+            self._db = ReadOnlyDatabase(self.db_path)
+        return self._db
+
+    def export_all_novels(self, progress_callback=None, cancel_check=None, max_workers=None):
+        """
+        全ての小説をエクスポート
+
+        Args:
+            progress_callback: 進捗通知関数 progress_callback(完了数, 総数, ncode)
+            cancel_check: キャンセルされたかどうかを返す関数
+            max_workers (int, optional): ワーカープロセス数（省略時はCPUコア数、1なら逐次処理）
+
+        Returns:
+            bool: 成功したかどうか（キャンセルされた場合はFalse）
+        """
+        novels = self.db.get_all_novels()
+        if not novels:
+            logger.warning("エクスポートする小説がありません")
+            return False
+        return self.export_novels([novel[0] for novel in novels], progress_callback, cancel_check, max_workers)
+
+    def export_novels(self, ncodes, progress_callback=None, cancel_check=None, max_workers=None):
+        """
+        複数の小説をエクスポート（複数プロセスで並列に処理）
+
+        Args:
+            ncodes (list): 小説コードのリスト
+            progress_callback: 進捗通知関数 progress_callback(完了数, 総数, ncode)
+            cancel_check: キャンセルされたかどうかを返す関数
+            max_workers (int, optional): ワーカープロセス数（省略時はCPUコア数、1なら逐次処理）
+
+        Returns:
+            bool: 全ての小説を処理した場合True（キャンセルされた場合はFalse）
+        """
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        logger.info(f"合計 {len(ncodes)} 作品をEPUBにエクスポートします: {self.base_dir}")
+        return run_novel_tasks(
+            ncodes, self.export_novel, _init_epub_worker, (self.export_dir, self.db_path),
+            _export_epub_chunk, (), lambda ncode, path: path is not None,
+            progress_callback, cancel_check, max_workers
+        )
+
+    def export_novel(self, ncode):
+        """
+        指定された小説をEPUBファイルとしてエクスポート
+        エピソードは少しずつ読み込んでその都度書き込むため、話数が多くてもメモリ使用量は一定です
+
+        Args:
+            ncode (str): 小説コード
+
+        Returns:
+            str: 作成したEPUBファイルのパス（失敗した場合はNone）
+        """
+        novel = self.db.get_novel_by_ncode(ncode)
+        if not novel:
+            logger.warning(f"小説 {ncode} が見つかりません")
+            return None
+
+        title = escape(novel[1] if novel[1] else "無題の小説")
+        author = escape(novel[2] if novel[2] else "著者不明")
+        synopsis = escape(novel[7] if len(novel) > 7 and novel[7] else "あらすじはありません")
+        identifier = f"urn:narou:{escape(ncode)}"
+
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        epub_path = self.base_dir / f'{ncode}.epub'
+        sink = ZipSink(epub_path)
+        try:
+            # mimetypeは先頭に無圧縮で格納する必要がある
+            sink.write_bytes('mimetype', b'application/epub+zip', compress=False)
+            sink.write_text('META-INF/container.xml', CONTAINER_XML)
+            sink.write_text('OEBPS/style.css', STYLE_CSS)
+
+            # 扉ページ
+            title_content = (
+                f'<h1>{title}</h1>\n<p class="author">{author}</p>\n'
+                f'<div class="synopsis">{render_paragraphs(novel[7] if len(novel) > 7 else None)}</div>'
+            )
+            sink.write_text('OEBPS/title.xhtml', XHTML_PAGE_TEMPLATE.render({
+                'title': title, 'css_path': 'style.css', 'content': title_content
+            }))
+
+            # 各エピソードを章として書き込み（目次用にはファイル名と見出しだけを保持する）
+            chapters = []
+            for episode_no, episode_title, episode_body in self.db.iter_episodes_by_ncode(ncode, EPISODE_BATCH_SIZE):
+                heading = escape(f"第{episode_no}話: {episode_title}" if episode_title else f"第{episode_no}話")
+                file_name = f'text/episode_{len(chapters) + 1:05d}.xhtml'
+                sink.write_text(f'OEBPS/{file_name}', XHTML_PAGE_TEMPLATE.render({
+                    'title': heading,
+                    'css_path': '../style.css',
+                    'content': f'<section epub:type="chapter">\n<h2>{heading}</h2>\n'
+                               f'{render_paragraphs(episode_body)}\n</section>',
+                }))
+                chapters.append((file_name, heading))
+
+            # 目次とパッケージ文書
+            sink.write_text('OEBPS/nav.xhtml', self._render_nav(title, chapters))
+            sink.write_text('OEBPS/toc.ncx', self._render_ncx(identifier, title, chapters))
+            sink.write_text('OEBPS/content.opf', OPF_TEMPLATE.render({
+                'identifier': identifier,
+                'title': title,
+                'author': author,
+                'synopsis': synopsis,
+                'modified': datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'items': '\n'.join(
+                    f'<item id="ep{i}" href="{file_name}" media-type="application/xhtml+xml"/>'
+                    for i, (file_name, _) in enumerate(chapters, 1)
+                ),
+                'itemrefs': '\n'.join(f'<itemref idref="ep{i}"/>' for i in range(1, len(chapters) + 1)),
+            }))
+
+            sink.close()
+            logger.info(f"小説 {ncode} をEPUBにエクスポートしました。エピソード数: {len(chapters)}")
+            return str(epub_path)
+
+        except Exception as e:
+            logger.error(f"小説 {ncode} のEPUBエクスポート中にエラーが発生しました: {e}")
+            import traceback
+            logger.error(traceback.format_exc())
+            sink.abort()
+            return None
+
+    def _render_nav(self, title, chapters):
+        """
+        EPUB3の目次（nav.xhtml）を作成
+
+        Args:
+            title (str): 小説タイトル（エスケープ済み）
+            chapters (list): [(ファイル名, 見出し)] のリスト
+
+        Returns:
+            str: nav.xhtmlの内容
+        """
+        items = [f'<li><a href="title.xhtml">{title}</a></li>']
+        items.extend(f'<li><a href="{file_name}">{heading}</a></li>' for file_name, heading in chapters)
+        return NAV_TEMPLATE.render({'items': '\n'.join(items)})
+
+    def _render_ncx(self, identifier, title, chapters):
+        """
+        EPUB2互換の目次（toc.ncx）を作成
+
+        Args:
+            identifier (str): 書籍の識別子
+            title (str): 小説タイトル（エスケープ済み）
+            chapters (list): [(ファイル名, 見出し)] のリスト
+
+        Returns:
+            str: toc.ncxの内容
+        """
+        nav_points = [
+            f'<navPoint id="nav{i}" playOrder="{i}"><navLabel><text>{heading}</text></navLabel>'
+            f'<content src="{file_name}"/></navPoint>'
+            for i, (file_name, heading) in enumerate([('title.xhtml', title)] + chapters, 1)
+        ]
+        return NCX_TEMPLATE.render({'identifier': identifier, 'title': title, 'nav_points': '\n'.join(nav_points)})
+
+    def close(self):
+        """データベース接続を閉じる"""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def _init_epub_worker(export_dir, db_path, cancel_event):
+    """
+    EPUBエクスポート用ワーカープロセスの初期化（プロセスごとに読み取り専用接続を作成）
+
+    Args:
+        export_dir (str): エクスポート先ディレクトリ
+        db_path (str): データベースファイルのパス
+        cancel_event: キャンセル通知用のイベント
+    """
+    global _worker_exporter, _worker_cancel_event
+    _worker_exporter = EpubExporter(export_dir, db_path)
+    _worker_cancel_event = cancel_event
+
+
+def _export_epub_chunk(ncodes):
+    """
+    ワーカープロセスで小説のチャンクをEPUBにエクスポート
+
+    Args:
+        ncodes (list): 小説コードのリスト
+
+    Returns:
+        list: [(ncode, 作成したEPUBファイルのパス)] のリスト（失敗した小説はNone、キャンセルされた小説は含まない）
+    """
+    results = []
+    for ncode in ncodes:
+        if _worker_cancel_event is not None and _worker_cancel_event.is_set():
+            break
+        results.append((ncode, _worker_exporter.export_novel(ncode)))
+    return results
+
+
+def run_export(export_dir='epub_export', max_workers=None):
+    """
+    EPUBエクスポート処理を実行する単独関数
+
+    Args:
+        export_dir (str): エクスポート先ディレクトリ
+        max_workers (int, optional): ワーカープロセス数（省略時はCPUコア数）
+
+    Returns:
+        bool: 成功したかどうか
+    """
+    exporter = EpubExporter(export_dir)
+    try:
+        result = exporter.export_all_novels(max_workers=max_workers)
+        if result:
+            print(f"EPUBエクスポートが完了しました。ディレクトリ: {export_dir}")
+        else:
+            print("EPUBエクスポートに失敗しました。ログを確認してください。")
+        return result
+
+    except Exception as e:
+        logger.error(f"EPUBエクスポート処理中にエラーが発生しました: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
+        print(f"エラー: {e}")
+        return False
+    finally:
+        exporter.close()
+
+
+# コマンドラインから直接実行された場合
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='小説データをEPUB形式にエクスポートします')
+    parser.add_argument('--dir', default='epub_export', help='エクスポート先ディレクトリ')
+    parser.add_argument('--ncode', help='特定の小説だけをエクスポート')
+    parser.add_argument('--workers', type=int, default=None, help='並列に処理するプロセス数（省略時はCPUコア数）')
+
+    args = parser.parse_args()
+
+    if args.ncode:
+        # 特定の小説のみエクスポート
+        exporter = EpubExporter(args.dir)
+        epub_path = exporter.export_novel(args.ncode)
+        exporter.close()
+
+        if epub_path:
+            print(f"小説 {args.ncode} のエクスポートが完了しました: {epub_path}")
+        else:
+            print(f"小説 {args.ncode} のエクスポートに失敗しました")
+    else:
+        # 全小説をエクスポート
+        run_export(args.dir, args.workers)
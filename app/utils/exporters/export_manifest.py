@@ -0,0 +1,190 @@
+"""
+HTMLエクスポートのマニフェストを管理するモジュール
+- エクスポート先ディレクトリに、小説・エピソードごとのページの内容ハッシュとテンプレートのバージョンを記録
+- 再エクスポート時は変更のあったページだけを書き出し、不要になったページを削除するために使用
+"""
+import hashlib
+import json
+import os
+from app.utils.logger_manager import get_logger
+
+# ロガーの設定
+logger = get_logger('ExportManifest')
+
+# マニフェストのファイル名（エクスポート先ディレクトリ直下）
+MANIFEST_FILENAME = 'export_manifest.json'
+
+# マニフェストの形式バージョン
+MANIFEST_FORMAT_VERSION = 1
+
+
+def content_hash(*values):
+    """
+    ページの内容を決める値からハッシュを計算
+
+    Args:
+        *values: ハッシュに含める値（JSONに変換できるもの）
+
+    Returns:
+        str: 16進数のハッシュ文字列
+    """
+    data = json.dumps(values, ensure_ascii=False, default=str, separators=(',', ':'))
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def data_hash(data):
+    """
+    ファイルの内容（バイト列）のハッシュを計算
+
+    Args:
+        data (bytes): 内容
+
+    Returns:
+        str: 16進数のハッシュ文字列
+    """
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class ExportManifest:
+    """
+    エクスポート済みページの内容ハッシュを記録するクラス
+
+    小説ごとのエントリ（辞書）のキー:
+        signature (str): 小説情報（novels_descsの行）のハッシュ
+        page (str): 小説情報ページのハッシュ
+        episodes (dict): {episode_no: エピソードページのハッシュ}
+        precache (str): 小説のプリキャッシュマニフェスト（precache.json）のハッシュ
+
+    小説以外のファイル（インデックス・カタログ・アセットなど）は {エクスポート先からの相対パス: ハッシュ} で記録します
+    """
+
+    def __init__(self, path, template_version, catalog_hash=None, novels=None, files=None):
+        """
+        初期化
+
+        Args:
+            path (str): マニフェストファイルのパス
+            template_version (int): ページテンプレートのバージョン
+            catalog_hash (str, optional): インデックスページを作成した時点のカタログのハッシュ
+            novels (dict, optional): {ncode: エントリ}
+            files (dict, optional): {小説以外のファイルのパス: ハッシュ}
+        """
+        self.path = path
+        self.template_version = template_version
+        self.catalog_hash = catalog_hash
+        self.novels = novels if novels is not None else {}
+        self.files = files if files is not None else {}
+
+    @classmethod
+    def load(cls, base_dir, template_version):
+        """
+        エクスポート先ディレクトリのマニフェストを読み込む
+        存在しない・壊れている・テンプレートのバージョンが異なる場合は空のマニフェストを返す
+
+        Args:
+            base_dir: エクスポート先ディレクトリ
+            template_version (int): 現在のページテンプレートのバージョン
+
+        Returns:
+            ExportManifest: マニフェスト
+        """
+        path = os.path.join(str(base_dir), MANIFEST_FILENAME)
+        if not os.path.exists(path):
+            return cls(path, template_version)
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"エクスポートマニフェストを読み込めませんでした。全ページを書き出します: {e}")
+            return cls(path, template_version)
+
+        if data.get('format_version') != MANIFEST_FORMAT_VERSION or data.get('template_version') != template_version:
+            logger.info("テンプレートが変更されているため、全ページを書き出します")
+            return cls(path, template_version)
+
+        return cls(path, template_version, data.get('catalog_hash'), data.get('novels', {}), data.get('files', {}))
+
+    def get_novel(self, ncode):
+        """
+        小説のエントリを取得
+
+        Args:
+            ncode (str): 小説コード
+
+        Returns:
+            dict: エントリ（記録されていない場合はNone）
+        """
+        return self.novels.get(ncode)
+
+    def set_novel(self, ncode, entry):
+        """
+        小説のエントリを記録
+
+        Args:
+            ncode (str): 小説コード
+            entry (dict): エントリ
+        """
+        self.novels[ncode] = entry
+
+    def remove_novel(self, ncode):
+        """
+        小説のエントリを削除
+
+        Args:
+            ncode (str): 小説コード
+        """
+        self.novels.pop(ncode, None)
+
+    def ncodes(self):
+        """
+        記録されている小説コードの一覧を取得
+
+        Returns:
+            list: 小説コードのリスト
+        """
+        return list(self.novels)
+
+    def set_file(self, path, file_hash):
+        """
+        小説以外のファイルのハッシュを記録
+
+        Args:
+            path (str): エクスポート先からの相対パス
+            file_hash (str): 内容のハッシュ
+        """
+        self.files[path] = file_hash
+
+    def remove_file(self, path):
+        """
+        小説以外のファイルの記録を削除
+
+        Args:
+            path (str): エクスポート先からの相対パス
+        """
+        self.files.pop(path, None)
+
+    def save(self):
+        """
+        マニフェストを保存（一時ファイルに書いてから置き換える）
+
+        Returns:
+            bool: 保存に成功した場合True
+        """
+        data = {
+            'format_version': MANIFEST_FORMAT_VERSION,
+            'template_version': self.template_version,
+            'catalog_hash': self.catalog_hash,
+            'novels': self.novels,
+            'files': self.files,
+        }
+
+        try:
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temp_path, self.path)
+            return True
+        except OSError as e:
+            logger.error(f"エクスポートマニフェストの保存に失敗しました: {e}")
+            return False
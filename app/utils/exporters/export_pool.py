@@ -0,0 +1,109 @@
+"""
+エクスポート処理を小説単位で複数プロセスに分散するモジュール
+- 小説を小さなチャンクに分けてワーカープロセスに配り、完了した小説ごとに結果を受け取る
+- キャンセル時は実行中のワーカーを小説の区切りで止め、未着手のチャンクを破棄する
+- ワーカープロセスはspawnで起動し、各プロセスが独自のデータベース接続を持つ
+"""
+import concurrent.futures
+import multiprocessing
+import os
+from app.utils.logger_manager import get_logger
+
+# ロガーの設定
+logger = get_logger('ExportPool')
+
+# ワーカープロセスに一度に渡す小説数の上限（キャンセルの応答性と転送コストの兼ね合い）
+MAX_NOVELS_PER_TASK = 8
+
+
+def run_novel_tasks(ncodes, serial_func, initializer, initargs, chunk_func, chunk_args,
+                    on_result, progress_callback=None, cancel_check=None, max_workers=None):
+    """
+    小説ごとの処理を複数プロセスで並列に実行（ワーカー数が1の場合は現在のプロセスで順に実行）
+
+    Args:
+        ncodes (list): 小説コードのリスト
+        serial_func: 逐次処理で小説ごとに呼び出す関数 serial_func(ncode) -> 結果
+        initializer: ワーカープロセスの初期化関数（initargsの後にキャンセル通知用のイベントを受け取る）
+        initargs (tuple): 初期化関数の引数
+        chunk_func: ワーカープロセスで実行する関数 chunk_func(ncodes, *chunk_args) -> [(ncode, 結果)]
+        chunk_args (tuple): chunk_funcの追加の引数
+        on_result: 結果を受け取る関数 on_result(ncode, 結果) -> 成功したかどうか
+        progress_callback: 進捗通知関数 progress_callback(完了数, 総数, ncode)
+        cancel_check: キャンセルされたかどうかを返す関数
+        max_workers (int, optional): ワーカープロセス数（省略時はCPUコア数）
+
+    Returns:
+        bool: 全ての小説を処理した場合True（キャンセルされた場合はFalse）
+    """
+    total = len(ncodes)
+    if total == 0:
+        return True
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, total))
+
+    if max_workers == 1:
+        for i, ncode in enumerate(ncodes):
+            if cancel_check and cancel_check():
+                logger.info("エクスポートがキャンセルされました")
+                return False
+
+            logger.info(f"小説のエクスポート中 ({i + 1}/{total}): {ncode}")
+            if not on_result(ncode, serial_func(ncode)):
+                logger.error(f"小説 {ncode} のエクスポートに失敗しました")
+
+            if progress_callback:
+                progress_callback(i + 1, total, ncode)
+        return True
+
+    # 小説を小さなチャンクに分けて配る（キャンセル時は未着手のチャンクを破棄する）
+    chunk_size = max(1, min(MAX_NOVELS_PER_TASK, total // (max_workers * 4)))
+    chunks = [ncodes[i:i + chunk_size] for i in range(0, total, chunk_size)]
+
+    context = multiprocessing.get_context('spawn')
+    cancel_event = context.Event()
+    completed = 0
+    cancelled = False
+
+    logger.info(f"{max_workers}プロセスで {total} 作品をエクスポートします")
+    executor = concurrent.futures.ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=context,
+        initializer=initializer,
+        initargs=tuple(initargs) + (cancel_event,)
+    )
+    try:
+        pending = {executor.submit(chunk_func, chunk, *chunk_args) for chunk in chunks}
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, timeout=0.2, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+
+            for future in done:
+                try:
+                    results = future.result()
+                except concurrent.futures.CancelledError:
+                    continue
+                except Exception as e:
+                    logger.error(f"ワーカープロセスでエラーが発生しました: {e}")
+                    continue
+
+                for ncode, result in results:
+                    completed += 1
+                    if not on_result(ncode, result):
+                        logger.error(f"小説 {ncode} のエクスポートに失敗しました")
+                    if progress_callback:
+                        progress_callback(completed, total, ncode)
+
+            if not cancelled and cancel_check and cancel_check():
+                # 実行中のワーカーには小説の区切りで中断させ、未着手のチャンクは破棄する
+                logger.info("エクスポートのキャンセルを受け付けました")
+                cancelled = True
+                cancel_event.set()
+                for future in pending:
+                    future.cancel()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return not cancelled and completed == total
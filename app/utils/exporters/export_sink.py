@@ -0,0 +1,251 @@
+"""
+エクスポートの出力先を管理するモジュール
+- DirectorySink: エクスポート先ディレクトリにファイルとして書き出す
+- ZipSink: 中間ファイルを作らずにZIPアーカイブへ直接書き出す
+- MemorySink: ワーカープロセスで圧縮済みのエントリを作成し、親プロセスのZipSinkへ渡す
+
+エントリは種類ごとに格納方式を選ぶ（画像など圧縮済みの形式はSTORED、テキストはDEFLATED）
+"""
+import os
+import shutil
+import time
+import zipfile
+import zlib
+from pathlib import Path
+from app.utils.logger_manager import get_logger
+
+# ロガーの設定
+logger = get_logger('ExportSink')
+
+# 圧縮せずに格納する拡張子（既に圧縮されている形式）
+STORED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.ico', '.woff', '.woff2', '.gz', '.zip', '.epub')
+
+# DEFLATEの既定の圧縮レベル
+DEFAULT_COMPRESS_LEVEL = 6
+
+
+def compress_entry(path, data, compresslevel=DEFAULT_COMPRESS_LEVEL, compress=True):
+    """
+    ZIPに格納するエントリを作成（ワーカープロセスでの事前圧縮にも使用）
+
+    Args:
+        path (str): アーカイブ内のパス
+        data (bytes): 内容
+        compresslevel (int): DEFLATEの圧縮レベル
+        compress (bool): Falseの場合は種類にかかわらず圧縮せずに格納する
+
+    Returns:
+        tuple: (パス, 格納方式, CRC32, 元のサイズ, 格納するデータ)
+    """
+    crc = zlib.crc32(data)
+    if not compress or path.lower().endswith(STORED_EXTENSIONS):
+        return path, zipfile.ZIP_STORED, crc, len(data), data
+
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -15)
+    payload = compressor.compress(data) + compressor.flush()
+    if len(payload) >= len(data):
+        # 圧縮しても小さくならない場合はそのまま格納
+        return path, zipfile.ZIP_STORED, crc, len(data), data
+    return path, zipfile.ZIP_DEFLATED, crc, len(data), payload
+
+
+class DirectorySink:
+    """エクスポート先ディレクトリにファイルとして書き出す出力先"""
+
+    def __init__(self, base_dir):
+        """
+        初期化
+
+        Args:
+            base_dir: エクスポート先ディレクトリ
+        """
+        self.base_dir = Path(base_dir)
+
+    def _target(self, path):
+        target = self.base_dir / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        return target
+
+    def write_text(self, path, text):
+        """
+        テキストファイルを書き出す
+
+        Args:
+            path (str): エクスポート先からの相対パス（/区切り）
+            text (str): 内容
+        """
+        with open(self._target(path), 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def write_bytes(self, path, data):
+        """
+        バイナリファイルを書き出す
+
+        Args:
+            path (str): エクスポート先からの相対パス（/区切り）
+            data (bytes): 内容
+        """
+        with open(self._target(path), 'wb') as f:
+            f.write(data)
+
+    def copy_file(self, source, path):
+        """
+        ファイルをコピー
+
+        Args:
+            source: コピー元のファイルパス
+            path (str): エクスポート先からの相対パス（/区切り）
+        """
+        shutil.copy(source, self._target(path))
+
+    def close(self):
+        """出力を完了（ディレクトリでは何もしない）"""
+
+
+class ZipSink:
+    """
+    ZIPアーカイブへ直接書き出す出力先
+    一時ファイルに書き込み、close時に指定したパスへ置き換えます
+    """
+
+    def __init__(self, zip_path, compresslevel=DEFAULT_COMPRESS_LEVEL):
+        """
+        初期化
+
+        Args:
+            zip_path: 作成するZIPファイルのパス
+            compresslevel (int): DEFLATEの圧縮レベル
+        """
+        self.zip_path = str(zip_path)
+        self.temp_path = self.zip_path + '.tmp'
+        self.compresslevel = compresslevel
+        self.date_time = time.localtime(time.time())[:6]
+        self.entry_count = 0
+        self.zip_file = zipfile.ZipFile(self.temp_path, 'w', allowZip64=True)
+
+    def write_text(self, path, text):
+        """
+        テキストのエントリを追加
+
+        Args:
+            path (str): アーカイブ内のパス
+            text (str): 内容
+        """
+        self.write_entry(compress_entry(path, text.encode('utf-8'), self.compresslevel))
+
+    def write_bytes(self, path, data, compress=True):
+        """
+        バイナリのエントリを追加
+
+        Args:
+            path (str): アーカイブ内のパス
+            data (bytes): 内容
+            compress (bool): Falseの場合は圧縮せずに格納する（EPUBのmimetypeなど）
+        """
+        self.write_entry(compress_entry(path, data, self.compresslevel, compress))
+
+    def copy_file(self, source, path):
+        """
+        ファイルをエントリとして追加
+
+        Args:
+            source: 追加するファイルのパス
+            path (str): アーカイブ内のパス
+        """
+        with open(source, 'rb') as f:
+            self.write_bytes(path, f.read())
+
+    def write_entry(self, entry):
+        """
+        圧縮済みのエントリを追加（compress_entryの戻り値をそのまま書き込む）
+        zipfileの書き込みハンドルを経由せず、ローカルヘッダとデータを直接書き込んで中央ディレクトリに登録します
+
+        Args:
+            entry (tuple): (パス, 格納方式, CRC32, 元のサイズ, 格納するデータ)
+        """
+        path, compress_type, crc, size, payload = entry
+
+        zinfo = zipfile.ZipInfo(path, date_time=self.date_time)
+        zinfo.compress_type = compress_type
+        zinfo.external_attr = 0o644 << 16
+        zinfo.file_size = size
+        zinfo.compress_size = len(payload)
+        zinfo.CRC = crc
+        zip64 = size > zipfile.ZIP64_LIMIT or len(payload) > zipfile.ZIP64_LIMIT
+
+        zip_file = self.zip_file
+        zip_file.fp.seek(zip_file.start_dir)
+        zinfo.header_offset = zip_file.fp.tell()
+        zip_file.fp.write(zinfo.FileHeader(zip64))
+        zip_file.fp.write(payload)
+        zip_file.start_dir = zip_file.fp.tell()
+        zip_file.filelist.append(zinfo)
+        zip_file.NameToInfo[path] = zinfo
+        self.entry_count += 1
+
+    def entry_revisions(self):
+        """
+        書き込んだエントリの内容を表すリビジョン（CRC32）を取得
+
+        Returns:
+            dict: {アーカイブ内のパス: CRC32の16進数文字列}
+        """
+        return {zinfo.filename: f'{zinfo.CRC:08x}' for zinfo in self.zip_file.filelist}
+
+    def close(self):
+        """中央ディレクトリを書き込んでZIPファイルを完成させる"""
+        self.zip_file.close()
+        os.replace(self.temp_path, self.zip_path)
+        logger.info(f"ZIPファイルを作成しました: {self.zip_path}（{self.entry_count}エントリ）")
+
+    def abort(self):
+        """書き込みを中止して一時ファイルを削除"""
+        try:
+            self.zip_file.close()
+        except Exception:
+            pass
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+class MemorySink:
+    """
+    圧縮済みのエントリをメモリに溜める出力先（ワーカープロセス用）
+    溜めたエントリはtake()で取り出し、親プロセスのZipSink.write_entryで書き込みます
+    """
+
+    def __init__(self, compresslevel=DEFAULT_COMPRESS_LEVEL):
+        """
+        初期化
+
+        Args:
+            compresslevel (int): DEFLATEの圧縮レベル
+        """
+        self.compresslevel = compresslevel
+        self.entries = []
+
+    def write_text(self, path, text):
+        """テキストのエントリを圧縮して追加"""
+        self.entries.append(compress_entry(path, text.encode('utf-8'), self.compresslevel))
+
+    def write_bytes(self, path, data):
+        """バイナリのエントリを圧縮して追加"""
+        self.entries.append(compress_entry(path, data, self.compresslevel))
+
+    def copy_file(self, source, path):
+        """ファイルをエントリとして追加"""
+        with open(source, 'rb') as f:
+            self.write_bytes(path, f.read())
+
+    def take(self):
+        """
+        溜めたエントリを取り出す
+
+        Returns:
+            list: エントリのリスト
+        """
+        entries, self.entries = self.entries, []
+        return entries
+
+    def close(self):
+        """出力を完了（メモリでは何もしない）"""
@@ -6,15 +6,34 @@ import os
 import sqlite3
 import datetime
 import shutil
+import io
 from pathlib import Path
 import json
 from app.utils.logger_manager import get_logger
-from app.database.db_handler import DatabaseHandler
+from app.database.db_handler import DatabaseHandler, ReadOnlyDatabase
+from app.utils.exporters.catalog_index import CATALOG_DIR, CATALOG_META_PATH, CATALOG_PAGE_SIZE, build_catalog
+from app.utils.exporters.export_manifest import ExportManifest, MANIFEST_FILENAME, content_hash, data_hash
+from app.utils.exporters.export_pool import run_novel_tasks
+from app.utils.exporters.export_sink import DirectorySink, MemorySink, ZipSink
+from app.utils.exporters.html_templates import (
+    build_episode_order, render_episode_page, render_index_page, render_novel_page
+)
+from app.utils.exporters.precache_manifest import (
+    NOVEL_PRECACHE_FILENAME, PRECACHE_MANIFEST_FILENAME, SERVICE_WORKER_REVISION_PLACEHOLDER,
+    render_novel_precache, render_precache_manifest, render_service_worker
+)
 from config import DATABASE_PATH, PACKAGE_ASSETS_DIR
 
 # ロガーの設定
 logger = get_logger('HTMLExporter')
 
+# ページテンプレートのバージョン（ページのHTMLを変更したら上げる。上げると次回は全ページを書き出す）
+TEMPLATE_VERSION = 3
+
+# ワーカープロセス内の状態（_init_export_workerで設定）
+_worker_exporter = None
+_worker_cancel_event = None
+
 
 class HTMLExporter:
     """
@@ -22,36 +41,88 @@ class HTMLExporter:
     assets_dirに配置されたスタイルやスクリプトを使用します
     """
 
-    def __init__(self, export_dir='html_export'):
+    def __init__(self, export_dir='html_export', db_handler=None, prepare_assets=True, sink=None):
         """
         初期化
 
         Args:
             export_dir (str): エクスポート先ディレクトリ
+            db_handler (optional): 使用するデータベースアクセス（省略時はDatabaseHandler）
+            prepare_assets (bool): エクスポート先ディレクトリを作成し、アセット・Service Worker・マニフェストを書き出すかどうか
+                                   （ワーカープロセスやZIPへの直接書き出しではFalse）
+            sink (optional): ページの出力先（省略時はエクスポート先ディレクトリ）
         """
-        self.db_path = DATABASE_PATH
+        # ワーカープロセスは指定されたデータベースアクセスと同じファイルを開く
+        self.db_path = getattr(db_handler, 'db_path', None) or DATABASE_PATH
         self.export_dir = export_dir
-        self.db_handler = DatabaseHandler()
+        self.db_handler = db_handler if db_handler is not None else DatabaseHandler()
 
         # パッケージのassets_dirパス（CSSやJSが格納されている場所）
         self.package_assets_dir = Path(PACKAGE_ASSETS_DIR)
 
-        # エクスポート先ディレクトリの作成
+        # エクスポート先ディレクトリ
         self.base_dir = Path(self.export_dir)
-        self.base_dir.mkdir(exist_ok=True)
-
-        # 必要なサブディレクトリの作成
         self.novels_dir = self.base_dir / 'novels'
-        self.novels_dir.mkdir(exist_ok=True)
-
         self.assets_dir = self.base_dir / 'assets'
+
+        # ページの出力先
+        self.sink = sink if sink is not None else DirectorySink(self.base_dir)
+
+        # 前回のエクスポート内容（変更のあったページだけを書き出すために使用）
+        self.manifest = ExportManifest.load(self.base_dir, TEMPLATE_VERSION)
+
+        if not prepare_assets:
+            return
+
+        # エクスポート先ディレクトリの作成
+        self.base_dir.mkdir(exist_ok=True)
+        self.novels_dir.mkdir(exist_ok=True)
         self.assets_dir.mkdir(exist_ok=True)
 
+        self._prepare_assets()
+
+    def _write_text(self, path, text):
+        """
+        小説以外のテキストファイルを書き出し、内容のハッシュをマニフェストに記録（プリキャッシュの対象にする）
+
+        Args:
+            path (str): エクスポート先からの相対パス
+            text (str): 内容
+        """
+        self.sink.write_text(path, text)
+        self.manifest.set_file(path, content_hash(text))
+
+    def _write_bytes(self, path, data):
+        """
+        小説以外のバイナリファイルを書き出し、内容のハッシュをマニフェストに記録（プリキャッシュの対象にする）
+
+        Args:
+            path (str): エクスポート先からの相対パス
+            data (bytes): 内容
+        """
+        self.sink.write_bytes(path, data)
+        self.manifest.set_file(path, data_hash(data))
+
+    def _copy_file(self, source, path):
+        """
+        ファイルをコピーし、内容のハッシュをマニフェストに記録（プリキャッシュの対象にする）
+
+        Args:
+            source: コピー元のファイルパス
+            path (str): エクスポート先からの相対パス
+        """
+        with open(source, 'rb') as f:
+            self._write_bytes(path, f.read())
+
+    def _prepare_assets(self):
+        """
+        アセット・マニフェストを出力先に書き出す
+        Service Workerはページを書き出した後、プリキャッシュマニフェストと一緒に作成します
+        """
         # 外部アセットファイルをコピー
         self._copy_asset_files()
 
-        # Service WorkerとManifestを作成
-        self._create_service_worker()
+        # Manifestを作成
         self._create_manifest_json()
 
     def _copy_asset_files(self):
@@ -70,39 +141,42 @@ class HTMLExporter:
 
         # CSSファイルをコピー
         if css_file.exists():
-            shutil.copy(css_file, self.assets_dir / 'style.css')
-            logger.info(f"CSSファイルをコピーしました: {css_file} -> {self.assets_dir / 'style.css'}")
+            self._copy_file(css_file, 'assets/style.css')
+            logger.info(f"CSSファイルをコピーしました: {css_file} -> assets/style.css")
         else:
             logger.warning(f"CSSファイルが見つかりません: {css_file}")
             # テンプレートファイルからコピー
             style_template = self.package_assets_dir / 'style-css.css'
             if style_template.exists():
-                shutil.copy(style_template, self.assets_dir / 'style.css')
-                logger.info(f"CSSテンプレートをコピーしました: {style_template} -> {self.assets_dir / 'style.css'}")
+                self._copy_file(style_template, 'assets/style.css')
+                logger.info(f"CSSテンプレートをコピーしました: {style_template} -> assets/style.css")
             else:
                 logger.warning("CSSファイルは別途用意する必要があります")
 
         # JSファイルをコピー
         if js_file.exists():
-            shutil.copy(js_file, self.assets_dir / 'script.js')
-            logger.info(f"JavaScriptファイルをコピーしました: {js_file} -> {self.assets_dir / 'script.js'}")
+            self._copy_file(js_file, 'assets/script.js')
+            logger.info(f"JavaScriptファイルをコピーしました: {js_file} -> assets/script.js")
         else:
             # テンプレートファイルからコピー
             script_template = self.package_assets_dir / 'script-js.js'
             if script_template.exists():
-                shutil.copy(script_template, self.assets_dir / 'script.js')
-                logger.info(f"JavaScriptテンプレートをコピーしました: {script_template} -> {self.assets_dir / 'script.js'}")
+                self._copy_file(script_template, 'assets/script.js')
+                logger.info(f"JavaScriptテンプレートをコピーしました: {script_template} -> assets/script.js")
             else:
                 logger.warning(f"JavaScriptファイルが見つかりません: {js_file}")
                 logger.info("JavaScriptファイルは別途用意する必要があります")
 
-    def _create_service_worker(self):
+    def _create_service_worker(self, revision):
         """
         Service Workerファイルを作成
-        パッケージ内のテンプレートを使用するか、シンプルなバージョンを作成
+        パッケージ内のテンプレートにプリキャッシュマニフェストのリビジョンを差し込むか、シンプルなバージョンを作成
+
+        Args:
+            revision (str): プリキャッシュマニフェストのリビジョン
         """
-        # Service Workerファイルのパス
-        sw_path = self.base_dir / 'service-worker.js'
+        # Service Workerファイルのパス（エクスポート先からの相対パス）
+        sw_path = 'service-worker.js'
 
         # パッケージ内のテンプレートをチェック
         sw_template = self.package_assets_dir / 'service-worker.js'
@@ -112,9 +186,12 @@ class HTMLExporter:
             sw_template = self.package_assets_dir / 'serviceworker-js.js'
 
         if sw_template.exists():
-            # テンプレートがある場合はコピー
-            shutil.copy(sw_template, sw_path)
-            logger.info(f"Service Workerテンプレートをコピーしました: {sw_template} -> {sw_path}")
+            # テンプレートがある場合はリビジョンを差し込んで書き出す
+            template = sw_template.read_text(encoding='utf-8')
+            if SERVICE_WORKER_REVISION_PLACEHOLDER not in template:
+                logger.warning(f"Service Workerテンプレートにリビジョンの差し込み位置がありません: {sw_template}")
+            self.sink.write_text(sw_path, render_service_worker(template, revision))
+            logger.info(f"Service Workerを作成しました: {sw_template} -> {sw_path}")
         else:
             # テンプレートがない場合は基本的な内容を生成
             logger.info(f"Service Workerテンプレートが見つからないため、基本バージョンを作成します: {sw_path}")
@@ -131,9 +208,9 @@ class HTMLExporter:
             # 各キャッシュURLをJSON文字列化
             cache_list = ',\n    '.join([f"'{url}'" for url in cached_urls])
 
-            # Service Workerの基本構造
+            # Service Workerの基本構造（リビジョンごとにキャッシュを作り直す）
             simple_sw = f"""// 小説ライブラリ用 Service Worker
-const CACHE_NAME = 'novel-library-cache-v1';
+const CACHE_NAME = 'novel-library-cache-{revision}';
 
 // キャッシュするリソースのリスト
 const urlsToCache = [
@@ -181,8 +258,7 @@ self.addEventListener('activate', event => {{
 }});
 """
             # ファイルに書き込み
-            with open(sw_path, 'w', encoding='utf-8') as f:
-                f.write(simple_sw)
+            self.sink.write_text(sw_path, simple_sw)
 
             logger.info(f"基本的なService Workerファイルを作成しました: {sw_path}")
 
@@ -191,8 +267,8 @@ self.addEventListener('activate', event => {{
         PWA用のmanifest.jsonファイルを作成
         パッケージ内のテンプレートを使用するか、シンプルなバージョンを作成
         """
-        # マニフェストファイルのパス
-        manifest_path = self.base_dir / 'manifest.json'
+        # マニフェストファイルのパス（エクスポート先からの相対パス）
+        manifest_path = 'manifest.json'
 
         # パッケージ内のテンプレートをチェック
         manifest_template = self.package_assets_dir / 'manifest.json'
@@ -203,7 +279,7 @@ self.addEventListener('activate', event => {{
 
         if manifest_template.exists():
             # テンプレートがある場合はコピー
-            shutil.copy(manifest_template, manifest_path)
+            self._copy_file(manifest_template, manifest_path)
             logger.info(f"マニフェストテンプレートをコピーしました: {manifest_template} -> {manifest_path}")
         else:
             # テンプレートがない場合は基本的な内容を生成
@@ -233,8 +309,7 @@ self.addEventListener('activate', event => {{
             }
 
             # JSONファイルとして書き込み
-            with open(manifest_path, 'w', encoding='utf-8') as f:
-                json.dump(manifest_data, f, ensure_ascii=False, indent=2)
+            self._write_text(manifest_path, json.dumps(manifest_data, ensure_ascii=False, indent=2))
 
             logger.info(f"基本的なマニフェストファイルを作成しました: {manifest_path}")
 
@@ -252,18 +327,14 @@ self.addEventListener('activate', event => {{
                 logger.info("アイコンファイルは別途用意する必要があります")
                 return
 
-            # アイコン用のディレクトリを作成
-            icons_dir = self.assets_dir
-            icons_dir.mkdir(exist_ok=True)
-
             # アイコンテンプレートをチェック
             icon_template_192 = self.package_assets_dir / 'icon-192.png'
             icon_template_512 = self.package_assets_dir / 'icon-512.png'
 
             # テンプレートが存在する場合はコピー
             if icon_template_192.exists() and icon_template_512.exists():
-                shutil.copy(icon_template_192, self.assets_dir / 'icon-192.png')
-                shutil.copy(icon_template_512, self.assets_dir / 'icon-512.png')
+                self._copy_file(icon_template_192, 'assets/icon-192.png')
+                self._copy_file(icon_template_512, 'assets/icon-512.png')
                 logger.info("アイコンテンプレートをコピーしました")
                 return
 
@@ -315,8 +386,10 @@ self.addEventListener('activate', event => {{
                 draw_512.ellipse((128, 128, 384, 384), fill=text_color)
 
             # アイコンを保存
-            img_192.save(self.assets_dir / 'icon-192.png')
-            img_512.save(self.assets_dir / 'icon-512.png')
+            for image, icon_path in ((img_192, 'assets/icon-192.png'), (img_512, 'assets/icon-512.png')):
+                buffer = io.BytesIO()
+                image.save(buffer, format='PNG')
+                self._write_bytes(icon_path, buffer.getvalue())
 
             logger.info("シンプルなアイコンファイルを作成しました")
 
@@ -324,12 +397,19 @@ self.addEventListener('activate', event => {{
             logger.warning(f"アイコン生成に失敗しました: {e}")
             logger.info("アイコンファイルは別途用意する必要があります")
 
-    def export_all_novels(self):
+    def export_all_novels(self, progress_callback=None, cancel_check=None, max_workers=None, force=False):
         """
         全ての小説をエクスポート
+        前回のエクスポートから変更のあった小説・ページだけを書き出し、カタログから消えた小説のページを削除します
+
+        Args:
+            progress_callback: 進捗通知関数 progress_callback(完了数, 総数, ncode)
+            cancel_check: キャンセルされたかどうかを返す関数
+            max_workers (int, optional): ワーカープロセス数（省略時はCPUコア数、1なら逐次処理）
+            force (bool): 変更の有無にかかわらず全ページを書き出すかどうか
 
         Returns:
-            bool: 成功したかどうか
+            bool: 成功したかどうか（キャンセルされた場合はFalse）
         """
         try:
             # 小説リストの取得
@@ -339,25 +419,41 @@ self.addEventListener('activate', event => {{
                 logger.warning("エクスポートする小説がありません")
                 return False
 
-            # インデックスページの作成
-            logger.info("インデックスページを作成します...")
-            self._create_index_page(novels)
-
-            # 各小説のページを作成
-            logger.info(f"合計 {len(novels)} 作品をエクスポートします")
-            for i, novel in enumerate(novels):
-                try:
-                    ncode = novel[0]
-                    logger.info(f"小説のエクスポート中 ({i+1}/{len(novels)}): {ncode}")
-                    self.export_novel(ncode)
-                except Exception as e:
-                    logger.error(f"小説 {ncode} のエクスポート中にエラーが発生しました: {e}")
-                    import traceback
-                    logger.error(traceback.format_exc())
+            # インデックスページの作成（一覧に表示する項目が変わった場合のみ）
+            catalog_hash = self._get_catalog_hash(novels)
+            if force or catalog_hash != self.manifest.catalog_hash or not (self.base_dir / 'index.html').exists():
+                logger.info("インデックスページを作成します...")
+                self._create_index_page(novels)
+                self.manifest.catalog_hash = catalog_hash
+            else:
+                logger.info("カタログに変更がないため、インデックスページの作成を省略します")
 
             # PWA用のアイコンを作成
             self._create_simple_icons()
 
+            # カタログから消えた小説のページを削除
+            self._remove_orphaned_novels({novel[0] for novel in novels})
+
+            # 変更のあった小説のページを作成（エピソードの構成は全小説分を1回のクエリで取得）
+            if force:
+                changed = [novel[0] for novel in novels]
+            else:
+                fingerprints = self._get_episode_fingerprints()
+                changed = [novel[0] for novel in novels
+                           if not self._is_novel_current(novel, fingerprints.get(novel[0]))]
+            logger.info(f"合計 {len(novels)} 作品のうち {len(changed)} 作品をエクスポートします")
+
+            result = True
+            if changed:
+                result = self.export_novels(changed, progress_callback, cancel_check, max_workers, force)
+            else:
+                self.manifest.save()
+                self._create_precache_manifest()
+                if progress_callback:
+                    progress_callback(len(novels), len(novels), novels[-1][0])
+            if not result:
+                return False
+
             logger.info(f"全ての小説のエクスポートが完了しました。合計: {len(novels)}作品")
             return True
 
@@ -367,30 +463,98 @@ self.addEventListener('activate', event => {{
             logger.error(traceback.format_exc())
             return False
 
-    def export_novel(self, ncode):
+    def export_novels(self, ncodes, progress_callback=None, cancel_check=None, max_workers=None, force=False):
+        """
+        複数の小説をエクスポート（複数プロセスで並列に処理）
+        各ワーカープロセスは独自の読み取り専用接続を持ち、小説ごとのページを書き出します
+        インデックスページとアセットは親プロセスで作成し、マニフェストは親プロセスでまとめて保存します
+
+        Args:
+            ncodes (list): 小説コードのリスト
+            progress_callback: 進捗通知関数 progress_callback(完了数, 総数, ncode)
+            cancel_check: キャンセルされたかどうかを返す関数
+            max_workers (int, optional): ワーカープロセス数（省略時はCPUコア数、1なら逐次処理）
+            force (bool): 変更の有無にかかわらず全ページを書き出すかどうか
+
+        Returns:
+            bool: 全ての小説を処理した場合True（キャンセルされた場合はFalse）
+        """
+        result = run_novel_tasks(
+            ncodes, lambda ncode: self._export_novel(ncode, force), _init_export_worker,
+            (str(self.base_dir), self.db_path), _export_novel_chunk, (force,), self._record_manifest_entry,
+            progress_callback, cancel_check, max_workers
+        )
+        # キャンセルされた場合も完了した小説の分は記録する（次回はその続きから書き出す）
+        self.manifest.save()
+        self._create_precache_manifest()
+        return result
+
+    def _record_manifest_entry(self, ncode, entry):
+        """
+        小説のエクスポート結果をマニフェストに記録
+
+        Args:
+            ncode (str): 小説コード
+            entry (dict): マニフェストのエントリ（失敗した場合はNone）
+
+        Returns:
+            bool: 成功したかどうか
+        """
+        if entry is None:
+            return False
+        self.manifest.set_novel(ncode, entry)
+        return True
+
+    def export_novel(self, ncode, force=False):
         """
         指定された小説をエクスポート
 
         Args:
             ncode (str): 小説コード
+            force (bool): 変更の有無にかかわらず全ページを書き出すかどうか
 
         Returns:
             bool: 成功したかどうか
         """
+        entry = self._export_novel(ncode, force)
+        if entry is None:
+            return False
+
+        self.manifest.set_novel(ncode, entry)
+        self.manifest.save()
+        self._create_precache_manifest()
+        return True
+
+    def _export_novel(self, ncode, force=False):
+        """
+        指定された小説の変更のあったページを書き出す
+
+        Args:
+            ncode (str): 小説コード
+            force (bool): 変更の有無にかかわらず全ページを書き出すかどうか
+
+        Returns:
+            dict: マニフェストに記録するエントリ（失敗した場合はNone）
+        """
         try:
             # 小説情報の取得
             novel = self.db_handler.get_novel_by_ncode(ncode)
             if not novel:
                 logger.warning(f"小説 {ncode} が見つかりません")
-                return False
-
-            # 小説タイトルの取得
-            title = novel[1] if novel[1] else "無題の小説"
-            author = novel[2] if novel[2] else "著者不明"
-            synopsis = novel[7] if len(novel) > 7 and novel[7] else "あらすじはありません"
-
-            # エピソードの取得
-            episodes = self.db_handler.get_episodes_by_ncode(ncode)
+                return None
+
+            # 小説情報とエピソードの構成に変更がなければエピソードを読み込まずに終了
+            previous = self.manifest.get_novel(ncode)
+            fingerprint = self._get_episode_fingerprints(ncode).get(ncode)
+            if not force and self._is_novel_current(novel, fingerprint):
+                logger.debug(f"小説 {ncode} に変更はありません")
+                return previous
+
+            # エピソードの取得（内容ハッシュが揃っていれば本文は書き出すページの分だけ後で読み込む）
+            episodes = self._get_episode_hashes(ncode)
+            bodies_loaded = episodes is None
+            if bodies_loaded:
+                episodes = self.db_handler.get_episodes_by_ncode(ncode)
             if not episodes:
                 logger.warning(f"小説 {ncode} にはエピソードがありません")
                 episodes = []
@@ -399,23 +563,179 @@ self.addEventListener('activate', event => {{
             novel_dir = self.novels_dir / ncode
             novel_dir.mkdir(exist_ok=True)
 
-            # 小説情報ページの作成
-            self._create_novel_page(novel_dir, novel, episodes)
+            previous_episodes = previous.get('episodes', {}) if previous and not force else {}
 
-            # 各エピソードのページを作成
-            logger.info(f"小説 {ncode} のエピソード {len(episodes)}話を処理中...")
-            for episode in episodes:
-                episode_no, title, body = episode
-                self._create_episode_page(novel_dir, novel, episode, episodes)
+            # 話数順の並びと前後のエピソードの対応表は小説ごとに一度だけ作成
+            ordered_episodes, neighbours = build_episode_order(episodes)
+            page_hash, episode_hashes = self._get_page_hashes(novel, ordered_episodes, neighbours)
+            entry = {'signature': self._get_novel_signature(novel, fingerprint), 'page': page_hash,
+                     'episodes': episode_hashes}
 
-            logger.info(f"小説 {ncode} のエクスポートが完了しました。エピソード数: {len(episodes)}")
-            return True
+            # 小説情報ページの作成（表示内容が変わった場合のみ）
+            if force or not previous or previous.get('page') != page_hash or not (novel_dir / 'index.html').exists():
+                self._create_novel_page(novel, ordered_episodes)
+
+            # 各エピソードのページを作成（本文・タイトル・前後のエピソードが変わった場合のみ）
+            changed_episodes = [
+                episode for episode in ordered_episodes
+                if previous_episodes.get(episode[0]) != episode_hashes[episode[0]] or
+                not (novel_dir / f'episode_{episode[0]}.html').exists()
+            ]
+            if not bodies_loaded and changed_episodes:
+                bodies = self.db_handler.get_episode_bodies(ncode, [episode[0] for episode in changed_episodes])
+                changed_episodes = [(episode[0], episode[1], bodies.get(episode[0]) or '')
+                                    for episode in changed_episodes]
+            for episode in changed_episodes:
+                self._create_episode_page(novel, episode, *neighbours[episode[0]])
+            written = len(changed_episodes)
+
+            # 削除されたエピソードのページを削除
+            for episode_no in set(previous_episodes) - set(entry['episodes']):
+                episode_path = novel_dir / f'episode_{episode_no}.html'
+                if episode_path.exists():
+                    episode_path.unlink()
+                    logger.info(f"不要になったエピソードページを削除しました: {episode_path}")
+
+            # プリキャッシュマニフェストの作成（内容が変わった場合のみ）
+            precache_text = render_novel_precache(TEMPLATE_VERSION, page_hash, episode_hashes)
+            entry['precache'] = content_hash(precache_text)
+            if force or not previous or previous.get('precache') != entry['precache'] or \
+                    not (novel_dir / NOVEL_PRECACHE_FILENAME).exists():
+                self.sink.write_text(f'novels/{ncode}/{NOVEL_PRECACHE_FILENAME}', precache_text)
+
+            logger.info(f"小説 {ncode} のエクスポートが完了しました。エピソード数: {len(episodes)}（書き出し: {written}）")
+            return entry
 
         except Exception as e:
             logger.error(f"小説 {ncode} のエクスポート中にエラーが発生しました: {e}")
             import traceback
             logger.error(traceback.format_exc())
+            return None
+
+    def _get_episode_hashes(self, ncode):
+        """
+        データベースに保存された本文の内容ハッシュをエピソードの代わりに取得
+
+        Args:
+            ncode (str): 小説コード
+
+        Returns:
+            list: [(episode_no, e_title, content_hash)]（ハッシュが未計算のエピソードがある場合はNone）
+        """
+        get_episode_hashes = getattr(self.db_handler, 'get_episode_hashes', None)
+        if get_episode_hashes is None:
+            return None
+        episodes = get_episode_hashes(ncode)
+        if episodes is None or any(episode[2] is None for episode in episodes):
+            return None
+        return episodes
+
+    def _get_page_hashes(self, novel, ordered_episodes, neighbours):
+        """
+        小説情報ページ・エピソードページの内容を決める値のハッシュを計算
+        エピソードの3番目の値は本文、または本文の内容ハッシュ（_get_episode_hashesの結果）
+
+        Args:
+            novel (tuple): 小説情報
+            ordered_episodes (list): 話数順のエピソードのリスト
+            neighbours (dict): {episode_no: (前話のepisode_no, 次話のepisode_no)}
+
+        Returns:
+            tuple: (小説情報ページのハッシュ, {episode_no: エピソードページのハッシュ}（話数順）)
+        """
+        ncode = novel[0]
+        page_hash = content_hash(
+            ncode, novel[1], novel[2], novel[3], novel[7] if len(novel) > 7 else None,
+            [(episode[0], episode[1]) for episode in ordered_episodes]
+        )
+        episode_hashes = {}
+        for episode in ordered_episodes:
+            prev_no, next_no = neighbours[episode[0]]
+            episode_hashes[episode[0]] = content_hash(ncode, novel[1], episode, prev_no, next_no)
+        return page_hash, episode_hashes
+
+    def _get_episode_fingerprints(self, ncode=None):
+        """
+        小説ごとのエピソードの構成を取得
+
+        Args:
+            ncode (str, optional): 小説コード。Noneの場合は全ての小説
+
+        Returns:
+            dict: {ncode: エピソードの構成}（取得できない場合は空）
+        """
+        get_episode_fingerprints = getattr(self.db_handler, 'get_episode_fingerprints', None)
+        if get_episode_fingerprints is None:
+            return {}
+        return get_episode_fingerprints(ncode)
+
+    def _get_novel_signature(self, novel, fingerprint=None):
+        """
+        小説情報（novels_descsの行）とエピソードの構成のハッシュを計算
+
+        Args:
+            novel (tuple): 小説情報
+            fingerprint (tuple, optional): エピソードの構成（get_episode_fingerprintsの値）
+
+        Returns:
+            str: ハッシュ
+        """
+        if fingerprint is not None:
+            count, latest, episodes = fingerprint
+            # 各話の並び順はクエリで保証されないため並べ替える
+            fingerprint = (count, latest, sorted((episodes or '').split(',')))
+        return content_hash(list(novel), fingerprint)
+
+    def _is_novel_current(self, novel, fingerprint=None):
+        """
+        小説のページが前回のエクスポートから変わっていないかどうか
+        小説情報（更新日時・話数を含む）とエピソードの構成（各話の番号と保存された内容ハッシュ）が前回と同じで、
+        ページが存在する場合に最新とみなします
+
+        Args:
+            novel (tuple): 小説情報
+            fingerprint (tuple, optional): エピソードの構成
+
+        Returns:
+            bool: 書き出しを省略できる場合True
+        """
+        previous = self.manifest.get_novel(novel[0])
+        if not previous or previous.get('signature') != self._get_novel_signature(novel, fingerprint):
             return False
+        return (self.novels_dir / novel[0] / 'index.html').exists()
+
+    def _get_catalog_hash(self, novels):
+        """
+        インデックスページに表示する項目のハッシュを計算
+
+        Args:
+            novels (list): 小説のリスト
+
+        Returns:
+            str: ハッシュ
+        """
+        return content_hash([
+            (novel[0], novel[1], novel[2], novel[3],
+             novel[5] if len(novel) > 5 else None, novel[7] if len(novel) > 7 else None)
+            for novel in novels
+        ])
+
+    def _remove_orphaned_novels(self, ncodes):
+        """
+        カタログから消えた小説のページを削除
+
+        Args:
+            ncodes (set): 現在のカタログの小説コード
+        """
+        for ncode in self.manifest.ncodes():
+            if ncode in ncodes:
+                continue
+
+            novel_dir = self.novels_dir / ncode
+            if novel_dir.exists():
+                shutil.rmtree(novel_dir, ignore_errors=True)
+                logger.info(f"カタログから削除された小説のページを削除しました: {novel_dir}")
+            self.manifest.remove_novel(ncode)
 
     # HTMLExporterクラスの_create_index_pageメソッドを修正
     # _create_index_pageメソッドの修正部分
@@ -423,6 +743,7 @@ self.addEventListener('activate', event => {{
     def _create_index_page(self, novels):
         """
         インデックスページを作成（最近読んだ小説セクション付き）
+        小説一覧はカタログページと検索インデックスのJSONに分割し、ページには先頭のカタログページだけを埋め込みます
 
         Args:
             novels (list): 小説のリスト
@@ -430,317 +751,129 @@ self.addEventListener('activate', event => {{
         # 現在日時を取得
         now = datetime.datetime.now().strftime('%Y年%m月%d日 %H:%M:%S')
 
-        html_content = f"""
-        <!DOCTYPE html>
-        <html lang="ja">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>小説ライブラリ</title>
-            <link rel="stylesheet" href="assets/style.css">
-            <script src="assets/script.js" defer></script>
-            <link rel="manifest" href="manifest.json">
-        </head>
-        <body>
-            <header>
-                <div class="container">
-                    <h1>小説ライブラリ</h1>
-                </div>
-            </header>
-
-            <main class="container">
-                <div class="search-container">
-                    <input type="text" class="search-box" placeholder="小説を検索...">
-                </div>
-
-                <!-- 最近読んだ小説セクション -->
-                <div class="recent-novels-section">
-                    <h2>最近読んだ小説</h2>
-                    <div class="recent-novels-list">
-                        <!-- JavaScriptで動的に読み込み -->
-                    </div>
-                </div>
-
-                <h2>全小説一覧</h2>
-                <div class="novel-list">
-        """
-
-        # 小説カードを追加
+        # 小説カードの差し込み値を作成
+        cards = []
         for novel in novels:
-            ncode = novel[0]
-            title = novel[1] if novel[1] else "無題の小説"
-            author = novel[2] if novel[2] else "著者不明"
-            updated_at = novel[3] if novel[3] else "更新日不明"
-            episodes = novel[5] if len(novel) > 5 and novel[5] is not None else 0
             synopsis = novel[7] if len(novel) > 7 and novel[7] else "あらすじはありません"
 
             # あらすじの短縮
             if len(synopsis) > 150:
                 synopsis = synopsis[:150] + "..."
 
-            html_content += f"""
-            <div class="novel-card" data-novel-id="{ncode}">
-                <h3><a href="novels/{ncode}/index.html">{title}</a></h3>
-                <div class="novel-info">作者: {author} | エピソード数: {episodes}</div>
-                <div class="novel-info">更新: {synopsis}</div>
-                <div class="novel-synopsis">{updated_at}</div>
-            </div>
-            """
-
-        html_content += f"""
-                </div>
-            </main>
-
-            <button class="back-to-top">↑</button>
-
-            <footer class="container">
-                <p>エクスポート日時: {now}</p>
-            </footer>
-
-            <script>
-                // Service Workerの登録
-                if ('serviceWorker' in navigator) {{
-                    window.addEventListener('load', function() {{
-                        navigator.serviceWorker.register('./service-worker.js')
-                            .then(function(registration) {{
-                                console.log('Service Worker登録成功:', registration.scope);
-                            }})
-                            .catch(function(error) {{
-                                console.log('Service Worker登録失敗:', error);
-                            }});
-                    }});
-                }}
-            </script>
-        </body>
-        </html>
-        """
+            cards.append({
+                'ncode': novel[0],
+                'title': novel[1] if novel[1] else "無題の小説",
+                'author': novel[2] if novel[2] else "著者不明",
+                'updated_at': novel[3] if novel[3] else "更新日不明",
+                'episodes': novel[5] if len(novel) > 5 and novel[5] is not None else 0,
+                'synopsis': synopsis,
+            })
+
+        # カタログと検索インデックスを書き込み
+        catalog_paths = set()
+        for path, text in build_catalog(cards, now):
+            self._write_text(path, text)
+            catalog_paths.add(path)
+        self._remove_stale_catalog_files(catalog_paths)
+
+        html_content = render_index_page(cards[:CATALOG_PAGE_SIZE], now, CATALOG_META_PATH, len(cards))
 
         # ファイルに書き込み
-        index_path = self.base_dir / 'index.html'
-        with open(index_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        self._write_text('index.html', html_content)
+
+        logger.info(f"インデックスページを作成しました: {len(cards)}作品（カタログ {len(catalog_paths)}ファイル）")
+
+    def _remove_stale_catalog_files(self, catalog_paths):
+        """
+        前回のエクスポートで作成し、今回は不要になったカタログのファイルを削除（ディレクトリへの書き出し時のみ）
+
+        Args:
+            catalog_paths (set): 今回書き出したカタログのパス（エクスポート先からの相対パス）
+        """
+        catalog_dir = self.base_dir / CATALOG_DIR
+        if not isinstance(self.sink, DirectorySink) or not catalog_dir.exists():
+            return
+
+        for path in catalog_dir.iterdir():
+            relative_path = f'{CATALOG_DIR}/{path.name}'
+            if relative_path not in catalog_paths:
+                path.unlink()
+                self.manifest.remove_file(relative_path)
+
+    def _create_precache_manifest(self, entry_revisions=None):
+        """
+        プリキャッシュマニフェストとService Workerを作成
+        Service Workerにはマニフェストのリビジョンを差し込むため、エクスポートのたびに更新が検出されます
 
-        logger.info(f"インデックスページを作成しました: {index_path}")
+        Args:
+            entry_revisions (dict, optional): ZIPへの書き出し時の {エントリのパス: リビジョン}
+                                              （省略時はエクスポートマニフェストの記録を使用）
+        """
+        if entry_revisions is None:
+            files = dict(self.manifest.files)
+            novels = {
+                ncode: entry['precache'] for ncode, entry in self.manifest.novels.items() if entry.get('precache')
+            }
+        else:
+            files, novels = {}, {}
+            for path, revision in entry_revisions.items():
+                parts = path.split('/')
+                if parts[0] != 'novels':
+                    files[path] = revision
+                elif len(parts) == 3 and parts[2] == NOVEL_PRECACHE_FILENAME:
+                    novels[parts[1]] = revision
+
+        manifest_text = render_precache_manifest(files, novels)
+        self.sink.write_text(PRECACHE_MANIFEST_FILENAME, manifest_text)
+        self._create_service_worker(content_hash(manifest_text))
+        logger.info(f"プリキャッシュマニフェストを作成しました: {len(files)}ファイル、{len(novels)}作品")
 
     # _create_novel_pageメソッドの修正部分
 
-    def _create_novel_page(self, novel_dir, novel, episodes):
+    def _create_novel_page(self, novel, ordered_episodes):
         """
         小説情報ページを作成（続きから読むボタン対応）
 
         Args:
-            novel_dir (Path): 小説ディレクトリのパス
             novel (tuple): 小説情報
-            episodes (list): エピソードのリスト
-        """
-        ncode = novel[0]
-        title = novel[1] if novel[1] else "無題の小説"
-        author = novel[2] if novel[2] else "著者不明"
-        synopsis = novel[7] if len(novel) > 7 and novel[7] else "あらすじはありません"
-        updated_at = novel[3] if novel[3] else "更新日不明"
-
-        # 目次を作成
-        episodes_html = ""
-        for episode in sorted(episodes, key=lambda x: int(x[0]) if x[0].isdigit() else 0):
-            episode_no, episode_title, _ = episode
-            episodes_html += f"""
-            <li class="episode-item">
-                <a href="episode_{episode_no}.html" class="episode-link">第{episode_no}話: {episode_title}</a>
-            </li>
-            """
-
-        html_content = f"""
-        <!DOCTYPE html>
-        <html lang="ja">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>{title} - 小説ライブラリ</title>
-            <link rel="stylesheet" href="../../assets/style.css">
-            <script src="../../assets/script.js" defer></script>
-        </head>
-        <body>
-            <header>
-                <div class="container">
-                    <h1>{title}</h1>
-                </div>
-            </header>
-
-            <main class="container">
-                <a href="../../index.html" class="back-link">← 小説一覧に戻る</a>
-
-                <div class="novel-meta">
-                    <h2>{title}</h2>
-                    <p>作者: {author}</p>
-                    <p>最終更新: {synopsis}</p>
-                    <p>エピソード数: {len(episodes)}</p>
-                    <h3>あらすじ</h3>
-                    <p>{updated_at}</p>
-                    <!-- 続きから読むボタンがここに動的に挿入されます -->
-                </div>
-
-                <div class="search-container">
-                    <input type="text" class="search-box" placeholder="エピソードを検索...">
-                </div>
-
-                <h3>目次</h3>
-                <ul class="episode-list">
-                    {episodes_html}
-                </ul>
-            </main>
-
-            <button class="back-to-top">↑</button>
-        </body>
-        </html>
+            ordered_episodes (list): 話数順のエピソードのリスト
         """
+        html_content = render_novel_page(
+            novel[0],
+            novel[1] if novel[1] else "無題の小説",
+            novel[2] if novel[2] else "著者不明",
+            novel[7] if len(novel) > 7 and novel[7] else "あらすじはありません",
+            novel[3] if novel[3] else "更新日不明",
+            ordered_episodes
+        )
 
         # ファイルに書き込み
-        index_path = novel_dir / 'index.html'
-        with open(index_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        index_path = f'novels/{novel[0]}/index.html'
+        self.sink.write_text(index_path, html_content)
 
         logger.info(f"小説情報ページを作成しました: {index_path}")
 
     # _create_episode_pageメソッドの修正部分
 
-    def _create_episode_page(self, novel_dir, novel, episode, all_episodes):
+    def _create_episode_page(self, novel, episode, prev_no, next_no):
         """
         エピソードページを作成（閲覧履歴保存対応）
 
         Args:
-            novel_dir (Path): 小説ディレクトリのパス
             novel (tuple): 小説情報
             episode (tuple): エピソード情報
-            all_episodes (list): すべてのエピソードのリスト
+            prev_no (str): 前話のepisode_no（ない場合はNone）
+            next_no (str): 次話のepisode_no（ない場合はNone）
         """
-        ncode = novel[0]
+        episode_no = episode[0]
         novel_title = novel[1] if novel[1] else "無題の小説"
-        author = novel[2] if novel[2] else "著者不明"
-
-        episode_no, episode_title, episode_body = episode
-
-        # 本文の整形
-        processed_body = ""
-        if episode_body:
-            # HTML除去
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(episode_body, 'html.parser')
-            clean_text = soup.get_text()
-
-            # 段落ごとに分割して整形
-            paragraphs = clean_text.split('\n\n')
-            processed_paragraphs = []
-
-            for paragraph in paragraphs:
-                paragraph = paragraph.strip()
-                if paragraph:
-                    processed_paragraphs.append(f'<p>{paragraph}</p>')
-
-            processed_body = '\n'.join(processed_paragraphs)
-        else:
-            processed_body = "<p>本文がありません</p>"
-
-        # 前後のエピソードへのリンクを準備
-        sorted_episodes = sorted(all_episodes, key=lambda x: int(x[0]) if x[0].isdigit() else 0)
-        episode_index = next((i for i, ep in enumerate(sorted_episodes) if ep[0] == episode_no), -1)
-
-        prev_link = ""
-        next_link = ""
-
-        if episode_index > 0:
-            prev_episode = sorted_episodes[episode_index - 1]
-            prev_no = prev_episode[0]
-            prev_link = f'<a href="episode_{prev_no}.html" class="nav-button">← 前話: 第{prev_no}話</a>'
-        else:
-            prev_link = '<span></span>'
-
-        if episode_index < len(sorted_episodes) - 1:
-            next_episode = sorted_episodes[episode_index + 1]
-            next_no = next_episode[0]
-            next_link = f'<a href="episode_{next_no}.html" class="nav-button">次話: 第{next_no}話 →</a>'
-        else:
-            next_link = '<span></span>'
-
-        # 読書設定パネル
-        settings_panel = """
-        <div class="reading-settings">
-            <button class="settings-toggle">⚙</button>
-            <div class="settings-group">
-                <h3>テーマ</h3>
-                <select id="theme-selector" class="theme-selector">
-                    <option value="default">デフォルト</option>
-                    <option value="light-theme">ライト</option>
-                    <option value="dark-theme">ダーク</option>
-                    <option value="sepia-theme">セピア</option>
-                </select>
-            </div>
-
-            <div class="settings-group">
-                <h3>フォント</h3>
-                <select id="font-selector" class="font-selector">
-                    <option value="default">デフォルト</option>
-                    <option value="'Hiragino Mincho ProN', serif">明朝体</option>
-                    <option value="'Hiragino Sans', sans-serif">ゴシック体</option>
-                    <option value="'Meiryo', sans-serif">メイリオ</option>
-                    <option value="'Yu Gothic', sans-serif">游ゴシック</option>
-                </select>
-            </div>
-
-            <div class="settings-group">
-                <h3>行間</h3>
-                <input type="range" id="line-height-slider" class="line-height-slider" min="1.2" max="2.4" step="0.1" value="1.8">
-            </div>
-        </div>"""
-
-        html_content = f"""
-        <!DOCTYPE html>
-        <html lang="ja">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>第{episode_no}話: {episode_title} - {novel_title}</title>
-            <link rel="stylesheet" href="../../assets/style.css">
-            <script src="../../assets/script.js" defer></script>
-        </head>
-        <body data-novel-id="{ncode}" data-episode-id="{episode_no}">
-            <header>
-                <div class="container">
-                    <h1>{novel_title}</h1>
-                    <h2>第{episode_no}話: {episode_title}</h2>
-                </div>
-            </header>
-
-            <main class="container">
-                <a href="index.html" class="back-link">← 目次に戻る</a>
-
-                <div class="episode-content">
-                    {processed_body}
-                </div>
-
-                <div class="episode-nav">
-                    {prev_link}
-                    {next_link}
-                </div>
-            </main>
-
-            {settings_panel}
-
-            <div class="font-size-controls">
-                <button id="decrease-font" class="font-button">A-</button>
-                <button id="increase-font" class="font-button">A+</button>
-            </div>
-
-            <button class="back-to-top">↑</button>
-        </body>
-        </html>
-        """
+        html_content = render_episode_page(novel[0], novel_title, episode, prev_no, next_no)
 
         # ファイルに書き込み
-        episode_path = novel_dir / f'episode_{episode_no}.html'
-        with open(episode_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        episode_path = f'novels/{novel[0]}/episode_{episode_no}.html'
+        self.sink.write_text(episode_path, html_content)
 
-        logger.info(f"エピソードページを作成しました: {episode_path}")
+        logger.debug(f"エピソードページを作成しました: {episode_path}")
 
     def create_readme(self):
         """
@@ -778,15 +911,14 @@ Android端末のブラウザで開くことで、小説を快適に読むこと
 """
 
         # ファイルに書き込み
-        readme_path = self.base_dir / 'README.txt'
-        with open(readme_path, 'w', encoding='utf-8') as f:
-            f.write(readme_content)
+        self.sink.write_text('README.txt', readme_content)
 
-        logger.info(f"READMEファイルを作成しました: {readme_path}")
+        logger.info("READMEファイルを作成しました")
 
     def export_as_zip(self, zip_filename='novel_library.zip'):
         """
         エクスポートディレクトリをZIPにまとめる
+        （書き出し済みのディレクトリをまとめる場合に使用。新たに書き出す場合はexport_to_zipを使用）
 
         Args:
             zip_filename (str): 出力するZIPファイル名
@@ -794,50 +926,252 @@ Android端末のブラウザで開くことで、小説を快適に読むこと
         Returns:
             str: 作成したZIPファイルのパス
         """
-        import zipfile
-
         # READMEファイルを作成
         self.create_readme()
 
         # PWA用アイコンを作成（必要であれば）
         self._create_simple_icons()
 
-        # ZIPファイルを作成
-        zip_path = Path(zip_filename)
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        # ZIPファイルを作成（画像などはそのまま格納する）
+        sink = ZipSink(zip_filename)
+        try:
             for root, _, files in os.walk(self.base_dir):
                 for file in files:
+                    if file.startswith(MANIFEST_FILENAME):
+                        # マニフェストは再エクスポート用のため含めない
+                        continue
                     file_path = Path(root) / file
                     rel_path = file_path.relative_to(self.base_dir)
-                    zipf.write(file_path, str(rel_path))
+                    sink.copy_file(file_path, rel_path.as_posix())
+            sink.close()
+        except Exception:
+            sink.abort()
+            raise
+
+        logger.info(f"エクスポートデータをZIPにまとめました: {zip_filename}")
+        return str(zip_filename)
+
+    def export_to_zip(self, zip_filename='novel_library.zip', ncodes=None, progress_callback=None,
+                      cancel_check=None, max_workers=None, precompress=True):
+        """
+        エクスポート先ディレクトリを経由せずに、ページをZIPファイルへ直接書き出す
+        ページはワーカープロセスで作成・圧縮し、親プロセスはZIPへの追記だけを行います
+
+        Args:
+            zip_filename (str): 出力するZIPファイル名
+            ncodes (list, optional): エクスポートする小説コード（省略時は全小説）
+            progress_callback: 進捗通知関数 progress_callback(完了数, 総数, ncode)
+            cancel_check: キャンセルされたかどうかを返す関数
+            max_workers (int, optional): ワーカープロセス数（省略時はCPUコア数、1なら逐次処理）
+            precompress (bool): ワーカープロセスで圧縮するかどうか（Falseの場合は親プロセスで作成・圧縮）
+
+        Returns:
+            str: 作成したZIPファイルのパス（失敗・キャンセルされた場合はNone）
+        """
+        sink = ZipSink(zip_filename)
+        previous_sink, self.sink = self.sink, sink
+        try:
+            novels = self.db_handler.get_all_novels()
+            if ncodes is not None:
+                selected = set(ncodes)
+                novels = [novel for novel in novels if novel[0] in selected]
+
+            if not novels:
+                logger.warning("エクスポートする小説がありません")
+                sink.abort()
+                return None
+
+            # アセット・インデックスページなど
+            self._prepare_assets()
+            self._create_simple_icons()
+            self.create_readme()
+            self._create_index_page(novels)
+
+            # 各小説のページ
+            target_ncodes = [novel[0] for novel in novels]
+            logger.info(f"合計 {len(target_ncodes)} 作品をZIPファイルに書き出します: {zip_filename}")
+
+            if not precompress:
+                max_workers = 1
+            # 逐次処理ではページを直接ZIPに書き込むため、追記するエントリはない
+            result = run_novel_tasks(
+                target_ncodes, lambda ncode: [] if self._render_novel(ncode) else None, _init_zip_worker, (self.db_path, sink.compresslevel),
+                _render_novel_chunk, (), lambda ncode, entries: self._write_zip_entries(sink, entries),
+                progress_callback, cancel_check, max_workers
+            )
+            if not result:
+                sink.abort()
+                return None
+
+            # 書き込んだエントリのCRC32をリビジョンとしてプリキャッシュマニフェストを作成
+            self._create_precache_manifest(sink.entry_revisions())
+
+            sink.close()
+            return sink.zip_path
+
+        except Exception as e:
+            logger.error(f"ZIPファイルへの書き出しに失敗しました: {e}")
+            import traceback
+            logger.error(traceback.format_exc())
+            sink.abort()
+            return None
+        finally:
+            self.sink = previous_sink
+
+    def _render_novel(self, ncode):
+        """
+        小説の全ページを出力先に書き出す（マニフェストを使用しない）
+
+        Args:
+            ncode (str): 小説コード
+
+        Returns:
+            bool: 成功したかどうか
+        """
+        try:
+            novel = self.db_handler.get_novel_by_ncode(ncode)
+            if not novel:
+                logger.warning(f"小説 {ncode} が見つかりません")
+                return False
+
+            episodes = self.db_handler.get_episodes_by_ncode(ncode) or []
+            ordered_episodes, neighbours = build_episode_order(episodes)
+
+            self._create_novel_page(novel, ordered_episodes)
+            for episode in ordered_episodes:
+                self._create_episode_page(novel, episode, *neighbours[episode[0]])
+
+            page_hash, episode_hashes = self._get_page_hashes(novel, ordered_episodes, neighbours)
+            self.sink.write_text(
+                f'novels/{ncode}/{NOVEL_PRECACHE_FILENAME}',
+                render_novel_precache(TEMPLATE_VERSION, page_hash, episode_hashes)
+            )
+            return True
+
+        except Exception as e:
+            logger.error(f"小説 {ncode} のページ作成中にエラーが発生しました: {e}")
+            return False
+
+    def _write_zip_entries(self, sink, entries):
+        """
+        ワーカープロセスで圧縮済みのエントリをZIPに追記
+
+        Args:
+            sink (ZipSink): 書き込み先
+            entries (list): エントリのリスト（失敗した場合はNone）
+
+        Returns:
+            bool: 成功したかどうか
+        """
+        if entries is None:
+            return False
+        for entry in entries:
+            sink.write_entry(entry)
+        return True
+
+
+def _init_export_worker(export_dir, db_path, cancel_event):
+    """
+    エクスポート用ワーカープロセスの初期化（プロセスごとに読み取り専用接続を作成）
+
+    Args:
+        export_dir (str): エクスポート先ディレクトリ
+        db_path (str): データベースファイルのパス
+        cancel_event: キャンセル通知用のイベント
+    """
+    global _worker_exporter, _worker_cancel_event
+    _worker_exporter = HTMLExporter(export_dir, db_handler=ReadOnlyDatabase(db_path), prepare_assets=False)
+    _worker_cancel_event = cancel_event
+
+
+def _init_zip_worker(db_path, compresslevel, cancel_event):
+    """
+    ZIP書き出し用ワーカープロセスの初期化（ページはメモリ上で作成・圧縮する）
+
+    Args:
+        db_path (str): データベースファイルのパス
+        compresslevel (int): DEFLATEの圧縮レベル
+        cancel_event: キャンセル通知用のイベント
+    """
+    global _worker_exporter, _worker_cancel_event
+    _worker_exporter = HTMLExporter(
+        db_handler=ReadOnlyDatabase(db_path), prepare_assets=False, sink=MemorySink(compresslevel)
+    )
+    _worker_cancel_event = cancel_event
+
+
+def _render_novel_chunk(ncodes):
+    """
+    ワーカープロセスで小説のチャンクのページを作成・圧縮
+
+    Args:
+        ncodes (list): 小説コードのリスト
+
+    Returns:
+        list: [(ncode, 圧縮済みのエントリのリスト)] のリスト（失敗した小説はNone、キャンセルされた小説は含まない）
+    """
+    results = []
+    for ncode in ncodes:
+        if _worker_cancel_event is not None and _worker_cancel_event.is_set():
+            break
+        success = _worker_exporter._render_novel(ncode)
+        entries = _worker_exporter.sink.take()
+        results.append((ncode, entries if success else None))
+    return results
+
+
+def _export_novel_chunk(ncodes, force=False):
+    """
+    ワーカープロセスで小説のチャンクをエクスポート
+
+    Args:
+        ncodes (list): 小説コードのリスト
+        force (bool): 変更の有無にかかわらず全ページを書き出すかどうか
 
-        logger.info(f"エクスポートデータをZIPにまとめました: {zip_path}")
-        return str(zip_path)
+    Returns:
+        list: [(ncode, マニフェストのエントリ)] のリスト（失敗した小説のエントリはNone、キャンセルされた小説は含まない）
+    """
+    results = []
+    for ncode in ncodes:
+        if _worker_cancel_event is not None and _worker_cancel_event.is_set():
+            break
+        results.append((ncode, _worker_exporter._export_novel(ncode, force)))
+    return results
 
 
-def run_export(export_dir='html_export', create_zip=True):
+def run_export(export_dir='html_export', create_zip=True, max_workers=None, force=False, precompress=True):
     """
     エクスポート処理を実行する単独関数
 
     Args:
         export_dir (str): エクスポート先ディレクトリ
-        create_zip (bool): ZIPファイルを作成するかどうか
+        create_zip (bool): ZIPファイルを作成するかどうか（作成する場合はディレクトリを経由せずに直接書き出す）
+        max_workers (int, optional): ワーカープロセス数（省略時はCPUコア数）
+        force (bool): 変更の有無にかかわらず全ページを書き出すかどうか（ディレクトリへの書き出し時）
+        precompress (bool): ZIPのエントリをワーカープロセスで圧縮するかどうか
 
     Returns:
         bool: 成功したかどうか
     """
     try:
+        if create_zip:
+            # ZIPファイルへ直接書き出す
+            exporter = HTMLExporter(export_dir, prepare_assets=False)
+            zip_path = exporter.export_to_zip(max_workers=max_workers, precompress=precompress)
+            result = zip_path is not None
+            if result:
+                print(f"エクスポートが完了しました。ZIPファイル: {zip_path}")
+            else:
+                print("エクスポートに失敗しました。ログを確認してください。")
+            return result
+
         # エクスポーターの初期化
         exporter = HTMLExporter(export_dir)
 
         # 全小説をエクスポート
-        result = exporter.export_all_novels()
+        result = exporter.export_all_novels(max_workers=max_workers, force=force)
 
-        if result and create_zip:
-            # ZIPファイルにまとめる
-            zip_path = exporter.export_as_zip()
-            print(f"エクスポートが完了しました。ZIPファイル: {zip_path}")
-        elif result:
+        if result:
             print(f"エクスポートが完了しました。ディレクトリ: {export_dir}")
         else:
             print("エクスポートに失敗しました。ログを確認してください。")
@@ -860,13 +1194,15 @@ if __name__ == "__main__":
     parser.add_argument('--dir', default='html_export', help='エクスポート先ディレクトリ')
     parser.add_argument('--no-zip', action='store_true', help='ZIPファイルを作成しない')
     parser.add_argument('--ncode', help='特定の小説だけをエクスポート')
+    parser.add_argument('--workers', type=int, default=None, help='並列に処理するプロセス数（省略時はCPUコア数）')
+    parser.add_argument('--full', action='store_true', help='変更の有無にかかわらず全ページを書き出す')
 
     args = parser.parse_args()
 
     if args.ncode:
         # 特定の小説のみエクスポート
         exporter = HTMLExporter(args.dir)
-        result = exporter.export_novel(args.ncode)
+        result = exporter.export_novel(args.ncode, force=args.full)
 
         if result:
             print(f"小説 {args.ncode} のエクスポートが完了しました")
@@ -878,4 +1214,4 @@ if __name__ == "__main__":
             print(f"小説 {args.ncode} のエクスポートに失敗しました")
     else:
         # 全小説をエクスポート
-        run_export(args.dir, not args.no_zip)
\ No newline at end of file
+        run_export(args.dir, not args.no_zip, args.workers, args.full)
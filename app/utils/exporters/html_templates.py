@@ -0,0 +1,424 @@
+"""
+HTMLエクスポートのページテンプレートを管理するモジュール
+- テンプレートはモジュール読み込み時に一度だけ固定部分と差し込み位置に分解しておく
+- ページの組み立ては固定部分と差し込む値を連結するだけで行う
+- エピソードの並び順と前後のエピソードは小説ごとに一度だけ計算する
+"""
+import time
+from string import Formatter
+
+
+class PageTemplate:
+    """
+    固定部分と差し込み位置に分解済みのテンプレート
+    str.formatと同じ書式（{name}で差し込み、{{ }}で波括弧そのもの）で記述します
+    """
+
+    def __init__(self, template):
+        """
+        初期化（テンプレートを分解）
+
+        Args:
+            template (str): テンプレート文字列
+        """
+        self.parts = []  # 固定部分と差し込み位置（差し込み位置はNone）を並べたリスト
+        self.slots = []  # [(partsのインデックス, 差し込む値の名前)]
+
+        for literal, field_name, _, _ in Formatter().parse(template):
+            if literal:
+                self.parts.append(literal)
+            if field_name is not None:
+                self.slots.append((len(self.parts), field_name))
+                self.parts.append(None)
+
+    def render(self, values):
+        """
+        値を差し込んでページを組み立てる
+
+        Args:
+            values (dict): {差し込む値の名前: 値}
+
+        Returns:
+            str: 組み立てたページ
+        """
+        parts = self.parts.copy()
+        for index, field_name in self.slots:
+            parts[index] = str(values[field_name])
+        return ''.join(parts)
+
+
+# ページテンプレート（エピソードページは読書設定パネルを含めた状態で分解する）
+INDEX_HEAD_TEMPLATE = PageTemplate("""
+        <!DOCTYPE html>
+        <html lang="ja">
+        <head>
+            <meta charset="UTF-8">
+            <meta name="viewport" content="width=device-width, initial-scale=1.0">
+            <title>小説ライブラリ</title>
+            <link rel="stylesheet" href="assets/style.css">
+            <script src="assets/script.js" defer></script>
+            <link rel="manifest" href="manifest.json">
+        </head>
+        <body>
+            <header>
+                <div class="container">
+                    <h1>小説ライブラリ</h1>
+                </div>
+            </header>
+
+            <main class="container">
+                <div class="search-container">
+                    <input type="text" class="search-box" placeholder="小説を検索...">
+                </div>
+
+                <!-- 最近読んだ小説セクション -->
+                <div class="recent-novels-section">
+                    <h2>最近読んだ小説</h2>
+                    <div class="recent-novels-list">
+                        <!-- JavaScriptで動的に読み込み -->
+                    </div>
+                </div>
+
+                <h2>全小説一覧</h2>
+                <div class="catalog-status" aria-live="polite"></div>
+                <div class="novel-list" data-catalog="{catalog_url}" data-total="{total}">
+        """)
+
+INDEX_CARD_TEMPLATE = PageTemplate("""
+            <div class="novel-card" data-novel-id="{ncode}">
+                <h3><a href="novels/{ncode}/index.html">{title}</a></h3>
+                <div class="novel-info">作者: {author} | エピソード数: {episodes}</div>
+                <div class="novel-info">更新: {updated_at}</div>
+                <div class="novel-synopsis">{synopsis}</div>
+            </div>
+            """)
+
+INDEX_TAIL_TEMPLATE = PageTemplate("""
+                </div>
+                <button class="load-more" hidden>もっと見る</button>
+            </main>
+
+            <button class="back-to-top">↑</button>
+
+            <footer class="container">
+                <p>エクスポート日時: {now}</p>
+            </footer>
+
+            <script>
+                // Service Workerの登録
+                if ('serviceWorker' in navigator) {{
+                    window.addEventListener('load', function() {{
+                        navigator.serviceWorker.register('./service-worker.js')
+                            .then(function(registration) {{
+                                console.log('Service Worker登録成功:', registration.scope);
+                            }})
+                            .catch(function(error) {{
+                                console.log('Service Worker登録失敗:', error);
+                            }});
+                    }});
+                }}
+            </script>
+        </body>
+        </html>
+        """)
+
+NOVEL_EPISODE_ITEM_TEMPLATE = PageTemplate("""
+            <li class="episode-item">
+                <a href="episode_{episode_no}.html" class="episode-link">第{episode_no}話: {episode_title}</a>
+            </li>
+            """)
+
+NOVEL_PAGE_TEMPLATE = PageTemplate("""
+        <!DOCTYPE html>
+        <html lang="ja">
+        <head>
+            <meta charset="UTF-8">
+            <meta name="viewport" content="width=device-width, initial-scale=1.0">
+            <title>{title} - 小説ライブラリ</title>
+            <link rel="stylesheet" href="../../assets/style.css">
+            <script src="../../assets/script.js" defer></script>
+        </head>
+        <body>
+            <header>
+                <div class="container">
+                    <h1>{title}</h1>
+                </div>
+            </header>
+
+            <main class="container">
+                <a href="../../index.html" class="back-link">← 小説一覧に戻る</a>
+
+                <div class="novel-meta">
+                    <h2>{title}</h2>
+                    <p>作者: {author}</p>
+                    <p>最終更新: {synopsis}</p>
+                    <p>エピソード数: {episode_count}</p>
+                    <h3>あらすじ</h3>
+                    <p>{updated_at}</p>
+                    <!-- 続きから読むボタンがここに動的に挿入されます -->
+                </div>
+
+                <div class="search-container">
+                    <input type="text" class="search-box" placeholder="エピソードを検索...">
+                </div>
+
+                <h3>目次</h3>
+                <ul class="episode-list">
+                    {episodes_html}
+                </ul>
+            </main>
+
+            <button class="back-to-top">↑</button>
+        </body>
+        </html>
+        """)
+
+EPISODE_PAGE_TEMPLATE = PageTemplate("""
+        <!DOCTYPE html>
+        <html lang="ja">
+        <head>
+            <meta charset="UTF-8">
+            <meta name="viewport" content="width=device-width, initial-scale=1.0">
+            <title>第{episode_no}話: {episode_title} - {novel_title}</title>
+            <link rel="stylesheet" href="../../assets/style.css">
+            <script src="../../assets/script.js" defer></script>
+        </head>
+        <body data-novel-id="{ncode}" data-episode-id="{episode_no}">
+            <header>
+                <div class="container">
+                    <h1>{novel_title}</h1>
+                    <h2>第{episode_no}話: {episode_title}</h2>
+                </div>
+            </header>
+
+            <main class="container">
+                <a href="index.html" class="back-link">← 目次に戻る</a>
+
+                <div class="episode-content">
+                    {processed_body}
+                </div>
+
+                <div class="episode-nav">
+                    {prev_link}
+                    {next_link}
+                </div>
+            </main>
+
+            
+        <div class="reading-settings">
+            <button class="settings-toggle">⚙</button>
+            <div class="settings-group">
+                <h3>テーマ</h3>
+                <select id="theme-selector" class="theme-selector">
+                    <option value="default">デフォルト</option>
+                    <option value="light-theme">ライト</option>
+                    <option value="dark-theme">ダーク</option>
+                    <option value="sepia-theme">セピア</option>
+                </select>
+            </div>
+
+            <div class="settings-group">
+                <h3>フォント</h3>
+                <select id="font-selector" class="font-selector">
+                    <option value="default">デフォルト</option>
+                    <option value="'Hiragino Mincho ProN', serif">明朝体</option>
+                    <option value="'Hiragino Sans', sans-serif">ゴシック体</option>
+                    <option value="'Meiryo', sans-serif">メイリオ</option>
+                    <option value="'Yu Gothic', sans-serif">游ゴシック</option>
+                </select>
+            </div>
+
+            <div class="settings-group">
+                <h3>行間</h3>
+                <input type="range" id="line-height-slider" class="line-height-slider" min="1.2" max="2.4" step="0.1" value="1.8">
+            </div>
+        </div>
+
+            <div class="font-size-controls">
+                <button id="decrease-font" class="font-button">A-</button>
+                <button id="increase-font" class="font-button">A+</button>
+            </div>
+
+            <button class="back-to-top">↑</button>
+        </body>
+        </html>
+        """)
+
+# エピソードナビゲーションの空欄
+EMPTY_NAV_LINK = '<span></span>'
+
+
+def episode_sort_key(episode):
+    """エピソードを話数順に並べるためのキー"""
+    return int(episode[0]) if episode[0].isdigit() else 0
+
+
+def build_episode_order(episodes):
+    """
+    エピソードを話数順に並べ、前後のエピソードの対応表を作成（小説ごとに一度だけ呼び出す）
+
+    Args:
+        episodes (list): エピソード情報のリスト [(episode_no, e_title, body)]
+
+    Returns:
+        tuple: (話数順のエピソードのリスト, {episode_no: (前話のepisode_no, 次話のepisode_no)})
+               前後のエピソードがない場合はNone
+    """
+    ordered = sorted(episodes, key=episode_sort_key)
+    numbers = [episode[0] for episode in ordered]
+    previous_numbers = [None] + numbers[:-1]
+    next_numbers = numbers[1:] + [None]
+    return ordered, dict(zip(numbers, zip(previous_numbers, next_numbers)))
+
+
+def episode_paragraphs(episode_body):
+    """
+    エピソード本文からHTMLを除去して段落に分割
+
+    Args:
+        episode_body (str): 本文（HTMLを含む場合がある）
+
+    Returns:
+        list: 段落のテキストのリスト（空の段落は含まない）
+    """
+    if '<' in episode_body or '&' in episode_body:
+        # HTML除去（タグや文字参照を含む場合のみパーサーを使用）
+        from bs4 import BeautifulSoup
+        clean_text = BeautifulSoup(episode_body, 'html.parser').get_text()
+    else:
+        clean_text = episode_body
+
+    return [paragraph for paragraph in (paragraph.strip() for paragraph in clean_text.split('\n\n')) if paragraph]
+
+
+def render_episode_body(episode_body):
+    """
+    エピソード本文をHTMLの段落に整形
+
+    Args:
+        episode_body (str): 本文（HTMLを含む場合がある）
+
+    Returns:
+        str: 段落ごとに<p>で囲んだ本文
+    """
+    if not episode_body:
+        return "<p>本文がありません</p>"
+
+    # 段落ごとに分割して整形
+    return '\n'.join(f'<p>{paragraph}</p>' for paragraph in episode_paragraphs(episode_body))
+
+
+def render_episode_page(ncode, novel_title, episode, prev_no, next_no):
+    """
+    エピソードページを組み立てる
+
+    Args:
+        ncode (str): 小説コード
+        novel_title (str): 小説タイトル
+        episode (tuple): エピソード情報 (episode_no, e_title, body)
+        prev_no (str): 前話のepisode_no（ない場合はNone）
+        next_no (str): 次話のepisode_no（ない場合はNone）
+
+    Returns:
+        str: ページのHTML
+    """
+    episode_no, episode_title, episode_body = episode
+
+    if prev_no is not None:
+        prev_link = f'<a href="episode_{prev_no}.html" class="nav-button">← 前話: 第{prev_no}話</a>'
+    else:
+        prev_link = EMPTY_NAV_LINK
+
+    if next_no is not None:
+        next_link = f'<a href="episode_{next_no}.html" class="nav-button">次話: 第{next_no}話 →</a>'
+    else:
+        next_link = EMPTY_NAV_LINK
+
+    return EPISODE_PAGE_TEMPLATE.render({
+        'ncode': ncode,
+        'novel_title': novel_title,
+        'episode_no': episode_no,
+        'episode_title': episode_title,
+        'processed_body': render_episode_body(episode_body),
+        'prev_link': prev_link,
+        'next_link': next_link,
+    })
+
+
+def render_novel_page(ncode, title, author, synopsis, updated_at, ordered_episodes):
+    """
+    小説情報ページを組み立てる
+
+    Args:
+        ncode (str): 小説コード
+        title (str): タイトル
+        author (str): 作者
+        synopsis (str): あらすじ
+        updated_at (str): 最終更新日時
+        ordered_episodes (list): 話数順のエピソードのリスト
+
+    Returns:
+        str: ページのHTML
+    """
+    episodes_html = ''.join(
+        NOVEL_EPISODE_ITEM_TEMPLATE.render({'episode_no': episode[0], 'episode_title': episode[1]})
+        for episode in ordered_episodes
+    )
+    return NOVEL_PAGE_TEMPLATE.render({
+        'ncode': ncode,
+        'title': title,
+        'author': author,
+        'synopsis': synopsis,
+        'updated_at': updated_at,
+        'episode_count': len(ordered_episodes),
+        'episodes_html': episodes_html,
+    })
+
+
+def render_index_page(cards, now, catalog_url, total):
+    """
+    インデックスページを組み立てる
+    埋め込むのはカタログの先頭ページの小説だけで、続きと検索はscript.jsがカタログから読み込む
+
+    Args:
+        cards (list): 埋め込む小説カードの差し込み値（辞書）のリスト
+        now (str): エクスポート日時
+        catalog_url (str): カタログの目次のURL（インデックスページからの相対パス）
+        total (int): カタログ全体の小説数
+
+    Returns:
+        str: ページのHTML
+    """
+    parts = [INDEX_HEAD_TEMPLATE.render({'catalog_url': catalog_url, 'total': total})]
+    parts.extend(INDEX_CARD_TEMPLATE.render(card) for card in cards)
+    parts.append(INDEX_TAIL_TEMPLATE.render({'now': now}))
+    return ''.join(parts)
+
+
+# コマンドラインから直接実行された場合はエピソードページの組み立て速度を計測
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='エピソードページの組み立て速度を計測します')
+    parser.add_argument('--episodes', type=int, default=5000, help='1作品あたりのエピソード数')
+    parser.add_argument('--body-size', type=int, default=8000, help='本文の文字数')
+    args = parser.parse_args()
+
+    paragraph = "吾輩は猫である。名前はまだ無い。" * 10
+    body = '\n\n'.join([paragraph] * max(1, args.body_size // len(paragraph)))
+    sample_episodes = [(str(i), f"第{i}話のタイトル", body) for i in range(args.episodes, 0, -1)]
+
+    start = time.perf_counter()
+    ordered, neighbours = build_episode_order(sample_episodes)
+    order_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    total_bytes = 0
+    for sample_episode in ordered:
+        prev_no, next_no = neighbours[sample_episode[0]]
+        total_bytes += len(render_episode_page('n0000aa', "ベンチマーク", sample_episode, prev_no, next_no))
+    render_elapsed = time.perf_counter() - start
+
+    print(f"並び順と前後の対応表: {order_elapsed * 1000:.1f}ms（{args.episodes}話）")
+    print(f"ページの組み立て: {args.episodes / render_elapsed:.0f}ページ/秒 "
+          f"（{total_bytes / render_elapsed / 1024 / 1024:.1f}MB/秒）")
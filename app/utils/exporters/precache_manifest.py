@@ -0,0 +1,94 @@
+"""
+HTMLエクスポートのプリキャッシュマニフェストを作成するモジュール
+- precache-manifest.json: 小説以外のファイル（インデックス・カタログ・アセットなど）のリビジョンと、小説ごとのリビジョン
+- novels/{ncode}/precache.json: 小説のページ（情報ページ・エピソードページ）ごとのリビジョン
+- Service Workerは前回取り込んだリビジョンと比較し、変わったページだけを取得し直す
+
+リビジョンはページの内容（または内容を決める値）のハッシュで、URLは変えずにマニフェスト側で内容の変化を伝えます
+"""
+import json
+
+# プリキャッシュマニフェストのファイル名（エクスポート先ディレクトリ直下）
+PRECACHE_MANIFEST_FILENAME = 'precache-manifest.json'
+
+# 小説ごとのプリキャッシュマニフェストのファイル名（小説のディレクトリ直下）
+NOVEL_PRECACHE_FILENAME = 'precache.json'
+
+# プリキャッシュマニフェストの形式バージョン（service-worker.jsと合わせる）
+PRECACHE_FORMAT_VERSION = 1
+
+# Service Workerのテンプレートでリビジョンを差し込む位置
+SERVICE_WORKER_REVISION_PLACEHOLDER = '__PRECACHE_REVISION__'
+
+# プリキャッシュの対象外とするファイル
+PRECACHE_EXCLUDED_FILES = ('service-worker.js', PRECACHE_MANIFEST_FILENAME, 'README.txt')
+
+
+def _dumps(data):
+    """JSONを空白なしで文字列化（キーの順序を固定）"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+
+
+def page_revision(template_version, page_hash):
+    """
+    ページのリビジョンを作成（テンプレートが変わった場合も値が変わるようにする）
+
+    Args:
+        template_version (int): ページテンプレートのバージョン
+        page_hash (str): ページの内容を決める値のハッシュ
+
+    Returns:
+        str: リビジョン
+    """
+    return f'{template_version}-{page_hash[:16]}'
+
+
+def render_novel_precache(template_version, page_hash, episode_hashes):
+    """
+    小説ごとのプリキャッシュマニフェストを作成
+
+    Args:
+        template_version (int): ページテンプレートのバージョン
+        page_hash (str): 小説情報ページのハッシュ
+        episode_hashes (dict): {episode_no: エピソードページのハッシュ}
+
+    Returns:
+        str: precache.jsonの内容（URLは小説のディレクトリからの相対パス）
+    """
+    revisions = {'index.html': page_revision(template_version, page_hash)}
+    for episode_no, episode_hash in episode_hashes.items():
+        revisions[f'episode_{episode_no}.html'] = page_revision(template_version, episode_hash)
+    return _dumps(revisions)
+
+
+def render_precache_manifest(files, novels):
+    """
+    プリキャッシュマニフェストを作成
+
+    Args:
+        files (dict): {小説以外のファイルのパス: リビジョン}
+        novels (dict): {ncode: 小説ごとのプリキャッシュマニフェストのリビジョン}
+
+    Returns:
+        str: precache-manifest.jsonの内容
+    """
+    return _dumps({
+        'version': PRECACHE_FORMAT_VERSION,
+        'files': {path: revision for path, revision in files.items() if path not in PRECACHE_EXCLUDED_FILES},
+        'novels': novels,
+    })
+
+
+def render_service_worker(template, revision):
+    """
+    Service Workerのテンプレートにプリキャッシュマニフェストのリビジョンを差し込む
+    リビジョンが変わるとService Worker自体の内容が変わり、ブラウザが更新を検出します
+
+    Args:
+        template (str): Service Workerのテンプレート
+        revision (str): プリキャッシュマニフェストのリビジョン
+
+    Returns:
+        str: Service Workerの内容
+    """
+    return template.replace(SERVICE_WORKER_REVISION_PLACEHOLDER, revision)
@@ -1,71 +1,400 @@
-# import os
-# import sqlite3
-# import threading
-# from queue import Queue
-#
-# from Recover_novel import DelDuplication
-#
-# # Queue for episodes to be processed
-# episode_queue = Queue()
-#
-# def fetch_episodes():
-#     print("Fetching episodes from the database...")
-#     conn = sqlite3.connect('database/novel_status.db')
-#     cursor = conn.cursor()
-#     offset = 0
-#     limit = 10
-#
-#     while True:
-#         cursor.execute('SELECT ncode, episode_no, body FROM episodes LIMIT ? OFFSET ?', (limit, offset))
-#         episodes = cursor.fetchall()
-#         if not episodes:
-#             break
-#         print(f"Fetched {len(episodes)} episodes")
-#         for episode in episodes:
-#             episode_queue.put(episode)
-#         process_queue()
-#         episode_queue.join()  # Wait for the queue to be fully processed
-#         offset += limit
-#
-#     conn.close()
-#
-# def save_episode_to_file(ncode, episode_no, body):
-#     print(f"Saving episode {episode_no} for novel {ncode} to a file...")
-#     directory = f'novel_data/{ncode}'
-#     os.makedirs(directory, exist_ok=True)
-#
-#     base_filename = f'{ncode}_{episode_no}.txt'
-#     filename = base_filename
-#     counter = 1
-#
-#     # Check for file name conflicts and resolve them
-#     while os.path.exists(os.path.join(directory, filename)):
-#         filename = f'{ncode}_{episode_no}_{counter}.txt'
-#         counter += 1
-#
-#     with open(os.path.join(directory, filename), 'w', encoding='utf-8') as file:
-#         file.write(body)
-#
-# def worker():
-#     while not episode_queue.empty():
-#         ncode, episode_no, body = episode_queue.get()
-#         save_episode_to_file(ncode, episode_no, body)
-#         episode_queue.task_done()
-#
-# def process_queue():
-#     print(f'Processing {episode_queue.qsize()} episodes...')
-#     threads = []
-#     for _ in range(10):  # Create 10 threads
-#         thread = threading.Thread(target=worker)
-#         thread.start()
-#         threads.append(thread)
-#
-#     for thread in threads:
-#         thread.join()
-#
-# def main():
-#     fetch_episodes()
-#
-# if __name__ == '__main__':
-#     # DelDuplication()
-#     main()
\ No newline at end of file
+"""
+小説データをテキスト形式でエクスポートするモジュール
+- エピソードはキーセット方式のページングでデータベースから少しずつ読み込む
+- 小説ごとに1ファイル、またはエピソードごとに1ファイルを作成
+- 文字コード（UTF-8 / Shift_JISなど）と改行コードを指定可能
+- 大きなバッファで書き込み、複数の小説を複数プロセスで並列に処理
+"""
+import codecs
+import os
+import sys
+import time
+from pathlib import Path
+
+# ルートディレクトリをパスに追加（単体実行用）
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+from app.database.db_handler import ReadOnlyDatabase
+from app.utils.exporters.export_pool import run_novel_tasks
+from app.utils.exporters.html_templates import episode_paragraphs
+from app.utils.logger_manager import get_logger
+from config import DATABASE_PATH
+
+# ロガーの設定
+logger = get_logger('TxtExporter')
+
+# ファイルの分け方
+SPLIT_NOVEL = 'novel'
+SPLIT_EPISODE = 'episode'
+
+# データベースから1ページで読み込むエピソード数
+EPISODE_PAGE_SIZE = 200
+
+# 書き込みバッファのサイズ
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# 小説ごとのファイルでのエピソードの区切り線
+EPISODE_SEPARATOR = '=' * 40
+
+# ワーカープロセス内の状態（_init_txt_workerで設定）
+_worker_exporter = None
+_worker_cancel_event = None
+
+
+def episode_text(episode_body):
+    """
+    エピソード本文をプレーンテキストに整形（HTMLを除去し、段落を空行で区切る）
+
+    Args:
+        episode_body (str): 本文（HTMLを含む場合がある）
+
+    Returns:
+        str: 本文のテキスト
+    """
+    if not episode_body:
+        return "本文がありません"
+    return '\n\n'.join(episode_paragraphs(episode_body))
+
+
+def episode_heading(episode_no, episode_title):
+    """
+    エピソードの見出しを作成
+
+    Args:
+        episode_no (str): 話数
+        episode_title (str): エピソードタイトル
+
+    Returns:
+        str: 見出し
+    """
+    return f"第{episode_no}話 {episode_title}" if episode_title else f"第{episode_no}話"
+
+
+class TxtExporter:
+    """
+    小説データをテキスト形式でエクスポートするクラス
+    小説ごとに「{ncode}.txt」、またはエピソードごとに「{ncode}/{ncode}_{episode_no}.txt」を作成します
+    """
+
+    def __init__(self, export_dir='txt_export', db_path=None, split=SPLIT_NOVEL, encoding='utf-8', newline='\n'):
+        """
+        初期化
+
+        Args:
+            export_dir (str): エクスポート先ディレクトリ
+            db_path (str, optional): データベースファイルのパス（省略時は設定のパス）
+            split (str): ファイルの分け方（'novel' または 'episode'）
+            encoding (str): 文字コード（'utf-8'、'utf-8-sig'、'cp932' など）
+            newline (str): 改行コード（'\\n' または '\\r\\n'）
+
+        Raises:
+            ValueError: ファイルの分け方・文字コードが不正な場合
+        """
+        if split not in (SPLIT_NOVEL, SPLIT_EPISODE):
+            raise ValueError(f"ファイルの分け方が不正です: {split}")
+        codecs.lookup(encoding)  # 不明な文字コードはLookupError（ValueErrorの派生）になる
+
+        self.export_dir = export_dir
+        self.base_dir = Path(export_dir)
+        self.db_path = db_path or DATABASE_PATH
+        self.split = split
+        self.encoding = encoding
+        self.newline = newline
+        self._db = None
+
+    @property
+    def db(self):
+        """読み取り専用のデータベース接続（初回アクセス時に接続）"""
+        if self._db is None:
+            self._db = ReadOnlyDatabase(self.db_path)
+        return self._db
+
+    def export_all_novels(self, progress_callback=None, cancel_check=None, max_workers=None):
+        """
+        全ての小説をエクスポート
+
+        Args:
+            progress_callback: 進捗通知関数 progress_callback(完了数, 総数, ncode)
+            cancel_check: キャンセルされたかどうかを返す関数
+            max_workers (int, optional): ワーカープロセス数（省略時はCPUコア数、1なら逐次処理）
+
+        Returns:
+            bool: 成功したかどうか（キャンセルされた場合はFalse）
+        """
+        novels = self.db.get_all_novels()
+        if not novels:
+            logger.warning("エクスポートする小説がありません")
+            return False
+        return self.export_novels([novel[0] for novel in novels], progress_callback, cancel_check, max_workers)
+
+    def export_novels(self, ncodes, progress_callback=None, cancel_check=None, max_workers=None):
+        """
+        複数の小説をエクスポート（複数プロセスで並列に処理）
+
+        Args:
+            ncodes (list): 小説コードのリスト
+            progress_callback: 進捗通知関数 progress_callback(完了数, 総数, ncode)
+            cancel_check: キャンセルされたかどうかを返す関数
+            max_workers (int, optional): ワーカープロセス数（省略時はCPUコア数、1なら逐次処理）
+
+        Returns:
+            bool: 全ての小説を処理した場合True（キャンセルされた場合はFalse）
+        """
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        logger.info(f"合計 {len(ncodes)} 作品をテキストにエクスポートします: {self.base_dir}")
+        return run_novel_tasks(
+            ncodes, self.export_novel, _init_txt_worker,
+            (self.export_dir, self.db_path, self.split, self.encoding, self.newline),
+            _export_txt_chunk, (), lambda ncode, path: path is not None,
+            progress_callback, cancel_check, max_workers
+        )
+
+    def export_novel(self, ncode):
+        """
+        指定された小説をテキストファイルとしてエクスポート
+
+        Args:
+            ncode (str): 小説コード
+
+        Returns:
+            str: 作成したファイル（エピソードごとの場合はディレクトリ）のパス（失敗した場合はNone）
+        """
+        novel = self.db.get_novel_by_ncode(ncode)
+        if not novel:
+            logger.warning(f"小説 {ncode} が見つかりません")
+            return None
+
+        try:
+            if self.split == SPLIT_EPISODE:
+                path, episode_count = self._write_episode_files(ncode)
+            else:
+                path, episode_count = self._write_novel_file(novel)
+
+            logger.info(f"小説 {ncode} をテキストにエクスポートしました。エピソード数: {episode_count}")
+            return str(path)
+
+        except Exception as e:
+            logger.error(f"小説 {ncode} のテキストエクスポート中にエラーが発生しました: {e}")
+            import traceback
+            logger.error(traceback.format_exc())
+            return None
+
+    def _open(self, path):
+        """
+        書き込み用にファイルを開く（指定の文字コードで表せない文字は「?」に置き換える）
+
+        Args:
+            path: ファイルのパス
+
+        Returns:
+            file: テキストファイル
+        """
+        return open(path, 'w', encoding=self.encoding, errors='replace',
+                    newline=self.newline, buffering=WRITE_BUFFER_SIZE)
+
+    def _write_novel_file(self, novel):
+        """
+        小説全体を1つのファイルに書き出す（一時ファイルに書いてから置き換える）
+
+        Args:
+            novel (tuple): 小説情報
+
+        Returns:
+            tuple: (ファイルのパス, エピソード数)
+        """
+        ncode = novel[0]
+        title = novel[1] if novel[1] else "無題の小説"
+        author = novel[2] if novel[2] else "著者不明"
+        synopsis = novel[7] if len(novel) > 7 and novel[7] else "あらすじはありません"
+
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        path = self.base_dir / f'{ncode}.txt'
+        temp_path = path.with_name(path.name + '.tmp')
+        episode_count = 0
+        try:
+            with self._open(temp_path) as f:
+                f.write(f"{title}\n作者: {author}\n\n【あらすじ】\n{synopsis}\n")
+                for page in self.db.iter_episode_pages(ncode, EPISODE_PAGE_SIZE):
+                    f.write(''.join(
+                        f"\n{EPISODE_SEPARATOR}\n\n{episode_heading(episode_no, episode_title)}\n\n"
+                        f"{episode_text(episode_body)}\n"
+                        for episode_no, episode_title, episode_body in page
+                    ))
+                    episode_count += len(page)
+            os.replace(temp_path, path)
+        except BaseException:
+            if temp_path.exists():
+                temp_path.unlink()
+            raise
+
+        return path, episode_count
+
+    def _write_episode_files(self, ncode):
+        """
+        エピソードごとにファイルを書き出す
+
+        Args:
+            ncode (str): 小説コード
+
+        Returns:
+            tuple: (ディレクトリのパス, エピソード数)
+        """
+        novel_dir = self.base_dir / ncode
+        novel_dir.mkdir(parents=True, exist_ok=True)
+        episode_count = 0
+        for page in self.db.iter_episode_pages(ncode, EPISODE_PAGE_SIZE):
+            for episode_no, episode_title, episode_body in page:
+                with self._open(novel_dir / f'{ncode}_{episode_no}.txt') as f:
+                    f.write(f"{episode_heading(episode_no, episode_title)}\n\n{episode_text(episode_body)}\n")
+            episode_count += len(page)
+
+        return novel_dir, episode_count
+
+    def close(self):
+        """データベース接続を閉じる"""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def _init_txt_worker(export_dir, db_path, split, encoding, newline, cancel_event):
+    """
+    テキストエクスポート用ワーカープロセスの初期化（プロセスごとに読み取り専用接続を作成）
+
+    Args:
+        export_dir (str): エクスポート先ディレクトリ
+        db_path (str): データベースファイルのパス
+        split (str): ファイルの分け方
+        encoding (str): 文字コード
+        newline (str): 改行コード
+        cancel_event: キャンセル通知用のイベント
+    """
+    global _worker_exporter, _worker_cancel_event
+    _worker_exporter = TxtExporter(export_dir, db_path, split, encoding, newline)
+    _worker_cancel_event = cancel_event
+
+
+def _export_txt_chunk(ncodes):
+    """
+    ワーカープロセスで小説のチャンクをテキストにエクスポート
+
+    Args:
+        ncodes (list): 小説コードのリスト
+
+    Returns:
+        list: [(ncode, 作成したパス)] のリスト（失敗した小説はNone、キャンセルされた小説は含まない）
+    """
+    results = []
+    for ncode in ncodes:
+        if _worker_cancel_event is not None and _worker_cancel_event.is_set():
+            break
+        results.append((ncode, _worker_exporter.export_novel(ncode)))
+    return results
+
+
+def run_export(export_dir='txt_export', max_workers=None, split=SPLIT_NOVEL, encoding='utf-8', newline='\n'):
+    """
+    テキストエクスポート処理を実行する単独関数
+
+    Args:
+        export_dir (str): エクスポート先ディレクトリ
+        max_workers (int, optional): ワーカープロセス数（省略時はCPUコア数）
+        split (str): ファイルの分け方（'novel' または 'episode'）
+        encoding (str): 文字コード
+        newline (str): 改行コード
+
+    Returns:
+        bool: 成功したかどうか
+    """
+    exporter = None
+    try:
+        exporter = TxtExporter(export_dir, split=split, encoding=encoding, newline=newline)
+        result = exporter.export_all_novels(max_workers=max_workers)
+        if result:
+            print(f"テキストエクスポートが完了しました。ディレクトリ: {export_dir}")
+        else:
+            print("テキストエクスポートに失敗しました。ログを確認してください。")
+        return result
+
+    except Exception as e:
+        logger.error(f"テキストエクスポート処理中にエラーが発生しました: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
+        print(f"エラー: {e}")
+        return False
+    finally:
+        if exporter is not None:
+            exporter.close()
+
+
+def benchmark(db_path=None, max_workers=None):
+    """
+    同じデータベースのテキストエクスポートとHTMLエクスポートの所要時間を比較
+    一時ディレクトリに書き出し、終了後に削除します
+
+    Args:
+        db_path (str, optional): データベースファイルのパス（省略時は設定のパス）
+        max_workers (int, optional): ワーカープロセス数（省略時はCPUコア数）
+
+    Returns:
+        dict: {エクスポート名: (秒数, 書き出したバイト数)}
+    """
+    import tempfile
+    from app.utils.exporters.html_exporter import HTMLExporter
+
+    def directory_size(path):
+        return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+    db_path = db_path or DATABASE_PATH
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        targets = [
+            ('TXT（小説ごと）', lambda out: TxtExporter(out, db_path).export_all_novels(max_workers=max_workers)),
+            ('TXT（エピソードごと）',
+             lambda out: TxtExporter(out, db_path, SPLIT_EPISODE).export_all_novels(max_workers=max_workers)),
+            ('HTML', lambda out: HTMLExporter(out, db_handler=ReadOnlyDatabase(db_path)).export_all_novels(
+                max_workers=max_workers, force=True)),
+        ]
+        for i, (name, export) in enumerate(targets):
+            out_dir = os.path.join(temp_dir, str(i))
+            start = time.perf_counter()
+            export(out_dir)
+            results[name] = (time.perf_counter() - start, directory_size(out_dir))
+
+    for name, (elapsed, size) in results.items():
+        print(f"{name}: {elapsed:.2f}秒（{size / 1024 / 1024:.1f}MB、{size / elapsed / 1024 / 1024:.1f}MB/秒）")
+    return results
+
+
+# コマンドラインから直接実行された場合
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='小説データをテキスト形式にエクスポートします')
+    parser.add_argument('--dir', default='txt_export', help='エクスポート先ディレクトリ')
+    parser.add_argument('--ncode', help='特定の小説だけをエクスポート')
+    parser.add_argument('--split', choices=[SPLIT_NOVEL, SPLIT_EPISODE], default=SPLIT_NOVEL,
+                        help='ファイルの分け方（novel: 小説ごと、episode: エピソードごと）')
+    parser.add_argument('--encoding', default='utf-8', help='文字コード（utf-8、utf-8-sig、cp932など）')
+    parser.add_argument('--crlf', action='store_true', help='改行コードをCRLFにする')
+    parser.add_argument('--workers', type=int, default=None, help='並列に処理するプロセス数（省略時はCPUコア数）')
+    parser.add_argument('--benchmark', action='store_true', help='テキストとHTMLのエクスポート時間を比較する')
+
+    args = parser.parse_args()
+    newline = '\r\n' if args.crlf else '\n'
+
+    if args.benchmark:
+        benchmark(max_workers=args.workers)
+    elif args.ncode:
+        # 特定の小説のみエクスポート
+        exporter = TxtExporter(args.dir, split=args.split, encoding=args.encoding, newline=newline)
+        path = exporter.export_novel(args.ncode)
+        exporter.close()
+
+        if path:
+            print(f"小説 {args.ncode} のエクスポートが完了しました: {path}")
+        else:
+            print(f"小説 {args.ncode} のエクスポートに失敗しました")
+    else:
+        # 全小説をエクスポート
+        run_export(args.dir, args.workers, args.split, args.encoding, newline)
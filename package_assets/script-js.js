@@ -59,29 +59,389 @@ function initFontSizeControls() {
 
 /**
  * 検索機能の初期化
- * 小説一覧やエピソード一覧で検索可能にする
+ * 小説一覧ではカタログの検索インデックスを、エピソード一覧ではページ内の項目を検索する
  */
 function initSearchFunction() {
     const searchBox = document.querySelector('.search-box');
-    if (searchBox) {
-        // 検索対象要素（小説カードまたはエピソードアイテム）
-        const items = document.querySelectorAll('.novel-card, .episode-item');
-        
-        // 入力イベントで検索フィルタリングを実行
-        searchBox.addEventListener('input', function() {
-            const searchTerm = this.value.toLowerCase();
-            
-            // 各要素について検索ワードを含むかチェック
-            items.forEach(item => {
-                const text = item.textContent.toLowerCase();
-                if (text.includes(searchTerm)) {
-                    item.style.display = ''; // 表示
+    if (!searchBox || searchBox.dataset.searchReady) return;
+    searchBox.dataset.searchReady = 'true';
+
+    // カタログ付きの小説一覧ではインデックス検索を使用
+    const novelList = document.querySelector('.novel-list[data-catalog]');
+    if (novelList) {
+        initCatalogSearch(searchBox, novelList);
+        return;
+    }
+
+    // 検索対象要素（エピソードアイテム）
+    const items = document.querySelectorAll('.novel-card, .episode-item');
+
+    // 入力イベントで検索フィルタリングを実行
+    searchBox.addEventListener('input', function() {
+        const searchTerm = this.value.toLowerCase();
+
+        // 各要素について検索ワードを含むかチェック
+        items.forEach(item => {
+            const text = item.textContent.toLowerCase();
+            if (text.includes(searchTerm)) {
+                item.style.display = ''; // 表示
+            } else {
+                item.style.display = 'none'; // 非表示
+            }
+        });
+    });
+}
+
+// ---------- 小説カタログ（分割されたJSONを必要な分だけ読み込む） ----------
+
+// 検索結果として表示する件数の上限
+const CATALOG_SEARCH_LIMIT = 100;
+
+// 検索インデックスのn-gramの最大の長さ（catalog_index.text_ngramsと合わせる）
+const CATALOG_NGRAM_SIZE = 2;
+
+// 候補の照合で同時に読み込むカタログページの数
+const CATALOG_VERIFY_PAGES = 4;
+
+// カタログの形式バージョン（catalog_index.pyと合わせる）
+const CATALOG_FORMAT_VERSION = 1;
+
+/**
+ * 小説カタログの読み込み状態を管理する
+ * 目次・カタログページ・検索インデックスのシャードは初めて必要になった時に読み込み、以降は使い回す
+ */
+const novelCatalog = {
+    metaUrl: null,
+    metaPromise: null,
+    pages: new Map(),
+    shards: new Map(),
+
+    init(metaUrl) {
+        this.metaUrl = metaUrl;
+    },
+
+    fetchJson(url) {
+        return fetch(url).then(response => {
+            if (!response.ok) throw new Error(`${url}: ${response.status}`);
+            return response.json();
+        });
+    },
+
+    meta() {
+        if (!this.metaPromise) {
+            this.metaPromise = this.fetchJson(this.metaUrl).then(meta => {
+                if (meta.version !== CATALOG_FORMAT_VERSION) throw new Error('カタログの形式が異なります');
+                return meta;
+            });
+        }
+        return this.metaPromise;
+    },
+
+    page(index) {
+        if (!this.pages.has(index)) {
+            this.pages.set(index, this.meta().then(meta => this.fetchJson(meta.pages[index])));
+        }
+        return this.pages.get(index);
+    },
+
+    shard(index) {
+        if (!this.shards.has(index)) {
+            this.shards.set(index, this.meta().then(meta => this.fetchJson(meta.search_shards[index])));
+        }
+        return this.shards.get(index);
+    },
+
+    // 小説の番号からカタログの項目を取得
+    novel(novelId) {
+        return this.meta().then(meta => {
+            const pageIndex = Math.floor(novelId / meta.page_size);
+            return this.page(pageIndex).then(entries => entries[novelId - pageIndex * meta.page_size]);
+        });
+    }
+};
+
+/**
+ * 検索用にテキストを正規化（catalog_index.normalize_textと同じ）
+ */
+function normalizeSearchText(text) {
+    return (text || '').normalize('NFKC').toLowerCase();
+}
+
+/**
+ * 検索語からn-gramを取り出す（1文字の語はその文字、2文字以上の語は2文字ずつ）
+ */
+function queryNgrams(term) {
+    const chars = Array.from(term);
+    if (chars.length === 1) return chars;
+    const grams = new Set();
+    for (let i = 1; i < chars.length; i++) {
+        grams.add(chars[i - 1] + chars[i]);
+    }
+    return Array.from(grams);
+}
+
+/**
+ * n-gramを格納するシャードの番号（catalog_index.ngram_shardと同じFNV-1a）
+ */
+function ngramShard(gram, shardCount) {
+    let h = 2166136261;
+    for (const char of gram) {
+        h = Math.imul(h ^ char.codePointAt(0), 16777619) >>> 0;
+    }
+    return h % shardCount;
+}
+
+/**
+ * 差分で格納された小説の番号を元に戻す
+ */
+function decodePostings(deltas) {
+    const ids = new Array(deltas.length);
+    let current = 0;
+    for (let i = 0; i < deltas.length; i++) {
+        current += deltas[i];
+        ids[i] = current;
+    }
+    return ids;
+}
+
+/**
+ * 昇順の番号リストの共通部分
+ */
+function intersectPostings(a, b) {
+    const result = [];
+    let i = 0, j = 0;
+    while (i < a.length && j < b.length) {
+        if (a[i] === b[j]) {
+            result.push(a[i]);
+            i++;
+            j++;
+        } else if (a[i] < b[j]) {
+            i++;
+        } else {
+            j++;
+        }
+    }
+    return result;
+}
+
+/**
+ * カタログを検索して一致した小説の項目を返す
+ * n-gramの転置インデックスで候補を絞り込み、候補のタイトル・作者名で照合する
+ * 戻り値は { entries, total, truncated }（truncatedは上限を超える一致があり照合を打ち切った場合true）
+ */
+async function searchCatalog(query) {
+    const terms = normalizeSearchText(query).split(/\s+/).filter(term => term);
+    if (terms.length === 0) return { entries: [], total: 0 };
+
+    const meta = await novelCatalog.meta();
+    const shardCount = meta.search_shards.length;
+    const grams = Array.from(new Set(terms.flatMap(queryNgrams)));
+    const shards = await Promise.all(grams.map(gram => novelCatalog.shard(ngramShard(gram, shardCount))));
+
+    // 件数の少ないn-gramから順に共通部分を取る
+    const postings = grams.map((gram, i) => shards[i][gram]);
+    if (postings.some(deltas => !deltas)) return { entries: [], total: 0 };
+    postings.sort((a, b) => a.length - b.length);
+    let candidates = decodePostings(postings[0]);
+    for (let i = 1; i < postings.length && candidates.length > 0; i++) {
+        candidates = intersectPostings(candidates, decodePostings(postings[i]));
+    }
+
+    // n-gram以下の長さの語だけなら転置インデックスの一致がそのまま結果になる（照合は不要）
+    if (terms.every(term => Array.from(term).length <= CATALOG_NGRAM_SIZE)) {
+        const entries = await Promise.all(
+            candidates.slice(0, CATALOG_SEARCH_LIMIT).map(novelId => novelCatalog.novel(novelId)));
+        return { entries, total: candidates.length, truncated: false };
+    }
+
+    // 長い語はn-gramの一致だけでは語順が保証されないため、項目の文字列で照合する
+    // カタログページごとにまとめて並列に読み込み、上限の件数が見つかった時点で打ち切る
+    const groups = [];
+    for (const novelId of candidates) {
+        const pageIndex = Math.floor(novelId / meta.page_size);
+        const last = groups[groups.length - 1];
+        if (last && last.pageIndex === pageIndex) {
+            last.ids.push(novelId);
+        } else {
+            groups.push({ pageIndex, ids: [novelId] });
+        }
+    }
+
+    const entries = [];
+    for (let start = 0; start < groups.length; start += CATALOG_VERIFY_PAGES) {
+        const round = groups.slice(start, start + CATALOG_VERIFY_PAGES);
+        const pages = await Promise.all(round.map(group => novelCatalog.page(group.pageIndex)));
+        for (let i = 0; i < round.length; i++) {
+            for (const novelId of round[i].ids) {
+                const entry = pages[i][novelId - round[i].pageIndex * meta.page_size];
+                const title = normalizeSearchText(entry[1]);
+                const author = normalizeSearchText(entry[2]);
+                if (!terms.every(term => title.includes(term) || author.includes(term))) continue;
+                if (entries.length === CATALOG_SEARCH_LIMIT) {
+                    // 上限を超える一致があることが分かった時点で打ち切る（総数は数えない）
+                    return { entries, total: entries.length, truncated: true };
+                }
+                entries.push(entry);
+            }
+        }
+    }
+    return { entries, total: entries.length, truncated: false };
+}
+
+/**
+ * カタログの項目から小説カードを作成（インデックスページに埋め込まれたカードと同じ構造）
+ */
+function createNovelCard(entry) {
+    const [ncode, title, author, updatedAt, episodes, synopsis] = entry;
+
+    const card = document.createElement('div');
+    card.className = 'novel-card';
+    card.dataset.novelId = ncode;
+
+    const heading = document.createElement('h3');
+    const link = document.createElement('a');
+    link.href = `novels/${ncode}/index.html`;
+    link.textContent = title;
+    heading.appendChild(link);
+    card.appendChild(heading);
+
+    const info = document.createElement('div');
+    info.className = 'novel-info';
+    info.textContent = `作者: ${author} | エピソード数: ${episodes}`;
+    card.appendChild(info);
+
+    const updated = document.createElement('div');
+    updated.className = 'novel-info';
+    updated.textContent = `更新: ${updatedAt}`;
+    card.appendChild(updated);
+
+    const synopsisElement = document.createElement('div');
+    synopsisElement.className = 'novel-synopsis';
+    synopsisElement.textContent = synopsis;
+    if (localStorage.getItem('synopsisHidden') === 'true') {
+        synopsisElement.style.display = 'none';
+    }
+    card.appendChild(synopsisElement);
+
+    return card;
+}
+
+/**
+ * 小説一覧のカタログ検索と続きの読み込みを初期化
+ * 一覧には埋め込まれた先頭ページを表示し、続きは「もっと見る」またはスクロールで読み込む
+ */
+function initCatalogSearch(searchBox, novelList) {
+    novelCatalog.init(novelList.dataset.catalog);
+
+    const total = parseInt(novelList.dataset.total) || 0;
+    const status = document.querySelector('.catalog-status');
+    const loadMoreButton = document.querySelector('.load-more');
+
+    // 一覧表示用のカード（検索中は退避しておく）
+    const browseFragment = document.createDocumentFragment();
+    let nextPage = 1;
+    let loading = false;
+    let searching = false;
+    let searchTimer = null;
+    let searchSerial = 0;
+
+    function setStatus(message) {
+        if (status) status.textContent = message;
+    }
+
+    function updateLoadMore() {
+        if (!loadMoreButton) return;
+        loadMoreButton.hidden = searching || novelList.querySelectorAll('.novel-card').length >= total;
+    }
+
+    // 一覧の続きを1ページ読み込む
+    function loadNextPage() {
+        if (loading || searching) return;
+        loading = true;
+        novelCatalog.meta()
+            .then(meta => {
+                if (nextPage >= meta.pages.length) return;
+                return novelCatalog.page(nextPage).then(entries => {
+                    nextPage++;
+                    if (searching) {
+                        entries.forEach(entry => browseFragment.appendChild(createNovelCard(entry)));
+                    } else {
+                        entries.forEach(entry => novelList.appendChild(createNovelCard(entry)));
+                    }
+                });
+            })
+            .catch(error => {
+                console.log('カタログの読み込みに失敗しました:', error);
+                setStatus('小説一覧の続きを読み込めませんでした');
+            })
+            .finally(() => {
+                loading = false;
+                updateLoadMore();
+            });
+    }
+
+    if (loadMoreButton) {
+        loadMoreButton.addEventListener('click', loadNextPage);
+
+        // ボタンが画面に入ったら自動で続きを読み込む
+        if ('IntersectionObserver' in window) {
+            new IntersectionObserver(observed => {
+                if (observed.some(item => item.isIntersecting)) loadNextPage();
+            }, { rootMargin: '600px' }).observe(loadMoreButton);
+        }
+    }
+    updateLoadMore();
+
+    // 検索語が空になったら一覧表示に戻す
+    function showBrowseList() {
+        if (!searching) return;
+        searching = false;
+        novelList.replaceChildren(browseFragment);
+        setStatus('');
+        updateLoadMore();
+    }
+
+    function runSearch(query) {
+        const serial = ++searchSerial;
+        if (!searching) {
+            searching = true;
+            browseFragment.replaceChildren(...novelList.childNodes);
+            updateLoadMore();
+        }
+        setStatus('検索中...');
+
+        searchCatalog(query)
+            .then(result => {
+                // 入力が続いている場合は古い結果を捨てる
+                if (serial !== searchSerial || !searching) return;
+                novelList.replaceChildren(...result.entries.map(createNovelCard));
+                if (result.total === 0) {
+                    setStatus('一致する小説はありません');
+                } else if (result.truncated) {
+                    setStatus(`${result.entries.length}件以上見つかりました（先頭の${result.entries.length}件を表示しています）`);
+                } else if (result.total > result.entries.length) {
+                    setStatus(`${result.total}件中 ${result.entries.length}件を表示しています`);
                 } else {
-                    item.style.display = 'none'; // 非表示
+                    setStatus(`${result.total}件`);
                 }
+            })
+            .catch(error => {
+                console.log('検索に失敗しました:', error);
+                if (serial === searchSerial) setStatus('検索インデックスを読み込めませんでした');
             });
-        });
     }
+
+    // 入力イベントで検索（入力が落ち着いてから実行）
+    searchBox.addEventListener('input', function() {
+        const query = this.value.trim();
+        clearTimeout(searchTimer);
+        if (!query) {
+            searchSerial++;
+            showBrowseList();
+            return;
+        }
+        searchTimer = setTimeout(() => runSearch(query), 150);
+    });
 }
 
 /**
@@ -340,4 +700,311 @@ document.addEventListener('DOMContentLoaded', function() {
 
   // あらすじ表示切り替え機能を初期化
   initSynopsisToggle();
-});
\ No newline at end of file
+
+  // リスト表示/グリッド表示切り替え機能を初期化
+  initViewToggle();
+
+  // 最近読んだ小説の履歴・続きから読むボタン
+  initRecentNovelsHistory();
+  showContinueReadingButton();
+  enhancedReadingProgress();
+
+  // 履歴表示用のスタイルを追加
+  addCustomStyles();
+});
+
+/**
+ * リスト表示/グリッド表示の切り替え機能
+ */
+function initViewToggle() {
+  // 小説一覧ページにのみ機能を追加
+  const novelList = document.querySelector('.novel-list');
+  if (!novelList) return;
+
+  // トグルボタンのコンテナを作成
+  const toggleContainer = document.createElement('div');
+  toggleContainer.className = 'view-toggle-container';
+
+  // トグルボタンを作成
+  const toggleButton = document.createElement('button');
+  toggleButton.className = 'view-toggle-button';
+  toggleButton.textContent = 'シンプルリスト表示';
+
+  // LocalStorageから状態を復元（デフォルトはグリッド表示）
+  const isListView = localStorage.getItem('novelListView') === 'list';
+  if (isListView) {
+    toggleButton.textContent = 'グリッド表示';
+    novelList.classList.add('list-view');
+  }
+
+  // クリックイベント追加
+  toggleButton.addEventListener('click', function() {
+    const isListView = novelList.classList.contains('list-view');
+    if (isListView) {
+      // リスト表示 → グリッド表示
+      toggleButton.textContent = 'シンプルリスト表示';
+      novelList.classList.remove('list-view');
+      localStorage.setItem('novelListView', 'grid');
+    } else {
+      // グリッド表示 → リスト表示
+      toggleButton.textContent = 'グリッド表示';
+      novelList.classList.add('list-view');
+      localStorage.setItem('novelListView', 'list');
+    }
+  });
+
+  // ボタンをコンテナに追加
+  toggleContainer.appendChild(toggleButton);
+
+  // トグルボタンをあらすじトグルボタンの下に挿入
+  const synopsisToggleContainer = document.querySelector('.synopsis-toggle-container');
+  if (synopsisToggleContainer) {
+    synopsisToggleContainer.after(toggleContainer);
+  } else {
+    // あらすじトグルがない場合は検索ボックスの下に挿入
+    const searchContainer = document.querySelector('.search-container');
+    if (searchContainer) {
+      searchContainer.after(toggleContainer);
+    } else {
+      // 検索ボックスもない場合はnovelListの前に挿入
+      novelList.before(toggleContainer);
+    }
+  }
+}
+
+/**
+ * 最近読んだ小説の履歴管理機能
+ */
+
+// ---------- 最近読んだ小説の履歴管理 ----------
+function initRecentNovelsHistory() {
+    // 履歴表示エリアの要素を取得
+    const recentHistoryArea = document.querySelector('.recent-novels-list');
+    if (!recentHistoryArea) return; // トップページ以外では実行しない
+
+    // LocalStorageから履歴データを取得
+    const historyData = getReadingHistory();
+    if (!historyData || historyData.length === 0) {
+        // 履歴がない場合のメッセージを表示
+        recentHistoryArea.innerHTML = '<p>まだ履歴がありません</p>';
+        return;
+    }
+
+    // 最大5件まで表示
+    const displayHistory = historyData.slice(0, 5);
+
+    // 履歴リストを構築
+    const historyHTML = displayHistory.map(item => {
+        const lastReadDate = new Date(item.timestamp);
+        const formattedDate = `${lastReadDate.getFullYear()}年${lastReadDate.getMonth() + 1}月${lastReadDate.getDate()}日 ${lastReadDate.getHours()}:${String(lastReadDate.getMinutes()).padStart(2, '0')}`;
+
+        return `
+        <div class="recent-novel-item">
+            <h3><a href="${item.novelUrl}">${item.novelTitle}</a></h3>
+            <div class="recent-novel-info">
+                最後に読んだ話: <a href="${item.episodeUrl}">第${item.episodeNo}話: ${item.episodeTitle}</a>
+            </div>
+            <div class="recent-novel-timestamp">
+                ${formattedDate}
+            </div>
+        </div>
+        `;
+    }).join('');
+
+    recentHistoryArea.innerHTML = historyHTML;
+}
+
+/**
+ * 読書履歴を取得
+ *
+ * @returns {Array} 履歴データの配列
+ */
+function getReadingHistory() {
+    const historyJson = localStorage.getItem('novelReadingHistory');
+    return historyJson ? JSON.parse(historyJson) : [];
+}
+
+/**
+ * 読書履歴を更新
+ * エピソードページ閲覧時に呼び出される
+ */
+function updateReadingHistory() {
+    // エピソードページでのみ実行
+    const body = document.body;
+    const novelId = body.getAttribute('data-novel-id');
+    const episodeId = body.getAttribute('data-episode-id');
+
+    if (!novelId || !episodeId) return;
+
+    // 現在のページ情報を取得
+    const novelTitle = document.querySelector('header h1').textContent;
+    const episodeTitle = document.querySelector('header h2').textContent.replace(`第${episodeId}話: `, '');
+
+    // 小説・エピソードへのURL
+    const novelUrl = `./index.html`;
+    const episodeUrl = `./episode_${episodeId}.html`;
+
+    // 新しい履歴項目を作成
+    const newHistoryItem = {
+        novelId: novelId,
+        novelTitle: novelTitle,
+        novelUrl: novelUrl,
+        episodeNo: episodeId,
+        episodeTitle: episodeTitle,
+        episodeUrl: episodeUrl,
+        timestamp: new Date().toISOString(),
+        scrollPosition: window.pageYOffset
+    };
+
+    // 既存の履歴を取得
+    let history = getReadingHistory();
+
+    // 同じ小説の既存エントリーを削除
+    history = history.filter(item => item.novelId !== novelId);
+
+    // 新しい項目を先頭に追加
+    history.unshift(newHistoryItem);
+
+    // 履歴が多すぎる場合は古いものを削除（最大20件）
+    if (history.length > 20) {
+        history = history.slice(0, 20);
+    }
+
+    // 更新した履歴を保存
+    localStorage.setItem('novelReadingHistory', JSON.stringify(history));
+}
+
+/**
+ * 前回の続きから読む機能
+ *
+ * @param {string} novelId 小説ID
+ * @returns {Object|null} 最後に読んだエピソード情報
+ */
+function getLastReadEpisode(novelId) {
+    const history = getReadingHistory();
+    return history.find(item => item.novelId === novelId) || null;
+}
+
+/**
+ * 「続きから読む」ボタンの表示
+ */
+function showContinueReadingButton() {
+    // 小説詳細ページでのみ実行
+    if (!document.querySelector('.novel-meta')) return;
+
+    const novelId = window.location.pathname.split('/').slice(-2)[0]; // URLからnovelIdを取得
+    const lastRead = getLastReadEpisode(novelId);
+
+    if (lastRead) {
+        // 「続きから読む」ボタンを作成
+        const continueButton = document.createElement('div');
+        continueButton.className = 'continue-reading-button';
+        continueButton.innerHTML = `
+            <a href="${lastRead.episodeUrl}" class="nav-button continue-reading">
+                続きから読む（第${lastRead.episodeNo}話: ${lastRead.episodeTitle}）
+            </a>
+        `;
+
+        // ボタンを挿入
+        const novelMeta = document.querySelector('.novel-meta');
+        novelMeta.appendChild(continueButton);
+    }
+}
+
+// エピソードページでは履歴更新とスクロール位置の保存
+function enhancedReadingProgress() {
+    const body = document.body;
+    const novelId = body.getAttribute('data-novel-id');
+    const episodeId = body.getAttribute('data-episode-id');
+
+    if (novelId && episodeId) {
+        // ページロード時に履歴を更新
+        updateReadingHistory();
+
+        // スクロール位置の更新（60秒ごと & スクロール停止後）
+        let scrollTimeout;
+        window.addEventListener('scroll', function() {
+            clearTimeout(scrollTimeout);
+            scrollTimeout = setTimeout(function() {
+                updateReadingHistory();
+            }, 1000);  // スクロール停止から1秒後に更新
+        });
+
+        // 定期的に履歴を更新（60秒ごと）
+        setInterval(updateReadingHistory, 60000);
+
+        // ページを離れる前にも保存
+        window.addEventListener('beforeunload', updateReadingHistory);
+    }
+}
+
+// ---------- スタイル拡張 ----------
+// 必要なCSSルールをページに追加
+function addCustomStyles() {
+    const customStyle = document.createElement('style');
+    customStyle.textContent = `
+        /* 最近読んだ小説セクション */
+        .recent-novels-section {
+            margin-top: 2rem;
+            margin-bottom: 2rem;
+        }
+        
+        .recent-novels-list {
+            display: grid;
+            grid-template-columns: repeat(auto-fill, minmax(300px, 1fr));
+            gap: 1rem;
+        }
+        
+        .recent-novel-item {
+            background-color: var(--card-bg);
+            border-radius: 8px;
+            padding: 1rem;
+            box-shadow: var(--card-shadow);
+            border-left: 4px solid #60a5fa;
+        }
+        
+        .recent-novel-item h3 {
+            margin-top: 0;
+            font-size: 1.1rem;
+        }
+        
+        .recent-novel-info {
+            font-size: 0.9rem;
+            margin-bottom: 0.5rem;
+        }
+        
+        .recent-novel-timestamp {
+            font-size: 0.8rem;
+            color: #666;
+        }
+        
+        /* 続きから読むボタン */
+        .continue-reading-button {
+            margin-top: 1rem;
+            margin-bottom: 1rem;
+        }
+        
+        .continue-reading {
+            display: inline-block;
+            background-color: #60a5fa;
+            color: white;
+            padding: 0.75rem 1.5rem;
+            border-radius: 4px;
+            font-weight: bold;
+            text-align: center;
+        }
+        
+        .continue-reading:hover {
+            background-color: #3b82f6;
+            text-decoration: none;
+        }
+        
+        /* ダークモード対応 */
+        @media (prefers-color-scheme: dark) {
+            .recent-novel-timestamp {
+                color: #aaa;
+            }
+        }
+    `;
+    document.head.appendChild(customStyle);
+}
@@ -1,427 +1,230 @@
 /**
  * 小説ライブラリ用 Service Worker
  * オフラインでも閲覧できるようにするための機能を提供
+ *
+ * エクスポート時に作成されるプリキャッシュマニフェストを、前回取り込んだ内容と比較して差分だけを取得する
+ * - precache-manifest.json: インデックス・カタログ・アセットのリビジョンと、小説ごとのリビジョン
+ * - novels/{ncode}/precache.json: 小説のページごとのリビジョン
+ * 小説のページは一度開いた小説だけを保持し、再エクスポート後は内容が変わったページだけを取得し直す
  */
 
-// キャッシュ名（バージョン管理のために使用）
-const CACHE_NAME = 'novel-library-cache-v1';
+// プリキャッシュマニフェストのリビジョン（エクスポート時に差し込まれ、変わるとService Workerが更新される）
+const PRECACHE_REVISION = '__PRECACHE_REVISION__';
+
+// プリキャッシュマニフェストの形式バージョン（precache_manifest.pyと合わせる）
+const PRECACHE_FORMAT_VERSION = 1;
+
+// キャッシュ名（ページ単位で入れ替えるため、リビジョンが変わっても同じキャッシュを使い続ける）
+const CACHE_NAME = 'novel-library-cache';
+
+// プリキャッシュマニフェストと、取り込み済みの状態を保存するキー
+const MANIFEST_URL = new URL('./precache-manifest.json', self.location).href;
+const STATE_URL = new URL('./__precache-state__.json', self.location).href;
+const NOVEL_MANIFEST_NAME = 'precache.json';
 
-// キャッシュするリソースのリスト
-const urlsToCache = [
-    './',                    // ルートページ
-    './index.html',          // インデックスページ
-    './assets/style.css',    // スタイルシート
-    './assets/script.js',    // メインスクリプト
-    './manifest.json',       // マニフェストファイル
-    './assets/icon-192.png', // アイコン（小）
-    './assets/icon-512.png'  // アイコン（大）
-];
+// 小説のページのURL（novels/{ncode}/...）
+const NOVEL_PAGE_PATTERN = new RegExp('^' + new URL('./novels/', self.location).href.replace(/[.*+?^${}()|[\]\\]/g, '\\$&') + '([^/]+)/');
+
+// 同時に取得するページ数
+const FETCH_CONCURRENCY = 6;
+
+// キャッシュの更新処理を順番に実行するためのキュー
+let syncQueue = Promise.resolve();
+
+function enqueueSync(task) {
+    const result = syncQueue.then(task);
+    syncQueue = result.catch(error => console.log('キャッシュの更新に失敗しました:', error));
+    return result;
+}
 
 /**
- * Service Workerインストール時の処理
- * 初回実行時または更新時にキャッシュを作成する
+ * キャッシュに保存したJSONを読み込む
  */
-self.addEventListener('install', event => {
-    // インストール処理が完了するまで待機するよう指示
-    event.waitUntil(
-        // 指定した名前のキャッシュを開く（存在しなければ作成）
-        caches.open(CACHE_NAME)
-            .then(cache => {
-                console.log('キャッシュをオープンしました');
-                // 指定したリソースをすべてキャッシュに追加
-                return cache.addAll(urlsToCache);
-            })
-    );
-});
+async function readCachedJson(cache, url) {
+    const response = await cache.match(url);
+    return response ? response.json() : null;
+}
 
 /**
- * ネットワークリクエスト時の処理
- * 優先的にキャッシュからリソースを取得し、なければネットワークから取得
+ * JSONをキャッシュに保存する
  */
-self.addEventListener('fetch', event => {
-    event.respondWith(
-        // キャッシュ内に該当リソースがあるか確認
-        caches.match(event.request)
-            .then(response => {
-                // キャッシュにあればそれを返す
-                if (response) {
-                    return response;
-                }
-                
-                // キャッシュになければネットワークから取得
-                return fetch(event.request)
-                    .then(networkResponse => {
-                        // レスポンスが有効か確認
-                        if (!networkResponse || networkResponse.status !== 200 || networkResponse.type !== 'basic') {
-                            return networkResponse;
-                        }
-                        
-                        // レスポンスを複製（レスポンスは一度しか使えないため）
-                        const responseToCache = networkResponse.clone();
-                        
-                        // 新たに取得したリソースをキャッシュに追加
-                        caches.open(CACHE_NAME)
-                            .then(cache => {
-                                cache.put(event.request, responseToCache);
-                            });
-                        
-                        return networkResponse;
-                    });
-            })
-    );
-});
+function writeCachedJson(cache, url, data) {
+    return cache.put(url, new Response(JSON.stringify(data), {
+        headers: { 'Content-Type': 'application/json' }
+    }));
+}
 
 /**
- * Service Worker有効化時の処理
- * 古いキャッシュを削除するための処理
+ * HTTPキャッシュを使わずにネットワークから取得する
  */
-self.addEventListener('activate', event => {
-    // 現在のキャッシュ名のリスト（これは残す）
-    const cacheWhitelist = [CACHE_NAME];
-    
-    event.waitUntil(
-        // すべてのキャッシュ名を取得
-        caches.keys().then(cacheNames => {
-            // 古いキャッシュを削除
-            return Promise.all(
-                cacheNames.map(cacheName => {
-                    // 現在のキャッシュリストにないものは削除
-                    if (cacheWhitelist.indexOf(cacheName) === -1) {
-                        return caches.delete(cacheName);
-                    }
-                })
-            );
-        })
-    );
-});
+async function fetchFresh(url) {
+    const response = await fetch(url, { cache: 'no-cache' });
+    if (!response.ok) {
+        throw new Error(`${url}: ${response.status}`);
+    }
+    return response;
+}
 
 /**
- * リスト表示/グリッド表示の切り替え機能
+ * 前回のリビジョンと比較して、変わったURLだけを取得し直し、なくなったURLをキャッシュから削除する
+ *
+ * @param {Cache} cache キャッシュ
+ * @param {string} baseUrl 相対パスの基準となるURL
+ * @param {Object} revisions 今回のリビジョン {相対パス: リビジョン}
+ * @param {Object} previous 前回のリビジョン {相対パス: リビジョン}
+ * @returns {number} 取得したURLの数
  */
-function initViewToggle() {
-  // 小説一覧ページにのみ機能を追加
-  const novelList = document.querySelector('.novel-list');
-  if (!novelList) return;
-
-  // トグルボタンのコンテナを作成
-  const toggleContainer = document.createElement('div');
-  toggleContainer.className = 'view-toggle-container';
-
-  // トグルボタンを作成
-  const toggleButton = document.createElement('button');
-  toggleButton.className = 'view-toggle-button';
-  toggleButton.textContent = 'シンプルリスト表示';
-
-  // LocalStorageから状態を復元（デフォルトはグリッド表示）
-  const isListView = localStorage.getItem('novelListView') === 'list';
-  if (isListView) {
-    toggleButton.textContent = 'グリッド表示';
-    novelList.classList.add('list-view');
-  }
-
-  // クリックイベント追加
-  toggleButton.addEventListener('click', function() {
-    const isListView = novelList.classList.contains('list-view');
-    if (isListView) {
-      // リスト表示 → グリッド表示
-      toggleButton.textContent = 'シンプルリスト表示';
-      novelList.classList.remove('list-view');
-      localStorage.setItem('novelListView', 'grid');
-    } else {
-      // グリッド表示 → リスト表示
-      toggleButton.textContent = 'グリッド表示';
-      novelList.classList.add('list-view');
-      localStorage.setItem('novelListView', 'list');
+async function applyRevisions(cache, baseUrl, revisions, previous) {
+    const changed = Object.keys(revisions).filter(path => previous[path] !== revisions[path]);
+
+    // 同時に取得する数を抑えながら順に取得する
+    let next = 0;
+    async function worker() {
+        while (next < changed.length) {
+            const url = new URL(changed[next++], baseUrl).href;
+            await cache.put(url, await fetchFresh(url));
+        }
     }
-  });
+    await Promise.all(Array.from({ length: Math.min(FETCH_CONCURRENCY, changed.length) }, worker));
 
-  // ボタンをコンテナに追加
-  toggleContainer.appendChild(toggleButton);
-
-  // トグルボタンをあらすじトグルボタンの下に挿入
-  const synopsisToggleContainer = document.querySelector('.synopsis-toggle-container');
-  if (synopsisToggleContainer) {
-    synopsisToggleContainer.after(toggleContainer);
-  } else {
-    // あらすじトグルがない場合は検索ボックスの下に挿入
-    const searchContainer = document.querySelector('.search-container');
-    if (searchContainer) {
-      searchContainer.after(toggleContainer);
-    } else {
-      // 検索ボックスもない場合はnovelListの前に挿入
-      novelList.before(toggleContainer);
-    }
-  }
+    const removed = Object.keys(previous).filter(path => !(path in revisions));
+    await Promise.all(removed.map(path => cache.delete(new URL(path, baseUrl).href)));
+    return changed.length;
 }
 
-// DOMの読み込み完了時に実行されるメイン関数に追加
-document.addEventListener('DOMContentLoaded', function() {
-  // 既存の初期化関数を呼び出し
-  initFontSizeControls();
-  initSearchFunction();
-  initBackToTopButton();
-  initReadingSettings();
-  initReadingProgress();
-
-  // あらすじ表示切り替え機能を初期化
-  initSynopsisToggle();
-
-  // リスト表示/グリッド表示切り替え機能を初期化
-  initViewToggle();
-});
 /**
- * 最近読んだ小説の履歴管理機能
- * 既存のscript-js.jsに追加するコード
+ * インデックス・カタログ・アセットを更新し、最新の小説ごとのリビジョンを記録する（インストール時）
  */
-
-// ---------- 最近読んだ小説の履歴管理 ----------
-function initRecentNovelsHistory() {
-    // 履歴表示エリアの要素を取得
-    const recentHistoryArea = document.querySelector('.recent-novels-list');
-    if (!recentHistoryArea) return; // トップページ以外では実行しない
-
-    // LocalStorageから履歴データを取得
-    const historyData = getReadingHistory();
-    if (!historyData || historyData.length === 0) {
-        // 履歴がない場合のメッセージを表示
-        recentHistoryArea.innerHTML = '<p>まだ履歴がありません</p>';
-        return;
+async function syncLibraryFiles() {
+    const cache = await caches.open(CACHE_NAME);
+    const manifest = await (await fetchFresh(MANIFEST_URL)).json();
+    if (manifest.version !== PRECACHE_FORMAT_VERSION) {
+        throw new Error('プリキャッシュマニフェストの形式が異なります');
     }
 
-    // 最大5件まで表示
-    const displayHistory = historyData.slice(0, 5);
-
-    // 履歴リストを構築
-    const historyHTML = displayHistory.map(item => {
-        const lastReadDate = new Date(item.timestamp);
-        const formattedDate = `${lastReadDate.getFullYear()}年${lastReadDate.getMonth() + 1}月${lastReadDate.getDate()}日 ${lastReadDate.getHours()}:${String(lastReadDate.getMinutes()).padStart(2, '0')}`;
+    const state = await readCachedJson(cache, STATE_URL) || { files: {}, novels: {}, latest: {} };
+    const baseUrl = new URL('./', self.location).href;
+    const fetched = await applyRevisions(cache, baseUrl, manifest.files, state.files);
 
-        return `
-        <div class="recent-novel-item">
-            <h3><a href="${item.novelUrl}">${item.novelTitle}</a></h3>
-            <div class="recent-novel-info">
-                最後に読んだ話: <a href="${item.episodeUrl}">第${item.episodeNo}話: ${item.episodeTitle}</a>
-            </div>
-            <div class="recent-novel-timestamp">
-                ${formattedDate}
-            </div>
-        </div>
-        `;
-    }).join('');
+    // ルートURLはindex.htmlと同じ内容を返す
+    const index = await cache.match(new URL('index.html', baseUrl).href);
+    if (index) {
+        await cache.put(baseUrl, index);
+    }
 
-    recentHistoryArea.innerHTML = historyHTML;
+    state.files = manifest.files;
+    state.latest = manifest.novels;
+    state.revision = PRECACHE_REVISION;
+    await writeCachedJson(cache, STATE_URL, state);
+    console.log(`ライブラリのファイルを更新しました: ${fetched}件`);
 }
 
 /**
- * 読書履歴を取得
- *
- * @returns {Array} 履歴データの配列
+ * 小説のページを更新する
  */
-function getReadingHistory() {
-    const historyJson = localStorage.getItem('novelReadingHistory');
-    return historyJson ? JSON.parse(historyJson) : [];
+async function syncNovel(cache, ncode) {
+    const novelUrl = new URL(`./novels/${ncode}/`, self.location).href;
+    const manifestUrl = novelUrl + NOVEL_MANIFEST_NAME;
+
+    const previous = await readCachedJson(cache, manifestUrl) || {};
+    const response = await fetchFresh(manifestUrl);
+    const revisions = await response.clone().json();
+    const fetched = await applyRevisions(cache, novelUrl, revisions, previous);
+
+    // 全ページの取得が終わってから小説のマニフェストを置き換える（途中で止まった場合は次回やり直す）
+    await cache.put(manifestUrl, response);
+    return fetched;
 }
 
 /**
- * 読書履歴を更新
- * エピソードページ閲覧時に呼び出される
+ * 保持しなくなった小説のページを削除する
  */
-function updateReadingHistory() {
-    // エピソードページでのみ実行
-    const body = document.body;
-    const novelId = body.getAttribute('data-novel-id');
-    const episodeId = body.getAttribute('data-episode-id');
-
-    if (!novelId || !episodeId) return;
-
-    // 現在のページ情報を取得
-    const novelTitle = document.querySelector('header h1').textContent;
-    const episodeTitle = document.querySelector('header h2').textContent.replace(`第${episodeId}話: `, '');
-
-    // 小説・エピソードへのURL
-    const novelUrl = `./index.html`;
-    const episodeUrl = `./episode_${episodeId}.html`;
-
-    // 新しい履歴項目を作成
-    const newHistoryItem = {
-        novelId: novelId,
-        novelTitle: novelTitle,
-        novelUrl: novelUrl,
-        episodeNo: episodeId,
-        episodeTitle: episodeTitle,
-        episodeUrl: episodeUrl,
-        timestamp: new Date().toISOString(),
-        scrollPosition: window.pageYOffset
-    };
-
-    // 既存の履歴を取得
-    let history = getReadingHistory();
-
-    // 同じ小説の既存エントリーを削除
-    history = history.filter(item => item.novelId !== novelId);
-
-    // 新しい項目を先頭に追加
-    history.unshift(newHistoryItem);
-
-    // 履歴が多すぎる場合は古いものを削除（最大20件）
-    if (history.length > 20) {
-        history = history.slice(0, 20);
-    }
-
-    // 更新した履歴を保存
-    localStorage.setItem('novelReadingHistory', JSON.stringify(history));
+async function removeNovel(cache, ncode) {
+    const novelUrl = new URL(`./novels/${ncode}/`, self.location).href;
+    const manifestUrl = novelUrl + NOVEL_MANIFEST_NAME;
+    const previous = await readCachedJson(cache, manifestUrl) || {};
+    await applyRevisions(cache, novelUrl, {}, previous);
+    await cache.delete(manifestUrl);
 }
 
 /**
- * 前回の続きから読む機能
- *
- * @param {string} novelId 小説ID
- * @returns {Object|null} 最後に読んだエピソード情報
+ * 保持している小説のうち、リビジョンが変わった小説のページを更新する（有効化時）
+ * カタログから消えた小説はキャッシュから削除する
  */
-function getLastReadEpisode(novelId) {
-    const history = getReadingHistory();
-    return history.find(item => item.novelId === novelId) || null;
+async function syncTrackedNovels() {
+    const cache = await caches.open(CACHE_NAME);
+    const state = await readCachedJson(cache, STATE_URL);
+    if (!state) return;
+
+    for (const ncode of Object.keys(state.novels)) {
+        if (!(ncode in state.latest)) {
+            await removeNovel(cache, ncode);
+            delete state.novels[ncode];
+        } else if (state.novels[ncode] !== state.latest[ncode]) {
+            const fetched = await syncNovel(cache, ncode);
+            state.novels[ncode] = state.latest[ncode];
+            console.log(`小説 ${ncode} のページを更新しました: ${fetched}件`);
+        } else {
+            continue;
+        }
+        // 小説ごとに状態を保存する（途中で止まっても済んだ小説はやり直さない）
+        await writeCachedJson(cache, STATE_URL, state);
+    }
 }
 
 /**
- * 「続きから読む」ボタンの表示
+ * 開いた小説を保持対象に加え、全ページをキャッシュする
  */
-function showContinueReadingButton() {
-    // 小説詳細ページでのみ実行
-    if (!document.querySelector('.novel-meta')) return;
-
-    const novelId = window.location.pathname.split('/').slice(-2)[0]; // URLからnovelIdを取得
-    const lastRead = getLastReadEpisode(novelId);
-
-    if (lastRead) {
-        // 「続きから読む」ボタンを作成
-        const continueButton = document.createElement('div');
-        continueButton.className = 'continue-reading-button';
-        continueButton.innerHTML = `
-            <a href="${lastRead.episodeUrl}" class="nav-button continue-reading">
-                続きから読む（第${lastRead.episodeNo}話: ${lastRead.episodeTitle}）
-            </a>
-        `;
-
-        // ボタンを挿入
-        const novelMeta = document.querySelector('.novel-meta');
-        novelMeta.appendChild(continueButton);
-    }
+async function trackNovel(ncode) {
+    const cache = await caches.open(CACHE_NAME);
+    const state = await readCachedJson(cache, STATE_URL);
+    if (!state || ncode in state.novels || !(ncode in state.latest)) return;
+
+    await syncNovel(cache, ncode);
+    state.novels[ncode] = state.latest[ncode];
+    await writeCachedJson(cache, STATE_URL, state);
 }
 
-// エピソードページでは履歴更新とスクロール位置の保存
-function enhancedReadingProgress() {
-    const body = document.body;
-    const novelId = body.getAttribute('data-novel-id');
-    const episodeId = body.getAttribute('data-episode-id');
-
-    if (novelId && episodeId) {
-        // ページロード時に履歴を更新
-        updateReadingHistory();
+/**
+ * Service Workerインストール時の処理
+ * インデックス・カタログ・アセットのうち変わったものだけを取得する
+ */
+self.addEventListener('install', event => {
+    event.waitUntil(
+        enqueueSync(syncLibraryFiles).then(() => self.skipWaiting())
+    );
+});
 
-        // スクロール位置の更新（60秒ごと & スクロール停止後）
-        let scrollTimeout;
-        window.addEventListener('scroll', function() {
-            clearTimeout(scrollTimeout);
-            scrollTimeout = setTimeout(function() {
-                updateReadingHistory();
-            }, 1000);  // スクロール停止から1秒後に更新
-        });
+/**
+ * Service Worker有効化時の処理
+ * 古いバージョンのキャッシュを削除し、保持している小説のページを更新する
+ */
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys()
+            .then(cacheNames => Promise.all(
+                cacheNames.filter(cacheName => cacheName !== CACHE_NAME).map(cacheName => caches.delete(cacheName))
+            ))
+            .then(() => self.clients.claim())
+            .then(() => enqueueSync(syncTrackedNovels))
+    );
+});
 
-        // 定期的に履歴を更新（60秒ごと）
-        setInterval(updateReadingHistory, 60000);
+/**
+ * ネットワークリクエスト時の処理
+ * キャッシュにあればそれを返し、なければネットワークから取得する
+ * 小説のページを開いた場合は、その小説の全ページをバックグラウンドでキャッシュする
+ */
+self.addEventListener('fetch', event => {
+    if (event.request.method !== 'GET') return;
 
-        // ページを離れる前にも保存
-        window.addEventListener('beforeunload', updateReadingHistory);
+    const match = NOVEL_PAGE_PATTERN.exec(event.request.url);
+    if (match) {
+        event.waitUntil(enqueueSync(() => trackNovel(decodeURIComponent(match[1]))));
     }
-}
-
-// DOMの読み込み完了時に実行するイベントに追加
-document.addEventListener('DOMContentLoaded', function() {
-    // 既存の初期化関数を呼び出し
-    initFontSizeControls();
-    initSearchFunction();
-    initBackToTopButton();
-    initReadingSettings();
-    initReadingProgress();
-    initSynopsisToggle();
 
-    // 新機能を初期化
-    initRecentNovelsHistory();
-    showContinueReadingButton();
-    enhancedReadingProgress();
+    event.respondWith(
+        caches.match(event.request)
+            .then(response => response || fetch(event.request))
+    );
 });
-
-// ---------- スタイル拡張 ----------
-// 必要なCSSルールをページに追加
-function addCustomStyles() {
-    const customStyle = document.createElement('style');
-    customStyle.textContent = `
-        /* 最近読んだ小説セクション */
-        .recent-novels-section {
-            margin-top: 2rem;
-            margin-bottom: 2rem;
-        }
-        
-        .recent-novels-list {
-            display: grid;
-            grid-template-columns: repeat(auto-fill, minmax(300px, 1fr));
-            gap: 1rem;
-        }
-        
-        .recent-novel-item {
-            background-color: var(--card-bg);
-            border-radius: 8px;
-            padding: 1rem;
-            box-shadow: var(--card-shadow);
-            border-left: 4px solid #60a5fa;
-        }
-        
-        .recent-novel-item h3 {
-            margin-top: 0;
-            font-size: 1.1rem;
-        }
-        
-        .recent-novel-info {
-            font-size: 0.9rem;
-            margin-bottom: 0.5rem;
-        }
-        
-        .recent-novel-timestamp {
-            font-size: 0.8rem;
-            color: #666;
-        }
-        
-        /* 続きから読むボタン */
-        .continue-reading-button {
-            margin-top: 1rem;
-            margin-bottom: 1rem;
-        }
-        
-        .continue-reading {
-            display: inline-block;
-            background-color: #60a5fa;
-            color: white;
-            padding: 0.75rem 1.5rem;
-            border-radius: 4px;
-            font-weight: bold;
-            text-align: center;
-        }
-        
-        .continue-reading:hover {
-            background-color: #3b82f6;
-            text-decoration: none;
-        }
-        
-        /* ダークモード対応 */
-        @media (prefers-color-scheme: dark) {
-            .recent-novel-timestamp {
-                color: #aaa;
-            }
-        }
-    `;
-    document.head.appendChild(customStyle);
-}
-
-// ページ読み込み時にスタイルを追加
-window.addEventListener('DOMContentLoaded', addCustomStyles);
\ No newline at end of file